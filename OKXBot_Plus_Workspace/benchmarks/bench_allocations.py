@@ -0,0 +1,267 @@
+"""
+[Benchmark] 每轮 tick 的内存分配 (记录类型 vs 字典)
+
+两部分:
+- records   单个对象的构造开销: 原字典写法 vs core.records 中的 __slots__ 记录类
+            (持仓 / 策略信号 / 模拟成交 / 每轮结果)。报告每次构造的耗时、每个实例常驻的字节数与内存块数
+- ticks     DeepSeekTrader.run() 单轮的分配: 稳态 (AI 冷却中) 与决策轮 (重置节流，经过门禁 -> 策略 -> 执行)。
+            报告 tracemalloc 测得的单轮瞬时峰值、单轮净增的内存块数 (sys.getallocatedblocks) 与单轮耗时
+
+ticks 部分不依赖 core.records，可把本脚本复制到旧版本的工作区中运行，得到改动前的对照数据:
+    git worktree add /tmp/before <commit> && cp benchmarks/bench_allocations.py /tmp/before/OKXBot_Plus_Workspace/benchmarks/
+
+trader.run 与 bench_hot_paths 相同，在零延迟的模拟撮合交易所 + stub 策略上运行，不访问网络。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_allocations.py
+    python benchmarks/bench_allocations.py --only ticks --ticks 500 --output /tmp/alloc.json
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+SYMBOL = 'BENCH/USDT:USDT'
+TIMEFRAME = '15m'
+SECTIONS = ('records', 'ticks')
+
+
+def make_config(symbol):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['symbols'] = [{'symbol': symbol, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5}]
+    config['trading']['test_mode'] = False
+    config['trading']['timeframe'] = TIMEFRAME
+    config['trading']['active_symbols_count'] = 1
+    return config
+
+
+# ---------------- records: 单个对象 ----------------
+
+def record_cases():
+    """(名称, 原字典构造, 记录类构造)；取值与 DeepSeekTrader.run() 热路径上的实际返回一致"""
+    from core.records import PositionRecord, SignalRecord, SimTradeRecord, TickResult
+
+    def legacy_position():
+        return {'side': 'long', 'size': 3.0, 'coin_size': 0.03, 'entry_price': 65000.0,
+                'unrealized_pnl': 12.5, 'leverage': 5.0, 'symbol': SYMBOL}
+
+    def legacy_signal():
+        return {'signal': 'BUY', 'confidence': 'HIGH', 'reason': 'stub', 'summary': 'stub', 'amount': 0.01,
+                'entry_price': 65000.0, 'stop_loss': 64000.0, 'take_profit': 67000.0, 'position_ratio': 1.0}
+
+    def legacy_sim_trade():
+        return {'symbol': SYMBOL, 'side': 'buy', 'price': 65000.0, 'amount': 0.01, 'cost': 650.0,
+                'fee': {'cost': 0.325, 'currency': 'USDT'}, 'timestamp': 1735689600000,
+                'datetime': '2025-01-01T00:00:00.000Z', 'info': {'pnl': 0.0}}
+
+    def legacy_tick():
+        return {'symbol': SYMBOL, 'has_position': True, 'price': 65000.0, 'change': 1.25, 'signal': 'HOLD',
+                'confidence': 'LOW', 'reason': 'AI冷却中', 'summary': '监控中', 'status': 'UNKNOWN',
+                'status_msg': 'Monitoring', 'volatility': 'NORMAL', 'persona': 'Monitor', 'adx': 22.0,
+                'rsi': 55.0, 'atr_ratio': 1.1, 'vol_ratio': 0.9, 'pattern': '-', 'recommended_sleep': 1.0}
+
+    return [
+        ('position', legacy_position,
+         lambda: PositionRecord('long', 3.0, coin_size=0.03, entry_price=65000.0, unrealized_pnl=12.5,
+                                leverage=5.0, symbol=SYMBOL)),
+        ('signal', legacy_signal,
+         lambda: SignalRecord(signal='BUY', confidence='HIGH', reason='stub', summary='stub', amount=0.01,
+                              entry_price=65000.0, stop_loss=64000.0, take_profit=67000.0, position_ratio=1.0)),
+        # 原写法每笔模拟成交都要格式化 datetime；记录类只在 to_dict / 访问时派生
+        ('sim_trade', legacy_sim_trade,
+         lambda: SimTradeRecord(SYMBOL, 'buy', 65000.0, 0.01, fee_cost=0.325, timestamp=1735689600000)),
+        ('tick_result', legacy_tick,
+         lambda: TickResult(SYMBOL, price=65000.0, change=1.25, reason='AI冷却中', summary='监控中',
+                            status='UNKNOWN', status_msg='Monitoring', volatility='NORMAL', persona='Monitor',
+                            adx=22.0, rsi=55.0, atr_ratio=1.1, vol_ratio=0.9, has_position=True,
+                            recommended_sleep=1.0)),
+    ]
+
+
+def construct_ns(fn, number, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter_ns() - t0) / number)
+    return round(statistics.median(samples), 1)
+
+
+def retained(fn, count):
+    """保留 count 个实例时每个实例占用的字节数与内存块数 (不含列表本身)"""
+    holder = [None] * count
+    gc.collect()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    size_before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        holder[i] = fn()
+    size_after = tracemalloc.get_traced_memory()[0]
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+    del holder
+    return round((size_after - size_before) / count, 1), round((blocks_after - blocks_before) / count, 2)
+
+
+def bench_records(args):
+    try:
+        cases = record_cases()
+    except ImportError:
+        print("⚠️ 当前版本没有 core.records，跳过 records 部分")
+        return {}
+    results = {}
+    print(f"{'RECORD':<12} | {'dict ns':>8} | {'slots ns':>8} | {'dict B':>7} | {'slots B':>7} | "
+          f"{'dict blk':>8} | {'slots blk':>9}")
+    for name, legacy, record in cases:
+        row = {}
+        for label, fn in (('dict', legacy), ('record', record)):
+            size, blocks = retained(fn, args.count)
+            row[label] = {'ns': construct_ns(fn, args.count, args.repeat), 'bytes': size, 'blocks': blocks}
+        results[name] = row
+        d, r = row['dict'], row['record']
+        print(f"{name:<12} | {d['ns']:>8.1f} | {r['ns']:>8.1f} | {d['bytes']:>7.1f} | {r['bytes']:>7.1f} | "
+              f"{d['blocks']:>8.2f} | {r['blocks']:>9.2f}")
+    return results
+
+
+# ---------------- ticks: DeepSeekTrader.run() ----------------
+
+def build_trader(loop, seed):
+    from core.utils import rate_limiter
+    from backtest.agents import build_agent
+    from services.execution.sim_exchange import build_sim_exchange
+    from services.execution.trade_executor import DeepSeekTrader
+
+    rate_limiter.capacity = rate_limiter.tokens = float('inf')
+    config = make_config(SYMBOL)
+    sim = build_sim_exchange({'latency_ms': 0, 'latency_jitter_ms': 0, 'seed': seed}, config['trading'], [SYMBOL])
+    trader = DeepSeekTrader(config['symbols'][0], config['trading'], sim, build_agent('stub'))
+    loop.run_until_complete(trader.initialize())
+    loop.run_until_complete(trader.run())
+    return trader
+
+
+def tick_fn(trader, mode):
+    if mode == 'monitor':
+        return trader.run
+
+    async def decide():
+        # 与 bench_hot_paths 的 trader.run.decision 相同: 每次都当作新收盘的 K 线
+        trader.analyze_on_bar_close = False
+        trader.last_ai_check_time = 0
+        trader.last_ai_analysis_time = 0
+        trader._last_analyzed_bar_ts = None
+        return await trader.run()
+    return decide
+
+
+def bench_ticks(args, loop):
+    trader = build_trader(loop, args.seed)
+    try:
+        return measure_ticks(args, loop, trader)
+    finally:
+        loop.run_until_complete(trader.exchange.close())
+        # 等待后台写库任务 (save_klines / save_signal) 结束，否则 aiosqlite 线程会阻塞进程退出
+        pending = asyncio.all_tasks(loop)
+        if pending:
+            loop.run_until_complete(asyncio.wait(pending, timeout=10))
+
+
+def measure_ticks(args, loop, trader):
+    results = {}
+    print(f"{'TICK':<12} | {'ms/tick':>8} | {'peak KB/tick':>12} | {'net blocks/tick':>15}")
+    for mode in ('monitor', 'decision'):
+        fn = tick_fn(trader, mode)
+        for _ in range(args.warmup):
+            loop.run_until_complete(fn())
+
+        # 耗时 (不开 tracemalloc)
+        t0 = time.perf_counter()
+        for _ in range(args.ticks):
+            loop.run_until_complete(fn())
+        ms = (time.perf_counter() - t0) / args.ticks * 1000
+
+        # 净增内存块 (不开 tracemalloc，避免其自身的记账分配)
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        for _ in range(args.ticks):
+            loop.run_until_complete(fn())
+        gc.collect()
+        net_blocks = (sys.getallocatedblocks() - blocks_before) / args.ticks
+
+        # 单轮瞬时峰值
+        peaks = []
+        tracemalloc.start()
+        for _ in range(args.ticks):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            loop.run_until_complete(fn())
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        tracemalloc.stop()
+
+        results[mode] = {
+            'ticks': args.ticks,
+            'ms_per_tick': round(ms, 4),
+            'peak_kb_median': round(statistics.median(peaks) / 1024, 2),
+            'peak_kb_max': round(max(peaks) / 1024, 2),
+            'net_blocks_per_tick': round(net_blocks, 2),
+        }
+        r = results[mode]
+        print(f"{mode:<12} | {r['ms_per_tick']:>8.3f} | {r['peak_kb_median']:>12.2f} | {r['net_blocks_per_tick']:>15.2f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="每轮 tick 的内存分配基准 (记录类型 vs 字典)")
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=list(SECTIONS), help="只运行指定部分")
+    parser.add_argument('--ticks', type=int, default=300, help="ticks 部分每种状态测量的轮数")
+    parser.add_argument('--warmup', type=int, default=20, help="ticks 部分每种状态的预热轮数")
+    parser.add_argument('--count', type=int, default=100_000, help="records 部分每种对象构造的实例数")
+    parser.add_argument('--repeat', type=int, default=5, help="records 部分构造耗时的样本数 (取中位数)")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    logging.getLogger("crypto_oracle").setLevel(logging.CRITICAL)
+    logging.disable(logging.CRITICAL)
+
+    report = {'python': sys.version.split()[0]}
+    if 'records' in args.only:
+        report['records'] = bench_records(args)
+        print()
+    if 'ticks' in args.only:
+        # 数据库 / 状态文件写到临时目录，不污染工作区
+        workdir = tempfile.mkdtemp(prefix='bench_alloc_')
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            report['ticks'] = bench_ticks(args, loop)
+        finally:
+            loop.close()
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
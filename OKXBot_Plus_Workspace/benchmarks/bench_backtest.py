@@ -0,0 +1,57 @@
+"""
+[Benchmark] 回测引擎吞吐量 (bars/sec)
+
+合成 N 个币种的 15m 随机游走 K 线，用 stub 策略后端驱动完整的 DeepSeekTrader.run()
+决策链 (信号门禁 -> 策略融合 -> execute_trade -> 移动止盈 -> RiskManager.check)，
+输出吞吐量与模拟账户绩效。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_backtest.py --symbols 10 --bars 3000
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+from backtest.data_feed import synthetic_store
+from backtest.engine import BacktestEngine
+
+
+def make_config(symbols):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['symbols'] = [{'symbol': s, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5} for s in symbols]
+    # 基准测试关注吞吐量，去掉全局止损金额线，避免提前结束
+    config['trading'].setdefault('risk_control', {}).pop('max_loss_usdt', None)
+    return config
+
+
+async def main(args):
+    symbols = [f"SYN{i}/USDT:USDT" for i in range(args.symbols)]
+    store = synthetic_store(symbols, args.bars, '15m', seed=args.seed)
+    store.derive('15m', ['4h'])
+    with tempfile.TemporaryDirectory() as output_dir:
+        engine = BacktestEngine(make_config(symbols), store, agent_backend=args.agent,
+                                initial_balance=args.balance, output_dir=output_dir)
+        report = await engine.run()
+    print(report.format())
+    calls = sorted(report.api_calls.items(), key=lambda kv: -kv[1])
+    print("API 调用: " + ", ".join(f"{k}={v}" for k, v in calls))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest engine throughput benchmark")
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--bars', type=int, default=3000)
+    parser.add_argument('--agent', default='stub', choices=['stub', 'hold'])
+    parser.add_argument('--balance', type=float, default=10000.0)
+    parser.add_argument('--seed', type=int, default=42)
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,154 @@
+"""
+[Benchmark] 跨币种批量指标内核 vs 逐币种串行计算
+
+串行基准为改动前 MarketDataService._calculate_indicators 的逐币种 pandas 实现 (原样移植到本脚本的
+legacy_indicators)；max|diff| 为两者共有指标列的最大绝对误差，用于确认批量内核与原实现等价
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_batch_indicators.py
+    python benchmarks/bench_batch_indicators.py --symbols 10 50 200 --bars 200 --repeat 5
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.data.batch_indicators import calculate_batch, INDICATOR_COLUMNS
+
+
+def make_frames(n_symbols, bars, seed=42):
+    """生成随机游走 K 线 (每个币种长度略有差异，覆盖左侧补位路径)"""
+    rng = np.random.default_rng(seed)
+    frames = {}
+    end = pd.Timestamp('2026-01-01')
+    for i in range(n_symbols):
+        n = bars - int(rng.integers(0, 10))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+        open_ = np.r_[close[0], close[:-1]]
+        spread = np.abs(rng.normal(0, 0.001, n)) * close
+        frames[f"SYM{i}/USDT:USDT"] = pd.DataFrame({
+            'timestamp': pd.date_range(end=end, periods=n, freq='15min'),
+            'open': open_,
+            'high': np.maximum(open_, close) + spread,
+            'low': np.minimum(open_, close) - spread,
+            'close': close,
+            'volume': rng.uniform(100, 1000, n),
+        })
+    return frames
+
+
+def legacy_indicators(df):
+    """改动前 MarketDataService._calculate_indicators 的逐币种 pandas 实现 (串行基准与等价性参照)"""
+    df = df.copy()
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
+    df['ema50'] = df['close'].ewm(span=50, adjust=False).mean()
+    df['ema200'] = df['close'].ewm(span=200, adjust=False).mean()
+
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['rsi'] = 100 - (100 / (1 + rs))
+
+    exp1 = df['close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['close'].ewm(span=26, adjust=False).mean()
+    df['macd'] = exp1 - exp2
+    df['signal'] = df['macd'].ewm(span=9, adjust=False).mean()
+    df['hist'] = df['macd'] - df['signal']
+
+    df['ma20'] = df['close'].rolling(window=20).mean()
+    df['std'] = df['close'].rolling(window=20).std()
+    df['upper_bb'] = df['ma20'] + (df['std'] * 2)
+    df['lower_bb'] = df['ma20'] - (df['std'] * 2)
+
+    df['tr1'] = df['high'] - df['low']
+    df['tr2'] = abs(df['high'] - df['close'].shift())
+    df['tr3'] = abs(df['low'] - df['close'].shift())
+    df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
+    df['atr'] = df['tr'].rolling(window=14).mean()
+
+    df['atr_ma50'] = df['atr'].rolling(window=50).mean()
+    df['atr_ratio'] = df['atr'] / df['atr_ma50']
+
+    df['vol_ma20'] = df['volume'].rolling(window=20).mean()
+    df['vol_ratio'] = df['volume'] / df['vol_ma20']
+
+    df['obv_change'] = 0.0
+    df.loc[df['close'] > df['close'].shift(), 'obv_change'] = df['volume']
+    df.loc[df['close'] < df['close'].shift(), 'obv_change'] = -df['volume']
+    df['obv'] = df['obv_change'].cumsum()
+
+    df['is_up_candle'] = df['close'] >= df['open']
+    df['up_vol'] = df['volume'].where(df['is_up_candle'], 0)
+    vol_sum_5 = df['volume'].rolling(window=5).sum().replace(0, np.nan)
+    df['buy_vol_prop_5'] = df['up_vol'].rolling(window=5).sum() / vol_sum_5
+    df['buy_vol_prop_5'] = df['buy_vol_prop_5'].fillna(0.5)
+    return df
+
+
+def max_abs_diff(a, b):
+    """两个等长数组的最大绝对误差 (NaN 位置必须一致，否则视为无穷大)"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    if len(a) != len(b) or not np.array_equal(np.isnan(a), np.isnan(b)):
+        return float('inf')
+    return float(np.nanmax(np.abs(a - b), initial=0.0))
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def run(symbol_counts, bars, repeat):
+    shared = None
+    print(f"{'symbols':>8} | {'serial(ms)':>11} | {'batch(ms)':>10} | {'speedup':>7} | {'max|diff|':>10}")
+    print("-" * 60)
+    for n in symbol_counts:
+        frames = make_frames(n, bars)
+
+        def serial():
+            return [legacy_indicators(df) for df in frames.values()]
+
+        def batched():
+            batch = calculate_batch(frames)
+            return [batch.frame(s) for s in batch.symbols]
+
+        serial_t = best_of(serial, repeat)
+        batch_t = best_of(batched, repeat)
+
+        # 等价性校验: 批量内核的每个币种切片 vs 原逐币种 pandas 实现 (两者共有的指标列)
+        batch = calculate_batch(frames)
+        max_diff = 0.0
+        for s, df in frames.items():
+            a = batch.frame(s)
+            b = legacy_indicators(df)
+            shared = [col for col in INDICATOR_COLUMNS if col in b.columns]
+            for col in shared:
+                max_diff = max(max_diff, max_abs_diff(a[col].to_numpy(), b[col].to_numpy()))
+
+        print(f"{n:>8} | {serial_t*1000:>11.2f} | {batch_t*1000:>10.2f} | {serial_t/batch_t:>6.1f}x | {max_diff:>10.2e}")
+    if shared:
+        print(f"对比列: {', '.join(shared)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch indicator kernel benchmark")
+    parser.add_argument('--symbols', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--bars', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.symbols, args.bars, args.repeat)
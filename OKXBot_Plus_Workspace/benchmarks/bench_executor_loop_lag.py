@@ -0,0 +1,78 @@
+"""
+[Benchmark] 分析执行器模式对事件循环延迟的影响
+
+模拟一轮主循环: N 个币种并发执行 compute_indicators，同时由 HealthMonitor 的
+事件循环延迟探针采样，对比 inline / thread / process 三种模式。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_executor_loop_lag.py --symbols 20 --bars 500 --rounds 3
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.executor import analytics_executor
+from core.monitor import HealthMonitor
+from services.data.ohlcv_pipeline import compute_indicators
+
+
+def make_frame(bars, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.001, bars)) * close
+    return pd.DataFrame({
+        'timestamp': pd.date_range(end='2026-01-01', periods=bars, freq='15min'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.uniform(100, 1000, bars),
+    })
+
+
+async def run_mode(mode, frames, rounds, workers):
+    analytics_executor.configure(mode=mode, max_workers=workers)
+    monitor = HealthMonitor()
+    monitor.start_loop_lag_probe(interval=0.01)
+    # 预热进程池 (首次 fork/spawn 不计入)
+    await analytics_executor.run_frame(compute_indicators, frames[0].copy(), '15m')
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        await asyncio.gather(*[
+            analytics_executor.run_frame(compute_indicators, df.copy(), '15m') for df in frames
+        ])
+    elapsed = time.perf_counter() - t0
+
+    monitor.stop_loop_lag_probe()
+    analytics_executor.shutdown(wait=True)
+    stats = monitor.get_loop_lag_stats()
+    return elapsed, stats
+
+
+async def main(args):
+    frames = [make_frame(args.bars, i) for i in range(args.symbols)]
+    print(f"{'mode':>8} | {'wall(s)':>8} | {'lag avg(ms)':>11} | {'lag p95(ms)':>11} | {'lag max(ms)':>11}")
+    print("-" * 62)
+    for mode in args.modes:
+        elapsed, stats = await run_mode(mode, frames, args.rounds, args.workers)
+        print(f"{mode:>8} | {elapsed:>8.2f} | {stats['avg_ms']:>11.1f} | {stats['p95_ms']:>11.1f} | {stats['max_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analytics executor event-loop lag benchmark")
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--modes', nargs='+', default=['inline', 'thread', 'process'])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,432 @@
+"""
+[Benchmark] 热路径基准套件 (回归跟踪)
+
+逐项测量每轮 tick 都会经过的热路径，结果写成 JSON，两次结果可用 compare 子命令对比:
+- indicators.compute[200/500/5000]   compute_indicators (DeepSeekTrader.calculate_indicators)
+- ohlcv.normalize / ohlcv.clean       normalize_ohlcv / clean_ohlcv (DeepSeekTrader.normalize_data / clean_data)
+- storage.save_klines                 DataManager.save_klines (每次 5 根，与 MarketDataService 相同)
+- storage.get_recent_klines           DataManager.get_recent_klines(limit=200) (库中已有 5000 根)
+- pattern.check_candlestick           SignalProcessor.check_candlestick_pattern
+- prompt.build_user_prompt            DeepSeekAgent._build_user_prompt (只构造提示词，不发请求)
+- trader.run.monitor                  DeepSeekTrader.run() 稳态 (AI 冷却中，只做行情/持仓/风控)
+- trader.run.decision                 DeepSeekTrader.run() 决策轮 (重置节流，经过门禁 -> 策略 -> 执行)
+
+数据默认为随机游走 K 线 (backtest.data_feed.synthetic_store)，也可用 --source 指定录制的历史数据
+(与回测相同的 sqlite / parquet / candles 加载器)。trader.run 在零延迟的模拟撮合交易所 + stub 策略上运行，
+不访问网络。每项先自动确定循环次数 (单个样本 >= --min-time 秒)，再取 --repeat 个样本的中位数 / 最小值。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_hot_paths.py run                                # 写入 benchmarks/results/<git sha>.json
+    python benchmarks/bench_hot_paths.py run --only indicators storage --repeat 7 --output /tmp/new.json
+    python benchmarks/bench_hot_paths.py run --source "data/trade_data_*.db" --source-type sqlite
+    python benchmarks/bench_hot_paths.py compare benchmarks/results/base.json /tmp/new.json --threshold 10
+    python benchmarks/bench_hot_paths.py list
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+SYMBOL = 'BENCH/USDT:USDT'
+TIMEFRAME = '15m'
+INDICATOR_ROWS = (200, 500, 5000)
+
+CASES = []  # (名称, 构造函数)；构造函数接收 Fixtures，返回 (被测函数, 是否协程)
+
+
+def case(name):
+    def register(factory):
+        CASES.append((name, factory))
+        return factory
+    return register
+
+
+def make_config(symbol):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['symbols'] = [{'symbol': symbol, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5}]
+    config['trading']['test_mode'] = False
+    config['trading']['timeframe'] = TIMEFRAME
+    config['trading']['active_symbols_count'] = 1
+    return config
+
+
+def git_revision():
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                             text=True, timeout=5).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                               capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if not sha:
+        return None
+    return f"{sha}-dirty" if dirty else sha
+
+
+# ---------------- 测量 ----------------
+
+def measure(fn, loop=None, repeat=5, min_time=0.1):
+    """
+    timeit 风格: 循环次数按 1, 2, 5, 10, 20, 50 ... 递增直到单个样本 >= min_time，再取 repeat 个样本 (单次耗时，毫秒)
+    loop 不为空时 fn 为协程函数，样本在同一个事件循环中运行
+    """
+    if loop is not None:
+        async def many(n):
+            for _ in range(n):
+                await fn()
+
+        def run(n):
+            loop.run_until_complete(many(n))
+    else:
+        def run(n):
+            for _ in range(n):
+                fn()
+
+    number, steps = 1, (2, 2.5, 2)
+    step = 0
+    while True:
+        t0 = time.perf_counter()
+        run(number)
+        if time.perf_counter() - t0 >= min_time or number >= 1_000_000:
+            break
+        number = int(number * steps[step % 3])
+        step += 1
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run(number)
+        samples.append((time.perf_counter() - t0) / number * 1000)
+    return {
+        'number': number,
+        'repeat': repeat,
+        'median_ms': round(statistics.median(samples), 6),
+        'min_ms': round(min(samples), 6),
+        'mean_ms': round(statistics.fmean(samples), 6),
+        'stdev_ms': round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0,
+    }
+
+
+# ---------------- 数据与被测对象 ----------------
+
+class Fixtures:
+    """按需构造 (只在选中的用例需要时才初始化数据库 / 交易所 / Trader)"""
+
+    def __init__(self, args, loop, workdir):
+        self.args = args
+        self.loop = loop
+        self.workdir = workdir
+        self._frame = None
+        self._data_manager = None
+        self._trader = None
+        self._price_data = None
+
+    @property
+    def frame(self):
+        """5000 根 K 线 (timestamp/open/high/low/close/volume)"""
+        if self._frame is None:
+            from backtest.data_feed import CandleStore, synthetic_store
+            bars = max(INDICATOR_ROWS)
+            if self.args.source:
+                store = CandleStore()
+                loader = {'sqlite': store.load_sqlite, 'parquet': store.load_parquet,
+                          'candles': store.load_candles}[self.args.source_type]
+                loader(self.args.source, TIMEFRAME)
+                if not store.series:
+                    raise SystemExit(f"❌ {self.args.source} 中没有 {TIMEFRAME} K 线")
+                series = max(store.series.values(), key=len)
+            else:
+                series = synthetic_store([SYMBOL], bars, TIMEFRAME, seed=self.args.seed).get(SYMBOL, TIMEFRAME)
+            self._frame = series.to_frame().tail(bars).reset_index(drop=True)
+        return self._frame
+
+    def rows(self, n):
+        return self.frame.tail(n).reset_index(drop=True)
+
+    @property
+    def data_manager(self):
+        if self._data_manager is None:
+            from services.data.data_manager import DataManager
+            from services.data.ohlcv_pipeline import compute_indicators
+            dm = DataManager(os.path.join(self.workdir, 'data', 'bench.db'))
+            self.loop.run_until_complete(dm.initialize())
+            seeded = compute_indicators(self.frame.copy(), TIMEFRAME)
+            for start in range(0, len(seeded), 500):
+                self.loop.run_until_complete(dm.save_klines(SYMBOL, TIMEFRAME, seeded.iloc[start:start + 500]))
+            self.loop.run_until_complete(dm._flush_buffer())
+            self._data_manager = dm
+        return self._data_manager
+
+    @property
+    def trader(self):
+        """零延迟模拟撮合交易所 + stub 策略上的 DeepSeekTrader (已完成 initialize 与首轮 run)"""
+        if self._trader is None:
+            from core.utils import rate_limiter
+            from backtest.agents import build_agent
+            from services.execution.sim_exchange import build_sim_exchange
+            from services.execution.trade_executor import DeepSeekTrader
+
+            # 基准只测本地开销: 关闭全局限频 (与回测引擎相同)
+            rate_limiter.capacity = rate_limiter.tokens = float('inf')
+            config = make_config(SYMBOL)
+            sim = build_sim_exchange({'latency_ms': 0, 'latency_jitter_ms': 0, 'seed': self.args.seed},
+                                     config['trading'], [SYMBOL])
+            trader = DeepSeekTrader(config['symbols'][0], config['trading'], sim, build_agent('stub'))
+            self.loop.run_until_complete(trader.initialize())
+            self.loop.run_until_complete(trader.run())
+            self._trader = trader
+        return self._trader
+
+    @property
+    def price_data(self):
+        """真实的 get_ohlcv 结果 (提示词 / 形态识别用例的输入)"""
+        if self._price_data is None:
+            self._price_data = self.loop.run_until_complete(self.trader.get_ohlcv())
+        return self._price_data
+
+
+# ---------------- 用例 ----------------
+
+def _indicator_case(rows):
+    def factory(fx):
+        from services.data.ohlcv_pipeline import compute_indicators
+        df = fx.rows(rows)
+        return (lambda: compute_indicators(df.copy(), TIMEFRAME)), False
+    return factory
+
+
+for _rows in INDICATOR_ROWS:
+    case(f"indicators.compute[{_rows}]")(_indicator_case(_rows))
+
+
+@case("ohlcv.normalize")
+def _normalize(fx):
+    from services.data.ohlcv_pipeline import normalize_ohlcv
+    # 抽掉若干根 K 线，覆盖重采样补洞路径
+    df = fx.rows(500).drop(index=[100, 101, 250, 400]).reset_index(drop=True)
+    return (lambda: normalize_ohlcv(df.copy(), TIMEFRAME)), False
+
+
+@case("ohlcv.clean")
+def _clean(fx):
+    from services.data.ohlcv_pipeline import clean_ohlcv
+    df = fx.rows(500)
+    df.loc[300, 'high'] *= 1.5  # 一根插针
+    return (lambda: clean_ohlcv(df.copy())), False
+
+
+@case("storage.save_klines")
+def _save_klines(fx):
+    from services.data.ohlcv_pipeline import compute_indicators
+    dm = fx.data_manager
+    frame = compute_indicators(fx.frame.copy(), TIMEFRAME)
+    state = {'offset': 0}
+
+    async def save():
+        start = state['offset']
+        state['offset'] = (start + 5) % (len(frame) - 5)
+        await dm.save_klines(SYMBOL, TIMEFRAME, frame.iloc[start:start + 5].reset_index(drop=True))
+    return save, True
+
+
+@case("storage.get_recent_klines")
+def _get_recent_klines(fx):
+    dm = fx.data_manager
+    return (lambda: dm.get_recent_klines(SYMBOL, TIMEFRAME, limit=200)), True
+
+
+@case("pattern.check_candlestick")
+def _pattern(fx):
+    from services.execution.components import SignalProcessor
+    processor = SignalProcessor(logging.getLogger("crypto_oracle"))
+    price_data = fx.price_data
+    # 走完整的形态判定 (ADX < 20 时会在环境过滤处提前返回)
+    indicators = dict(price_data.get('indicators', {}), adx=30)
+    return (lambda: processor.check_candlestick_pattern(price_data, indicators)), False
+
+
+@case("prompt.build_user_prompt")
+def _prompt(fx):
+    from services.strategy.ai_strategy import DeepSeekAgent
+    agent = DeepSeekAgent(api_key='benchmark')  # 只构造客户端，不发请求
+    trader = fx.trader
+    price_data = fx.price_data
+    risk_control = trader.common_config.get('risk_control', {})
+
+    def build():
+        return agent._build_user_prompt(
+            SYMBOL, TIMEFRAME, price_data, 10000.0, "无持仓", 0.01, 0.0005, 5, risk_control, 0.0, None, 0.0001,
+            True, price_data.get('volatility_status', 'NORMAL'), 1.5, False, None)
+    return build, False
+
+
+@case("trader.run.monitor")
+def _run_monitor(fx):
+    trader = fx.trader
+    return trader.run, True
+
+
+@case("trader.run.decision")
+def _run_decision(fx):
+    trader = fx.trader
+
+    async def decide():
+        # 每次都当作新收盘的 K 线: 重置 AI 节流与 "本周期已分析" 标记
+        trader.analyze_on_bar_close = False
+        trader.last_ai_check_time = 0
+        trader.last_ai_analysis_time = 0
+        trader._last_analyzed_bar_ts = None
+        return await trader.run()
+    return decide, True
+
+
+# ---------------- 子命令 ----------------
+
+def select_cases(only):
+    if not only:
+        return CASES
+    return [(name, factory) for name, factory in CASES if any(name.startswith(p) for p in only)]
+
+
+def cmd_list(args):
+    for name, _ in CASES:
+        print(name)
+
+
+def cmd_run(args):
+    logging.basicConfig(level=logging.CRITICAL)
+    logging.getLogger("crypto_oracle").setLevel(logging.CRITICAL)
+    cases = select_cases(args.only)
+    if not cases:
+        raise SystemExit(f"❌ 没有匹配 {args.only} 的用例 (可用 list 查看)")
+    if args.source:
+        args.source = os.path.abspath(args.source)
+    label = args.label or git_revision() or datetime.now().strftime('%Y%m%d-%H%M%S')
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{label}.json"))
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Trader 的 SQLite / 状态文件写入临时目录
+        os.environ['CRYPTO_ORACLE_HOME'] = workdir
+        os.chdir(workdir)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            fx = Fixtures(args, loop, workdir)
+            print(f"{'benchmark':<28} | {'median(ms)':>11} | {'min(ms)':>10} | {'stdev':>8} | {'loops':>6}")
+            print("-" * 75)
+            for name, factory in cases:
+                try:
+                    fn, is_async = factory(fx)
+                except ImportError as e:
+                    print(f"{name:<28} | 跳过 (缺少依赖: {e.name})")
+                    continue
+                stats = measure(fn, loop if is_async else None, args.repeat, args.min_time)
+                results[name] = stats
+                print(f"{name:<28} | {stats['median_ms']:>11.4f} | {stats['min_ms']:>10.4f} | "
+                      f"{stats['stdev_ms']:>8.4f} | {stats['number']:>6}")
+            if fx._trader is not None:
+                loop.run_until_complete(fx._trader.exchange.close())
+            # 等待后台写库任务 (save_klines / save_signal) 结束，再删除临时目录
+            pending = asyncio.all_tasks(loop)
+            if pending:
+                loop.run_until_complete(asyncio.wait(pending, timeout=10))
+        finally:
+            loop.close()
+            os.chdir(cwd)
+
+    report = {
+        'meta': {
+            'label': label,
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'data': args.source or f"synthetic(seed={args.seed})",
+            'repeat': args.repeat,
+            'min_time': args.min_time,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {output}")
+
+
+def cmd_compare(args):
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"base: {base['meta'].get('label')} ({base['meta'].get('timestamp')})  "
+          f"new: {new['meta'].get('label')} ({new['meta'].get('timestamp')})  指标: {args.metric}")
+    print(f"{'benchmark':<28} | {'base(ms)':>10} | {'new(ms)':>10} | {'change':>8} |")
+    print("-" * 75)
+    regressions = []
+    names = list(base['results']) + [n for n in new['results'] if n not in base['results']]
+    for name in names:
+        old, cur = base['results'].get(name), new['results'].get(name)
+        if old is None or cur is None:
+            side = 'new' if old is None else 'base'
+            print(f"{name:<28} | {'-':>10} | {'-':>10} | {'-':>8} | 仅存在于 {side}")
+            continue
+        before, after = old[args.metric], cur[args.metric]
+        change = (after - before) / before * 100 if before else 0.0
+        verdict = ''
+        if change > args.threshold:
+            verdict = '❌ 变慢'
+            regressions.append(name)
+        elif change < -args.threshold:
+            verdict = '✅ 变快'
+        print(f"{name:<28} | {before:>10.4f} | {after:>10.4f} | {change:>+7.1f}% | {verdict}")
+    if regressions:
+        print(f"\n{len(regressions)} 项超过 {args.threshold:.0f}% 阈值: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n没有超过 {args.threshold:.0f}% 阈值的回归")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hot path benchmark suite")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help="运行基准并写入 JSON")
+    run_parser.add_argument('--only', nargs='+', help="只运行名称以这些前缀开头的用例 (如 indicators storage)")
+    run_parser.add_argument('--repeat', type=int, default=5)
+    run_parser.add_argument('--min-time', type=float, default=0.1, help="单个样本的最短时长 (秒)")
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--source', help="录制的 K 线 (glob / 路径)，默认使用随机游走数据")
+    run_parser.add_argument('--source-type', choices=('sqlite', 'parquet', 'candles'), default='sqlite')
+    run_parser.add_argument('--label', help="结果标签 (默认 git 短 sha)")
+    run_parser.add_argument('--output', help="输出路径 (默认 benchmarks/results/<label>.json)")
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = sub.add_parser('compare', help="对比两次结果，超过阈值的回归以退出码 1 结束")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help="回归阈值 (%%)")
+    compare_parser.add_argument('--metric', choices=('min_ms', 'median_ms', 'mean_ms'), default='min_ms',
+                                help="对比的统计量 (默认 min_ms，受后台负载干扰最小)")
+    compare_parser.set_defaults(func=cmd_compare)
+
+    list_parser = sub.add_parser('list', help="列出全部用例")
+    list_parser.set_defaults(func=cmd_list)
+
+    cli_args = parser.parse_args()
+    cli_args.func(cli_args)
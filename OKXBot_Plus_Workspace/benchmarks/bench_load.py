@@ -0,0 +1,349 @@
+"""
+[Benchmark] 负载测试: 单进程能带多少个交易对
+
+对每个交易对数量 N 启动一个独立子进程，运行真实的 OKXBot_Plus.main() 主循环 (启动编排、风控检查、插件、
+全部 DeepSeekTrader.run()、表格输出、健康报告都不变)，只替换两个外部依赖:
+- 交易所: N 个随机游走交易对的模拟撮合交易所，外包一层网络模型
+  * 每个请求等待 latency_ms + U(0, jitter_ms)
+  * 按接口 (方法名) 的令牌桶限频 (OKX 的 "每接口每 2 秒 X 次")，超限抛出 RateLimitExceeded (50011)
+- AI: stub 策略 (确定性规则)，可用 --ai-latency-ms 模拟 DeepSeek 响应时间
+
+每轮结束时采集: tick 耗时 (LOOP_DURATION)、本轮交易所请求数与被限频次数、全局限频器排队时间、
+进程 CPU 时间与 RSS；结束时附上 tick_profiler 的阶段耗时，用于定位瓶颈。
+父进程汇总为一张表，给出 p95 tick 超过 loop_interval 的第一个 N (扩展上限)，
+并按 RSS 对 N 线性回归估算每个 Trader 的内存。
+
+机器人只通过 ccxt 的 REST 方法访问交易所 (没有 WebSocket 订阅)，因此网络模型直接包在进程内的模拟交易所上，
+不经过本地 HTTP 服务与 ccxt 的签名/解析。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_load.py --symbols 50 100 200 500 --ticks 5 --loop-interval 10
+    python benchmarks/bench_load.py --symbols 200 --latency-ms 80 --jitter-ms 40 --rate-limit 10 --ai-latency-ms 1500
+    python benchmarks/bench_load.py --symbols 100 300 --max-concurrent 20 --output /tmp/load.json --keep-workdir
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+try:
+    from ccxt.base.errors import RateLimitExceeded
+except ImportError:
+    RateLimitExceeded = Exception
+
+
+class NetworkModel:
+    """
+    为被包装交易所的每个协程方法加上延迟与按接口限频，并计数
+    rate: 每个接口每秒允许的请求数 (令牌桶容量为 2 秒的量，对应 OKX 的 2 秒窗口)；0 表示不限频
+    """
+
+    def __init__(self, exchange, latency_ms=50, jitter_ms=30, rate=20, seed=None):
+        self._exchange = exchange
+        self._latency = latency_ms / 1000
+        self._jitter = jitter_ms / 1000
+        self._rate = rate
+        self._rng = random.Random(seed)
+        self._buckets = {}  # 方法 -> [令牌数, 上次补充时间]
+        self.requests = Counter()
+        self.rejected = Counter()
+
+    def _take_token(self, name):
+        if not self._rate:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets[name] = [self._rate * 2.0, now]
+        bucket[0] = min(self._rate * 2.0, bucket[0] + (now - bucket[1]) * self._rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not asyncio.iscoroutinefunction(attr) or name == 'close':
+            return attr
+
+        async def networked(*args, **kwargs):
+            self.requests[name] += 1
+            delay = self._latency + (self._rng.uniform(0, self._jitter) if self._jitter else 0.0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not self._take_token(name):
+                self.rejected[name] += 1
+                raise RateLimitExceeded('okx {"msg":"Too Many Requests","code":"50011"}')
+            return await attr(*args, **kwargs)
+        return networked
+
+
+def build_agent(ai_latency_ms):
+    """stub 策略 + 系统自检用的 client.chat.completions (不联网)，可选模拟 AI 响应时间"""
+    from backtest.agents import StubDeepSeekAgent
+
+    class _Completions:
+        async def create(self, **kwargs):
+            return None
+
+    class LoadTestDeepSeekAgent(StubDeepSeekAgent):
+        def __init__(self):
+            super().__init__()
+            self.client = type('LoadTestClient', (), {})()
+            self.client.chat = type('LoadTestChat', (), {'completions': _Completions()})()
+
+        async def analyze(self, *args, **kwargs):
+            if ai_latency_ms:
+                await asyncio.sleep(ai_latency_ms / 1000)
+            return await super().analyze(*args, **kwargs)
+
+    return LoadTestDeepSeekAgent()
+
+
+def make_config(symbols, args):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['symbols'] = [{'symbol': s, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5} for s in symbols]
+    trading = config['trading']
+    trading['test_mode'] = False
+    trading['loop_interval'] = args.loop_interval
+    if args.max_concurrent:
+        trading['max_concurrent_traders'] = args.max_concurrent
+    trading.setdefault('recording', {})['enabled'] = False
+    trading.setdefault('simulation', {})['enabled'] = False
+    trading['performance'].setdefault('metrics', {})['enabled'] = False
+    config['notification'] = {'enabled': False}
+    return config
+
+
+# ---------------- 子进程: 运行一次主循环 ----------------
+
+async def run_worker(args):
+    import psutil
+    import OKXBot_Plus
+    from core.metrics import LOOP_DURATION, RATE_LIMIT_WAIT
+    from core.tick_profiler import tick_profiler
+    from services.execution.sim_exchange import build_sim_exchange
+
+    process = psutil.Process()
+    rss_base = process.memory_info().rss
+    symbols = [f"LOAD{i}/USDT:USDT" for i in range(args.symbols)]
+    config = make_config(symbols, args)
+    with open('config.json', 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+    sim = build_sim_exchange({'latency_ms': 0, 'latency_jitter_ms': 0, 'seed': args.seed}, config['trading'], symbols)
+    exchange = NetworkModel(sim, args.latency_ms, args.jitter_ms, args.rate_limit, seed=args.seed)
+    agent = build_agent(args.ai_latency_ms)
+
+    loop_hist = LOOP_DURATION.labels()
+    wait_hist = RATE_LIMIT_WAIT.labels()
+    t_start = time.perf_counter()
+    bot = asyncio.ensure_future(OKXBot_Plus.main(exchange=exchange, agent=agent))
+
+    ticks = []
+    phases = {}
+    seen, last_sum, last_wait = 0, 0.0, 0.0
+    last_calls, last_rejected = 0, 0
+    last_cpu = sum(process.cpu_times()[:2])
+    last_wall = time.perf_counter()
+    startup_s = None
+
+    def keep_phases(current):
+        # 健康报告每 10 轮重置剖析窗口，保留样本最多的一份
+        summary = tick_profiler.summary()['phases']
+        return summary if summary.get('tick', {}).get('count', 0) >= current.get('tick', {}).get('count', 0) else current
+
+    while len(ticks) < args.ticks and not bot.done():
+        await asyncio.sleep(0.02)
+        count = getattr(OKXBot_Plus.main, 'loop_count', 0)
+        if count == seen:
+            phases = keep_phases(phases)
+            continue
+        seen = count
+        now, cpu = time.perf_counter(), sum(process.cpu_times()[:2])
+        calls, rejected = sum(exchange.requests.values()), sum(exchange.rejected.values())
+        duration = loop_hist.sum - last_sum
+        if startup_s is None:
+            startup_s = now - t_start - duration
+        ticks.append({
+            'duration_s': round(duration, 3),
+            'api_calls': calls - last_calls,
+            'rate_limited': rejected - last_rejected,
+            'limiter_wait_s': round(wait_hist.sum - last_wait, 3),
+            'cpu_s': round(cpu - last_cpu, 3),
+            'wall_s': round(now - last_wall, 3),
+            'rss_mb': round(process.memory_info().rss / 2**20, 1),
+        })
+        last_sum, last_wait = loop_hist.sum, wait_hist.sum
+        last_calls, last_rejected = calls, rejected
+        last_cpu, last_wall = cpu, now
+
+    phases = keep_phases(phases)
+    bot.cancel()
+    await asyncio.gather(bot, return_exceptions=True)
+    if not ticks:
+        raise SystemExit("❌ 主循环未完成任何一轮 (查看工作目录中的 stdout.log)")
+
+    return {
+        'symbols': args.symbols,
+        'loop_interval': args.loop_interval,
+        'startup_s': round(startup_s, 2),
+        'rss_base_mb': round(rss_base / 2**20, 1),
+        'ticks': ticks,
+        'phases': phases,
+        'requests': dict(exchange.requests.most_common()),
+        'rejected': dict(exchange.rejected.most_common()),
+    }
+
+
+# ---------------- 父进程: 扫描 N 并汇总 ----------------
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(q * (len(values) - 1)))))]
+
+
+def summarize(result):
+    # 第一轮包含冷启动 (K 线回补、缓存预热)，稳态统计从第二轮开始
+    steady = result['ticks'][1:] or result['ticks']
+    durations = [t['duration_s'] for t in steady]
+    cpu = sum(t['cpu_s'] for t in steady)
+    wall = sum(t['wall_s'] for t in steady)
+    rss = result['ticks'][-1]['rss_mb']
+    # 瓶颈: 主循环中 p95 最高的阶段，以及交易对内部 p95 最高的阶段 (通常前者是 tick.traders)
+    bottleneck = []
+    for prefix in ('tick.', 'run.'):
+        stages = [(k, v['p95_ms']) for k, v in result['phases'].items() if k.startswith(prefix)]
+        if stages:
+            name, p95 = max(stages, key=lambda kv: kv[1])
+            bottleneck.append(f"{name} {p95:.0f}ms")
+    return {
+        'symbols': result['symbols'],
+        'startup_s': result['startup_s'],
+        'first_tick_s': result['ticks'][0]['duration_s'],
+        'tick_p50_s': round(percentile(durations, 0.5), 3),
+        'tick_p95_s': round(percentile(durations, 0.95), 3),
+        'api_per_tick': round(sum(t['api_calls'] for t in steady) / len(steady), 1),
+        'rate_limited_per_tick': round(sum(t['rate_limited'] for t in steady) / len(steady), 1),
+        'limiter_wait_s': round(sum(t['limiter_wait_s'] for t in steady) / len(steady), 2),
+        'cpu_percent': round(cpu / wall * 100, 1) if wall else 0.0,
+        'cpu_ms_per_tick': round(cpu / len(steady) * 1000, 1),
+        'rss_mb': rss,
+        'rss_per_trader_kb': round((rss - result['rss_base_mb']) * 1024 / max(result['symbols'], 1), 1),
+        'bottleneck': ' > '.join(bottleneck) or '-',
+        'over_budget': percentile(durations, 0.95) > result['loop_interval'],
+    }
+
+
+def linear_slope(xs, ys):
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    var = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var if var else 0.0
+
+
+def run_one(n, args):
+    workdir = tempfile.mkdtemp(prefix=f"load_{n}_")
+    result_path = os.path.join(workdir, 'result.json')
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', '--symbols', str(n),
+           '--ticks', str(args.ticks), '--loop-interval', str(args.loop_interval),
+           '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+           '--rate-limit', str(args.rate_limit), '--ai-latency-ms', str(args.ai_latency_ms),
+           '--max-concurrent', str(args.max_concurrent), '--seed', str(args.seed), '--result', result_path]
+    env = dict(os.environ, CRYPTO_ORACLE_HOME=workdir, PYTHONUNBUFFERED='1')
+    env.pop('NOTIFICATION_WEBHOOK', None)
+    with open(os.path.join(workdir, 'stdout.log'), 'w', encoding='utf-8') as out:
+        proc = subprocess.run(cmd, cwd=workdir, env=env, stdout=out, stderr=subprocess.STDOUT)
+    if proc.returncode != 0 or not os.path.exists(result_path):
+        print(f"❌ N={n} 运行失败 (退出码 {proc.returncode})，日志: {os.path.join(workdir, 'stdout.log')}")
+        return None, workdir
+    with open(result_path, 'r', encoding='utf-8') as f:
+        return json.load(f), workdir
+
+
+def main(args):
+    print(f"loop_interval={args.loop_interval}s | 延迟 {args.latency_ms}±{args.jitter_ms}ms | "
+          f"限频 {args.rate_limit or '不限'}/s/接口 | AI {args.ai_latency_ms}ms | "
+          f"并发 {args.max_concurrent or '配置值'} | 每组 {args.ticks} 轮")
+    print(f"{'symbols':>7} | {'startup':>7} | {'tick p50':>8} | {'tick p95':>8} | {'api/tick':>8} | {'429/tick':>8} | "
+          f"{'lim wait':>8} | {'cpu%':>6} | {'rss MB':>7} | {'KB/trader':>9} | bottleneck")
+    print("-" * 125)
+    rows, raw = [], []
+    for n in args.symbols:
+        result, workdir = run_one(n, args)
+        if result is None:
+            continue
+        row = summarize(result)
+        rows.append(row)
+        raw.append(result)
+        flag = ' ⚠️ 超过 loop_interval' if row['over_budget'] else ''
+        print(f"{n:>7} | {row['startup_s']:>6.1f}s | {row['tick_p50_s']:>7.2f}s | {row['tick_p95_s']:>7.2f}s | "
+              f"{row['api_per_tick']:>8.1f} | {row['rate_limited_per_tick']:>8.1f} | {row['limiter_wait_s']:>7.2f}s | "
+              f"{row['cpu_percent']:>6.1f} | {row['rss_mb']:>7.1f} | {row['rss_per_trader_kb']:>9.1f} | "
+              f"{row['bottleneck']}{flag}")
+        if not args.keep_workdir:
+            import shutil
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            print(f"{'':>7}   工作目录: {workdir}")
+
+    if not rows:
+        return
+    print()
+    ceiling = next((r['symbols'] for r in rows if r['over_budget']), None)
+    if ceiling is None:
+        print(f"✅ 测试范围内 p95 tick 均未超过 loop_interval ({args.loop_interval}s)")
+    else:
+        fits = [r['symbols'] for r in rows if not r['over_budget'] and r['symbols'] < ceiling]
+        print(f"⚠️ 扩展上限: N={ceiling} 时 p95 tick 超过 loop_interval ({args.loop_interval}s)"
+              + (f"，最大可用规模约 N={max(fits)}" if fits else ""))
+    if len(rows) >= 2:
+        slope = linear_slope([r['symbols'] for r in rows], [r['rss_mb'] for r in rows])
+        print(f"📦 内存: 每个 Trader 约 {slope * 1024:.0f} KB (RSS 对交易对数量线性回归)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'args': {k: v for k, v in vars(args).items() if k != 'worker'},
+                       'summary': rows, 'runs': raw}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Main loop load test")
+    parser.add_argument('--symbols', type=int, nargs='+', default=[50, 100, 200, 500])
+    parser.add_argument('--ticks', type=int, default=5, help="每组运行的主循环轮数 (第一轮不计入稳态统计)")
+    parser.add_argument('--loop-interval', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--jitter-ms', type=float, default=30)
+    parser.add_argument('--rate-limit', type=float, default=20, help="每个接口每秒请求数上限 (0 为不限)")
+    parser.add_argument('--ai-latency-ms', type=float, default=0)
+    parser.add_argument('--max-concurrent', type=int, default=0,
+                        help="覆盖 trading.max_concurrent_traders (0 为使用示例配置的值)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="把汇总与每轮明细写入 JSON")
+    parser.add_argument('--keep-workdir', action='store_true', help="保留每组的工作目录 (日志 / 数据库)")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    cli_args = parser.parse_args()
+
+    if cli_args.worker:
+        logging.basicConfig(level=logging.CRITICAL)
+        cli_args.symbols = cli_args.symbols[0]
+        worker_result = asyncio.run(run_worker(cli_args))
+        with open(cli_args.result, 'w', encoding='utf-8') as f:
+            json.dump(worker_result, f, ensure_ascii=False)
+    else:
+        main(cli_args)
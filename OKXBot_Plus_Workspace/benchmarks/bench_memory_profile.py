@@ -0,0 +1,154 @@
+"""
+[Benchmark] 内存剖析采样对事件循环的阻塞
+
+在一个模拟撮合交易所上创建 N 个 DeepSeekTrader (stub 策略，先各跑几轮填满 K 线 / 缓存 / 历史)，
+按 OKXBot_Plus.main 的方式注册缓存命名空间后采样:
+- sync        MemoryProfiler.sample() 在事件循环线程中完成全部工作 (对照)
+- background  MemoryProfiler.sample_in_background(): 事件循环上只做快照，其余在工作线程中完成 (主循环使用的方式)
+采样期间由 HealthMonitor 的事件循环延迟探针测量最长阻塞。--max-block-ms 给定时，
+background 模式的最长阻塞超过该值则以退出码 1 结束 (可用于 CI)。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_memory_profile.py --symbols 50
+    python benchmarks/bench_memory_profile.py --symbols 50 --samples 3 --max-block-ms 500
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+TIMEFRAME = '15m'
+
+
+def make_config(symbols):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['symbols'] = [{'symbol': s, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5} for s in symbols]
+    config['trading']['test_mode'] = False
+    config['trading']['timeframe'] = TIMEFRAME
+    config['trading']['active_symbols_count'] = len(symbols)
+    return config
+
+
+async def build_traders(n, seed, warm_ticks):
+    from core.utils import rate_limiter
+    from backtest.agents import build_agent
+    from services.execution.sim_exchange import build_sim_exchange
+    from services.execution.trade_executor import DeepSeekTrader
+
+    rate_limiter.capacity = rate_limiter.tokens = float('inf')
+    symbols = [f"MEM{i}/USDT:USDT" for i in range(n)]
+    config = make_config(symbols)
+    sim = build_sim_exchange({'latency_ms': 0, 'latency_jitter_ms': 0, 'seed': seed}, config['trading'], symbols)
+    agent = build_agent('stub')
+    traders = [DeepSeekTrader(s, config['trading'], sim, agent) for s in config['symbols']]
+    for trader in traders:
+        await trader.initialize()
+    for _ in range(warm_ticks):
+        await asyncio.gather(*(t.run() for t in traders))
+    return sim, agent, traders
+
+
+async def measure(mode, traders, samples):
+    from core.monitor import HealthMonitor
+    from core.memory_profiler import memory_profiler
+
+    rows = []
+    for _ in range(samples):
+        monitor = HealthMonitor()
+        monitor.start_loop_lag_probe(interval=0.01)
+        await asyncio.sleep(0.05)
+        t0 = time.perf_counter()
+        if mode == 'sync':
+            report = memory_profiler.sample(traders)
+        else:
+            report = await memory_profiler.sample_in_background(traders)
+        wall = (time.perf_counter() - t0) * 1000
+        await asyncio.sleep(0.05)
+        monitor.stop_loop_lag_probe()
+        lag = monitor.get_loop_lag_stats()
+        rows.append({'wall_ms': round(wall, 1), 'capture_ms': report['capture_ms'],
+                     'loop_lag_max_ms': lag['max_ms'], 'trader_avg_kb': round(report['traders']['avg_bytes'] / 1024, 1)})
+    return rows
+
+
+async def run(args):
+    from core.cache import cache_manager
+    from core.tracing import tracer
+    from core.memory_profiler import memory_profiler
+
+    memory_profiler.configure(enabled=True, export_path=None)
+    memory_profiler.start()
+    sim, agent, traders = await build_traders(args.symbols, args.seed, args.warm_ticks)
+    memory_profiler.register_namespace('cache', lambda: cache_manager.cache, by_prefix=True)
+    memory_profiler.register_namespace('tracer.traces', lambda: tracer.traces)
+    memory_profiler.register_shared(lambda: sim)
+    memory_profiler.register_shared(lambda: agent)
+
+    results = {}
+    print(f"{'mode':<11} | {'wall(ms)':>9} | {'on-loop(ms)':>11} | {'lag max(ms)':>11} | {'trader avg(KB)':>14}")
+    print("-" * 68)
+    for mode in ('sync', 'background'):
+        rows = await measure(mode, traders, args.samples)
+        results[mode] = rows
+        for r in rows:
+            on_loop = r['wall_ms'] if mode == 'sync' else r['capture_ms']
+            print(f"{mode:<11} | {r['wall_ms']:>9.1f} | {on_loop:>11.1f} | {r['loop_lag_max_ms']:>11.1f} | "
+                  f"{r['trader_avg_kb']:>14.1f}")
+
+    memory_profiler.stop()
+    await sim.close()
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    if pending:
+        await asyncio.wait(pending, timeout=10)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内存剖析采样对事件循环的阻塞")
+    parser.add_argument('--symbols', type=int, default=50, help="Trader 数量")
+    parser.add_argument('--samples', type=int, default=3, help="每种模式的采样次数")
+    parser.add_argument('--warm-ticks', type=int, default=3, help="采样前每个 Trader 运行的轮数")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--max-block-ms', type=float, help="background 模式允许的最长事件循环阻塞 (毫秒)")
+    parser.add_argument('--output', help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    logging.getLogger("crypto_oracle").setLevel(logging.CRITICAL)
+    logging.disable(logging.CRITICAL)
+
+    # 数据库 / 状态文件写到临时目录，不污染工作区
+    workdir = tempfile.mkdtemp(prefix='bench_memprof_')
+    cwd = os.getcwd()
+    os.environ['CRYPTO_ORACLE_HOME'] = workdir
+    os.chdir(workdir)
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'symbols': args.symbols, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入: {args.output}")
+
+    if args.max_block_ms is not None:
+        worst = max(r['loop_lag_max_ms'] for r in results['background'])
+        if worst > args.max_block_ms:
+            print(f"❌ background 模式最长阻塞 {worst:.1f}ms > {args.max_block_ms:.0f}ms")
+            sys.exit(1)
+        print(f"✅ background 模式最长阻塞 {worst:.1f}ms <= {args.max_block_ms:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
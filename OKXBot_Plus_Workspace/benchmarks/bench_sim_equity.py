@@ -0,0 +1,111 @@
+"""
+[Benchmark] 测试模式总权益: 逐交易对 await 盯市 vs 列式持仓簿向量化盯市
+
+模拟 N 个交易对的模拟持仓 (现货/合约混合)，交易所每次行情请求带固定延迟:
+- sequential: 旧实现，逐个交易对 get_current_position() + fetch_ticker()
+- book: RiskManager._sim_total_equity 的做法，一次 fetch_tickers 快照 + SimPositionBook.total_equity
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_sim_equity.py --symbols 50 --latency-ms 20 --rounds 5
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.execution.components.position_manager import PositionManager
+from services.execution.components.sim_position_book import sim_position_book
+
+
+class LatencyExchange:
+    """只实现行情接口的假交易所，每次请求 sleep 固定延迟"""
+
+    def __init__(self, prices, latency):
+        self.prices = prices
+        self.latency = latency
+        self.requests = 0
+
+    async def fetch_ticker(self, symbol):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return {'last': self.prices[symbol]}
+
+    async def fetch_tickers(self, symbols):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return {s: {'last': self.prices[s]} for s in symbols}
+
+
+def build_managers(exchange, symbols, seed):
+    rng = np.random.default_rng(seed)
+    managers = []
+    for i, symbol in enumerate(symbols):
+        mode = 'cash' if i % 3 == 0 else 'margin'
+        pm = PositionManager(exchange, symbol, mode, True, logging.getLogger("crypto_oracle"))
+        position = None
+        if i % 5:
+            price = exchange.prices[symbol]
+            position = {
+                'side': 'long' if mode == 'cash' or i % 2 else 'short',
+                'size': 1.0, 'coin_size': 1.0,
+                'entry_price': price * rng.uniform(0.9, 1.1),
+                'unrealized_pnl': 0.0, 'leverage': 1.0, 'symbol': symbol, 'mode': mode,
+            }
+        pm.set_sim_state(1000.0, position, [], 0.0)
+        managers.append(pm)
+    return managers
+
+
+async def sequential_equity(managers, exchange):
+    total = 0.0
+    for pm in managers:
+        equity = pm.sim_balance
+        position = await pm.get_current_position()
+        if position:
+            if pm.trade_mode == 'cash':
+                ticker = await exchange.fetch_ticker(pm.symbol)
+                equity += float(position['size']) * ticker['last']
+            else:
+                equity += position.get('unrealized_pnl', 0.0)
+        total += equity
+    return total
+
+
+async def book_equity(managers, exchange):
+    symbols = [pm.symbol for pm in managers]
+    held = sim_position_book.open_symbols(symbols)
+    tickers = await exchange.fetch_tickers(held) if held else {}
+    return sim_position_book.total_equity({s: t['last'] for s, t in tickers.items()}, symbols)
+
+
+async def main(args):
+    symbols = [f"SYM{i}/USDT:USDT" for i in range(args.symbols)]
+    prices = dict(zip(symbols, np.random.default_rng(args.seed).uniform(1, 1000, len(symbols))))
+    exchange = LatencyExchange(prices, args.latency_ms / 1000)
+    managers = build_managers(exchange, symbols, args.seed)
+
+    print(f"{'method':>10} | {'equity':>14} | {'requests':>8} | {'avg(ms)':>8}")
+    print("-" * 50)
+    for name, func in (('sequential', sequential_equity), ('book', book_equity)):
+        exchange.requests = 0
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            equity = await func(managers, exchange)
+        elapsed = (time.perf_counter() - t0) / args.rounds * 1000
+        print(f"{name:>10} | {equity:>14.4f} | {exchange.requests // args.rounds:>8} | {elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated equity mark-to-market benchmark")
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
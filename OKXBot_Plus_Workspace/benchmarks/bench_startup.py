@@ -0,0 +1,110 @@
+"""
+[Benchmark] 启动耗时: 分批顺序初始化 vs StartupOrchestrator 并发初始化
+
+模拟撮合交易所外包一层固定延迟 (每个交易所请求 sleep latency_ms)，构造 N 个 DeepSeekTrader:
+- batched: 旧实现，每批 max_concurrent_traders 个依次 initialize()，批间 sleep(batch_sleep)，
+           每个交易对各自请求 fetch_trading_fee / set_leverage / fetch_balance
+- orchestrated: 一次 load_markets + 按品种类型获取费率 + 一次 fetch_balance，随后全部并发 initialize()
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_startup.py --symbols 50 --latency-ms 100
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+
+class LatencyExchange:
+    """为被包装交易所的每个协程方法加上固定延迟并计数"""
+
+    def __init__(self, exchange, latency):
+        self._exchange = exchange
+        self._latency = latency
+        self.requests = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def delayed(*args, **kwargs):
+            self.requests[name] += 1
+            await asyncio.sleep(self._latency)
+            return await attr(*args, **kwargs)
+        return delayed
+
+
+def make_config(symbols):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['symbols'] = [{'symbol': s, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5} for s in symbols]
+    config['trading']['test_mode'] = False
+    config['trading']['active_symbols_count'] = len(symbols)
+    return config
+
+
+async def batched(traders, args):
+    for i in range(0, len(traders), args.batch_size):
+        for trader in traders[i:i + args.batch_size]:
+            await trader.initialize()
+        if i + args.batch_size < len(traders):
+            await asyncio.sleep(args.batch_sleep)
+
+
+async def orchestrated(traders, args, exchange, trading):
+    from services.execution.startup_orchestrator import StartupOrchestrator
+    orchestrator = StartupOrchestrator(exchange, trading)
+    await orchestrator.prefetch(traders)
+    await orchestrator.initialize_traders(traders, concurrency=args.concurrency)
+    return orchestrator.report()
+
+
+async def main(args):
+    from services.execution.sim_exchange import build_sim_exchange
+    from services.execution.trade_executor import DeepSeekTrader
+
+    symbols = [f"SYM{i}/USDT:USDT" for i in range(args.symbols)]
+    config = make_config(symbols)
+    print(f"{'method':>13} | {'seconds':>8} | {'requests':>8} | detail")
+    print("-" * 70)
+    for name in ('batched', 'orchestrated'):
+        sim = build_sim_exchange({'latency_ms': 0, 'latency_jitter_ms': 0, 'seed': 0}, config['trading'], symbols)
+        exchange = LatencyExchange(sim, args.latency_ms / 1000)
+        traders = [DeepSeekTrader(s, config['trading'], exchange, None) for s in config['symbols']]
+        t0 = time.perf_counter()
+        if name == 'batched':
+            await batched(traders, args)
+            detail = ''
+        else:
+            report = await orchestrated(traders, args, exchange, config['trading'])
+            detail = ", ".join(f"{k} {v:.0f}ms" for k, v in report['phases_ms'].items())
+        elapsed = time.perf_counter() - t0
+        print(f"{name:>13} | {elapsed:>8.2f} | {sum(exchange.requests.values()):>8} | {detail}")
+        print(f"{'':>13} | {'':>8} | {'':>8} | " + ", ".join(f"{k}={v}" for k, v in sorted(exchange.requests.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trader startup benchmark")
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--batch-size', type=int, default=5, help="旧实现的 max_concurrent_traders")
+    parser.add_argument('--batch-sleep', type=float, default=2.0)
+    parser.add_argument('--concurrency', type=int, default=10)
+    cli_args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+    logging.getLogger("crypto_oracle").setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as workdir:
+        # Trader 的 SQLite / 状态日志写入临时目录
+        os.environ['CRYPTO_ORACLE_HOME'] = workdir
+        os.chdir(workdir)
+        asyncio.run(main(cli_args))
@@ -0,0 +1,57 @@
+"""
+[Benchmark] 参数扫描的多核扩展性
+
+同一批随机参数组分别用 1 / 2 / 4 / ... 个进程运行，输出耗时、加速比与并行效率。
+K 线与指标只在主进程计算一次并放入共享内存，Worker 之间无共享可写状态，理想情况下加速比 ≈ 进程数。
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_sweep_scaling.py --symbols 4 --bars 1500 --trials 16 --workers 1 2 4 8
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, 'src'))
+
+from backtest.data_feed import synthetic_store
+from backtest.sweep import DEFAULT_SPACE, random_params, run_sweep
+
+
+def main(args):
+    with open(os.path.join(ROOT_DIR, 'config.example.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    symbols = [f"SYN{i}/USDT:USDT" for i in range(args.symbols)]
+    config['symbols'] = [{'symbol': s, 'amount': 'auto', 'allocation': 'auto', 'leverage': 5} for s in symbols]
+    config['trading'].setdefault('risk_control', {}).pop('max_loss_usdt', None)
+    store = synthetic_store(symbols, args.bars, '15m')
+    store.derive('15m', ['4h'])
+    trials = random_params(DEFAULT_SPACE, args.trials, seed=1)
+
+    print(f"CPU: {os.cpu_count()} | 参数组: {len(trials)} | 币种: {args.symbols} x {args.bars} 根")
+    print(f"{'workers':>7} | {'wall(s)':>8} | {'trials/s':>8} | {'bars/s':>8} | {'speedup':>7} | {'efficiency':>10}")
+    print("-" * 64)
+    # 以第一组进程数为基准 (通常为 1)
+    base_workers, base_wall = None, None
+    for workers in args.workers:
+        results = run_sweep(config, store, trials, workers=workers, balance=10000.0, progress=False)
+        wall = results.attrs['wall_time']
+        if base_wall is None:
+            base_workers, base_wall = workers, wall
+        speedup = base_wall / wall
+        efficiency = speedup / (workers / base_workers)
+        print(f"{workers:>7} | {wall:>8.1f} | {len(trials) / wall:>8.2f} | {results.attrs['bars'] / wall:>8.0f} "
+              f"| {speedup:>7.2f} | {efficiency * 100:>9.0f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep multi-core scaling benchmark")
+    parser.add_argument('--symbols', type=int, default=4)
+    parser.add_argument('--bars', type=int, default=1500)
+    parser.add_argument('--trials', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    logging.basicConfig(level=logging.CRITICAL)
+    main(parser.parse_args())
@@ -0,0 +1,89 @@
+"""
+[Benchmark] 热启动 K 线加载: SQLite get_recent_klines vs 内存映射归档 get_recent_candles
+
+在临时目录写入 N 个交易对 × bars 根 1m K 线 (DataManager.save_klines 同时写入 SQLite 与 .candles 归档)，
+然后模拟重启/热添加交易对时的预热读取:
+- sqlite: 旧路径，每个交易对 get_recent_klines(limit) (SQL 查询 + 字典列表)
+- memmap: 新路径，每个交易对 get_recent_candles(limit) (映射视图 + 二分定位)
+- backtest: CandleStore.load_sqlite vs CandleStore.load_candles 全量加载
+
+用法 (在 OKXBot_Plus_Workspace 目录下):
+    python benchmarks/bench_warm_start.py --symbols 20 --bars 20000 --limit 200
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.data.data_manager import DataManager
+from backtest.data_feed import CandleStore
+
+
+def random_frame(bars, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-01-01', periods=bars, freq='1min'),
+        'open': close, 'high': close * 1.001, 'low': close * 0.999, 'close': close,
+        'volume': rng.uniform(1, 100, bars),
+    })
+
+
+async def main(args):
+    logging.getLogger("data_manager").setLevel(logging.ERROR)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'trade_data.db')
+        dm = DataManager(db_path)
+        await dm.initialize()
+        symbols = [f"SYM{i}/USDT:USDT" for i in range(args.symbols)]
+        for i, symbol in enumerate(symbols):
+            await dm.save_klines(symbol, '1m', random_frame(args.bars, i))
+
+        print(f"{'method':>10} | {'rows':>10} | {'total(ms)':>10} | {'per symbol(ms)':>14}")
+        print("-" * 54)
+
+        t0 = time.perf_counter()
+        rows = 0
+        for symbol in symbols:
+            rows += len(await dm.get_recent_klines(symbol, '1m', limit=args.limit))
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{'sqlite':>10} | {rows:>10} | {elapsed:>10.1f} | {elapsed / len(symbols):>14.2f}")
+
+        # 新的 DataManager 实例 = 重启后首次读取 (映射尚未建立)
+        dm_restart = DataManager(db_path)
+        t0 = time.perf_counter()
+        rows = 0
+        for symbol in symbols:
+            rows += len(dm_restart.get_recent_candles(symbol, '1m', limit=args.limit))
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{'memmap':>10} | {rows:>10} | {elapsed:>10.1f} | {elapsed / len(symbols):>14.2f}")
+
+        print()
+        print(f"{'backtest':>10} | {'bars':>10} | {'load(ms)':>10}")
+        print("-" * 38)
+        for name, load in (
+            ('sqlite', lambda: CandleStore().load_sqlite(db_path, '1m')),
+            ('memmap', lambda: CandleStore().load_candles(dm.candles.root, '1m')),
+        ):
+            t0 = time.perf_counter()
+            store = load()
+            elapsed = (time.perf_counter() - t0) * 1000
+            bars = sum(len(store.get(s, '1m')) for s in store.symbols)
+            print(f"{name:>10} | {bars:>10} | {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-start candle loading benchmark")
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--bars', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -2,23 +2,41 @@ import sys
 import os
 import time
 import asyncio
-import ccxt.async_support as ccxt
 # import emoji # [Fix] Removed unused/unsafe dependency
 from datetime import datetime
 
 # Ensure src is in python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# [New] 启动剖析: 必须在其它模块之前开启，才能统计到全部导入耗时
+from core.startup_profile import startup_profile
+if '--profile-startup' in sys.argv or os.getenv('CRYPTO_ORACLE_PROFILE_STARTUP'):
+    startup_profile.enable()
+
 # Local imports
 from core.config import Config
 from core.utils import setup_logger
 from core.monitor import health_monitor
+from core.executor import analytics_executor
 from core.plugin import plugin_manager
+from core.records import TickResult
 from services.strategy.ai_strategy import DeepSeekAgent
 from services.execution.trade_executor import DeepSeekTrader
 from services.risk.risk_manager import RiskManager
 from services.data.market_data_service import MarketDataService # [New] Import MarketDataService
 from services.data.data_manager import DataManager
+from services.data.market_cache import market_cache, patch_okx_parse_market
+from services.data.gap_index import gap_index
+from core.recorder import Recorder, RecordingExchange, RecordingDeepSeekAgent
+from core.state_store import state_store
+from core.chart_renderer import chart_renderer
+from core.tick_profiler import tick_profiler
+from core.metrics import metrics, instrument_exchange, LOOP_DURATION, TRADERS
+from core.loop_watchdog import loop_watchdog
+from core.tracing import tracer
+from core.memory_profiler import memory_profiler
+from core.cache import cache_manager
+from services.execution.startup_orchestrator import StartupOrchestrator
 
 SYSTEM_VERSION = "v3.9.8 (Strategy Factory Edition)"
 
@@ -107,8 +125,45 @@ async def run_system_check(logger, exchange, agent, config):
         logger.error(f"❌ 自检失败: {e}")
         return 0
 
-async def main():
+async def create_okx_exchange(config, proxy=''):
+    """创建并初始化 OKX 异步交易所实例"""
+    # [Optimization] ccxt.async_support 会导入全部交易所 (~0.8s)，只在真正连接 OKX 时才导入
+    import ccxt.async_support as ccxt
+    okx_config = config['exchanges']['okx']
+    exchange_params = {
+        'apiKey': okx_config['api_key'],
+        'secret': okx_config['secret'],
+        'password': okx_config['password'],
+        'options': okx_config.get('options', {'defaultType': 'swap'}),
+        'enableRateLimit': True
+    }
+    if proxy:
+        exchange_params['aiohttp_proxy'] = proxy
+
+    # [v3.9.6 Fix] 完整加载产品列表时容忍 OKX 返回的不完整产品数据 (补丁只打一次)
+    patch_okx_parse_market(ccxt.okx)
+
+    exchange = ccxt.okx(exchange_params)
+    # [New] 按接口记录 REST 请求延迟 (Prometheus 指标)
+    instrument_exchange(exchange, 'okx')
+    # [Optimization] 市场信息缓存: 只注入配置中交易对的 market 结构 (本地快照)，快照过期/缺失时才完整 load_markets
+    cache_config = config['trading'].get('performance', {}).get('market_cache', {})
+    if cache_config.get('enabled', True):
+        market_cache.configure(
+            path=cache_config.get('path', 'data/markets.json'),
+            ttl_hours=cache_config.get('ttl_hours', 24),
+            refresh_hours=cache_config.get('refresh_hours', 6)
+        )
+        await market_cache.load(exchange, [s['symbol'] for s in config['symbols']])
+    else:
+        await exchange.load_markets()
+    return exchange
+
+
+async def main(exchange=None, agent=None):
+    """exchange / agent 可由调用方注入 (例如 backtest.replay 回放录制日志)，默认按配置创建"""
     # print(BANNER) # 不再直接打印，交给 logger 统一管理
+    startup_profile.mark('imports')
     logger = setup_logger()
     logger.info("\n" + BANNER) # 确保 Banner 前有换行，防止挤在一起
     logger.info(f"🚀 启动 CryptoOracle {SYSTEM_VERSION}")
@@ -155,48 +210,141 @@ async def main():
     except Exception:
         pass
 
+    # [New] 分析执行器 (指标/数据整理/CSV 读取卸载到线程池或进程池) 与事件循环延迟探针
+    perf_config = config['trading'].get('performance', {})
+    executor_config = perf_config.get('executor', {})
+    analytics_executor.configure(
+        mode=executor_config.get('mode', 'inline'),
+        max_workers=executor_config.get('max_workers')
+    )
+    health_monitor.start_loop_lag_probe(interval=perf_config.get('loop_lag_interval', 0.5))
+    # [New] 阻塞检测: 事件循环卡住超过阈值时采样调用栈，按调用点汇总
+    watchdog_config = perf_config.get('watchdog', {})
+    loop_watchdog.configure(
+        enabled=watchdog_config.get('enabled', True),
+        threshold_ms=watchdog_config.get('threshold_ms', 100),
+        heartbeat_ms=watchdog_config.get('heartbeat_ms', 50)
+    )
+    loop_watchdog.start()
+    logger.info(f"🧮 分析执行器: {analytics_executor.mode} (workers={analytics_executor.max_workers})")
+
+    # [New] 统一状态存储 (交易对状态 / 模拟账户 / 风控基准)，追加日志 + 合并写盘
+    store_config = perf_config.get('state_store', {})
+    state_store.configure(
+        path=store_config.get('path'),
+        flush_interval_ms=store_config.get('flush_interval_ms', 500),
+        fsync=store_config.get('fsync', True),
+        compact_records=store_config.get('compact_records', 2000)
+    )
+
+    # [New] PnL 图表在独立进程中渲染 (降采样 + 合并 + 内容哈希缓存)，不占用交易进程的 GIL
+    chart_config = perf_config.get('chart', {})
+    chart_renderer.configure(
+        mode=chart_config.get('mode', 'process'),
+        dpi=chart_config.get('dpi', 120),
+        debounce_seconds=chart_config.get('debounce_seconds', 30),
+        max_points=chart_config.get('max_points', 1500)
+    )
+
+    # [New] 主循环剖析: 各阶段 / 各交易对耗时直方图，随健康报告定期输出
+    profiler_config = perf_config.get('profiler', {})
+    tick_profiler.configure(
+        enabled=profiler_config.get('enabled', True),
+        top_symbols=profiler_config.get('top_symbols', 5)
+    )
+
+    # [New] 信号到成交链路追踪 (环形缓冲区，经 /traces 导出，退出时写入 log/traces.json)
+    tracing_config = perf_config.get('tracing', {})
+    tracer.configure(
+        enabled=tracing_config.get('enabled', True),
+        capacity=tracing_config.get('capacity', 500),
+        confirm_fills=tracing_config.get('confirm_fills', False),
+        fill_poll_interval=tracing_config.get('fill_poll_interval', 1.0),
+        fill_poll_max_interval=tracing_config.get('fill_poll_max_interval', 8.0),
+        fill_poll_timeout=tracing_config.get('fill_poll_timeout', 30.0)
+    )
+    metrics.register_json_endpoint('/traces', lambda query: tracer.export(
+        symbol=query.get('symbol'),
+        orders_only=query.get('orders') == '1',
+        limit=int(query.get('limit', 0)) or None
+    ))
+
+    # [New] 内存剖析模式 (默认关闭): 在创建 Trader 之前开启 tracemalloc，按 interval_ticks 采样每个 Trader / 缓存命名空间的内存
+    memory_config = perf_config.get('memory', {})
+    memory_profiler.configure(
+        enabled=memory_config.get('enabled', False),
+        interval_ticks=memory_config.get('interval_ticks', 30),
+        frames=memory_config.get('tracemalloc_frames', 1),
+        top=memory_config.get('top', 10),
+        leak_samples=memory_config.get('leak_samples', 4),
+        leak_min_mb=memory_config.get('leak_min_mb', 5),
+        warmup_samples=memory_config.get('warmup_samples', 3),
+        export_path=memory_config.get('export_path', 'log/memory_profile.json')
+    )
+    memory_profiler.start()
+
+    # [New] Prometheus 指标端点 (本地 HTTP /metrics，默认关闭；多实例部署时每个实例配置不同端口)
+    metrics_config = perf_config.get('metrics', {})
+    if metrics_config.get('enabled', False):
+        try:
+            await metrics.start_server(
+                host=metrics_config.get('host', '127.0.0.1'),
+                port=metrics_config.get('port', 9464)
+            )
+        except OSError as e:
+            logger.warning(f"⚠️ 指标端点启动失败 (端口被占用?): {e}")
+
+    startup_profile.mark('config')
+
     # DeepSeek Client (Async)
     deepseek_config = config['models']['deepseek']
     proxy = config['trading'].get('proxy', '')
     
-    agent = DeepSeekAgent(
-        api_key=deepseek_config['api_key'],
-        base_url=deepseek_config.get('base_url', "https://api.deepseek.com/v1"),
-        proxy=proxy
-    )
+    if agent is None:
+        agent = DeepSeekAgent(
+            api_key=deepseek_config['api_key'],
+            base_url=deepseek_config.get('base_url', "https://api.deepseek.com/v1"),
+            proxy=proxy
+        )
 
     # Exchange (Async)
-    okx_config = config['exchanges']['okx']
-    exchange_params = {
-        'apiKey': okx_config['api_key'],
-        'secret': okx_config['secret'],
-        'password': okx_config['password'],
-        'options': okx_config.get('options', {'defaultType': 'swap'}),
-        'enableRateLimit': True
-    }
-    if proxy:
-        exchange_params['aiohttp_proxy'] = proxy
-
-    # [v3.9.6 Fix] Monkey Patch CCXT to prevent NoneType error in parse_market and sorting
-    # This fixes the crash during load_markets() when OKX returns incomplete instrument data
-    _original_okx_parse_market = ccxt.okx.parse_market
-    def _patched_okx_parse_market(self, market):
-        try:
-            return _original_okx_parse_market(self, market)
-        except Exception:
-            return None
-    ccxt.okx.parse_market = _patched_okx_parse_market
-
-    # Also patch parse_markets to filter out the None results, preventing sort crashes later
-    _original_okx_parse_markets = ccxt.okx.parse_markets
-    def _patched_okx_parse_markets(self, markets):
-        results = _original_okx_parse_markets(self, markets)
-        return [m for m in results if m is not None]
-    ccxt.okx.parse_markets = _patched_okx_parse_markets
-
-    exchange = ccxt.okx(exchange_params)
-    await exchange.load_markets()
+    sim_config = config['trading'].get('simulation', {})
+    sim_exchange = None
+    if exchange is not None:
+        logger.info(f"🔌 使用外部注入的交易所: {type(exchange).__name__}")
+    elif config['trading'].get('test_mode') and sim_config.get('enabled', False):
+        # [New] 模拟撮合交易所: 下单走真实交易路径 (create_order / 持仓同步 / 止损单)，由本地撮合引擎成交，无需联网
+        from services.execution.sim_exchange import build_sim_exchange
+        exchange = sim_exchange = build_sim_exchange(
+            sim_config, config['trading'], [s['symbol'] for s in config['symbols']],
+            initial_balance=config['trading'].get('risk_control', {}).get('initial_balance_usdt', 10000.0)
+        )
+        config['trading']['test_mode'] = False
+        config['trading']['paper_trading'] = True
+        logger.info(f"🧪 模拟撮合交易所: 行情源 {sim_config.get('feed', 'synthetic')} | "
+                    f"延迟 {sim_config.get('latency_ms', 50)}±{sim_config.get('latency_jitter_ms', 30)}ms | "
+                    f"价差 {sim_config.get('spread_bps', 2.0)}bps")
+    else:
+        exchange = await create_okx_exchange(config, proxy)
+
+    # [New] 录制交易所响应与 AI 决策 (供 backtest.replay 复现与性能对比)
+    recorder = None
+    recording_config = config['trading'].get('recording', {})
+    if recording_config.get('enabled', False):
+        recorder = Recorder.for_session(
+            recording_config.get('dir', 'data/recordings'), config=config.data,
+            chunk_records=recording_config.get('chunk_records', 512),
+            flush_interval=recording_config.get('flush_interval', 2.0),
+        )
+        exchange = RecordingExchange(exchange, recorder)
+        agent = RecordingDeepSeekAgent(agent, recorder)
+        plugin_manager.configure_io(recorder)
+        # 市场信息已缓存，这里经代理再取一次写入日志 (回放端据此实现 market / amount_to_precision)
+        await exchange.load_markets()
+        logger.info(f"📼 录制已开启: {recorder.path}")
     
+    startup_profile.mark('exchange')
+
     # [New] Initialize MarketDataService
     # 这里我们初始化一个新的 DataManager 实例传给 MarketDataService
     # 注意: TradeExecutor 内部也会初始化自己的 DataManager，但这没关系，只要数据库路径一样就行
@@ -205,6 +353,17 @@ async def main():
     await data_manager.initialize()
     
     market_data_service = MarketDataService(exchange, data_manager, logger)
+
+    # [New] 内存剖析: 缓存命名空间与不计入单个 Trader 的共享对象
+    memory_profiler.register_namespace('cache', lambda: cache_manager.cache, by_prefix=True)
+    memory_profiler.register_namespace('market_data.batch_frames', lambda: market_data_service.batch_frames)
+    memory_profiler.register_namespace('market_data.cache', lambda: market_data_service.cache)
+    memory_profiler.register_namespace('gap_index.gaps', lambda: gap_index.gaps)
+    memory_profiler.register_namespace('gap_index.patches', lambda: gap_index.patches)
+    memory_profiler.register_namespace('tracer.traces', lambda: tracer.traces)
+    for shared in (lambda: exchange, lambda: agent, lambda: market_data_service, lambda: data_manager,
+                   lambda: risk_manager):
+        memory_profiler.register_shared(shared)
     
     # Init Traders
     traders = []
@@ -216,29 +375,38 @@ async def main():
     max_concurrent_traders = config['trading'].get('max_concurrent_traders', 5)
     logger.info(f"⚡ 并发交易对限制: {max_concurrent_traders}")
     
-    # 分批初始化交易对
-    batch_size = min(max_concurrent_traders, len(config['symbols']))
-    for i in range(0, len(config['symbols']), batch_size):
-        batch_symbols = config['symbols'][i:i+batch_size]
-        batch_traders = []
-        
-        for symbol_conf in batch_symbols:
-            trader = DeepSeekTrader(
-                symbol_conf, 
-                config['trading'], 
-                exchange, 
-                agent,
-                market_data_service=market_data_service # [New] Inject Service
-            )
-            await trader.initialize()
-            batch_traders.append(trader)
-        
-        traders.extend(batch_traders)
-        
-        # 如果不是最后一批，暂停一下
-        if i + batch_size < len(config['symbols']):
-            logger.debug(f"⏳ 已初始化 {len(traders)}/{len(config['symbols'])} 个交易对，休息 2 秒...")
-            await asyncio.sleep(2)
+    # [Optimization] 启动编排: 批量预取市场信息/费率/账户权益，随后全部交易对并发初始化 (由全局限频器控速)
+    startup_config = perf_config.get('startup', {})
+    orchestrator = StartupOrchestrator(exchange, config['trading'], logger)
+    for symbol_conf in config['symbols']:
+        traders.append(DeepSeekTrader(
+            symbol_conf, 
+            config['trading'], 
+            exchange, 
+            agent,
+            market_data_service=market_data_service # [New] Inject Service
+        ))
+    await orchestrator.prefetch(traders)
+    traders = await orchestrator.initialize_traders(traders, concurrency=startup_config.get('concurrency', 10))
+    orchestrator.log_report()
+    startup_profile.mark('traders')
+    # 市场信息快照的后台刷新 (仅在使用了市场信息缓存时)
+    if market_cache.symbols:
+        market_cache.start_refresh(exchange)
+
+    # [New] K 线冷热分层: SQLite 只保留热窗口，更早的 K 线定期迁入 Parquet 归档 (全局库 + 每个交易对的库)
+    # [Fix] 默认关闭: 开启后会从 SQLite 中删除 (已归档的) 旧 K 线，需显式开启
+    tiering_config = perf_config.get('kline_tiering', {})
+    tiering_options = None
+    if tiering_config.get('enabled', False):
+        tiering_options = {
+            'hot_bars': tiering_config.get('hot_bars', 2000),
+            'interval': tiering_config.get('interval_hours', 6) * 3600,
+            'initial_delay': tiering_config.get('initial_delay', 300),
+            'convert_timeout': tiering_config.get('vacuum_convert_timeout', 3.0),
+        }
+        for dm in [data_manager] + [t.data_manager for t in traders]:
+            dm.start_tiering(**tiering_options)
 
     risk_manager = RiskManager(exchange, config['trading'].get('risk_control', {}), traders)
     
@@ -246,15 +414,18 @@ async def main():
     plugin_manager.load_plugins(config, exchange, agent)
     await plugin_manager.initialize_plugins()
     
+    startup_profile.mark('risk_and_plugins')
+
     # --- 启动前自检与初始化 ---
     start_equity = await run_system_check(logger, exchange, agent, config)
+    startup_profile.mark('system_check')
     
     # 发送启动通知
     if config['trading'].get('notification', {}).get('enabled', False):
         logger.info("📨 发送启动通知...")
         await risk_manager.send_notification(
             f"**版本**: {SYSTEM_VERSION}\n"
-            f"**模式**: {'🧪 测试模式' if config['trading']['test_mode'] else '🔥 实盘模式'}\n"
+            f"**模式**: {'🧪 测试模式' if config['trading']['test_mode'] else ('🧪 模拟撮合' if config['trading'].get('paper_trading') else '🔥 实盘模式')}\n"
             f"**权益**: `{start_equity:.2f} U`\n"
             f"**监控**: `{len(traders)}` 个币种",
             title="🚀 机器人启动成功"
@@ -264,6 +435,7 @@ async def main():
     logger.info("⏳ 正在预热市场数据...")
     pre_warm_tasks = [trader.get_ohlcv() for trader in traders]
     await asyncio.gather(*pre_warm_tasks, return_exceptions=True)
+    startup_profile.mark('prewarm')
     
     
 
@@ -291,8 +463,9 @@ async def main():
 
     # [User Request] 恢复启动概览表格
     await risk_manager.initialize_baseline(start_equity)
-    risk_manager.display_pnl_history()
+    await risk_manager.display_pnl_history_async()
     
+    startup_profile.mark('baseline')
     logger.info("🏁 初始化完成，进入主循环...")
     
     # --- 进入主循环 ---
@@ -315,6 +488,7 @@ async def main():
     try:
         while True:
             current_ts = time.time()
+            tick_start = time.perf_counter()
             
             # [v3.9.7 New] 全局配置同步 (增删币种热重载)
             try:
@@ -326,6 +500,10 @@ async def main():
                     # 重新加载配置
                     new_config_obj = Config('config.json')
                     new_config = new_config_obj.data
+                    if sim_exchange is not None:
+                        # 与启动时相同: 模拟撮合交易所走实盘代码路径 (否则新 Trader 会回到内存记账的测试模式)
+                        new_config['trading']['test_mode'] = False
+                        new_config['trading']['paper_trading'] = True
                     
                     # 1. 识别新增币种
                     existing_symbols = {t.symbol for t in traders}
@@ -336,7 +514,13 @@ async def main():
                     for sym, sym_conf in new_symbols_conf.items():
                         if sym not in existing_symbols:
                             logger.info(f"🆕 [SYSTEM] 发现新币种: {sym}, 正在初始化 Trader...")
+                            if sim_exchange is not None and not sim_exchange.add_symbol(sym):
+                                logger.warning(f"⚠️ [SYSTEM] 模拟行情源中没有 {sym} 的 K 线，跳过热添加 "
+                                               f"(历史回放行情源只能使用启动时已加载的交易对，请重启)")
+                                continue
                             try:
+                                if market_cache.symbols:
+                                    await market_cache.ensure(exchange, [sym])
                                 new_trader = DeepSeekTrader(
                                     sym_conf, 
                                     new_config['trading'], 
@@ -344,7 +528,12 @@ async def main():
                                     agent,
                                     market_data_service=market_data_service
                                 )
-                                await new_trader.initialize()
+                                # 复用编排器的费率缓存 (同品种类型不再重复请求)；权益可能已变化，由 Trader 自行获取
+                                if sym not in orchestrator.fees:
+                                    await orchestrator.prefetch_fees([sym])
+                                await new_trader.initialize(prefetched={'fees': orchestrator.fees})
+                                if tiering_options:
+                                    new_trader.data_manager.start_tiering(**tiering_options)
                                 traders.append(new_trader)
                                 added_count += 1
                             except Exception as e:
@@ -359,6 +548,7 @@ async def main():
                             to_remove.append(t)
                     
                     for t in to_remove:
+                        t.data_manager.stop_tiering()
                         traders.remove(t)
                     
                     if added_count > 0 or to_remove:
@@ -372,6 +562,7 @@ async def main():
                         
             except Exception as e:
                 logger.error(f"⚠️ [SYSTEM] 同步配置失败: {e}")
+            tick_profiler.record('tick.config_sync', time.perf_counter() - tick_start)
 
             # 1. 批次执行开始日志 (静默模式)
             # current_time_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -381,11 +572,24 @@ async def main():
 
             # 2. 账户监控与风控检查
             # check() 会打印当前的 PnL 状态
-            await risk_manager.check(force_log=False) # [User Request] 关闭风控日志强制打印
+            with tick_profiler.span('tick.risk_check'):
+                await risk_manager.check(force_log=False) # [User Request] 关闭风控日志强制打印
             
             # 3. 插件系统 - 每轮循环调用
-            await plugin_manager.on_tick({"timestamp": current_ts, "traders": traders})
+            with tick_profiler.span('tick.plugins'):
+                await plugin_manager.on_tick({"timestamp": current_ts, "traders": traders})
             
+            # [New] 批量指标预取: 全市场 K 线一次向量化计算，Trader 直接取用切片
+            if config['trading'].get('performance', {}).get('batch_indicators', False):
+                try:
+                    with tick_profiler.span('tick.batch_indicators'):
+                        await market_data_service.prefetch_universe(
+                            [t.symbol for t in traders],
+                            [config['trading']['timeframe'], '4h']
+                        )
+                except Exception as e:
+                    logger.warning(f"⚠️ [SYSTEM] 批量指标预取失败，回退逐币种计算: {e}")
+
             # 3. 并行执行所有 Traders 的分析与交易任务 (P1-4.4: 彻底隔离任务，消除木桶效应)
             max_concurrent_traders = config['trading'].get('max_concurrent_traders', 5)
             semaphore = asyncio.Semaphore(max_concurrent_traders)
@@ -396,13 +600,18 @@ async def main():
                         return await trader.run()
                     except Exception as e:
                         logger.error(f"❌ [{trader.symbol}] 执行异常: {e}")
-                        return {'symbol': trader.symbol, 'status': 'ERROR', 'error': str(e)}
+                        return TickResult(trader.symbol, status='ERROR', status_msg=str(e), reason=str(e), error=str(e))
 
             # 创建所有任务并同时启动 (受 Semaphore 限制并发数)
             tasks = [run_trader_isolated(t) for t in traders]
-            results = await asyncio.gather(*tasks)
+            with tick_profiler.span('tick.traders'):
+                results = await asyncio.gather(*tasks)
+            if startup_profile.enabled and startup_profile.first_tick_at is None:
+                startup_profile.mark('first_tick')
+                startup_profile.first_tick(logger)
             
             # 4. 结构化表格输出
+            render_start = time.perf_counter()
             table_lines = []
 
             # [User Request] 移除表格上方所有 "交易执行" 相关的 JSON 打印
@@ -609,6 +818,7 @@ async def main():
             for line in table_lines:
                  # 不需要再过滤了，因为 header 已经直接打印了
                  logger.info(line)
+            tick_profiler.record('tick.render', time.perf_counter() - render_start)
             
             # [Dynamic Interval]
             # 用户要求: 活跃行情的时候不要缩短分析时间，配置多少就按照多少
@@ -622,10 +832,19 @@ async def main():
             
             # 每执行10次循环记录一次健康状态报告
             if loop_count % 10 == 0:
-                health_monitor.log_health_report()
+                with tick_profiler.span('tick.health_report'):
+                    health_monitor.log_health_report()
+
+            if memory_profiler.due(loop_count):
+                # 主循环只承担快照，度量与报告在工作线程中完成
+                with tick_profiler.span('tick.memory_profile'):
+                    memory_profiler.sample_in_background(traders)
             
             # 6. Sleep
             elapsed = time.time() - current_ts
+            tick_profiler.record('tick', time.perf_counter() - tick_start)
+            LOOP_DURATION.observe(time.perf_counter() - tick_start)
+            TRADERS.set(len(traders))
             # logger.info(f"💤 本轮分析耗时 {elapsed:.4f}s")
             
             sleep_time = max(1, current_interval - elapsed)
@@ -645,7 +864,25 @@ async def main():
         logger.info("🔌 关闭插件系统...")
         await plugin_manager.shutdown_plugins()
         
+        health_monitor.stop_loop_lag_probe()
+        loop_watchdog.stop()
+        memory_profiler.stop()
+        market_cache.stop_refresh()
+        if tiering_options:
+            for dm in [data_manager] + [t.data_manager for t in traders]:
+                dm.stop_tiering()
+        analytics_executor.shutdown()
         await exchange.close()
+        if recorder:
+            recorder.close()
+        state_store.close()
+        chart_renderer.close()
+        await metrics.stop_server()
+        if tracer.enabled and tracer.traces:
+            try:
+                tracer.dump(tracing_config.get('export_path', 'log/traces.json'))
+            except Exception as e:
+                logger.warning(f"⚠️ 导出链路追踪失败: {e}")
         # agent.client closes automatically
 
 if __name__ == "__main__":
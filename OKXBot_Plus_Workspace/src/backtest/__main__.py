@@ -0,0 +1,51 @@
+"""
+[New] 回测命令行入口
+
+用法 (在 src 目录下):
+    # 使用 DataManager 落库的 15m K 线 (data/trade_data_*.db)
+    python -m backtest --sqlite "../data/trade_data_*.db" --base-tf 15m --start 2025-01-01 --end 2025-04-01
+
+    # 使用 Parquet 归档 (1m 基础周期，自动重采样出 15m / 4h)
+    python -m backtest --parquet "../data/archive/*_1m_*.parquet" --base-tf 1m
+
+    # 无历史数据时的吞吐量冒烟测试: 20 个合成币种 x 5000 根 15m
+    python -m backtest --synthetic 20 --bars 5000
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import argparse
+
+from backtest.agents import AGENT_BACKENDS
+from backtest.cli import ROOT_DIR, load_config, add_data_arguments, build_store
+from backtest.engine import BacktestEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CryptoOracle 离线回测 (驱动 DeepSeekTrader.run)")
+    add_data_arguments(parser)
+    parser.add_argument('--agent', default='stub', choices=AGENT_BACKENDS)
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'data', 'backtest'))
+    parser.add_argument('--progress', type=int, default=500, help="每 N 步打印一次进度 (0 关闭)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    config = load_config(args.config)
+    store = build_store(args, config)
+    if not store.series:
+        print("❌ 未加载到任何 K 线数据")
+        sys.exit(1)
+
+    engine = BacktestEngine(config, store, agent_backend=args.agent, initial_balance=args.balance,
+                            output_dir=args.output, warmup_bars=args.warmup)
+    report = asyncio.run(engine.run(start=args.start, end=args.end, progress_every=args.progress))
+    print(report.format())
+    print(f"结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
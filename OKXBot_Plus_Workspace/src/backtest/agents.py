@@ -0,0 +1,105 @@
+"""
+[New] 回测策略后端 (Pluggable Strategy Backends)
+
+DeepSeekTrader 的多策略融合引擎通过类名识别 AI 信号 ('DeepSeekAgent' in name)，
+因此这里的替身类名都包含 DeepSeekAgent，可直接作为 shared_agent 注入:
+- stub:   StubDeepSeekAgent，确定性规则 (MACD 趋势 + RSI)，无网络、可复现
+- hold:   HoldDeepSeekAgent，永远 HOLD，只回测形态/风控/移动止盈等非 AI 路径
+- live:   真实 DeepSeekAgent (需要 api_key，会产生真实 API 费用与延迟)
+"""
+
+import logging
+
+from core.records import SignalRecord
+from services.strategy.base import BaseStrategy
+
+
+class StubDeepSeekAgent(BaseStrategy):
+    """
+    确定性 AI 替身
+    - 多头: MACD 线 > 0 且 MACD 柱 > 0 且 RSI < rsi_overbought
+    - 空头: MACD 线 < 0 且 MACD 柱 < 0 且 RSI > rsi_oversold
+    - 持仓方向与信号相反时给出反向信号 (由 execute_trade 负责平仓/反手)
+    止损按 ATR * atr_sl 设置，输出字段与真实 DeepSeekAgent 的 JSON 一致
+    """
+
+    def __init__(self, rsi_overbought=70, rsi_oversold=30, atr_sl=2.0, position_ratio=1.0):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.rsi_overbought = rsi_overbought
+        self.rsi_oversold = rsi_oversold
+        self.atr_sl = atr_sl
+        self.position_ratio = position_ratio
+        self.calls = 0
+
+    async def analyze(self, symbol, timeframe, price_data, current_pos, balance, default_amount=0, **kwargs):
+        self.calls += 1
+        ind = price_data.get('indicators', {}) or {}
+        price = price_data.get('price')
+        rsi = ind.get('rsi')
+        hist = ind.get('macd_hist')
+        macd = ind.get('macd')
+        atr = ind.get('atr') or 0.0
+        if price is None or rsi is None or hist is None or macd is None:
+            return None
+        # MACD 线在零轴上方 <=> EMA12 > EMA26 (趋势向上)
+        trend_up = macd > 0
+        trend_down = macd < 0
+
+        signal = 'HOLD'
+        if trend_up and hist > 0 and rsi < self.rsi_overbought:
+            signal = 'BUY'
+        elif trend_down and hist < 0 and rsi > self.rsi_oversold:
+            signal = 'SELL'
+
+        if signal == 'HOLD':
+            return SignalRecord(
+                signal='HOLD', confidence='LOW', reason='Stub: 无明确趋势',
+                summary='Stub HOLD', amount=default_amount, position_ratio=self.position_ratio,
+            )
+
+        if current_pos and ((current_pos['side'] == 'long' and signal == 'BUY') or
+                            (current_pos['side'] == 'short' and signal == 'SELL')):
+            confidence = 'MEDIUM'
+        else:
+            confidence = 'HIGH' if abs(rsi - 50) > 10 else 'MEDIUM'
+
+        sl = None
+        if atr > 0:
+            sl = price - atr * self.atr_sl if signal == 'BUY' else price + atr * self.atr_sl
+        return SignalRecord(
+            signal=signal,
+            confidence=confidence,
+            reason=f"Stub: MACD {macd:+.4f} / 柱 {hist:+.4f} + RSI {rsi:.1f}",
+            summary=f"Stub {signal}",
+            amount=default_amount,
+            stop_loss=sl,
+            position_ratio=self.position_ratio,
+        )
+
+
+class HoldDeepSeekAgent(BaseStrategy):
+    """永远返回 HOLD 的 AI 替身 (用于只评估非 AI 逻辑)"""
+
+    async def analyze(self, symbol, timeframe, price_data, current_pos, balance, default_amount=0, **kwargs):
+        return SignalRecord(signal='HOLD', confidence='LOW', reason='Hold backend', summary='HOLD',
+                            amount=default_amount)
+
+
+AGENT_BACKENDS = ('stub', 'hold', 'live')
+
+
+def build_agent(backend='stub', config=None, **kwargs):
+    """按名称构造策略后端"""
+    config = config or {}
+    if backend == 'stub':
+        return StubDeepSeekAgent(**kwargs)
+    if backend == 'hold':
+        return HoldDeepSeekAgent()
+    if backend == 'live':
+        from services.strategy.ai_strategy import DeepSeekAgent
+        models = config.get('models', {}).get('deepseek', {})
+        return DeepSeekAgent(
+            api_key=models.get('api_key'),
+            base_url=models.get('base_url', "https://api.deepseek.com/v1"),
+        )
+    raise ValueError(f"未知的策略后端: {backend} (可选: {', '.join(AGENT_BACKENDS)})")
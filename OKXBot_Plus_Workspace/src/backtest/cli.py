@@ -0,0 +1,61 @@
+"""
+回测命令行公共部分: 配置加载与数据源参数 (backtest / backtest.sweep 共用)
+"""
+
+import os
+import json
+
+from backtest.data_feed import CandleStore, synthetic_store
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_config(path):
+    """优先读取指定配置，找不到时回退到 config.example.json"""
+    for candidate in (path, os.path.join(ROOT_DIR, path), os.path.join(ROOT_DIR, 'config.example.json')):
+        if candidate and os.path.exists(candidate):
+            with open(candidate, 'r', encoding='utf-8') as f:
+                return json.load(f)
+    raise FileNotFoundError(f"未找到配置文件: {path}")
+
+
+def override_symbols(config, symbols, leverage=5):
+    config['symbols'] = [{'symbol': s, 'amount': 'auto', 'allocation': 'auto', 'leverage': leverage} for s in symbols]
+
+
+def add_data_arguments(parser):
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--sqlite', help="SQLite 数据库路径或 glob (klines 表)")
+    parser.add_argument('--parquet', help="Parquet 归档路径或 glob")
+    parser.add_argument('--candles', help="内存映射 K 线归档目录 / .candles 文件或 glob (零拷贝加载)")
+    parser.add_argument('--symbols', nargs='+', help="覆盖配置中的交易对列表")
+    parser.add_argument('--synthetic', type=int, default=0, help="使用 N 个合成币种 (忽略配置中的 symbols)")
+    parser.add_argument('--bars', type=int, default=5000, help="合成数据的 K 线数量")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--base-tf', default='15m', help="数据源的基础周期")
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--balance', type=float, help="初始资金 (默认读取 risk_control.initial_balance_usdt)")
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--log-level', default='WARNING')
+
+
+def build_store(args, config):
+    if args.symbols:
+        override_symbols(config, args.symbols)
+    symbols = [s['symbol'] for s in config.get('symbols', [])]
+    if args.synthetic:
+        symbols = [f"SYN{i}/USDT:USDT" for i in range(args.synthetic)]
+        override_symbols(config, symbols)
+        store = synthetic_store(symbols, args.bars, args.base_tf, seed=args.seed)
+    else:
+        store = CandleStore()
+        if args.sqlite:
+            store.load_sqlite(args.sqlite, args.base_tf, symbols or None)
+        if args.parquet:
+            store.load_parquet(args.parquet, args.base_tf, symbols or None)
+        if args.candles:
+            store.load_candles(args.candles, args.base_tf, symbols or None)
+    main_tf = config.get('trading', {}).get('timeframe', '15m')
+    store.derive(args.base_tf, [main_tf, '4h'])
+    return store
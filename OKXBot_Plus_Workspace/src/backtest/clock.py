@@ -0,0 +1,125 @@
+"""
+[New] 回测虚拟时钟 (Virtual Clock)
+
+DeepSeekTrader / PositionManager / RiskManager 内部大量使用 time.time()、datetime.now()
+与 asyncio.sleep() 做冷却、节流与熔断判断。回测时用虚拟时钟替换这些模块中的
+time / datetime / asyncio 引用，使 AI 冷却、K 线收盘判断等逻辑按历史时间推进，
+而不是按真实墙钟时间。
+"""
+
+import time as _real_time
+import importlib
+import asyncio as _real_asyncio
+from datetime import datetime as _real_datetime
+
+# 回测期间需要替换时间引用的模块 (模块名 -> 需要替换的全局名)
+PATCH_TARGETS = {
+    'services.execution.trade_executor': ('time', 'datetime', 'asyncio'),
+    'services.execution.components.position_manager': ('time', 'datetime'),
+    'services.execution.components.order_executor': ('time', 'datetime'),
+    'services.risk.risk_manager': ('time', 'datetime'),
+    'services.strategy.ai_strategy': ('time',),
+    # retry_async 的退避等待
+    'core.utils': ('asyncio',),
+}
+
+
+class VirtualClock:
+    """单调递增的虚拟时钟 (秒级 Unix 时间戳)"""
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def time(self):
+        return self.now
+
+    def set(self, ts):
+        """跳转到指定时间 (只允许向前)"""
+        if ts > self.now:
+            self.now = float(ts)
+
+    def advance(self, seconds):
+        if seconds and seconds > 0:
+            self.now += float(seconds)
+
+
+class VirtualTimeModule:
+    """time 模块替身: time()/sleep() 走虚拟时钟，其余属性透传真实 time 模块"""
+
+    def __init__(self, clock):
+        self._clock = clock
+
+    def time(self):
+        return self._clock.time()
+
+    def sleep(self, seconds):
+        self._clock.advance(seconds)
+
+    def __getattr__(self, name):
+        return getattr(_real_time, name)
+
+
+class VirtualAsyncioModule:
+    """asyncio 模块替身: sleep() 推进虚拟时钟后立即让出事件循环 (时钟自带 sleep 时交给时钟处理)，其余透传"""
+
+    def __init__(self, clock):
+        self._clock = clock
+
+    async def sleep(self, delay, result=None):
+        if hasattr(self._clock, 'sleep'):
+            return await self._clock.sleep(delay, result)
+        self._clock.advance(delay)
+        return await _real_asyncio.sleep(0, result)
+
+    def __getattr__(self, name):
+        return getattr(_real_asyncio, name)
+
+
+def make_virtual_datetime(clock):
+    """生成 now()/today() 走虚拟时钟的 datetime 子类"""
+
+    class VirtualDatetime(_real_datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return _real_datetime.fromtimestamp(clock.time(), tz)
+
+        @classmethod
+        def today(cls):
+            return _real_datetime.fromtimestamp(clock.time())
+
+    return VirtualDatetime
+
+
+class ClockPatch:
+    """
+    上下文管理器: 进入时将 PATCH_TARGETS 中模块的时间引用替换为虚拟时钟，退出时还原
+    用法:
+        with ClockPatch(clock):
+            await trader.run()
+    """
+
+    def __init__(self, clock, targets=None):
+        self.clock = clock
+        self.targets = targets or PATCH_TARGETS
+        self._saved = []
+
+    def __enter__(self):
+        replacements = {
+            'time': VirtualTimeModule(self.clock),
+            'datetime': make_virtual_datetime(self.clock),
+            'asyncio': VirtualAsyncioModule(self.clock),
+        }
+        for module_name, names in self.targets.items():
+            # 主动导入: 目标模块可能在进入上下文之后才被首次导入 (例如引擎 setup 内的延迟导入)
+            module = importlib.import_module(module_name)
+            for name in names:
+                if hasattr(module, name):
+                    self._saved.append((module, name, getattr(module, name)))
+                    setattr(module, name, replacements[name])
+        return self.clock
+
+    def __exit__(self, exc_type, exc, tb):
+        for module, name, original in reversed(self._saved):
+            setattr(module, name, original)
+        self._saved = []
+        return False
@@ -0,0 +1,184 @@
+"""
+[New] 回测数据源 (Candle Store)
+
+从以下来源加载历史 K 线并转换为按时间排序的 NumPy 数组:
+- DataManager 写入的 SQLite `klines` 表 (data/trade_data_*.db)
+- DataManager.export_to_parquet 导出的归档 (data/archive/*.parquet)
+- DataManager 的内存映射 K 线归档 (data/candles/<库名>/<交易对>/<周期>.candles，零拷贝映射)
+- 任意 {symbol: DataFrame}
+
+只保存一个基础周期 (例如 1m)，其余周期 (15m / 4h) 在加载时一次性重采样得到；
+按时间取窗口时使用 searchsorted 二分定位，避免每个 tick 切 DataFrame。
+"""
+
+import os
+import glob
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from services.data.ohlcv_pipeline import timeframe_to_ms
+from services.data.candle_series import CandleSeries
+from services.data.candle_archive import CandleArchive
+
+
+def _timeframe_to_offset(timeframe):
+    """CCXT 周期 -> pandas resample 规则"""
+    unit = timeframe[-1]
+    n = timeframe[:-1]
+    return {'m': f"{n}min", 'h': f"{n}h", 'd': f"{n}D", 'w': f"{n}W"}[unit]
+
+
+class CandleStore:
+    """
+    多币种多周期 K 线仓库
+    series: (symbol, timeframe) -> CandleSeries
+    """
+
+    def __init__(self):
+        self.series = {}
+
+    def add_frame(self, symbol, timeframe, df):
+        if df is None or len(df) == 0:
+            return
+        self.series[(symbol, timeframe)] = CandleSeries.from_frame(df)
+
+    def get(self, symbol, timeframe):
+        return self.series.get((symbol, timeframe))
+
+    @property
+    def symbols(self):
+        return sorted({s for s, _ in self.series})
+
+    def timeframes(self, symbol):
+        return sorted({tf for s, tf in self.series if s == symbol}, key=lambda tf: timeframe_to_ms(tf) or 0)
+
+    def derive(self, base_timeframe, timeframes):
+        """由基础周期重采样出其它周期 (只在加载时执行一次)"""
+        base_ms = timeframe_to_ms(base_timeframe)
+        for symbol in self.symbols:
+            base = self.get(symbol, base_timeframe)
+            if base is None:
+                continue
+            df = base.to_frame().set_index('timestamp')
+            for tf in timeframes:
+                tf_ms = timeframe_to_ms(tf)
+                if tf == base_timeframe or (symbol, tf) in self.series or not tf_ms or tf_ms < base_ms:
+                    continue
+                agg = df.resample(_timeframe_to_offset(tf), label='left', closed='left').agg({
+                    'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'
+                }).dropna(subset=['close'])
+                self.add_frame(symbol, tf, agg.reset_index())
+
+    def clip(self, start=None, end=None):
+        """按时间裁剪 (start/end 为可被 pd.Timestamp 解析的值)"""
+        lo = pd.Timestamp(start).value // 10**6 if start is not None else None
+        hi = pd.Timestamp(end).value // 10**6 if end is not None else None
+        for key, s in list(self.series.items()):
+            # [Optimization] ts 已排序: 二分定位后切片 (视图)，内存映射归档加载的数据不会被复制
+            i = int(np.searchsorted(s.ts, lo, side='left')) if lo is not None else 0
+            j = int(np.searchsorted(s.ts, hi, side='right')) if hi is not None else len(s)
+            self.series[key] = CandleSeries(s.ts[i:j], s.open[i:j], s.high[i:j], s.low[i:j], s.close[i:j], s.volume[i:j])
+
+    # ---------------- 加载器 ----------------
+
+    def load_sqlite(self, db_paths, timeframe, symbols=None):
+        """
+        从 DataManager 的 klines 表加载
+        db_paths: 单个路径 / 路径列表 / glob 模式 (例如 data/trade_data_*.db)
+        """
+        if isinstance(db_paths, str):
+            db_paths = sorted(glob.glob(db_paths)) if any(ch in db_paths for ch in '*?[') else [db_paths]
+        for path in db_paths:
+            if not os.path.exists(path):
+                continue
+            with sqlite3.connect(path) as conn:
+                query = "SELECT symbol, timestamp, open, high, low, close, volume FROM klines WHERE timeframe = ?"
+                params = [timeframe]
+                if symbols:
+                    query += f" AND symbol IN ({','.join('?' * len(symbols))})"
+                    params.extend(symbols)
+                try:
+                    df = pd.read_sql_query(query + " ORDER BY timestamp ASC", conn, params=params)
+                except Exception:
+                    continue
+            for symbol, group in df.groupby('symbol'):
+                existing = self.get(symbol, timeframe)
+                if existing is not None:
+                    group = pd.concat([existing.to_frame(), group], ignore_index=True)
+                self.add_frame(symbol, timeframe, group)
+        return self
+
+    def load_parquet(self, pattern, timeframe=None, symbols=None):
+        """
+        加载 export_to_parquet 生成的归档
+        文件名格式: {BASE_QUOTE[:SETTLE]}_{timeframe}_{YYYYMMDD}.parquet，同一币种多份归档会自动合并去重
+        """
+        paths = sorted(glob.glob(pattern)) if any(ch in pattern for ch in '*?[') else [pattern]
+        for path in paths:
+            df = pd.read_parquet(path)
+            if df.empty:
+                continue
+            if 'symbol' in df.columns and 'timeframe' in df.columns:
+                groups = df.groupby(['symbol', 'timeframe'])
+            else:
+                # 旧归档不含 symbol 列时，从文件名解析
+                stem = os.path.basename(path).rsplit('.', 1)[0].split('_')
+                sym = stem[0] + '/' + '_'.join(stem[1:-2]) if len(stem) >= 4 else stem[0]
+                groups = [((sym, stem[-2]), df)]
+            for (symbol, tf), group in groups:
+                if timeframe and tf != timeframe:
+                    continue
+                if symbols and symbol not in symbols:
+                    continue
+                existing = self.get(symbol, tf)
+                if existing is not None:
+                    group = pd.concat([existing.to_frame(), group], ignore_index=True)
+                self.add_frame(symbol, tf, group)
+        return self
+
+    def load_candles(self, pattern, timeframe=None, symbols=None):
+        """
+        [New] 加载内存映射 K 线归档 (DataManager.candles)
+        pattern: 归档根目录 (例如 data/candles/trade_data_BTC_USDT) / 单个 .candles 文件 / glob
+        各列直接是映射内存上的视图，不经过 SQLite 与 DataFrame，也不复制数据；
+        同一币种已从其它来源加载时按 DataFrame 合并去重
+        """
+        for candle_file in CandleArchive.scan(pattern):
+            if timeframe and candle_file.timeframe != timeframe:
+                continue
+            if symbols and candle_file.symbol not in symbols:
+                continue
+            if len(candle_file) == 0:
+                continue
+            key = (candle_file.symbol, candle_file.timeframe)
+            existing = self.series.get(key)
+            if existing is not None:
+                merged = pd.concat([existing.to_frame(), candle_file.series().to_frame()], ignore_index=True)
+                self.add_frame(candle_file.symbol, candle_file.timeframe, merged)
+            else:
+                self.series[key] = candle_file.series()
+        return self
+
+
+def synthetic_store(symbols, bars, timeframe='1m', seed=42, start='2025-01-01'):
+    """
+    生成随机游走 K 线 (用于基准测试与冒烟测试，无需任何历史数据)
+    """
+    rng = np.random.default_rng(seed)
+    step_ms = timeframe_to_ms(timeframe)
+    start_ms = pd.Timestamp(start).value // 10**6
+    ts = start_ms + np.arange(bars, dtype=np.int64) * step_ms
+    store = CandleStore()
+    for i, symbol in enumerate(symbols):
+        base = 100.0 * (1 + i % 7)
+        rets = rng.normal(0, 0.002, bars) + 0.0003 * np.sin(np.arange(bars) / (200 + 17 * i))
+        close = base * np.exp(np.cumsum(rets))
+        open_ = np.concatenate(([base], close[:-1]))
+        spread = np.abs(rng.normal(0, 0.0015, bars)) * close
+        high = np.maximum(open_, close) + spread
+        low = np.minimum(open_, close) - spread
+        volume = rng.lognormal(3, 0.6, bars)
+        store.series[(symbol, timeframe)] = CandleSeries(ts, open_, high, low, close, volume)
+    return store
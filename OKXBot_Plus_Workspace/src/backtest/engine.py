@@ -0,0 +1,390 @@
+"""
+[New] 离线回测引擎 (Offline Backtest Engine)
+
+用历史 K 线驱动真实的 DeepSeekTrader.run():
+信号门禁 -> 异动唤醒 -> _analyze_market_with_strategies -> execute_trade -> 移动止盈 -> RiskManager.check
+
+组成:
+- CandleStore (data_feed): SQLite klines 表 / Parquet 归档 / 合成数据
+- BacktestExchange (exchange): ccxt 子集，撮合、持仓、资金
+- VirtualClock + ClockPatch (clock): 让冷却/节流/收盘判断按历史时间推进
+- 策略后端 (agents): stub / hold / live
+- BacktestMarketData: 指标在加载时对整段历史一次性计算 (批量指标内核，因果运算无未来函数)，
+  每个 tick 只做切片，这是吞吐量 (bars/sec) 的关键
+"""
+
+import os
+import copy
+import time
+import asyncio
+import logging
+
+import numpy as np
+import pandas as pd
+
+from core.utils import rate_limiter
+from core.tracing import tracer
+from core.state_store import StateStore
+from core.pnl_store import PnLStore
+from services.data.batch_indicators import calculate_single
+from services.data.ohlcv_pipeline import timeframe_to_ms
+from backtest.clock import VirtualClock, ClockPatch
+from backtest.exchange import BacktestExchange
+from backtest.agents import build_agent
+
+
+class NullDataManager:
+    """回测用 DataManager 替身: 不落库，避免污染实盘数据库"""
+
+    async def initialize(self):
+        return None
+
+    async def save_klines(self, symbol, timeframe, df):
+        return None
+
+    async def save_signal(self, symbol, signal_data, price):
+        return None
+
+    async def get_recent_klines(self, symbol, timeframe, limit=200):
+        return []
+
+    def get_recent_candles(self, symbol, timeframe, limit=200):
+        return None
+
+    def warm_fetch_limit(self, frame, timeframe, limit=200, min_bars=10):
+        return limit
+
+
+async def _skip_pnl_record(*args, **kwargs):
+    return None
+
+
+# DeepSeekTrader.get_ohlcv (MarketDataService 分支) 实际读取的列；
+# 切片只保留这些列，减少每个 tick 的 to_dict('records') 开销
+TRADER_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'rsi', 'macd', 'signal', 'hist', 'upper_bb', 'lower_bb', 'adx',
+    'vol_ratio', 'obv', 'buy_vol_prop_5', 'atr', 'atr_ratio', 'ema20', 'ema50',
+]
+
+
+def compute_indicator_frames(store, timeframes):
+    """对每个 (symbol, timeframe) 的整段历史计算一次指标 (因果运算，切片后无未来函数)"""
+    frames = {}
+    for symbol in store.symbols:
+        for tf in timeframes:
+            series = store.get(symbol, tf)
+            if series is None or len(series) == 0:
+                continue
+            frames[(symbol, tf)] = calculate_single(series.to_frame())[TRADER_COLUMNS]
+    return frames
+
+
+class BacktestMarketData:
+    """
+    MarketDataService 的回测实现 (接口相同: get_market_context / fetch_and_process_ohlcv)
+    加载时对每个 (symbol, timeframe) 整段历史计算一次指标，tick 时按虚拟时钟切片
+    window 默认 100: get_ohlcv 最多使用最近 100 根 (price_history)
+    """
+
+    def __init__(self, store, clock, window=100):
+        self.store = store
+        self.clock = clock
+        self.window = window
+        self.frames = {}
+
+    def precompute(self, timeframes, indicator_frames=None):
+        """indicator_frames: 预先算好的 {(symbol, tf): DataFrame} (参数扫描时由主进程计算一次后共享)"""
+        if indicator_frames is None:
+            indicator_frames = compute_indicator_frames(self.store, timeframes)
+        for (symbol, tf), frame in indicator_frames.items():
+            series = self.store.get(symbol, tf)
+            if series is not None and tf in timeframes:
+                self.frames[(symbol, tf)] = (series, frame)
+
+    async def fetch_and_process_ohlcv(self, symbol, timeframe, limit=200):
+        entry = self.frames.get((symbol, timeframe))
+        step_ms = timeframe_to_ms(timeframe)
+        if entry is None or not step_ms:
+            return None
+        series, frame = entry
+        end = series.closed_count(int(self.clock.time() * 1000), step_ms)
+        if end <= 0:
+            return None
+        # copy: _build_ohlcv_result 会写回 volatility_status 列
+        return frame.iloc[max(0, end - min(limit, self.window)):end].copy()
+
+    async def get_market_context(self, symbol, main_tf='15m'):
+        df_main = await self.fetch_and_process_ohlcv(symbol, main_tf)
+        df_trend = await self.fetch_and_process_ohlcv(symbol, '4h', limit=60)
+        trend_4h = "NEUTRAL"
+        if df_trend is not None and len(df_trend) >= 2:
+            last_row = df_trend.iloc[-2]
+            ema20, ema50 = last_row.get('ema20'), last_row.get('ema50')
+            if ema20 and ema50:
+                if ema20 > ema50: trend_4h = "UP"
+                elif ema20 < ema50: trend_4h = "DOWN"
+        return {'main_df': df_main, 'trend_4h': trend_4h, 'trend_df': df_trend}
+
+
+class BacktestReport:
+    """回测结果: 绩效 + 吞吐量"""
+
+    def __init__(self, engine, wall_time, steps, bars):
+        ex = engine.exchange
+        self.wall_time = wall_time
+        self.steps = steps
+        self.bars = bars
+        self.bars_per_sec = bars / wall_time if wall_time > 0 else 0.0
+        self.initial_equity = ex.initial_balance
+        self.final_equity = ex.equity()
+        self.total_return = (self.final_equity - self.initial_equity) / self.initial_equity if self.initial_equity else 0.0
+        self.realized_pnl = ex.realized_pnl
+        self.fees = ex.fees_paid
+        self.trades = len(ex.trades)
+        self.api_calls = dict(ex.calls)
+        self.stop_reason = engine.stop_reason
+        curve = np.asarray([eq for _, eq in engine.equity_curve], dtype=np.float64)
+        if len(curve):
+            peak = np.maximum.accumulate(curve)
+            self.max_drawdown = float(np.max((peak - curve) / np.where(peak > 0, peak, 1.0)))
+        else:
+            self.max_drawdown = 0.0
+        self.per_symbol = {}
+        for t in ex.trades:
+            stats = self.per_symbol.setdefault(t['symbol'], {'trades': 0, 'pnl': 0.0, 'fees': 0.0})
+            stats['trades'] += 1
+            stats['pnl'] += float(t['info'].get('fillPnl', 0) or 0)
+            stats['fees'] += t['fee']['cost']
+
+    def as_dict(self):
+        return {
+            'steps': self.steps,
+            'bars': self.bars,
+            'wall_time_s': round(self.wall_time, 3),
+            'bars_per_sec': round(self.bars_per_sec, 1),
+            'initial_equity': round(self.initial_equity, 2),
+            'final_equity': round(self.final_equity, 2),
+            'total_return_pct': round(self.total_return * 100, 2),
+            'max_drawdown_pct': round(self.max_drawdown * 100, 2),
+            'realized_pnl': round(self.realized_pnl, 2),
+            'fees': round(self.fees, 2),
+            'trades': self.trades,
+            'stop_reason': self.stop_reason,
+        }
+
+    def format(self):
+        d = self.as_dict()
+        lines = [
+            "=" * 60,
+            "📊 回测报告 (Backtest Report)",
+            "-" * 60,
+            f"K 线: {d['bars']} (步数 {d['steps']}) | 耗时 {d['wall_time_s']}s | 吞吐 {d['bars_per_sec']} bars/sec",
+            f"权益: {d['initial_equity']} -> {d['final_equity']} U ({d['total_return_pct']:+.2f}%) | 最大回撤 {d['max_drawdown_pct']:.2f}%",
+            f"已实现盈亏: {d['realized_pnl']} U | 手续费: {d['fees']} U | 成交笔数: {d['trades']}",
+            "-" * 60,
+        ]
+        if d['stop_reason']:
+            lines.insert(-1, f"提前结束: {d['stop_reason']}")
+        for symbol, stats in sorted(self.per_symbol.items()):
+            lines.append(f"{symbol:<20} 成交 {stats['trades']:>4} | 盈亏 {stats['pnl']:>10.2f} | 手续费 {stats['fees']:>8.2f}")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+
+class BacktestEngine:
+    """
+    回测引擎
+    config: 与 config.json 相同结构 (至少包含 trading 与 symbols)
+    store:  CandleStore (需包含主周期；4h / 1m 可由基础周期 derive 得到)
+    """
+
+    def __init__(self, config, store, agent_backend='stub', initial_balance=None, output_dir='data/backtest',
+                 warmup_bars=200, risk_check_every=1, exchange_options=None, agent_options=None,
+                 indicator_frames=None):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.config = copy.deepcopy(config)
+        self.store = store
+        self.agent_backend = agent_backend
+        self.output_dir = output_dir
+        self.warmup_bars = warmup_bars
+        self.risk_check_every = risk_check_every
+        self.exchange_options = exchange_options or {}
+        self.agent_options = agent_options or {}
+        self.indicator_frames = indicator_frames
+
+        trading = self.config.setdefault('trading', {})
+        risk_control = trading.setdefault('risk_control', {})
+        self.initial_balance = float(initial_balance or risk_control.get('initial_balance_usdt') or 10000.0)
+        risk_control['initial_balance_usdt'] = self.initial_balance
+        # 回测: 走交易所路径 (由 BacktestExchange 撮合)，关闭通知
+        trading['test_mode'] = False
+        trading['notification'] = {'enabled': False}
+        ai_interval = trading.get('strategy', {}).get('ai_interval') or trading.get('loop_interval', 60)
+        trading['actual_ai_interval'] = int(ai_interval)
+        trading['active_symbols_count'] = len(self.config.get('symbols', []))
+
+        self.timeframe = trading.get('timeframe', '15m')
+        self.clock = VirtualClock()
+        # 回测状态只保存在内存中，构造 Trader / RiskManager 时注入，不读写实盘的 state.journal
+        self.state_store = StateStore(in_memory=True)
+        self.exchange = None
+        self.market_data = None
+        self.agent = None
+        self.traders = []
+        self.risk_manager = None
+        self.equity_curve = []
+        self.stop_reason = None
+
+    def _timeline(self, end=None):
+        """主周期 K 线开盘时间的并集 (ms)"""
+        arrays = [self.store.get(s['symbol'], self.timeframe).ts
+                  for s in self.config.get('symbols', []) if self.store.get(s['symbol'], self.timeframe) is not None]
+        if not arrays:
+            return np.zeros(0, dtype=np.int64)
+        timeline = np.unique(np.concatenate(arrays))
+        if end is not None:
+            timeline = timeline[timeline <= pd.Timestamp(end).value // 10**6]
+        return timeline
+
+    def _isolate_trader(self, trader):
+        """隔离实盘状态: 状态文件/数据库/热重载全部指向回测目录，并清空构造时读入的实盘状态"""
+        tag = trader.symbol.replace('/', '_').replace(':', '_')
+        trader.data_manager = NullDataManager()
+        trader.state_file = os.path.join(self.output_dir, f"state_{tag}.json")
+        trader.sim_state_file = os.path.join(self.output_dir, f"sim_state_{tag}.json")
+        trader.config_path = os.path.join(self.output_dir, "config.json")
+        trader.daily_high_equity = 0.0
+        trader.dynamic_stop_loss = 0.0
+        trader.dynamic_take_profit = 0.0
+        trader.dynamic_sl_side = None
+        trader.trailing_max_pnl = 0.0
+        trader.position_manager.trailing_max_pnl = 0.0
+
+    async def setup(self, start_ts):
+        from services.execution.trade_executor import DeepSeekTrader
+        from services.risk.risk_manager import RiskManager
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.clock.set(start_ts)
+        self.exchange = BacktestExchange(self.store, self.clock, initial_balance=self.initial_balance,
+                                         **self.exchange_options)
+        self.market_data = BacktestMarketData(self.store, self.clock)
+        self.market_data.precompute({self.timeframe, '4h'}, self.indicator_frames)
+        self.agent = build_agent(self.agent_backend, self.config, **self.agent_options)
+
+        trading = self.config['trading']
+        # 初始化 (setup_leverage) 同样不走网络，关闭全局限频
+        saved_limiter = (rate_limiter.capacity, rate_limiter.tokens)
+        rate_limiter.capacity = rate_limiter.tokens = float('inf')
+        try:
+            for symbol_conf in self.config.get('symbols', []):
+                if self.store.get(symbol_conf['symbol'], self.timeframe) is None:
+                    self.logger.warning(f"⚠️ [Backtest] 缺少 {symbol_conf['symbol']} {self.timeframe} 数据，跳过")
+                    continue
+                trader = DeepSeekTrader(symbol_conf, trading, self.exchange, self.agent,
+                                        market_data_service=self.market_data, state_store=self.state_store)
+                self._isolate_trader(trader)
+                await trader.initialize()
+                self.traders.append(trader)
+        finally:
+            rate_limiter.capacity, rate_limiter.tokens = saved_limiter
+
+        if self.risk_check_every:
+            self.risk_manager = RiskManager(self.exchange, trading.get('risk_control', {}), self.traders,
+                                            state_store=self.state_store)
+            self.risk_manager.state_file = os.path.join(self.output_dir, "bot_state.json")
+            self.risk_manager.csv_file = os.path.join(self.output_dir, "pnl_history.csv")
+            self.risk_manager.pnl_store = PnLStore(os.path.join(self.output_dir, "pnl_history"))
+            self.risk_manager.chart_path = os.path.join(self.output_dir, "pnl_chart.png")
+            # 权益曲线由引擎写出 (equity_curve.csv)；RiskManager 每次记账都会重绘 matplotlib 图表，回测中关闭
+            self.risk_manager.record_pnl_to_csv = _skip_pnl_record
+            self.risk_manager.last_chart_display_time = float('inf')
+            self.risk_manager.smart_baseline = None
+            self.risk_manager.deposit_offset = 0.0
+            self.risk_manager.is_initialized = False
+
+    async def run(self, start=None, end=None, progress_every=0):
+        timeline = self._timeline(end)
+        step_ms = timeframe_to_ms(self.timeframe)
+        # 预热使用 start 之前的历史；start 之前不足 warmup_bars 根时顺延
+        first = self.warmup_bars
+        if start is not None:
+            first = max(first, int(np.searchsorted(timeline, pd.Timestamp(start).value // 10**6)))
+        if len(timeline) <= first:
+            raise ValueError(f"历史数据不足: {len(timeline)} 根 {self.timeframe} K 线 (预热需要 {self.warmup_bars})")
+
+        # 回测不走网络，关闭全局限频；链路追踪 (每根 K 线一条 trace + 成交轮询) 对回测没有意义，一并关闭
+        saved_limiter = (rate_limiter.capacity, rate_limiter.tokens)
+        rate_limiter.capacity = rate_limiter.tokens = float('inf')
+        saved_tracing = tracer.enabled
+        tracer.enabled = False
+
+        steps = 0
+        bars = 0
+        try:
+            with ClockPatch(self.clock):
+                first_close = (timeline[first] + step_ms) / 1000 + 1
+                await self.setup(first_close)
+                main_series = {t.symbol: self.store.get(t.symbol, self.timeframe) for t in self.traders}
+
+                wall_start = time.perf_counter()
+                for bar_open in timeline[first:]:
+                    now_ms = int(bar_open) + step_ms
+                    self.clock.set(now_ms / 1000 + 1)
+                    self.exchange.sync_orders()
+
+                    active = []
+                    for trader in self.traders:
+                        series = main_series[trader.symbol]
+                        idx = int(np.searchsorted(series.ts, bar_open))
+                        if idx < len(series) and series.ts[idx] == bar_open:
+                            # 虚拟时钟每步跳过一个周期，刷新心跳避免看门狗误报
+                            trader.last_heartbeat_time = self.clock.time()
+                            active.append(trader)
+
+                    await asyncio.gather(*(t.run() for t in active))
+                    steps += 1
+                    bars += len(active)
+
+                    if self.risk_manager and steps % self.risk_check_every == 0:
+                        try:
+                            await self.risk_manager.check(force_log=False)
+                        except SystemExit:
+                            # 全局止盈/止损触发后 RiskManager 会平掉所有仓位并 sys.exit，回测在此结束
+                            self.stop_reason = f"全局风控触发 @ {pd.to_datetime(now_ms, unit='ms')}"
+                            self.equity_curve.append((now_ms, self.exchange.equity()))
+                            self.logger.warning(f"🛑 [Backtest] {self.stop_reason}")
+                            break
+
+                    self.equity_curve.append((now_ms, self.exchange.equity()))
+                    if progress_every and steps % progress_every == 0:
+                        elapsed = time.perf_counter() - wall_start
+                        self.logger.warning(
+                            f"⏩ [Backtest] {pd.to_datetime(now_ms, unit='ms')} | {steps}/{len(timeline) - first} 步 "
+                            f"| {bars / max(elapsed, 1e-9):.0f} bars/sec | 权益 {self.exchange.equity():.2f}"
+                        )
+                wall_time = time.perf_counter() - wall_start
+                # 让 create_task 派发的后台任务 (save_state 等) 收尾
+                await asyncio.sleep(0)
+        finally:
+            rate_limiter.capacity, rate_limiter.tokens = saved_limiter
+            tracer.enabled = saved_tracing
+
+        report = BacktestReport(self, wall_time, steps, bars)
+        self._write_outputs()
+        return report
+
+    def _write_outputs(self):
+        try:
+            pd.DataFrame(self.equity_curve, columns=['timestamp', 'equity']).assign(
+                timestamp=lambda d: pd.to_datetime(d['timestamp'], unit='ms')
+            ).to_csv(os.path.join(self.output_dir, "equity_curve.csv"), index=False)
+            trades = pd.DataFrame([{k: v for k, v in t.items() if k not in ('info', 'fee')} |
+                                   {'fee': t['fee']['cost'], 'pnl': t['info'].get('fillPnl')}
+                                   for t in self.exchange.trades])
+            if not trades.empty:
+                trades['timestamp'] = pd.to_datetime(trades['timestamp'], unit='ms')
+            trades.to_csv(os.path.join(self.output_dir, "trades.csv"), index=False)
+        except Exception as e:
+            self.logger.warning(f"⚠️ [Backtest] 结果写出失败: {e}")
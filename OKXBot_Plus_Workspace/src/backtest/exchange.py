@@ -0,0 +1,29 @@
+"""
+[New] 回测用假交易所 (ccxt 子集)
+
+撮合逻辑与 test_mode 的模拟交易所共用 (services.execution.sim_exchange.SimExchange)，
+回测时的差异只在于:
+- 行情来自 CandleStore，时间来自 VirtualClock (fetch_ohlcv 只返回已收盘 K 线，杜绝未来函数)
+- 无网络延迟，盘口深度无限: 市价单按最新价 ± 固定滑点 (bps) 成交并收取 Taker 手续费
+- 挂单与触发单由回测引擎每步调用 sync_orders()，用下单之后收盘的基础周期 K 线高低点撮合
+"""
+
+from services.execution.sim_exchange import SimExchange, CandleFeed, DepthModel
+
+
+class BacktestExchange(SimExchange):
+
+    def __init__(self, store, clock, initial_balance=10000.0, taker_fee=0.0005, maker_fee=0.0002,
+                 slippage_bps=2.0, funding_rate=0.0001, contract_sizes=None, leverage=1):
+        self.store = store
+        super().__init__(
+            CandleFeed(store, clock),
+            initial_balance=initial_balance,
+            taker_fee=taker_fee,
+            maker_fee=maker_fee,
+            funding_rate=funding_rate,
+            contract_sizes=contract_sizes,
+            leverage=leverage,
+            # 最优档偏离中间价 = 半个价差 = slippage_bps
+            depth=DepthModel(spread_bps=slippage_bps * 2),
+        )
@@ -0,0 +1,312 @@
+"""
+[New] 录制日志回放 (Recording Replay)
+
+把 core.recorder 录制的 *.clog 原样喂回 OKXBot_Plus.main():
+- ReplayExchange: 按 (方法, 匹配键) 顺序返回录制时交易所的响应 (含异常)，可选按录制耗时模拟延迟
+- ReplayDeepSeekAgent: 按 (symbol, timeframe) 顺序返回录制时的 AI 决策，不调用 API
+- ReplayPluginIO: 插件经 Plugin.call_external 发起的外部请求 (如情绪插件的 Fear & Greed 指数) 按 (插件名, key)
+  顺序返回录制结果；未声明 replayable 的插件在回放时不加载，回放全程不访问网络
+- ReplayClock: 时间从录制起点开始，按 1x / Nx 倍速推进；max 模式下 sleep 直接推进虚拟时钟
+回放在独立工作目录中进行 (写入录制时的配置快照，数据库/CSV/日志都落在该目录)，不影响线上数据。
+录制结束后 (某个调用在日志中已无对应记录且时钟越过录制终点) 自动停止主循环并输出统计。
+
+用法 (在 src 目录下):
+    python -m backtest.replay ../data/recordings/session_20260101_120000.clog --speed max
+    python -m backtest.replay session.clog --speed 10 --workdir ../data/replay/incident_0101
+    python -m backtest.replay session.clog --info
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import argparse
+from collections import Counter, defaultdict, deque
+
+from core.recorder import read_log, call_key
+from backtest.clock import VirtualClock, ClockPatch, PATCH_TARGETS
+from backtest.cli import ROOT_DIR
+
+try:
+    import ccxt.base.errors as ccxt_errors
+except ImportError:
+    ccxt_errors = None
+
+# 回放时额外接管主程序的时间引用 (主循环 sleep / 耗时统计) 与插件的缓存过期判断 (外部请求次数与录制时一致)
+REPLAY_PATCH_TARGETS = dict(PATCH_TARGETS, OKXBot_Plus=('time', 'datetime', 'asyncio'),
+                            **{'plugins.sentiment_plugin': ('time',)})
+
+
+class ReplayExhausted(Exception):
+    """录制日志中已没有与该调用对应的记录"""
+
+
+class ReplayClock(VirtualClock):
+    """
+    回放时钟: 从录制起点 (墙钟) 开始
+    - speed 有限: 虚拟时间 = 起点 + 真实流逝 × speed，sleep(d) 实际等待 d / speed
+    - speed = inf (max): 纯虚拟时钟，sleep(d) 直接推进 d 秒并让出事件循环
+    """
+
+    def __init__(self, start, speed=1.0):
+        super().__init__(start)
+        self.speed = float(speed)
+        self._wall_start = time.monotonic()
+
+    @property
+    def virtual(self):
+        return math.isinf(self.speed)
+
+    def time(self):
+        if self.virtual:
+            return self.now
+        return self.now + (time.monotonic() - self._wall_start) * self.speed
+
+    async def sleep(self, delay, result=None):
+        if self.virtual:
+            self.advance(delay)
+            return await asyncio.sleep(0, result)
+        return await asyncio.sleep(max(delay or 0, 0) / self.speed, result)
+
+
+class ReplayLog:
+    """加载录制日志并按 (来源, 方法, 匹配键) 建立先进先出队列"""
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = None
+        self.records = []
+        for record in read_log(path):
+            if record.get('s') == 'meta':
+                if self.meta is None:
+                    self.meta = record
+                continue
+            self.records.append(record)
+        if self.meta is None:
+            raise ValueError(f"录制日志缺少元信息: {path}")
+        self.queues = defaultdict(deque)
+        for record in self.records:
+            self.queues[(record['s'], record['m'], record['k'])].append(record)
+        self.end_t = self.records[-1]['t'] + self.records[-1].get('d', 0) if self.records else 0.0
+        self.served = Counter()
+        self.misses = Counter()
+
+    @property
+    def start_wall(self):
+        return self.meta['wall']
+
+    def take(self, source, method, key):
+        queue = self.queues.get((source, method, key))
+        if not queue:
+            self.misses[f"{source}.{method}"] += 1
+            return None
+        self.served[f"{source}.{method}"] += 1
+        return queue.popleft()
+
+    def remaining(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def summary(self):
+        counts = Counter(f"{r['s']}.{r['m']}" for r in self.records)
+        return {
+            'path': self.path,
+            'version': self.meta.get('version'),
+            'start': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start_wall)),
+            'duration_s': round(self.end_t, 1),
+            'records': len(self.records),
+            'symbols': [s['symbol'] for s in (self.meta.get('config') or {}).get('symbols', [])],
+            'calls': dict(counts.most_common()),
+        }
+
+
+def _rebuild_error(error):
+    """按录制的异常类名还原 ccxt 异常 (找不到时使用 Exception)"""
+    name, message = error
+    cls = getattr(ccxt_errors, name, None) if ccxt_errors else None
+    if not (isinstance(cls, type) and issubclass(cls, Exception)):
+        cls = Exception
+    return cls(message)
+
+
+class _ReplaySource:
+    def __init__(self, log, clock, source, replay_latency=True):
+        self._log = log
+        self._clock = clock
+        self._source = source
+        self._replay_latency = replay_latency
+        self.exhausted = asyncio.Event()
+
+    async def _serve(self, method, args):
+        record = self._log.take(self._source, method, call_key(args))
+        if record is None:
+            if self._clock.time() - self._log.start_wall >= self._log.end_t or not self._log.remaining():
+                self.exhausted.set()
+            raise ReplayExhausted(f"回放日志中没有 {self._source}.{method}({call_key(args)}) 的记录")
+        if self._replay_latency and record.get('d'):
+            await self._clock.sleep(record['d'])
+        if 'e' in record:
+            raise _rebuild_error(record['e'])
+        return record.get('r')
+
+
+class ReplayExchange(_ReplaySource):
+    """按录制顺序返回交易所响应；market / amount_to_precision 由录制的 load_markets 结果本地计算"""
+
+    def __init__(self, log, clock, replay_latency=True):
+        super().__init__(log, clock, 'exchange', replay_latency)
+        self.markets = {}
+        self.methods = {r['m'] for r in log.records if r['s'] == 'exchange'}
+        first = next((r for r in log.records if r['s'] == 'exchange' and r['m'] == 'load_markets' and 'r' in r), None)
+        if first:
+            self.markets = first['r'] or {}
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.methods:
+            raise AttributeError(name)
+
+        async def replayed(*args, **kwargs):
+            result = await self._serve(name, args)
+            if name == 'load_markets' and result:
+                self.markets = result
+            return result
+
+        return replayed
+
+    def market(self, symbol):
+        if symbol not in self.markets:
+            raise (ccxt_errors.BadSymbol if ccxt_errors else KeyError)(f"okx does not have market symbol {symbol}")
+        return self.markets[symbol]
+
+    def amount_to_precision(self, symbol, amount):
+        step = float((self.market(symbol).get('precision') or {}).get('amount') or 1e-8)
+        value = math.floor(float(amount) / step + 1e-9) * step
+        digits = max(0, -int(math.floor(math.log10(step))))
+        return f"{value:.{digits}f}"
+
+    async def close(self):
+        return None
+
+
+class _ReplayCompletions:
+    """系统自检会 ping DeepSeek，回放时直接返回"""
+
+    async def create(self, **kwargs):
+        return None
+
+
+class _ReplayClient:
+    def __init__(self):
+        self.chat = type('ReplayChat', (), {'completions': _ReplayCompletions()})()
+
+
+class ReplayDeepSeekAgent(_ReplaySource):
+    """按 (symbol, timeframe) 顺序返回录制的 AI 决策 (类名保留 DeepSeekAgent 供融合引擎识别)"""
+
+    def __init__(self, log, clock, replay_latency=True):
+        super().__init__(log, clock, 'agent', replay_latency)
+        self.client = _ReplayClient()
+
+    async def analyze(self, symbol, timeframe, *args, **kwargs):
+        return await self._serve('analyze', (symbol, timeframe))
+
+
+class ReplayPluginIO(_ReplaySource):
+    """插件外部 I/O 的回放 (接口与 Recorder.call 相同，由 PluginManager.configure_io 注入)"""
+
+    def __init__(self, log, clock, replay_latency=True):
+        super().__init__(log, clock, 'plugin', replay_latency)
+
+    async def call(self, source, method, func, args, kwargs, record_args=True):
+        return await self._serve(method, args)
+
+
+def prepare_workdir(log, workdir):
+    """在工作目录写入录制时的配置快照 (关闭录制与通知)，回放期间所有相对路径都落在该目录"""
+    config = json.loads(json.dumps(log.meta.get('config') or {}))
+    if not config.get('symbols'):
+        raise ValueError("录制日志中没有配置快照，无法回放")
+    trading = config.setdefault('trading', {})
+    trading.setdefault('recording', {})['enabled'] = False
+    trading.setdefault('simulation', {})['enabled'] = False
+    config['notification'] = {'enabled': False}
+    os.makedirs(workdir, exist_ok=True)
+    with open(os.path.join(workdir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+    return config
+
+
+async def replay(path, speed=float('inf'), workdir=None, replay_latency=True):
+    """回放录制日志，返回统计字典"""
+    log = ReplayLog(path)
+    workdir = os.path.abspath(workdir or os.path.join(ROOT_DIR, 'data', 'replay',
+                                                      os.path.splitext(os.path.basename(path))[0]))
+    prepare_workdir(log, workdir)
+    # 回放不发送通知；状态/PnL/图表/日志写入工作目录
+    os.environ.pop('NOTIFICATION_WEBHOOK', None)
+    os.environ['CRYPTO_ORACLE_HOME'] = workdir
+
+    clock = ReplayClock(log.start_wall, speed)
+    exchange = ReplayExchange(log, clock, replay_latency)
+    agent = ReplayDeepSeekAgent(log, clock, replay_latency)
+
+    import OKXBot_Plus
+    from core.plugin import plugin_manager
+    plugin_manager.configure_io(ReplayPluginIO(log, clock, replay_latency), replay=True)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    wall_start = time.perf_counter()
+    try:
+        with ClockPatch(clock, REPLAY_PATCH_TARGETS):
+            bot = asyncio.ensure_future(OKXBot_Plus.main(exchange=exchange, agent=agent))
+            stops = [asyncio.ensure_future(exchange.exhausted.wait()),
+                     asyncio.ensure_future(agent.exhausted.wait())]
+            await asyncio.wait([bot] + stops, return_when=asyncio.FIRST_COMPLETED)
+            for task in [bot] + stops:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(bot, *stops, return_exceptions=True)
+    finally:
+        os.chdir(cwd)
+        plugin_manager.configure_io(None)
+    wall_time = time.perf_counter() - wall_start
+
+    replayed = clock.time() - log.start_wall
+    return {
+        'records': len(log.records),
+        'served': sum(log.served.values()),
+        'unserved': log.remaining(),
+        'misses': dict(log.misses),
+        'ticks': getattr(OKXBot_Plus.main, 'loop_count', 0),
+        'replayed_s': round(replayed, 1),
+        'wall_s': round(wall_time, 2),
+        'speedup': round(replayed / max(wall_time, 1e-9), 1),
+        'workdir': workdir,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CryptoOracle 录制日志回放")
+    parser.add_argument('log', help="录制文件 (*.clog)")
+    parser.add_argument('--speed', default='max', help="回放倍速: 1 / 10 / max")
+    parser.add_argument('--workdir', help="回放工作目录 (默认 data/replay/<录制文件名>)")
+    parser.add_argument('--no-latency', action='store_true', help="不按录制耗时模拟调用延迟")
+    parser.add_argument('--info', action='store_true', help="只打印日志概要，不回放")
+    args = parser.parse_args()
+
+    if args.info:
+        print(json.dumps(ReplayLog(args.log).summary(), ensure_ascii=False, indent=2))
+        return
+
+    speed = float('inf') if args.speed == 'max' else float(args.speed)
+    stats = asyncio.run(replay(args.log, speed=speed, workdir=args.workdir, replay_latency=not args.no_latency))
+    print("=" * 60)
+    print(f"📼 回放完成: {stats['served']}/{stats['records']} 条记录 | 主循环 {stats['ticks']} 轮")
+    print(f"⏱️ 录制时长 {stats['replayed_s']}s | 回放耗时 {stats['wall_s']}s | 加速比 {stats['speedup']}x")
+    if stats['misses']:
+        print(f"⚠️ 与录制不一致的调用 (日志中无对应记录): {stats['misses']}")
+    print(f"📂 工作目录: {stats['workdir']}")
+
+
+if __name__ == "__main__":
+    main()
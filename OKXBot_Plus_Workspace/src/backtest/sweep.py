@@ -0,0 +1,291 @@
+"""
+[New] 并行参数扫描 (Parallel Parameter Sweep)
+
+对 signal_gate (rsi_min / rsi_max / adx_min)、trailing_stop (activation_pnl / callback_rate)
+与 partial_tp_stages 做网格或随机扫描:
+- 主进程只加载一次 K 线并一次性计算指标 (这些参数都不影响指标)，
+  每个 (symbol, timeframe) 通过 SharedFrame 写入共享内存
+- 进程池 Worker 在 initializer 中 attach 一次，之后每组参数只需传递几百字节的配置差异
+- 每组参数独立运行一次 BacktestEngine (默认 stub 策略后端，不调用 AI)，结果汇总为排名表
+Worker 之间没有共享可写状态，吞吐量随核数线性扩展。
+
+用法 (在 src 目录下):
+    python -m backtest.sweep --synthetic 10 --bars 3000 --mode random --samples 64 --workers 8
+    python -m backtest.sweep --sqlite "../data/trade_data_*.db" \\
+        --param 'strategy.signal_gate.adx_min=[15,20,25]' \\
+        --param 'strategy.trailing_stop.activation_pnl={"uniform":[0.01,0.08]}' --mode random --samples 100
+参数路径相对于 config.json 的 trading 节点。
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from core.executor import SharedFrame
+from backtest.cli import ROOT_DIR, load_config, add_data_arguments, build_store
+from backtest.data_feed import CandleStore, CandleSeries
+from backtest.engine import BacktestEngine, compute_indicator_frames
+
+# 默认扫描空间 (值列表 = 候选值；{"uniform": [lo, hi]} / {"int": [lo, hi]} = 随机区间，仅 random 模式)
+DEFAULT_SPACE = {
+    'strategy.signal_gate.rsi_min': [25, 30, 35],
+    'strategy.signal_gate.rsi_max': [65, 70, 75],
+    'strategy.signal_gate.adx_min': [15, 20, 25],
+    'strategy.trailing_stop.activation_pnl': [0.02, 0.05, 0.08],
+    'strategy.trailing_stop.callback_rate': [0.003, 0.005, 0.01],
+    'strategy.partial_tp_stages': [
+        [{'threshold': 0.05, 'ratio': 0.3}, {'threshold': 0.10, 'ratio': 0.3}],
+        [{'threshold': 0.08, 'ratio': 0.5}],
+        [],
+    ],
+}
+
+# 排名时越小越好的指标
+ASCENDING_METRICS = {'max_drawdown_pct', 'fees'}
+
+
+# ---------------- 参数空间 ----------------
+
+def set_path(config, dotted, value):
+    """按点分路径写入嵌套字典 (中间节点不存在时自动创建)"""
+    keys = dotted.split('.')
+    node = config
+    for key in keys[:-1]:
+        if not isinstance(node.get(key), dict):
+            node[key] = {}
+        node = node[key]
+    node[keys[-1]] = value
+
+
+def parse_param(spec):
+    """解析 --param KEY=JSON，例如 strategy.signal_gate.adx_min=[15,20,25]"""
+    if '=' not in spec:
+        raise ValueError(f"参数格式应为 KEY=JSON: {spec}")
+    key, raw = spec.split('=', 1)
+    value = json.loads(raw)
+    if not isinstance(value, (list, dict)):
+        value = [value]
+    return key.strip(), value
+
+
+def grid_params(space):
+    """网格: 所有候选值的笛卡尔积"""
+    keys = list(space)
+    for key in keys:
+        if not isinstance(space[key], list):
+            raise ValueError(f"网格模式只支持候选值列表: {key}")
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+
+
+def random_params(space, samples, seed=0):
+    """随机: 列表等概率抽取，{"uniform": [lo, hi]} 均匀分布，{"int": [lo, hi]} 闭区间整数"""
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(samples):
+        params = {}
+        for key, spec in space.items():
+            if isinstance(spec, list):
+                params[key] = spec[int(rng.integers(len(spec)))]
+            elif 'uniform' in spec:
+                lo, hi = spec['uniform']
+                params[key] = round(float(rng.uniform(lo, hi)), 6)
+            elif 'int' in spec:
+                lo, hi = spec['int']
+                params[key] = int(rng.integers(lo, hi + 1))
+            else:
+                raise ValueError(f"无法识别的参数区间: {key}={spec}")
+        trials.append(params)
+    return trials
+
+
+# ---------------- 共享内存 K 线 ----------------
+
+def export_store(store, indicator_frames):
+    """
+    将 CandleStore 写入共享内存
+    已计算指标的 (symbol, tf) 直接导出指标表 (包含 OHLCV)，Worker 端同时还原 K 线与指标
+    返回 (shm 列表, {(symbol, tf): (descriptor, has_indicators)})
+    """
+    handles = []
+    descriptors = {}
+    for key, series in store.series.items():
+        frame = indicator_frames.get(key)
+        has_indicators = frame is not None
+        shm, descriptor = SharedFrame.export(frame if has_indicators else series.to_frame())
+        handles.append(shm)
+        descriptors[key] = (descriptor, has_indicators)
+    return handles, descriptors
+
+
+_WORKER = {}
+
+
+def _init_worker(descriptors, log_level=logging.CRITICAL):
+    """
+    Worker 初始化: 以零拷贝方式映射共享内存中的 K 线与指标 (每个进程只执行一次)；单次回测的交易日志默认静默
+    DataFrame / CandleSeries 的列直接是共享内存上的只读视图，各 Worker 共用主进程导出的那一份；
+    SharedMemory 句柄保存在 _WORKER 中，与 Worker 进程同生命周期
+    """
+    logging.getLogger("crypto_oracle").setLevel(log_level)
+    store = CandleStore()
+    frames = {}
+    handles = []
+    for key, (descriptor, has_indicators) in descriptors.items():
+        shm, frame = SharedFrame.attach(descriptor)
+        handles.append(shm)
+        store.series[key] = CandleSeries.from_frame(frame)
+        if has_indicators:
+            frames[key] = frame
+    _WORKER['handles'] = handles
+    _WORKER['store'] = store
+    _WORKER['frames'] = frames
+
+
+def _run_trial(trial_id, config, params, options, store=None, indicator_frames=None):
+    """
+    运行一组参数，返回 参数 + 绩效 的扁平字典
+    store / indicator_frames 未传入时使用 _init_worker 映射的共享数据 (进程池 Worker)
+    """
+    if store is None:
+        store, indicator_frames = _WORKER['store'], _WORKER['frames']
+    config = copy.deepcopy(config)
+    trading = config.setdefault('trading', {})
+    for key, value in params.items():
+        set_path(trading, key, value)
+
+    output_dir = tempfile.mkdtemp(prefix=f"sweep_{trial_id}_")
+    try:
+        engine = BacktestEngine(
+            config, store,
+            agent_backend=options.get('agent', 'stub'),
+            initial_balance=options.get('balance'),
+            output_dir=output_dir,
+            warmup_bars=options.get('warmup', 200),
+            indicator_frames=indicator_frames,
+        )
+        report = asyncio.run(engine.run(start=options.get('start'), end=options.get('end')))
+        result = report.as_dict()
+    except Exception as e:
+        result = {'error': str(e)}
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    row = {'trial': trial_id}
+    for key, value in params.items():
+        row[key] = json.dumps(value) if isinstance(value, (list, dict)) else value
+    row.update(result)
+    dd = row.get('max_drawdown_pct')
+    row['return_dd'] = round(row['total_return_pct'] / dd, 3) if dd and 'total_return_pct' in row else None
+    return row
+
+
+# ---------------- 调度 ----------------
+
+def run_sweep(config, store, trials, workers=None, agent_backend='stub', balance=None, warmup=200,
+              start=None, end=None, sort_by='total_return_pct', progress=True):
+    """
+    并行运行 trials (参数字典列表)，返回按 sort_by 排序的 DataFrame
+    workers <= 1 时在当前进程内顺序执行 (便于调试): 直接使用 store 与指标，不经过共享内存，
+    也不调整调用方的日志级别
+    """
+    logger = logging.getLogger("crypto_oracle")
+    timeframe = config.get('trading', {}).get('timeframe', '15m')
+    indicator_frames = compute_indicator_frames(store, {timeframe, '4h'})
+    options = {'agent': agent_backend, 'balance': balance, 'warmup': warmup, 'start': start, 'end': end}
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    t0 = time.perf_counter()
+
+    def report_progress(done):
+        if progress and (done % max(1, len(trials) // 10) == 0 or done == len(trials)):
+            logger.warning(f"⏩ [Sweep] {done}/{len(trials)} 组完成 | 耗时 {time.perf_counter() - t0:.1f}s")
+
+    if workers <= 1:
+        # [Fix] _init_worker 会静默 crypto_oracle 日志并持有共享内存句柄，只用于进程池 Worker
+        for i, params in enumerate(trials):
+            rows.append(_run_trial(i, config, params, options, store=store, indicator_frames=indicator_frames))
+            report_progress(i + 1)
+    else:
+        handles, descriptors = export_store(store, indicator_frames)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(descriptors,)) as pool:
+                futures = [pool.submit(_run_trial, i, config, params, options) for i, params in enumerate(trials)]
+                for done, future in enumerate(as_completed(futures), 1):
+                    rows.append(future.result())
+                    report_progress(done)
+        finally:
+            for shm in handles:
+                shm.close()
+                shm.unlink()
+    wall_time = time.perf_counter() - t0
+
+    results = pd.DataFrame(rows)
+    if sort_by in results.columns:
+        results = results.sort_values(sort_by, ascending=sort_by in ASCENDING_METRICS, na_position='last')
+    results.attrs['wall_time'] = wall_time
+    results.attrs['bars'] = int(results['bars'].sum()) if 'bars' in results.columns else 0
+    results.attrs['workers'] = workers
+    return results.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CryptoOracle 并行参数扫描")
+    add_data_arguments(parser)
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=50, help="random 模式的参数组数")
+    parser.add_argument('--param', action='append', default=[], help="KEY=JSON，可重复；指定后替换默认扫描空间")
+    parser.add_argument('--space', help="扫描空间 JSON 文件 ({KEY: 候选列表或区间})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--agent', default='stub', choices=['stub', 'hold'])
+    parser.add_argument('--sort', default='total_return_pct')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'data', 'backtest', 'sweep_results.csv'))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING),
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+    if args.param:
+        space = dict(parse_param(p) for p in args.param)
+    trials = grid_params(space) if args.mode == 'grid' else random_params(space, args.samples, args.seed)
+
+    config = load_config(args.config)
+    store = build_store(args, config)
+    if not store.series:
+        print("❌ 未加载到任何 K 线数据")
+        sys.exit(1)
+
+    print(f"🔬 参数扫描: {len(trials)} 组 ({args.mode}) | {len(store.symbols)} 个币种 | {args.workers} 个进程")
+    results = run_sweep(config, store, trials, workers=args.workers, agent_backend=args.agent,
+                        balance=args.balance, warmup=args.warmup, start=args.start, end=args.end,
+                        sort_by=args.sort)
+
+    wall_time = results.attrs['wall_time']
+    print(results.head(args.top).to_string(index=False))
+    print(f"⏱️ 总耗时 {wall_time:.1f}s | {len(results) / max(wall_time, 1e-9):.2f} 组/秒 | "
+          f"{results.attrs['bars'] / max(wall_time, 1e-9):.0f} bars/sec (全部进程合计)")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    results.to_csv(args.output, index=False)
+    print(f"结果已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import time
 from typing import Dict, Any, Optional
 
+from core.metrics import CACHE_REQUESTS
+
 class CacheManager:
     """
     缓存管理器，用于缓存API请求结果
@@ -56,14 +58,18 @@ class CacheManager:
         Returns:
             缓存值，如果缓存不存在或已过期则返回None
         """
+        namespace = key.split(':', 1)[0]
         if key not in self.cache:
+            CACHE_REQUESTS.labels(namespace, 'miss').inc()
             return None
         
         item = self.cache[key]
         if time.time() > item['expires_at']:
             del self.cache[key]
+            CACHE_REQUESTS.labels(namespace, 'miss').inc()
             return None
         
+        CACHE_REQUESTS.labels(namespace, 'hit').inc()
         return item['value']
     
     def delete(self, key: str) -> None:
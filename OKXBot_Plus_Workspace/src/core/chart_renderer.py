@@ -0,0 +1,233 @@
+"""
+[New] 图表渲染服务 (Chart Renderer)
+
+RiskManager 原先每次记账都在线程池里调用 plotter.generate_pnl_chart: matplotlib 12x10in@300DPI 全量绘制，
+与交易事件循环争抢 GIL 与内存。现在改为独立的渲染进程:
+- 主进程只把权益序列转换为 NumPy 数组 (时间戳 / 权益 / 盈亏率) 放入有界队列，队列满时丢弃 (下一次提交会带上最新数据)，
+  从不等待渲染；matplotlib 只在渲染进程中导入
+- 渲染进程收到任务后在 debounce_seconds 窗口内合并同一输出路径的后续任务，只渲染最新一份
+- 渲染前用 LTTB (Largest-Triangle-Three-Buckets) 降采样到 max_points 个点，保留曲线形状
+- 降采样结果 + DPI 的内容哈希与上次相同且图片仍存在时跳过渲染
+mode: "process" (默认) / "thread" (单线程渲染，无法启动子进程时的降级) / "off" (不生成图表)
+"""
+
+import os
+import time
+import queue
+import hashlib
+import logging
+import threading
+import traceback
+import multiprocessing
+
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标 (含首尾)
+    x / y 为等长一维数组，threshold 为目标点数
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # 下一个桶的均值点 (最后一个桶用末点)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def render_job(job, cache):
+    """
+    渲染一个图表任务 (渲染进程/线程内执行)
+    cache: 输出路径 -> 上次渲染的内容哈希；返回 True 表示实际渲染了
+    """
+    ts, equity, pnl = job['ts'], job['equity'], job['pnl']
+    if len(ts) == 0:
+        return False
+    idx = lttb_indices(ts, equity, job.get('max_points', 1500))
+    ts, equity, pnl = ts[idx], equity[idx], pnl[idx]
+
+    digest = hashlib.sha1()
+    for arr in (ts, equity, pnl):
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    digest.update(str(job.get('dpi')).encode())
+    content_hash = digest.hexdigest()
+    path = job['output_path']
+    if cache.get(path) == content_hash and os.path.exists(path):
+        return False
+
+    import pandas as pd
+    from core import plotter
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(ts, unit='ms'),
+        'total_equity': equity,
+        'pnl_percent': pnl,
+    })
+    plotter.generate_pnl_chart(df=df, output_path=path, verbose=False, dpi=job.get('dpi', 120), raise_errors=True)
+    cache[path] = content_hash
+    return True
+
+
+def _render_worker(jobs, errors, debounce):
+    """
+    渲染进程主循环: 合并窗口内的任务后逐个渲染，收到 None 退出
+    spawn 子进程中没有配置 crypto_oracle 日志 (多进程写同一日志文件也不安全)，
+    渲染异常连同 traceback 放入 errors 队列，由主进程写入日志
+    """
+    logging.getLogger("matplotlib").setLevel(logging.ERROR)
+    cache = {}
+    running = True
+    while running:
+        job = jobs.get()
+        if job is None:
+            break
+        pending = {job['output_path']: job}
+        deadline = time.monotonic() + debounce
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                running = False
+                break
+            pending[job['output_path']] = job
+        for job in pending.values():
+            try:
+                render_job(job, cache)
+            except Exception as e:
+                try:
+                    errors.put_nowait((job['output_path'], repr(e), traceback.format_exc()))
+                except queue.Full:
+                    pass
+
+
+class ChartRenderer:
+    MODES = ('process', 'thread', 'off')
+
+    def __init__(self, mode='process', dpi=120, debounce_seconds=30, max_points=1500, queue_size=4):
+        self.logger = logging.getLogger("crypto_oracle")
+        self._process = None
+        self._jobs = None
+        self._errors = None
+        self._thread_busy = threading.Lock()
+        self._thread_cache = {}
+        self.submitted = 0
+        self.dropped = 0
+        self.configure(mode, dpi, debounce_seconds, max_points, queue_size)
+
+    def configure(self, mode='process', dpi=120, debounce_seconds=30, max_points=1500, queue_size=4):
+        if mode not in self.MODES:
+            self.logger.warning(f"⚠️ 未知的图表渲染模式 '{mode}'，回退为 process")
+            mode = 'process'
+        self.close()
+        self.mode = mode
+        self.dpi = dpi
+        self.debounce = debounce_seconds
+        self.max_points = max_points
+        self.queue_size = queue_size
+
+    def _ensure_process(self):
+        if self._process is not None and self._process.is_alive():
+            return True
+        try:
+            ctx = multiprocessing.get_context('spawn')
+            self._jobs = ctx.Queue(maxsize=self.queue_size)
+            self._errors = ctx.Queue(maxsize=16)
+            self._process = ctx.Process(target=_render_worker, args=(self._jobs, self._errors, self.debounce),
+                                        name="chart-renderer", daemon=True)
+            self._process.start()
+            return True
+        except Exception as e:
+            self.logger.warning(f"⚠️ 图表渲染进程启动失败，降级为线程渲染: {e}")
+            self._process = None
+            self.mode = 'thread'
+            return False
+
+    def submit(self, df, output_path):
+        """
+        提交图表任务 (从不阻塞)
+        df: 含 timestamp / total_equity / pnl_percent 列的权益序列 (PnLStore.frame 的结果)
+        返回 True 表示已入队
+        """
+        if self.mode == 'off' or df is None or df.empty:
+            return False
+        job = {
+            'output_path': output_path,
+            'ts': df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64),
+            'equity': df['total_equity'].to_numpy(dtype=np.float64),
+            'pnl': df['pnl_percent'].to_numpy(dtype=np.float64),
+            'dpi': self.dpi,
+            'max_points': self.max_points,
+        }
+        self.submitted += 1
+        self._drain_errors()
+        if self.mode == 'process' and self._ensure_process():
+            try:
+                self._jobs.put_nowait(job)
+                return True
+            except queue.Full:
+                self.dropped += 1
+                return False
+        # thread 模式: 上一张图还在渲染时直接丢弃本次 (下一次提交会带上最新数据)
+        if not self._thread_busy.acquire(blocking=False):
+            self.dropped += 1
+            return False
+        threading.Thread(target=self._render_in_thread, args=(job,), name="chart-renderer", daemon=True).start()
+        return True
+
+    def _render_in_thread(self, job):
+        try:
+            render_job(job, self._thread_cache)
+        except Exception as e:
+            self.logger.error(f"❌ 生成图表时发生错误 ({job['output_path']}): {e}", exc_info=True)
+        finally:
+            self._thread_busy.release()
+
+    def _drain_errors(self):
+        """把渲染进程交回的异常写入主进程日志"""
+        if self._errors is None:
+            return
+        while True:
+            try:
+                path, error, trace = self._errors.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            self.logger.error(f"❌ 生成图表时发生错误 ({path}): {error}\n{trace.rstrip()}")
+
+    def close(self, timeout=5):
+        if self._process is not None:
+            try:
+                self._jobs.put(None, timeout=1)
+            except Exception:
+                pass
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._drain_errors()
+            self._process = None
+            self._jobs = None
+            self._errors = None
+
+
+# 全局单例 (由 OKXBot_Plus.main 按 trading.performance.chart 调用 configure)
+chart_renderer = ChartRenderer()
@@ -0,0 +1,214 @@
+import os
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+INDEX_COLUMN = '__shared_frame_index__'
+
+
+class SharedFrame:
+    """
+    [New] OHLCV DataFrame 的共享内存传输
+    - 数值列 (含 datetime 列，按 int64 纳秒存储) 打包为一块 float64/int64 矩阵写入 SharedMemory
+    - 非数值列 (如 volatility_status) 体积很小，随描述符一起序列化
+    - 非默认索引 (如 DatetimeIndex) 作为一列写入共享内存，还原时恢复为索引
+    进程池只需传递描述符 (几百字节)，Worker 端按名称 attach 后重建 DataFrame
+    """
+
+    @staticmethod
+    def export(df):
+        """将 DataFrame 写入共享内存，返回 (SharedMemory, descriptor)；调用方负责 close/unlink"""
+        columns = {col: df[col] for col in df.columns}
+        index = None
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            columns[INDEX_COLUMN] = pd.Series(df.index, index=pd.RangeIndex(len(df)))
+            tz = getattr(df.index, 'tz', None)
+            index = {'name': df.index.name, 'dtype': str(df.index.dtype), 'tz': str(tz) if tz else None}
+        numeric_cols = []
+        datetime_cols = []
+        extra = {}
+        for col, series in columns.items():
+            if pd.api.types.is_datetime64_any_dtype(series):
+                datetime_cols.append(col)
+            elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                numeric_cols.append(col)
+            else:
+                extra[col] = series.tolist()
+
+        n_rows = len(df)
+        n_num = len(numeric_cols)
+        n_dt = len(datetime_cols)
+        num_bytes = max(n_rows * n_num * 8, 0)
+        dt_bytes = max(n_rows * n_dt * 8, 0)
+        shm = shared_memory.SharedMemory(create=True, size=max(num_bytes + dt_bytes, 1))
+
+        if n_num:
+            num_view = np.ndarray((n_num, n_rows), dtype=np.float64, buffer=shm.buf, offset=0)
+            for i, col in enumerate(numeric_cols):
+                num_view[i, :] = columns[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        if n_dt:
+            dt_view = np.ndarray((n_dt, n_rows), dtype=np.int64, buffer=shm.buf, offset=num_bytes)
+            for i, col in enumerate(datetime_cols):
+                dt_view[i, :] = columns[col].to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        descriptor = {
+            'name': shm.name,
+            'rows': n_rows,
+            'numeric_cols': numeric_cols,
+            'datetime_cols': datetime_cols,
+            'extra': extra,
+            'columns': list(df.columns),
+            'index': index,
+        }
+        return shm, descriptor
+
+    @staticmethod
+    def _columns(shm, descriptor):
+        """共享内存上的各列 (只读视图，按原列顺序)"""
+        n_rows = descriptor['rows']
+        numeric_cols = descriptor['numeric_cols']
+        datetime_cols = descriptor['datetime_cols']
+        num_bytes = n_rows * len(numeric_cols) * 8
+        views = {}
+        if numeric_cols:
+            num_view = np.ndarray((len(numeric_cols), n_rows), dtype=np.float64, buffer=shm.buf, offset=0)
+            num_view.flags.writeable = False
+            views.update(zip(numeric_cols, num_view))
+        if datetime_cols:
+            dt_view = np.ndarray((len(datetime_cols), n_rows), dtype=np.int64, buffer=shm.buf, offset=num_bytes)
+            dt_view.flags.writeable = False
+            views.update((col, row.view('datetime64[ns]')) for col, row in zip(datetime_cols, dt_view))
+        views.update(descriptor['extra'])
+        index = None
+        if descriptor.get('index') is not None:
+            meta = descriptor['index']
+            index = pd.Index(views[INDEX_COLUMN], name=meta['name'])
+            if meta['tz']:
+                index = index.tz_localize('UTC').tz_convert(meta['tz'])
+            elif str(index.dtype) != meta['dtype']:
+                # 整数索引按 float64 存储，还原原 dtype
+                index = index.astype(meta['dtype'])
+        return {col: views[col] for col in descriptor['columns']}, index
+
+    @staticmethod
+    def load(descriptor):
+        """Worker 端: 按描述符 attach 共享内存并复制出独立的 DataFrame"""
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+        try:
+            columns, index = SharedFrame._columns(shm, descriptor)
+            return pd.DataFrame({col: np.array(values) for col, values in columns.items()},
+                                index=index.copy(deep=True) if index is not None else None)
+        finally:
+            shm.close()
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        Worker 端零拷贝: 返回 (SharedMemory, DataFrame)，数值 / 时间列直接是共享内存上的只读视图
+        (每列单独成块、不合并，多个进程共用同一份物理内存)。DataFrame 使用期间调用方必须持有 SharedMemory，
+        否则缓冲区被释放；需要修改时先 .copy()
+        """
+        shm = shared_memory.SharedMemory(name=descriptor['name'])
+        columns, index = SharedFrame._columns(shm, descriptor)
+        return shm, pd.DataFrame(columns, index=index, copy=False)
+
+
+def _run_on_shared_frame(fn, descriptor, args, kwargs):
+    """Worker 端入口: 从共享内存还原 DataFrame 后执行 fn"""
+    df = SharedFrame.load(descriptor)
+    return fn(df, *args, **kwargs)
+
+
+class AnalyticsExecutor:
+    """
+    [New] CPU 密集型分析任务执行器 (指标计算 / 数据整理 / CSV 读取)
+    mode:
+      - "inline": 直接在事件循环线程执行 (旧行为，未配置时的默认值)
+      - "thread": 线程池，pandas/NumPy 大部分运算会释放 GIL
+      - "process": 进程池，DataFrame 通过共享内存传输，彻底不占用事件循环线程
+    """
+    MODES = ('inline', 'thread', 'process')
+
+    def __init__(self, mode='inline', max_workers=None):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.mode = 'inline'
+        self.max_workers = None
+        self._pool = None
+        self.configure(mode, max_workers)
+
+    def configure(self, mode='inline', max_workers=None):
+        """切换执行模式 (会关闭旧的池)"""
+        if mode not in self.MODES:
+            self.logger.warning(f"⚠️ 未知的分析执行器模式 '{mode}'，回退为 inline")
+            mode = 'inline'
+        self.shutdown()
+        self.mode = mode
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == 'process':
+                # spawn 模式下 multiprocessing 会自动同步 sys.path，Worker 可直接导入 core/services
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            elif self.mode == 'thread':
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analytics")
+        return self._pool
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        执行任意可调用对象
+        process 模式下 fn 与参数必须可 pickle (模块级函数)
+        """
+        if self.mode == 'inline':
+            return fn(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        try:
+            future = loop.run_in_executor(self._get_pool(), call)
+        except RuntimeError:
+            # 池已关闭 (例如退出阶段)，降级为同步执行
+            return fn(*args, **kwargs)
+        return await future
+
+    async def run_frame(self, fn, df, *args, **kwargs):
+        """
+        执行以 DataFrame 为首参的函数
+        process 模式下 DataFrame 经共享内存传输，避免整表 pickle
+        """
+        if self.mode != 'process':
+            return await self.run(fn, df, *args, **kwargs)
+
+        shm, descriptor = SharedFrame.export(df)
+
+        def release(_=None):
+            shm.close()
+            shm.unlink()
+
+        try:
+            future = self._get_pool().submit(_run_on_shared_frame, fn, descriptor, args, kwargs)
+        except RuntimeError:
+            # 池已关闭 (例如退出阶段)，降级为同步执行
+            release()
+            return fn(df, *args, **kwargs)
+        # [Fix] 共享内存在池中的任务真正结束后才释放: 等待方被取消时任务可能仍在排队或运行，
+        # 提前 unlink 会让 Worker attach 时 FileNotFoundError
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait=False):
+        if self._pool is not None:
+            try:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+            except Exception:
+                pass
+            self._pool = None
+
+
+# 全局单例 (由 OKXBot_Plus.main 按配置调用 configure)
+analytics_executor = AnalyticsExecutor()
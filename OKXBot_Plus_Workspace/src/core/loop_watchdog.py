@@ -0,0 +1,183 @@
+"""
+[New] 事件循环阻塞检测 (Loop Watchdog)
+
+HealthMonitor 的延迟探针只能告诉我们 "事件循环被阻塞了多久"，不能告诉我们 "是谁阻塞的"。
+这里用 心跳 + 采样线程 定位阻塞调用:
+- 事件循环内每 heartbeat_ms 执行一次心跳回调 (call_later，记录时间戳)
+- 后台线程每 heartbeat_ms 检查一次: 距上次心跳超过 threshold_ms 说明事件循环线程正卡在某个同步调用里，
+  立即通过 sys._current_frames() 抓取事件循环线程的调用栈作为样本
+- 心跳恢复时得到本次阻塞的实际时长，按样本中出现最多的调用点 (项目代码中最内层的帧) 归因，
+  汇总每个调用点的次数 / 累计 / 最大阻塞时间，并附上最内层帧 (如 psutil / pandas 内部) 与一份调用栈
+- 新出现的调用点立即输出一条带调用栈的警告；汇总随健康报告输出，并导出为 Prometheus 指标
+
+阻塞时长不足一个检查周期的调用可能来不及采样，这类阻塞归为 "<未采样>"。
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter
+
+from core.metrics import metrics
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+UNSAMPLED = '<未采样>'
+
+LOOP_BLOCKS = metrics.counter(
+    'crypto_oracle_event_loop_blocks_total', 'Event loop stalls above the watchdog threshold by call site', ('site',))
+LOOP_BLOCKED = metrics.counter(
+    'crypto_oracle_event_loop_blocked_seconds_total', 'Time the event loop was blocked by call site', ('site',))
+
+
+def _frame_site(filename, lineno, name):
+    try:
+        filename = os.path.relpath(filename, SRC_DIR)
+    except ValueError:
+        pass
+    return f"{filename}:{lineno} {name}"
+
+
+def describe_stack(frame, depth=8):
+    """
+    返回 (调用点, 最内层帧, 调用栈文本)
+    调用点为项目代码 (src 目录下、非本模块) 中最内层的帧，找不到时退化为最内层帧
+    """
+    leaf = _frame_site(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+    site = None
+    f = frame
+    while f is not None:
+        filename = os.path.abspath(f.f_code.co_filename)
+        if filename.startswith(SRC_DIR) and filename != _THIS_FILE:
+            site = _frame_site(filename, f.f_lineno, f.f_code.co_name)
+            break
+        f = f.f_back
+    stack = ''.join(traceback.format_stack(frame, limit=depth))
+    return site or leaf, leaf, stack
+
+
+class LoopWatchdog:
+    def __init__(self, enabled=True, threshold_ms=100, heartbeat_ms=50, max_sites=50):
+        self.logger = logging.getLogger("crypto_oracle")
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread_id = None
+        self._thread = None
+        self._handle = None
+        self._running = False
+        self._last_beat = time.monotonic()
+        self._samples = []
+        self.sites = {}   # 调用点 -> {'count', 'total', 'max', 'leaf', 'stack'}
+        self.stalls = 0
+        self.configure(enabled, threshold_ms, heartbeat_ms, max_sites)
+
+    def configure(self, enabled=True, threshold_ms=100, heartbeat_ms=50, max_sites=50):
+        self.enabled = enabled
+        self.threshold = threshold_ms / 1000
+        self.heartbeat = heartbeat_ms / 1000
+        self.max_sites = max_sites
+
+    # ---------------- 启停 ----------------
+
+    def start(self):
+        """在事件循环内调用 (重复调用无副作用)"""
+        if not self.enabled or self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._running = True
+        self._last_beat = time.monotonic()
+        self._handle = self._loop.call_later(self.heartbeat, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # ---------------- 心跳 (事件循环线程) ----------------
+
+    def _beat(self):
+        now = time.monotonic()
+        stalled = now - self._last_beat - self.heartbeat
+        self._last_beat = now
+        if stalled > self.threshold:
+            self._finish_stall(stalled)
+        if self._running:
+            self._handle = self._loop.call_later(self.heartbeat, self._beat)
+
+    def _finish_stall(self, duration):
+        with self._lock:
+            samples, self._samples = self._samples, []
+        if samples:
+            counts = Counter(site for site, _, _ in samples)
+            site = counts.most_common(1)[0][0]
+            _, leaf, stack = next(s for s in samples if s[0] == site)
+        else:
+            site, leaf, stack = UNSAMPLED, UNSAMPLED, ''
+
+        with self._lock:
+            self.stalls += 1
+            entry = self.sites.get(site)
+            is_new = entry is None
+            if is_new:
+                if len(self.sites) >= self.max_sites:
+                    # 调用点过多时丢弃累计阻塞最少的一个，保持内存与指标标签数量有界
+                    weakest = min(self.sites, key=lambda k: self.sites[k]['total'])
+                    del self.sites[weakest]
+                entry = self.sites[site] = {'count': 0, 'total': 0.0, 'max': 0.0, 'leaf': leaf, 'stack': stack}
+            entry['count'] += 1
+            entry['total'] += duration
+            if duration > entry['max']:
+                entry['max'] = duration
+                entry['leaf'], entry['stack'] = leaf, stack or entry['stack']
+
+        LOOP_BLOCKS.labels(site).inc()
+        LOOP_BLOCKED.labels(site).inc(duration)
+        if is_new and site != UNSAMPLED:
+            self.logger.warning(f"🐢 [WATCHDOG] 事件循环被阻塞 {duration * 1000:.0f}ms: {site} (最内层: {leaf})\n{stack}")
+
+    # ---------------- 采样 (后台线程) ----------------
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.heartbeat)
+            if time.monotonic() - self._last_beat - self.heartbeat <= self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                sample = describe_stack(frame)
+            finally:
+                del frame
+            with self._lock:
+                self._samples.append(sample)
+
+    # ---------------- 报告 ----------------
+
+    def report(self, top=5):
+        """按累计阻塞时间排序的调用点 (毫秒)"""
+        with self._lock:
+            items = sorted(self.sites.items(), key=lambda kv: -kv[1]['total'])[:top]
+            return {
+                'stalls': self.stalls,
+                'offenders': [
+                    {'site': site, 'count': e['count'], 'total_ms': round(e['total'] * 1000, 1),
+                     'max_ms': round(e['max'] * 1000, 1), 'leaf': e['leaf']}
+                    for site, e in items
+                ],
+            }
+
+
+# 全局单例 (由 OKXBot_Plus.main 按 trading.performance.watchdog 调用 configure / start)
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,492 @@
+"""
+[New] 内存剖析模式 (Memory Profiler)
+
+每个 DeepSeekTrader 都持有 K 线 DataFrame (缓存的 get_ohlcv 结果中的 df)、price_history / signal_history、
+独立的 DataManager / PositionManager / OrderExecutor / SignalProcessor 与深拷贝的 risk_control，
+交易对数量上百时需要知道 "每个 Trader / 每类缓存到底占多少内存、是否在持续增长"。这里每隔 interval_ticks 轮采样一次:
+- 进程: RSS 与 tracemalloc 跟踪的总量 / 峰值；与上次快照对比，列出增长最多的分配点 (文件:行号)
+- 每个 Trader: 从 Trader 对象出发按引用图累计保留的内存 (DataFrame / ndarray 按实际缓冲区大小)，
+  共享对象 (交易所、AI、公共配置、MarketDataService 等) 不计入；附上该交易对在缓存中的条目，按属性给出最大的几项
+- 每个缓存命名空间: 通过 register_namespace 注册的容器 (CacheManager 按键前缀拆分)，统计条目数、大小与已过期未清理的条目
+- 增长跟踪: 每个序列 (tracemalloc 总量、各 Trader、各命名空间) 连续 leak_samples 次采样单调增长、
+  且累计增长超过 leak_min_mb 时告警 (持续增长期间只告警一次)；启动后的前 warmup_samples 次采样
+  (K 线缓存、指标与各类历史逐步填满) 不计入
+
+[Optimization] 事件循环上只做快照 (tracemalloc.take_snapshot、缓存条目与 Trader 属性的浅拷贝)，
+引用图遍历、按行号分组与增长对比在工作线程中完成 (sample_in_background)，不再阻塞主循环数秒；
+遍历期间对象可能被并发修改，个别对象读取失败时跳过。开启后 tracemalloc 本身会让内存分配变慢，
+因此默认关闭 (trading.performance.memory)。
+np.memmap (K 线归档映射) 由文件支撑、可被系统回收，不计入。
+"""
+
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import logging
+import threading
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from core.metrics import metrics
+
+MB = 1024 * 1024
+
+TRADER_BYTES = metrics.gauge(
+    'crypto_oracle_trader_memory_bytes', 'Memory retained by each trader (memory profiler)', ('symbol',))
+NAMESPACE_BYTES = metrics.gauge(
+    'crypto_oracle_cache_memory_bytes', 'Memory retained by each cache namespace (memory profiler)', ('namespace',))
+TRACED_BYTES = metrics.gauge(
+    'crypto_oracle_traced_memory_bytes', 'Python heap traced by tracemalloc (memory profiler)')
+
+# 遍历时不进入的类型: 代码/模块/类型对象，以及会把引用图连到整个进程的运行时对象
+_SKIP_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    types.CodeType, types.FrameType, types.CoroutineType, types.GeneratorType,
+    logging.Logger, logging.Handler, threading.Thread, asyncio.AbstractEventLoop, asyncio.Future,
+    np.memmap,
+)
+_ATOMIC_TYPES = {str, bytes, bytearray, int, float, bool, complex, type(None)}
+_IGNORED_FILES = {tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>',
+                  '<unknown>'}
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _site(frame):
+    """分配点显示为 文件:行号 (项目内文件用相对 src 的路径，第三方库只保留包名/文件名)"""
+    filename = frame.filename
+    if filename.startswith(_SRC_DIR):
+        filename = os.path.relpath(filename, _SRC_DIR)
+    else:
+        filename = os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+    return f"{filename}:{frame.lineno}"
+
+
+def deep_sizeof(obj, seen):
+    """
+    obj 引用图中尚未计入 (不在 seen 中) 的对象总大小 (字节)
+    DataFrame / Series / Index 按 memory_usage(deep=True)，ndarray 只计自身持有的缓冲区 (视图不重复计算)
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        oid = id(o)
+        if oid in seen:
+            continue
+        if type(o) in _ATOMIC_TYPES:
+            seen.add(oid)
+            total += sys.getsizeof(o)
+            continue
+        if isinstance(o, _SKIP_TYPES):
+            continue
+        seen.add(oid)
+        try:
+            if isinstance(o, pd.DataFrame):
+                total += int(o.memory_usage(index=True, deep=True).sum())
+                continue
+            if isinstance(o, (pd.Series, pd.Index)):
+                total += int(o.memory_usage(deep=True))
+                continue
+            if isinstance(o, np.ndarray):
+                total += sys.getsizeof(o) if o.base is None else 0
+                if o.dtype == object:
+                    stack.extend(o.ravel())
+                continue
+            total += sys.getsizeof(o)
+            if isinstance(o, dict):
+                stack.extend(o.keys())
+                stack.extend(o.values())
+            elif isinstance(o, (list, tuple, set, frozenset, deque)):
+                stack.extend(o)
+            else:
+                attrs = getattr(o, '__dict__', None)
+                if attrs is not None:
+                    stack.append(attrs)
+                for slot in getattr(type(o), '__slots__', ()):
+                    value = getattr(o, slot, None)
+                    if value is not None:
+                        stack.append(value)
+        except (RuntimeError, ValueError, KeyError, AttributeError):
+            # 在工作线程中遍历时，事件循环可能正在修改该对象 (如字典在迭代中改变大小)，跳过
+            continue
+    return total
+
+
+def _key_symbol(key, symbols):
+    """从 CacheManager 的键 (prefix:k1:v1:symbol:BTC/USDT:USDT:...) 中取出交易对 (symbol 自身含 ':'，取最长匹配)"""
+    start = key.find('symbol:')
+    while start != -1:
+        parts = key[start + 7:].split(':')
+        for i in range(len(parts), 0, -1):
+            candidate = ':'.join(parts[:i])
+            if candidate in symbols:
+                return candidate
+        start = key.find('symbol:', start + 1)
+    return None
+
+
+class MemoryProfiler:
+    def __init__(self, enabled=False, interval_ticks=30, frames=1, top=10, leak_samples=4, leak_min_mb=5,
+                 warmup_samples=3, export_path='log/memory_profile.json'):
+        self.logger = logging.getLogger("crypto_oracle")
+        self._namespaces = {}   # 名称 -> (容器获取函数, 是否按键前缀拆分)
+        self._shared = []       # 不计入单个 Trader 的共享对象获取函数
+        self._previous_sites = None
+        self._alerting = set()
+        self._started_tracemalloc = False
+        self._task = None
+        self.samples = 0
+        self.history = {}       # 序列名 -> deque[(时间, 字节)]
+        self.latest = None
+        self.configure(enabled, interval_ticks, frames, top, leak_samples, leak_min_mb, warmup_samples, export_path)
+
+    def configure(self, enabled=False, interval_ticks=30, frames=1, top=10, leak_samples=4, leak_min_mb=5,
+                  warmup_samples=3, export_path='log/memory_profile.json'):
+        self.enabled = enabled
+        self.interval_ticks = max(1, int(interval_ticks))
+        self.frames = max(1, int(frames))
+        self.top = top
+        self.leak_samples = max(2, int(leak_samples))
+        self.leak_min = leak_min_mb * MB
+        self.warmup_samples = max(0, int(warmup_samples))
+        self.export_path = export_path
+
+    # ---------------- 启停与注册 ----------------
+
+    def start(self):
+        """开启 tracemalloc (应在创建 Trader 之前调用，之后的分配才会被跟踪)"""
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+
+    def stop(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._previous_sites = None
+
+    def register_namespace(self, name, getter, by_prefix=False):
+        """
+        注册一个缓存容器: getter() 返回容器对象 (dict / deque / 任意对象)
+        by_prefix=True 时容器为 {键: 值} 且按键的第一段 (':' 之前) 拆分为多个命名空间 (如 CacheManager)
+        """
+        self._namespaces[name] = (getter, by_prefix)
+
+    def register_shared(self, getter):
+        """注册被多个 Trader 共享的对象 (交易所 / AI / MarketDataService 等)，不计入单个 Trader"""
+        self._shared.append(getter)
+
+    def due(self, loop_count):
+        return self.enabled and loop_count % self.interval_ticks == 0
+
+    # ---------------- 采样 ----------------
+
+    def _shared_ids(self, traders):
+        ids = {id(t) for t in traders}
+        # 多个 Trader 的属性指向同一对象 (全局单例如 state_store、共享的服务) 时不计入任何一个 Trader
+        owners = {}
+        for trader in traders:
+            for value in vars(trader).values():
+                owners[id(value)] = owners.get(id(value), 0) + 1
+        ids.update(oid for oid, count in owners.items() if count > 1)
+        for getter in self._shared:
+            try:
+                obj = getter()
+            except Exception:
+                continue
+            if obj is not None:
+                ids.add(id(obj))
+        return ids
+
+    def _containers(self):
+        """各命名空间的容器: 名称 -> (容器, 按前缀拆分时为条目的浅拷贝 [(键, 值)]，否则 None)"""
+        result = {}
+        for name, (getter, by_prefix) in self._namespaces.items():
+            try:
+                container = getter()
+            except Exception as e:
+                self.logger.debug(f"内存剖析: 读取命名空间 {name} 失败: {e}")
+                continue
+            if container is None:
+                continue
+            entries = list(container.items()) if by_prefix and isinstance(container, dict) else None
+            result[name] = (container, entries)
+        return result
+
+    @staticmethod
+    def _split_prefixes(containers):
+        """展开按前缀拆分的命名空间 (如 CacheManager): 名称:前缀 -> (容器, 条目列表)"""
+        result = {}
+        for name, (container, entries) in containers.items():
+            if entries is None:
+                result[name] = (container, None)
+                continue
+            groups = {}
+            for key, value in entries:
+                prefix = str(key).split(':', 1)[0]
+                groups.setdefault(f"{name}:{prefix}", []).append((key, value))
+            result.update({ns: (container, items) for ns, items in groups.items()})
+        return result
+
+    def _measure_namespaces(self, containers, now):
+        report = {}
+        for name, (container, entries) in containers.items():
+            seen = set()
+            if entries is None:
+                size = deep_sizeof(container, seen)
+                count = len(container) if hasattr(container, '__len__') else None
+                expired = 0
+            else:
+                size = sum(sys.getsizeof(k) + deep_sizeof(v, seen) for k, v in entries)
+                count = len(entries)
+                # CacheManager 只在 get 时淘汰过期条目，不再被读取的键 (如已移除的交易对) 会一直留在内存中
+                expired = sum(1 for _, v in entries
+                              if isinstance(v, dict) and v.get('expires_at', now) < now)
+            report[name] = {'entries': count, 'bytes': size, 'expired': expired}
+        return report
+
+    def _cache_index(self, containers, symbols):
+        """遍历一次全部缓存条目，按交易对分组: symbol -> [值, ...] (每个 Trader 不必各扫一遍)"""
+        index = {}
+        for container, entries in containers.values():
+            if entries is not None:
+                for key, value in entries:
+                    symbol = _key_symbol(str(key), symbols)
+                    if symbol is not None:
+                        index.setdefault(symbol, []).append(value)
+            elif isinstance(container, dict):
+                for key, value in list(container.items()):
+                    if isinstance(key, tuple):
+                        key = next((part for part in key if isinstance(part, str) and part in symbols), None)
+                    if isinstance(key, str) and key in symbols:
+                        index.setdefault(key, []).append(value)
+        return index
+
+    def _measure_trader(self, symbol, own_size, attrs, shared_ids, cached):
+        """按属性累计 Trader 保留的内存；该交易对的缓存条目计入 'cache'"""
+        seen = set(shared_ids)  # 已包含全部 Trader 自身，避免经互相引用计入其他 Trader
+        parts = {}
+        for attr, value in attrs:
+            size = deep_sizeof(value, seen)
+            if size:
+                parts[attr] = size
+        cache_bytes = sum(deep_sizeof(value, seen) for value in cached)
+        if cache_bytes:
+            parts['cache'] = cache_bytes
+        total = own_size + sum(parts.values())
+        top = sorted(parts.items(), key=lambda kv: -kv[1])[:3]
+        return {'symbol': symbol, 'bytes': total, 'top': [{'attr': k, 'bytes': v} for k, v in top]}
+
+    def _tracemalloc_report(self, snapshot, current, peak):
+        if snapshot is None:
+            return None
+        # [Optimization] Snapshot.filter_traces / compare_to 在 Python 层逐条匹配 trace，几十万条时需要数秒；
+        # 这里只按行号分组一次，过滤与对比都在分组结果上完成，也不必保留上一次的完整快照
+        stats = [stat for stat in snapshot.statistics('lineno')
+                 if stat.traceback[0].filename not in _IGNORED_FILES]
+        sites = {stat.traceback: (stat.size, stat.count) for stat in stats}
+        top = [{'site': _site(stat.traceback[0]), 'size': stat.size, 'count': stat.count} for stat in stats[:self.top]]
+        growth = []
+        if self._previous_sites is not None:
+            diffs = []
+            for key, (size, count) in sites.items():
+                old_size, old_count = self._previous_sites.get(key, (0, 0))
+                if size > old_size:
+                    diffs.append((size - old_size, count - old_count, size, key))
+            diffs.sort(key=lambda d: -d[0])
+            growth = [{'site': _site(key[0]), 'size_diff': diff, 'size': size, 'count_diff': count_diff}
+                      for diff, count_diff, size, key in diffs[:self.top]]
+        self._previous_sites = sites
+        return {'current': current, 'peak': peak, 'top': top, 'growth': growth}
+
+    def _capture(self, traders):
+        """事件循环上的部分: tracemalloc 快照与各容器 / Trader 属性的浅拷贝 (只复制引用)"""
+        t0 = time.perf_counter()
+        snapshot, current, peak = None, 0, 0
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+        return {
+            'timestamp': time.time(),
+            'containers': self._containers(),
+            'shared_ids': self._shared_ids(traders),
+            'traders': [(t.symbol, sys.getsizeof(t), list(vars(t).items())) for t in traders],
+            'snapshot': snapshot,
+            'traced': (current, peak),
+            'capture_ms': (time.perf_counter() - t0) * 1000,
+        }
+
+    def sample(self, traders):
+        """同步采样一次，返回报告 (基准 / 离线分析用；主循环使用 sample_in_background)"""
+        return self._analyze(self._capture(traders))
+
+    def sample_in_background(self, traders):
+        """
+        事件循环上只做快照，度量、对比、告警与导出交给工作线程；返回 asyncio.Task
+        上一次采样尚未完成时跳过本次 (返回 None)
+        """
+        if self._task is not None and not self._task.done():
+            self.logger.debug("内存剖析: 上一次采样尚未完成，跳过")
+            return None
+        capture = self._capture(traders)
+        self._task = asyncio.get_running_loop().create_task(self._finish(capture))
+        return self._task
+
+    async def _finish(self, capture):
+        try:
+            report = await asyncio.to_thread(self._analyze, capture)
+            self.log_report(report)
+            return report
+        except Exception as e:
+            self.logger.warning(f"⚠️ 内存剖析采样失败: {e}")
+
+    def _analyze(self, capture):
+        """工作线程中的部分: 引用图遍历、分配点分组与对比；同时记录增长历史、更新指标、检测泄漏并导出 JSON"""
+        t0 = time.perf_counter()
+        now = capture['timestamp']
+        containers = self._split_prefixes(capture['containers'])
+        shared_ids = capture['shared_ids']
+        namespaces = self._measure_namespaces(containers, now)
+        index = self._cache_index(containers, {symbol for symbol, _, _ in capture['traders']})
+        per_trader = [self._measure_trader(symbol, size, attrs, shared_ids, index.get(symbol, ()))
+                      for symbol, size, attrs in capture['traders']]
+        per_trader.sort(key=lambda r: -r['bytes'])
+        traced = self._tracemalloc_report(capture['snapshot'], *capture['traced'])
+        rss = None
+        try:
+            import psutil
+            rss = psutil.Process().memory_info().rss
+        except ImportError:
+            pass
+
+        trader_total = sum(r['bytes'] for r in per_trader)
+        report = {
+            'timestamp': now,
+            'rss': rss,
+            'traced': traced,
+            'traders': {
+                'count': len(per_trader),
+                'total_bytes': trader_total,
+                'avg_bytes': trader_total // len(per_trader) if per_trader else 0,
+                'largest': per_trader[:self.top],
+            },
+            'namespaces': dict(sorted(namespaces.items(), key=lambda kv: -kv[1]['bytes'])),
+        }
+
+        # 增长跟踪 (序列名: trader:<symbol> / ns:<命名空间> / traced)
+        series = {f"trader:{r['symbol']}": r['bytes'] for r in per_trader}
+        series.update({f"ns:{name}": item['bytes'] for name, item in namespaces.items()})
+        if traced:
+            series['traced'] = traced['current']
+        for name in list(self.history):
+            if name not in series:
+                del self.history[name]
+                self._alerting.discard(name)
+        self.samples += 1
+        report['alerts'] = self._track(series, now, traced) if self.samples > self.warmup_samples else []
+
+        for r in per_trader:
+            TRADER_BYTES.labels(r['symbol']).set(r['bytes'])
+        for name, item in namespaces.items():
+            NAMESPACE_BYTES.labels(name).set(item['bytes'])
+        if traced:
+            TRACED_BYTES.set(traced['current'])
+
+        report['capture_ms'] = round(capture['capture_ms'], 1)
+        report['duration_ms'] = round((time.perf_counter() - t0) * 1000 + capture['capture_ms'], 1)
+        self.latest = report
+        self._export(report)
+        return report
+
+    def _track(self, series, now, traced):
+        alerts = []
+        for name, value in series.items():
+            points = self.history.get(name)
+            if points is None:
+                points = self.history[name] = deque(maxlen=self.leak_samples)
+            points.append((now, value))
+            values = [v for _, v in points]
+            growing = (len(values) == self.leak_samples
+                       and all(b > a for a, b in zip(values, values[1:]))
+                       and values[-1] - values[0] >= self.leak_min)
+            if not growing:
+                self._alerting.discard(name)
+                continue
+            alert = {'series': name, 'growth_bytes': values[-1] - values[0], 'bytes': values[-1],
+                     'minutes': round((points[-1][0] - points[0][0]) / 60, 1)}
+            alerts.append(alert)
+            if name in self._alerting:
+                continue
+            self._alerting.add(name)
+            sites = ""
+            if name == 'traced' and traced and traced['growth']:
+                sites = " | 增长最多: " + ", ".join(f"{g['site']} +{g['size_diff'] / MB:.1f}MB"
+                                                 for g in traced['growth'][:3])
+            self.logger.warning(f"🧠 [MEMORY] 疑似内存泄漏: {name} 连续 {self.leak_samples} 次采样增长 "
+                                f"+{alert['growth_bytes'] / MB:.1f}MB ({alert['minutes']:.0f} 分钟内)，"
+                                f"当前 {values[-1] / MB:.1f}MB{sites}")
+        return alerts
+
+    def _export(self, report):
+        if not self.export_path:
+            return
+        try:
+            directory = os.path.dirname(self.export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.export_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.logger.warning(f"⚠️ 导出内存剖析报告失败: {e}")
+
+    # ---------------- 报告 ----------------
+
+    def log_report(self, report=None):
+        report = report or self.latest
+        if not report:
+            return
+        traders = report['traders']
+        head = f"🧠 内存剖析 (采样耗时 {report['duration_ms']:.0f}ms，其中阻塞事件循环 {report['capture_ms']:.0f}ms)"
+        if report['rss']:
+            head += f" | RSS {report['rss'] / MB:.1f}MB"
+        if report['traced']:
+            head += f" | tracemalloc {report['traced']['current'] / MB:.1f}MB (峰值 {report['traced']['peak'] / MB:.1f}MB)"
+        self.logger.info(head)
+        if traders['count']:
+            self.logger.info(f"   Trader: {traders['count']} 个，共 {traders['total_bytes'] / MB:.1f}MB，"
+                             f"平均 {traders['avg_bytes'] / 1024:.0f}KB "
+                             f"(100 个交易对约 {traders['avg_bytes'] * 100 / MB:.0f}MB)")
+            for r in traders['largest'][:5]:
+                parts = ", ".join(f"{p['attr']} {p['bytes'] / 1024:.0f}KB" for p in r['top'])
+                self.logger.info(f"   {r['symbol']:<22} {r['bytes'] / 1024:>8.0f}KB | {parts}")
+        for name, item in list(report['namespaces'].items())[:self.top]:
+            expired = f" (过期未清理 {item['expired']})" if item['expired'] else ""
+            entries = f"{item['entries']} 条" if item['entries'] is not None else "-"
+            self.logger.info(f"   缓存 {name:<24} {entries:>8} | {item['bytes'] / 1024:>8.0f}KB{expired}")
+        if report['traced'] and report['traced']['growth']:
+            self.logger.info("   分配增长 (较上次采样): " + " | ".join(
+                f"{g['site']} +{g['size_diff'] / 1024:.0f}KB" for g in report['traced']['growth'][:5]))
+
+    def summary(self):
+        """健康报告用的精简摘要"""
+        report = self.latest
+        if not report:
+            return None
+        return {
+            'rss_mb': round(report['rss'] / MB, 1) if report['rss'] else None,
+            'traced_mb': round(report['traced']['current'] / MB, 1) if report['traced'] else None,
+            'traders': report['traders']['count'],
+            'trader_avg_kb': round(report['traders']['avg_bytes'] / 1024, 1),
+            'namespaces_mb': round(sum(i['bytes'] for i in report['namespaces'].values()) / MB, 2),
+            'alerts': [a['series'] for a in report['alerts']],
+        }
+
+
+# 全局单例 (由 OKXBot_Plus.main 按 trading.performance.memory 调用 configure / start)
+memory_profiler = MemoryProfiler()
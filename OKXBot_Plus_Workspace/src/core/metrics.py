@@ -0,0 +1,315 @@
+"""
+[New] 运行指标 (Metrics) 与 Prometheus 导出
+
+HealthMonitor 只有 okx / deepseek 两个调用总数，且每 10 轮才写一次日志，无法横向比较多个实例的性能变化。
+这里提供一个轻量的指标注册表 (接口与 prometheus_client 一致: counter / gauge / histogram + labels())，
+并通过本地 HTTP 端点 /metrics 以 Prometheus 文本格式 (0.0.4) 导出，由 Prometheus 抓取:
+
+    crypto_oracle_api_request_duration_seconds{exchange,endpoint,status}   交易所 REST 请求延迟 (按接口)
+    crypto_oracle_rate_limiter_wait_seconds                                全局限频器排队时间
+    crypto_oracle_cache_requests_total{namespace,result}                   缓存命中/未命中
+    crypto_oracle_event_loop_lag_seconds                                   事件循环延迟
+    crypto_oracle_ai_request_duration_seconds{model,status}                AI 请求延迟
+    crypto_oracle_ai_tokens_total{model,type}                              AI token 用量
+    crypto_oracle_order_round_trip_seconds{symbol,side,status}             下单往返时间
+    crypto_oracle_trader_tick_duration_seconds{symbol}                     单个交易对每轮耗时
+    crypto_oracle_loop_duration_seconds                                    主循环每轮耗时
+
+记录只是内存中的加法 (不加锁，只在事件循环线程中记录)；HTTP 端点默认关闭 (trading.performance.metrics)。
+"""
+
+import time
+import logging
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+AI_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = float(value)
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+    def dec(self, amount=1.0):
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """按标签取子指标 (首次使用时创建)，标签值按 labelnames 的顺序传入"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} 需要标签 {self.labelnames}，收到 {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        return [f"{self.name}{_label_str(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._children.items()]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1.0):
+        self.labels().dec(amount)
+
+    def _samples(self):
+        return [f"{self.name}{_label_str(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._children.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _samples(self):
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = _label_str(self.labelnames, values, ('le', _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _label_str(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.logger = logging.getLogger("crypto_oracle")
+        self._metrics = {}
+        self._collectors = []
+        self._json_endpoints = {}
+        self._runner = None
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, callback):
+        """抓取前调用的回调 (用于刷新 Gauge，例如运行时长、交易对数量)"""
+        self._collectors.append(callback)
+
+    def register_json_endpoint(self, path, callback):
+        """在指标端点上附加一个 JSON 接口: callback(query) -> 可 JSON 序列化的对象 (如 /traces)"""
+        self._json_endpoints[path] = callback
+
+    def render(self):
+        for callback in self._collectors:
+            try:
+                callback()
+            except Exception as e:
+                self.logger.debug(f"指标采集回调失败: {e}")
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    # ---------------- HTTP 端点 ----------------
+
+    async def start_server(self, host='127.0.0.1', port=9464):
+        """在事件循环内启动 /metrics 端点 (重复调用无副作用)"""
+        if self._runner is not None:
+            return
+        from aiohttp import web
+
+        async def handle_metrics(request):
+            return web.Response(body=self.render().encode('utf-8'), headers={'Content-Type': self.CONTENT_TYPE})
+
+        def json_handler(callback):
+            async def handle(request):
+                try:
+                    return web.json_response(callback(dict(request.query)))
+                except (TypeError, ValueError) as e:
+                    return web.json_response({'error': str(e)}, status=400)
+            return handle
+
+        app = web.Application()
+        app.router.add_get('/metrics', handle_metrics)
+        for path, callback in self._json_endpoints.items():
+            app.router.add_get(path, json_handler(callback))
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        self._runner = runner
+        self.logger.info(f"📈 指标端点已启动: http://{host}:{port}/metrics")
+
+    async def stop_server(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def instrument_exchange(exchange, name='okx'):
+    """
+    给 ccxt 交易所实例的 fetch2 (所有 REST 请求的统一入口) 加上计时，按接口路径 (如 market/candles) 记录延迟，
+    同时累计 HealthMonitor 的 API 调用计数。非 ccxt 交易所 (模拟撮合) 不做处理。
+    """
+    fetch2 = getattr(exchange, 'fetch2', None)
+    if fetch2 is None or getattr(exchange, '_crypto_oracle_instrumented', False):
+        return exchange
+    from core.monitor import health_monitor
+
+    async def timed_fetch2(path, api='public', method='GET', params={}, headers=None, body=None, config={}):
+        t0 = time.perf_counter()
+        status = 'ok'
+        try:
+            return await fetch2(path, api, method, params, headers, body, config)
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            API_LATENCY.labels(name, path, status).observe(time.perf_counter() - t0)
+            health_monitor.record_api_call(name, success=(status == 'ok'))
+
+    exchange.fetch2 = timed_fetch2
+    exchange._crypto_oracle_instrumented = True
+    return exchange
+
+
+# 全局注册表 (HTTP 端点由 OKXBot_Plus.main 按 trading.performance.metrics 启动)
+metrics = MetricsRegistry()
+
+API_LATENCY = metrics.histogram(
+    'crypto_oracle_api_request_duration_seconds', 'Exchange REST request latency by endpoint',
+    ('exchange', 'endpoint', 'status'))
+RATE_LIMIT_WAIT = metrics.histogram(
+    'crypto_oracle_rate_limiter_wait_seconds', 'Time spent waiting for a global rate limiter token', (),
+    LAG_BUCKETS)
+CACHE_REQUESTS = metrics.counter(
+    'crypto_oracle_cache_requests_total', 'Cache lookups by namespace and result (hit/miss)',
+    ('namespace', 'result'))
+LOOP_LAG = metrics.histogram(
+    'crypto_oracle_event_loop_lag_seconds', 'Event loop scheduling lag', (), LAG_BUCKETS)
+AI_LATENCY = metrics.histogram(
+    'crypto_oracle_ai_request_duration_seconds', 'AI completion request latency', ('model', 'status'), AI_BUCKETS)
+AI_TOKENS = metrics.counter(
+    'crypto_oracle_ai_tokens_total', 'AI tokens consumed', ('model', 'type'))
+ORDER_RTT = metrics.histogram(
+    'crypto_oracle_order_round_trip_seconds', 'Order placement round-trip time', ('symbol', 'side', 'status'))
+TICK_DURATION = metrics.histogram(
+    'crypto_oracle_trader_tick_duration_seconds', 'DeepSeekTrader.run duration per symbol', ('symbol',))
+LOOP_DURATION = metrics.histogram(
+    'crypto_oracle_loop_duration_seconds', 'Main loop iteration duration (excluding sleep)', (),
+    DEFAULT_BUCKETS + (30.0, 60.0))
+TRADERS = metrics.gauge('crypto_oracle_traders', 'Number of active traders')
+START_TIME = metrics.gauge('crypto_oracle_start_time_seconds', 'Process start time (unix seconds)')
+START_TIME.set(time.time())
@@ -1,11 +1,28 @@
 import time
-try:
-    import psutil
-except ImportError:
-    psutil = None
+import asyncio
+from collections import deque
 import logging
 from datetime import datetime
 
+from core.tick_profiler import tick_profiler
+from core.metrics import LOOP_LAG
+from core.loop_watchdog import loop_watchdog
+from core.memory_profiler import memory_profiler
+
+_psutil = False
+
+
+def _load_psutil():
+    """[Optimization] psutil 在首次采集系统指标时才导入 (未安装时返回 None)"""
+    global _psutil
+    if _psutil is False:
+        try:
+            import psutil
+            _psutil = psutil
+        except ImportError:
+            _psutil = None
+    return _psutil
+
 class HealthMonitor:
     """系统健康状态监控器"""
     def __init__(self):
@@ -21,12 +38,57 @@ class HealthMonitor:
             'failed': 0
         }
         self.system_metrics = {}
+        # [New] 事件循环延迟 (Event Loop Lag) 采样，单位秒
+        self.loop_lag_samples = deque(maxlen=600)
+        self.loop_lag_interval = 0.5
+        self._loop_lag_task = None
+    
+    async def _loop_lag_probe(self):
+        """
+        [New] 事件循环延迟探针
+        每隔 interval 睡眠一次，实际唤醒时间与预期之差即为事件循环被阻塞的时长
+        """
+        loop = asyncio.get_running_loop()
+        interval = self.loop_lag_interval
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - start - interval)
+            self.loop_lag_samples.append(lag)
+            LOOP_LAG.observe(lag)
+
+    def start_loop_lag_probe(self, interval=0.5):
+        """启动事件循环延迟探针 (需在事件循环内调用，重复调用无副作用)"""
+        if self._loop_lag_task and not self._loop_lag_task.done():
+            return self._loop_lag_task
+        self.loop_lag_interval = interval
+        self._loop_lag_task = asyncio.create_task(self._loop_lag_probe())
+        return self._loop_lag_task
+
+    def stop_loop_lag_probe(self):
+        if self._loop_lag_task and not self._loop_lag_task.done():
+            self._loop_lag_task.cancel()
+        self._loop_lag_task = None
+
+    def get_loop_lag_stats(self):
+        """事件循环延迟统计 (毫秒)"""
+        samples = sorted(self.loop_lag_samples)
+        if not samples:
+            return {'samples': 0, 'avg_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+        p95_idx = min(len(samples) - 1, int(len(samples) * 0.95))
+        return {
+            'samples': len(samples),
+            'avg_ms': sum(samples) / len(samples) * 1000,
+            'p95_ms': samples[p95_idx] * 1000,
+            'max_ms': samples[-1] * 1000,
+        }
     
     def record_api_call(self, provider, success=True):
         """记录API调用"""
-        self.api_calls[provider]['total'] += 1
+        stats = self.api_calls.setdefault(provider, {'total': 0, 'failed': 0})
+        stats['total'] += 1
         if not success:
-            self.api_calls[provider]['failed'] += 1
+            stats['failed'] += 1
     
     def record_trade_execution(self, success=True):
         """记录交易执行"""
@@ -40,6 +102,7 @@ class HealthMonitor:
         """收集系统指标"""
         try:
             # 如果 psutil 不存在，跳过系统指标收集
+            psutil = _load_psutil()
             if psutil is None:
                 self.system_metrics = {
                     'cpu_usage': 0,
@@ -49,7 +112,8 @@ class HealthMonitor:
                 return
 
             # CPU 使用率
-            cpu_usage = psutil.cpu_percent(interval=0.1)
+            # [Fix] interval=0.1 会让事件循环线程 sleep 100ms；interval=None 返回距上次调用以来的使用率，不阻塞
+            cpu_usage = psutil.cpu_percent(interval=None)
             
             # 内存使用情况
             memory = psutil.virtual_memory()
@@ -96,6 +160,10 @@ class HealthMonitor:
             'system_metrics': self.system_metrics,
             'api_calls': self.api_calls,
             'trade_executions': self.trade_executions,
+            'loop_lag': self.get_loop_lag_stats(),
+            'tick_profile': tick_profiler.summary(),
+            'blocking_calls': loop_watchdog.report(),
+            'memory': memory_profiler.summary(),
             'health_status': self._assess_health_status()
         }
         
@@ -127,6 +195,13 @@ class HealthMonitor:
             issues.append(f"磁盘使用率过高: {self.system_metrics['disk_usage']}%")
             status = "CRITICAL"
         
+        # [New] 检查事件循环延迟 (p95 > 200ms 说明有同步任务阻塞主循环)
+        lag = self.get_loop_lag_stats()
+        if lag['samples'] and lag['p95_ms'] > 200:
+            issues.append(f"事件循环延迟过高: p95 {lag['p95_ms']:.0f}ms / max {lag['max_ms']:.0f}ms")
+            if status == "HEALTHY":
+                status = "WARNING"
+        
         # 检查 API 调用失败率
         for provider, stats in self.api_calls.items():
             if stats['total'] > 0:
@@ -165,6 +240,42 @@ class HealthMonitor:
         self.logger.info(f"   磁盘使用率: {metrics.get('disk_usage', 0):.1f}%")
         self.logger.info(f"   网络发送: {metrics.get('bytes_sent', 0):.1f}MB | 接收: {metrics.get('bytes_recv', 0):.1f}MB")
         
+        lag = report['loop_lag']
+        if lag['samples']:
+            self.logger.info(f"   事件循环延迟: avg {lag['avg_ms']:.1f}ms | p95 {lag['p95_ms']:.1f}ms | max {lag['max_ms']:.1f}ms ({lag['samples']} 样本)")
+        
+        # [New] 主循环各阶段耗时分布 (统计窗口为上次报告至今)
+        profile = report['tick_profile']
+        if profile['phases']:
+            self.logger.info("-" * 80)
+            self.logger.info(f"⏱️ 阶段耗时 (最近 {profile['window_seconds']:.0f}s):")
+            for name, stats in profile['phases'].items():
+                self.logger.info(f"   {name:<22} n={stats['count']:<5} p50 {stats['p50_ms']:.1f}ms | "
+                                 f"p95 {stats['p95_ms']:.1f}ms | p99 {stats['p99_ms']:.1f}ms | max {stats['max_ms']:.1f}ms")
+            slowest = profile['slowest_symbols'].get('run')
+            if slowest:
+                self.logger.info("   最慢交易对 (run p95): " +
+                                 " | ".join(f"{s['symbol']} {s['p95_ms']:.0f}ms" for s in slowest))
+            tick_profiler.reset()
+        
+        # [New] 阻塞事件循环的调用点 (按累计阻塞时间排序)
+        blocking = report['blocking_calls']
+        if blocking['offenders']:
+            self.logger.info("-" * 80)
+            self.logger.info(f"🐢 事件循环阻塞调用 (共 {blocking['stalls']} 次):")
+            for item in blocking['offenders']:
+                self.logger.info(f"   {item['site']} | {item['count']} 次 | 累计 {item['total_ms']:.0f}ms | "
+                                 f"最长 {item['max_ms']:.0f}ms | 最内层: {item['leaf']}")
+
+        # [New] 内存剖析摘要 (最近一次采样，详细报告见 log/memory_profile.json)
+        memory = report['memory']
+        if memory:
+            self.logger.info("-" * 80)
+            traced = f" | tracemalloc {memory['traced_mb']}MB" if memory['traced_mb'] is not None else ""
+            alerts = f" | ⚠️ 持续增长: {', '.join(memory['alerts'])}" if memory['alerts'] else ""
+            self.logger.info(f"🧠 内存: RSS {memory['rss_mb']}MB{traced} | Trader 平均 {memory['trader_avg_kb']}KB "
+                             f"x {memory['traders']} | 缓存 {memory['namespaces_mb']}MB{alerts}")
+        
         # API 调用统计
         self.logger.info("-" * 80)
         self.logger.info("🌐 API 调用统计:")
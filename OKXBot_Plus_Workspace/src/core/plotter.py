@@ -1,19 +1,13 @@
+"""
+PnL 图表绘制
+[Optimization] matplotlib 与系统字体扫描 (fontManager.ttflist) 改为首次绘图时才加载，
+导入本模块不再拖慢启动
+"""
 import pandas as pd
-import matplotlib
-# 设置非交互式后端，防止在非主线程中报错
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import os
 import sys
 import logging
-
-# [新增] 在绘图模块内部也屏蔽字体警告，防止单独运行时刷屏
-logging.getLogger("matplotlib").setLevel(logging.ERROR)
-logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
-
-# 设置中文字体 (优先尝试 Linux 常见字体，然后是 Windows 字体)
-import matplotlib.font_manager as fm
+import threading
 
 # 1. 定义候选字体列表 (中文优先)
 font_candidates = [
@@ -23,26 +17,56 @@ font_candidates = [
     'DejaVu Sans', 'Liberation Sans', 'Arial' # English Fallback
 ]
 
-# 2. 动态检测可用字体
-def get_available_font():
-    available_fonts = set(f.name for f in fm.fontManager.ttflist)
-    for font in font_candidates:
-        if font in available_fonts:
-            return font
-    return 'sans-serif'
+_pyplot = None
+_pyplot_lock = threading.Lock()
+selected_font = None
+
+
+def _load_pyplot():
+    """首次调用时导入 matplotlib (Agg 后端) 并选择可用字体，之后直接返回缓存的 pyplot"""
+    global _pyplot
+    if _pyplot is not None:
+        return _pyplot
+    with _pyplot_lock:
+        if _pyplot is None:
+            _pyplot = _init_pyplot()
+    return _pyplot
+
 
-selected_font = get_available_font()
-# print(f"Plotter using font: {selected_font}")
+def _init_pyplot():
+    global selected_font
+    import matplotlib
+    # 设置非交互式后端，防止在非主线程中报错
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import matplotlib.font_manager as fm
 
-plt.rcParams['font.sans-serif'] = [selected_font] + font_candidates
-plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    # [新增] 在绘图模块内部也屏蔽字体警告，防止单独运行时刷屏
+    logging.getLogger("matplotlib").setLevel(logging.ERROR)
+    logging.getLogger("matplotlib.font_manager").setLevel(logging.ERROR)
 
-def generate_pnl_chart(csv_path=None, output_path=None, verbose=True):
+    # 2. 动态检测可用字体
+    available_fonts = set(f.name for f in fm.fontManager.ttflist)
+    selected_font = next((font for font in font_candidates if font in available_fonts), 'sans-serif')
+
+    plt.rcParams['font.sans-serif'] = [selected_font] + font_candidates
+    plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    return plt
+
+def generate_pnl_chart(csv_path=None, output_path=None, verbose=True, df=None, dpi=300, raise_errors=False):
     """
     读取 PnL 历史数据并生成折线图
+    csv_path: 指定时读取该 CSV；df 与 csv_path 都未指定时读取 data/pnl_history (PnLStore)
+    df: [New] 直接传入权益序列 (如 PnLStore.frame() 的预聚合结果)，此时不再读取 CSV
+    dpi: [New] 输出分辨率 (运行中由 core.chart_renderer 按配置传入)
+    raise_errors: 绘图异常向上抛出 (渲染进程中没有配置日志，由 core.chart_renderer 交回主进程记录)
     """
+    plt = _load_pyplot()
+    import matplotlib.dates as mdates
+
     # 智能推断路径
     project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    project_root = os.getenv('CRYPTO_ORACLE_HOME', project_root)
     
     # 检查是否使用了支持中文的字体
     has_chinese_font = any(f in selected_font for f in ['YaHei', 'SimHei', 'SimSun', 'WenQuanYi', 'Droid', 'CJK', 'PingFang', 'Heiti'])
@@ -58,25 +82,35 @@ def generate_pnl_chart(csv_path=None, output_path=None, verbose=True):
         'label2': '盈亏率 (%)' if has_chinese_font else 'PnL Rate (%)'
     }
 
-    if csv_path is None:
-        csv_path = os.path.join(project_root, "data", "pnl_history.csv")
-        # 回退兼容：如果 data 下没有，但根目录有，则使用根目录的 (迁移过渡期)
-        if not os.path.exists(csv_path) and os.path.exists(os.path.join(project_root, "pnl_history.csv")):
-             csv_path = os.path.join(project_root, "pnl_history.csv")
+    if df is None and csv_path is None:
+        # [Fix] RiskManager 已改为写入 PnLStore (data/pnl_history/)，不再生成 pnl_history.csv；
+        # 旧版 CSV 只作为 PnLStore 首次打开时的导入源
+        from core.pnl_store import PnLStore
+        data_dir = os.path.join(project_root, "data")
+        store_dir = os.path.join(data_dir, "pnl_history")
+        legacy_csv = os.path.join(data_dir, "pnl_history.csv")
+        if not os.path.isdir(store_dir) and not os.path.exists(legacy_csv):
+            if verbose:
+                print(f"错误: 找不到权益记录 {store_dir}")
+            return
+        df = PnLStore(store_dir, legacy_csv=legacy_csv).frame()
 
     if output_path is None:
         # [New] 按日期命名图片
         today_str = pd.Timestamp.now().strftime('%Y%m%d')
         output_path = os.path.join(project_root, "png", f"pnl_chart_{today_str}.png")
 
-    if not os.path.exists(csv_path):
+    if df is None and not os.path.exists(csv_path):
         if verbose:
             print(f"错误: 找不到文件 {csv_path}")
         return
 
     try:
         # 读取 CSV
-        df = pd.read_csv(csv_path)
+        if df is None:
+            df = pd.read_csv(csv_path)
+        else:
+            df = df.copy()
         
         # 转换时间戳
         df['timestamp'] = pd.to_datetime(df['timestamp'])
@@ -131,7 +165,7 @@ def generate_pnl_chart(csv_path=None, output_path=None, verbose=True):
             os.makedirs(output_dir)
 
         # 保存图片
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+        plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
         if verbose:
             print(f"✅ 图表已生成并保存至: {output_path}")
         
@@ -141,9 +175,12 @@ def generate_pnl_chart(csv_path=None, output_path=None, verbose=True):
         plt.close()
 
     except Exception as e:
-        print(f"生成图表时发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        plt.close('all')
+        if raise_errors:
+            raise
+        logging.getLogger("crypto_oracle").error(f"❌ 生成图表时发生错误: {e}", exc_info=True)
 
 if __name__ == "__main__":
+    # 直接运行本文件 (python core/plotter.py) 时 src 不在 sys.path 中
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     generate_pnl_chart()
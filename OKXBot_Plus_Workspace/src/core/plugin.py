@@ -2,19 +2,40 @@ import os
 import importlib
 import logging
 from abc import ABC, abstractmethod
+from core.records import Record
 
 class Plugin(ABC):
-    """插件基类"""
+    """
+    插件基类
+    [New] 外部 I/O (HTTP 等) 应通过 call_external 发起: 录制时写入录制日志，回放时直接返回录制结果。
+    全部外部 I/O 都经 call_external (或没有外部 I/O) 的插件设置 replayable = True；
+    其余插件在回放时不会加载，避免回放访问网络
+    """
     name = "BasePlugin"
     description = "基础插件"
     version = "1.0.0"
     enabled = True
+    replayable = False
     
     def __init__(self, config, exchange=None, agent=None):
         self.config = config
         self.exchange = exchange
         self.agent = agent
         self.logger = logging.getLogger("crypto_oracle")
+        self.io = None  # 由 PluginManager 注入 (Recorder / 回放源)
+
+    async def call_external(self, key, func, *args, **kwargs):
+        """
+        执行一次外部调用 (返回值需可 JSON 序列化)
+        key: 调用标识 (如 'fear_greed_index')，回放时按 (插件名, key) 顺序匹配录制结果
+        """
+        if self.io is None:
+            return await func(*args, **kwargs)
+
+        async def invoke(_key):
+            return await func(*args, **kwargs)
+
+        return await self.io.call('plugin', self.name, invoke, (key,), {}, record_args=False)
     
     @abstractmethod
     async def initialize(self):
@@ -46,6 +67,17 @@ class PluginManager:
     def __init__(self):
         self.plugins = []
         self.logger = logging.getLogger("crypto_oracle")
+        self.io = None
+        self.replay = False
+
+    def configure_io(self, io, replay=False):
+        """
+        [New] 插件外部 I/O 的录制 / 回放 (须在 load_plugins 之前调用)
+        io: core.recorder.Recorder (录制) 或 backtest.replay.ReplayPluginIO (回放)
+        replay: 回放模式下跳过 replayable = False 的插件
+        """
+        self.io = io
+        self.replay = replay
     
     def load_plugins(self, config, exchange=None, agent=None):
         """加载插件"""
@@ -68,8 +100,12 @@ class PluginManager:
                         # 查找插件类
                         for name, obj in module.__dict__.items():
                             if isinstance(obj, type) and issubclass(obj, Plugin) and obj != Plugin:
+                                if self.replay and not obj.replayable:
+                                    self.logger.warning(f"⚠️ 回放模式跳过插件 {obj.name}: 其外部 I/O 未经 call_external，无法回放")
+                                    continue
                                 # 创建插件实例
                                 plugin = obj(config, exchange, agent)
+                                plugin.io = self.io
                                 self.plugins.append(plugin)
                                 self.logger.debug(f"加载插件: {plugin.name} v{plugin.version}")
                     except Exception as e:
@@ -98,6 +134,11 @@ class PluginManager:
     
     async def on_trade(self, trade_data):
         """调用所有插件的 on_trade 方法"""
+        # [Optimization] 记录类型 (TickResult 等) 只在交给插件时转换为字典
+        if isinstance(trade_data, Record):
+            if not any(plugin.enabled for plugin in self.plugins):
+                return
+            trade_data = trade_data.to_dict()
         for plugin in self.plugins:
             if plugin.enabled:
                 try:
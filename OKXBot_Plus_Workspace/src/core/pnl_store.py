@@ -0,0 +1,333 @@
+"""
+[New] 权益时间序列存储 (PnL Store)
+
+替代单个只追加的 pnl_history.csv (每次回顾/绘图都要 pd.read_csv 整个文件):
+
+    data/pnl_history/
+        segments/YYYYMMDD.csv       当日原始记录 (每 60s 追加一行，格式与旧 CSV 相同)
+        segments/YYYYMMDD.parquet   跨日后压缩为 Parquet (未安装 pyarrow 时保留 CSV 分段)
+        rollup_1m.csv / rollup_1h.csv / rollup_1d.csv
+                                    预聚合降采样 (权益开/高/低/收 + 收盘盈亏)，桶结束时追加一行
+        meta.json                   已压缩分段的行数与最后压缩日期
+
+- append(): 写当日分段 + 更新内存中的最近记录缓存与各级未结束的聚合桶，均为 O(1)
+- tail(n) / count: 直接取内存缓存与计数，不读文件
+- frame(resolution): 绘图只读对应粒度的聚合文件 ('auto' 按时间跨度选择 1m / 1h / 1d)
+首次打开时若目录不存在且有旧版 CSV，按日期拆分导入。
+"""
+
+import os
+import importlib.util
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+# [Optimization] 只检测 pyarrow 是否已安装 (DataFrame.to_parquet 引擎)，不在导入时加载它；
+# pandas 在首次读写 Parquet 时才真正导入
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+COLUMNS = ['timestamp', 'total_equity', 'pnl_usdt', 'pnl_percent']
+ROLLUP_COLUMNS = ['timestamp', 'equity_open', 'equity_high', 'equity_low', 'total_equity',
+                  'pnl_usdt', 'pnl_percent', 'samples']
+
+# 粒度 -> (时间戳前缀长度, 桶起点补齐后缀)；时间戳格式固定为 '%Y-%m-%d %H:%M:%S'
+RESOLUTIONS = {
+    '1m': (16, ':00'),
+    '1h': (13, ':00:00'),
+    '1d': (10, ' 00:00:00'),
+}
+
+
+def _tail_line(path):
+    """读取文本文件最后一个非空行 (从文件末尾向前查找，与文件大小无关)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block = b''
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step) + block
+            lines = block.rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or pos == 0:
+                return lines[-1].decode('utf-8') if lines[-1] else None
+    return None
+
+
+class _Bucket:
+    """一个未结束的聚合桶"""
+    __slots__ = ('key', 'open', 'high', 'low', 'close', 'pnl', 'pct', 'samples')
+
+    def __init__(self, key, equity, pnl, pct):
+        self.key = key
+        self.open = self.high = self.low = self.close = equity
+        self.pnl = pnl
+        self.pct = pct
+        self.samples = 1
+
+    def add(self, equity, pnl, pct):
+        self.high = max(self.high, equity)
+        self.low = min(self.low, equity)
+        self.close = equity
+        self.pnl = pnl
+        self.pct = pct
+        self.samples += 1
+
+    def row(self, suffix):
+        return [self.key + suffix, self.open, self.high, self.low, self.close, self.pnl, self.pct, self.samples]
+
+
+class PnLStore:
+    """权益时间序列存储 (首次访问时才创建目录/导入旧 CSV，线程安全)"""
+
+    def __init__(self, directory, legacy_csv=None, tail_cache=1000):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.directory = directory
+        self.segment_dir = os.path.join(directory, 'segments')
+        self.meta_path = os.path.join(directory, 'meta.json')
+        self.legacy_csv = legacy_csv
+        self._lock = threading.RLock()
+        self._opened = False
+        self._recent = deque(maxlen=tail_cache)
+        self._meta = {'closed_rows': 0, 'closed_through': '', 'first_ts': None}
+        self._hot_rows = 0
+        self._day = None
+        self._buckets = {}
+        self._flushed = {}
+
+    # ---------------- 打开与恢复 ----------------
+
+    def _open(self):
+        if self._opened:
+            return
+        fresh = not os.path.isdir(self.directory)
+        os.makedirs(self.segment_dir, exist_ok=True)
+        if fresh and self.legacy_csv and os.path.isfile(self.legacy_csv):
+            self._import_legacy(self.legacy_csv)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self._meta.update(json.load(f))
+
+        for res, (width, suffix) in RESOLUTIONS.items():
+            last = _tail_line(self._rollup_path(res))
+            self._flushed[res] = last.split(',', 1)[0][:width] if last and not last.startswith('timestamp') else ''
+
+        # 重放未压缩的分段: 恢复未结束的聚合桶 (停机期间已结束的桶在此补写)，并填充最近记录缓存
+        self._hot_rows = 0
+        for day in self._hot_days():
+            for row in self._read_csv_rows(self._segment_path(day, 'csv')):
+                if not self._meta.get('first_ts'):
+                    self._meta['first_ts'] = row[0]
+                self._hot_rows += 1
+                self._roll(row)
+                self._recent.append(row)
+        self._opened = True
+
+        today = datetime.now().strftime('%Y%m%d')
+        self._day = today
+        self.compact(before=today)
+        if len(self._recent) < self._recent.maxlen:
+            self._backfill_recent()
+
+    def _import_legacy(self, path):
+        """按日期拆分导入旧版 pnl_history.csv (只在存储目录首次创建时执行)"""
+        df = pd.read_csv(path)
+        if df.empty:
+            return
+        df = df[COLUMNS]
+        df['timestamp'] = df['timestamp'].astype(str)
+        for day, group in df.groupby(df['timestamp'].str[:10].str.replace('-', ''), sort=True):
+            group.to_csv(self._segment_path(day, 'csv'), index=False, float_format='%.2f')
+        self.logger.info(f"📦 已导入旧版 PnL 历史: {path} ({len(df)} 条)")
+
+    def _hot_days(self):
+        """尚未压缩的分段 (日期升序)"""
+        closed = self._meta.get('closed_through', '')
+        return sorted(name[:8] for name in os.listdir(self.segment_dir)
+                      if name.endswith('.csv') and name[:8] > closed)
+
+    def _segment_path(self, day, ext):
+        return os.path.join(self.segment_dir, f"{day}.{ext}")
+
+    def _rollup_path(self, res):
+        return os.path.join(self.directory, f"rollup_{res}.csv")
+
+    @staticmethod
+    def _read_csv_rows(path):
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            next(f, None)
+            for line in f:
+                parts = line.rstrip('\n').split(',')
+                if len(parts) == 4:
+                    rows.append((parts[0], float(parts[1]), float(parts[2]), float(parts[3])))
+        return rows
+
+    def _backfill_recent(self):
+        """当日记录不足缓存长度时，从最近一个已压缩分段补齐"""
+        closed = self._meta.get('closed_through')
+        if not closed:
+            return
+        try:
+            df = self._read_segment(closed)
+        except Exception:
+            return
+        if df is None:
+            return
+        need = self._recent.maxlen - len(self._recent)
+        older = list(df.tail(need).itertuples(index=False, name=None))
+        self._recent.extendleft(reversed(older))
+
+    def _read_segment(self, day):
+        parquet = self._segment_path(day, 'parquet')
+        if os.path.exists(parquet):
+            return pd.read_parquet(parquet)
+        csv = self._segment_path(day, 'csv')
+        if os.path.exists(csv):
+            return pd.read_csv(csv)
+        return None
+
+    def _save_meta(self):
+        tmp = self.meta_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self.meta_path)
+
+    # ---------------- 聚合 ----------------
+
+    def _roll(self, row):
+        ts, equity, pnl, pct = row
+        for res, (width, suffix) in RESOLUTIONS.items():
+            key = ts[:width]
+            if key <= self._flushed[res]:
+                continue
+            bucket = self._buckets.get(res)
+            if bucket is not None and bucket.key == key:
+                bucket.add(equity, pnl, pct)
+                continue
+            if bucket is not None:
+                self._write_rollup(res, bucket.row(suffix))
+                self._flushed[res] = bucket.key
+            self._buckets[res] = _Bucket(key, equity, pnl, pct)
+
+    def _write_rollup(self, res, row):
+        path = self._rollup_path(res)
+        exists = os.path.exists(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            if not exists:
+                f.write(','.join(ROLLUP_COLUMNS) + '\n')
+            f.write(f"{row[0]},{row[1]:.2f},{row[2]:.2f},{row[3]:.2f},{row[4]:.2f},{row[5]:.2f},{row[6]:.2f},{row[7]}\n")
+
+    # ---------------- 写入 ----------------
+
+    def append(self, total_equity, pnl_usdt, pnl_percent, timestamp=None):
+        """追加一条记录 (同步 I/O，调用方可放到线程中执行)"""
+        with self._lock:
+            self._open()
+            ts = timestamp or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            day = ts[:10].replace('-', '')
+            if day != self._day:
+                # 跨日: 压缩之前的分段
+                self.compact(before=day)
+                self._day = day
+            path = self._segment_path(day, 'csv')
+            exists = os.path.exists(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                if not exists:
+                    f.write(','.join(COLUMNS) + '\n')
+                f.write(f"{ts},{total_equity:.2f},{pnl_usdt:.2f},{pnl_percent:.2f}\n")
+            row = (ts, round(total_equity, 2), round(pnl_usdt, 2), round(pnl_percent, 2))
+            self._hot_rows += 1
+            self._recent.append(row)
+            self._roll(row)
+            if not self._meta.get('first_ts'):
+                self._meta['first_ts'] = ts
+                self._save_meta()
+
+    def compact(self, before=None):
+        """将 before (YYYYMMDD) 之前的未压缩分段转为 Parquet 并记入已压缩行数"""
+        with self._lock:
+            self._open()
+            before = before or datetime.now().strftime('%Y%m%d')
+            days = [d for d in self._hot_days() if d < before]
+            if not days:
+                return 0
+            for day in days:
+                csv = self._segment_path(day, 'csv')
+                df = pd.read_csv(csv)
+                if PARQUET_AVAILABLE:
+                    try:
+                        df.to_parquet(self._segment_path(day, 'parquet'), index=False, compression='snappy')
+                        os.remove(csv)
+                    except Exception as e:
+                        self.logger.warning(f"⚠️ PnL 分段压缩失败 {day}: {e}")
+                self._meta['closed_rows'] += len(df)
+                self._meta['closed_through'] = day
+                self._hot_rows -= len(df)
+            self._save_meta()
+            return len(days)
+
+    # ---------------- 读取 ----------------
+
+    @property
+    def count(self):
+        with self._lock:
+            self._open()
+            return self._meta['closed_rows'] + self._hot_rows
+
+    def tail(self, n=10):
+        """最近 n 条原始记录 (内存缓存，不读文件)"""
+        with self._lock:
+            self._open()
+            rows = list(self._recent)[-n:] if n else []
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def history(self, tail=10):
+        """(总记录数, 最近 tail 条)，供历史盈亏回顾使用"""
+        with self._lock:
+            return self.count, self.tail(tail)
+
+    def resolve_resolution(self, resolution='auto'):
+        if resolution != 'auto':
+            return resolution
+        first = self._meta.get('first_ts')
+        if not first:
+            return '1m'
+        span_days = (datetime.now() - datetime.strptime(first, '%Y-%m-%d %H:%M:%S')).total_seconds() / 86400
+        if span_days <= 2:
+            return '1m'
+        if span_days <= 90:
+            return '1h'
+        return '1d'
+
+    def frame(self, resolution='auto'):
+        """
+        读取权益序列 (timestamp 为 datetime)
+        resolution: 'raw' 读取全部原始分段；'1m' / '1h' / '1d' 只读聚合文件 + 未结束的桶；'auto' 按跨度选择
+        """
+        with self._lock:
+            self._open()
+            resolution = self.resolve_resolution(resolution)
+            if resolution == 'raw':
+                days = sorted({name[:8] for name in os.listdir(self.segment_dir)})
+                frames = [self._read_segment(day) for day in days]
+                frames = [f for f in frames if f is not None and not f.empty]
+                df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+            else:
+                width, suffix = RESOLUTIONS[resolution]
+                path = self._rollup_path(resolution)
+                df = pd.read_csv(path) if os.path.exists(path) else pd.DataFrame(columns=ROLLUP_COLUMNS)
+                bucket = self._buckets.get(resolution)
+                if bucket is not None:
+                    current = pd.DataFrame([bucket.row(suffix)], columns=ROLLUP_COLUMNS)
+                    df = pd.concat([df, current], ignore_index=True) if not df.empty else current
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
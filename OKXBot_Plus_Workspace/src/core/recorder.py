@@ -0,0 +1,258 @@
+"""
+[New] 行情与决策录制器 (Market Data Recorder)
+
+包装交易所与 DeepSeekAgent，把机器人 "看到的一切" (K 线 / Ticker / 资金费率 / 持仓 / 余额 / 订单回报 / AI 决策 /
+插件经 Plugin.call_external 发起的外部请求)
+连同单调时钟时间戳与耗时写入追加式、分块压缩的二进制日志，供 backtest.replay 原样回放，
+用于复现线上事故以及在完全相同的输入下对比主循环改动的性能。
+
+日志格式 (*.clog):
+    [chunk][chunk]...   每个 chunk = 头部 struct('<4sIII': b'CHNK', 记录数, 原始长度, 压缩长度) + zlib(JSON Lines)
+第一条记录为会话元信息 (s='meta'：格式版本、墙钟起点、配置快照)，之后每条记录:
+    t: 调用开始时刻 (相对会话起点的单调时钟秒数)   d: 耗时 (秒)
+    s: 来源 ('exchange' / 'agent' / 'plugin')   m: 方法名 (plugin 为插件名)   k: 匹配键 (位置参数中的字符串，如 symbol|timeframe)
+    a: 调用参数 (analyze 不记录，其输入已由交易所记录覆盖)   r: 返回值   e: 异常 [类名, 消息]
+压缩与写盘在后台线程完成；进程异常退出时最多丢失最后一个未写出的 chunk，读取端会忽略截断的尾部。
+"""
+
+import os
+import json
+import time
+import zlib
+import queue
+import struct
+import asyncio
+import logging
+import threading
+from datetime import datetime
+
+from core.records import Record
+
+FORMAT_VERSION = 1
+CHUNK_MAGIC = b'CHNK'
+CHUNK_HEADER = struct.Struct('<4sIII')
+
+
+def _json_default(obj):
+    # 记录类型 (core.records) 在写入日志时转为字典
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    # NumPy 标量 / Timestamp 等
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+def call_key(args):
+    """
+    匹配键: 位置参数中的字符串 (含字符串列表，如 fetch_positions([symbol])) 依次拼接
+    例如 fetch_ohlcv('BTC/USDT:USDT', '15m') -> 'BTC/USDT:USDT|15m'
+    """
+    parts = []
+    for arg in args:
+        if isinstance(arg, str):
+            parts.append(arg)
+        elif isinstance(arg, (list, tuple)):
+            parts.extend(a for a in arg if isinstance(a, str))
+    return '|'.join(parts)
+
+
+class ChunkedLogWriter:
+    """追加写入的分块压缩日志 (后台线程负责压缩与落盘)"""
+
+    def __init__(self, path, chunk_records=512, flush_interval=2.0, level=6):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.chunk_records = chunk_records
+        self.flush_interval = flush_interval
+        self.level = level
+        self.bytes_written = 0
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._fh = open(path, 'ab')
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name="recorder-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, line):
+        self._pending.append(line)
+        if len(self._pending) >= self.chunk_records or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if self._pending:
+            self._queue.put(self._pending)
+            self._pending = []
+
+    def _worker(self):
+        while True:
+            lines = self._queue.get()
+            if lines is None:
+                break
+            raw = b'\n'.join(lines)
+            payload = zlib.compress(raw, self.level)
+            self._fh.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(lines), len(raw), len(payload)))
+            self._fh.write(payload)
+            self._fh.flush()
+            self.bytes_written += CHUNK_HEADER.size + len(payload)
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._fh.close()
+
+
+def read_log(path):
+    """逐条读取录制日志 (生成器)，截断或损坏的尾部 chunk 会被忽略"""
+    with open(path, 'rb') as fh:
+        while True:
+            header = fh.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            magic, count, raw_len, comp_len = CHUNK_HEADER.unpack(header)
+            if magic != CHUNK_MAGIC:
+                return
+            payload = fh.read(comp_len)
+            if len(payload) < comp_len:
+                return
+            try:
+                raw = zlib.decompress(payload)
+            except zlib.error:
+                return
+            for line in raw.split(b'\n'):
+                if line:
+                    yield json.loads(line)
+
+
+class Recorder:
+    """
+    录制会话
+    用法:
+        recorder = Recorder.for_session('data/recordings', config=config.data)
+        exchange = RecordingExchange(exchange, recorder)
+        agent = RecordingDeepSeekAgent(agent, recorder)
+        plugin_manager.configure_io(recorder)
+        ...
+        recorder.close()
+    """
+
+    def __init__(self, path, config=None, **writer_options):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.path = path
+        self.origin = time.monotonic()
+        self.records = 0
+        self.writer = ChunkedLogWriter(path, **writer_options)
+        self._write({
+            's': 'meta', 't': 0.0, 'version': FORMAT_VERSION,
+            'wall': time.time(), 'pid': os.getpid(),
+            'config': self.config_snapshot(config) if config else None,
+        })
+
+    @classmethod
+    def for_session(cls, directory='data/recordings', config=None, **writer_options):
+        """在目录下按启动时间创建新的录制文件"""
+        path = os.path.join(directory, f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.clog")
+        return cls(path, config=config, **writer_options)
+
+    @staticmethod
+    def config_snapshot(config):
+        """配置快照 (去掉密钥与通知 Webhook，回放时用于还原 trading / symbols 配置)"""
+        snapshot = {k: v for k, v in config.items() if k not in ('exchanges', 'models', 'notification')}
+        trading = dict(snapshot.get('trading', {}))
+        trading.pop('notification', None)
+        snapshot['trading'] = trading
+        return json.loads(json.dumps(snapshot, default=_json_default))
+
+    def _write(self, record):
+        try:
+            line = json.dumps(record, default=_json_default, separators=(',', ':'))
+        except (TypeError, ValueError):
+            # 循环引用等无法序列化的返回值退化为字符串
+            record['r'] = repr(record.get('r'))
+            line = json.dumps(record, default=_json_default, separators=(',', ':'))
+        self.writer.append(line.encode('utf-8'))
+        self.records += 1
+
+    def record(self, source, method, args, kwargs, started, duration, result=None, error=None, record_args=True):
+        record = {
+            't': round(started - self.origin, 6),
+            'd': round(duration, 6),
+            's': source,
+            'm': method,
+            'k': call_key(args),
+        }
+        if record_args:
+            record['a'] = [list(args), kwargs] if kwargs else [list(args)]
+        if error is not None:
+            record['e'] = [type(error).__name__, str(error)]
+        else:
+            record['r'] = result
+        self._write(record)
+
+    async def call(self, source, method, func, args, kwargs, record_args=True):
+        """执行一次异步调用并录制返回值/异常"""
+        started = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.record(source, method, args, kwargs, started, time.monotonic() - started,
+                        error=e, record_args=record_args)
+            raise
+        self.record(source, method, args, kwargs, started, time.monotonic() - started,
+                    result=result, record_args=record_args)
+        return result
+
+    def close(self):
+        self.writer.close()
+        self.logger.info(f"📼 录制结束: {self.records} 条记录 -> {self.path} ({self.writer.bytes_written / 1024:.1f} KB)")
+
+
+def is_recorded_method(name):
+    """需要录制的交易所方法: 所有网络请求 (fetch_* / create_* / cancel_* / set_* / load_markets)"""
+    return name == 'load_markets' or name.startswith(('fetch_', 'create_', 'cancel_', 'set_'))
+
+
+class RecordingExchange:
+    """ccxt 交易所代理: 所有属性透传，异步网络方法的返回值/异常写入录制日志"""
+
+    def __init__(self, exchange, recorder):
+        self._exchange = exchange
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not is_recorded_method(name) or not asyncio.iscoroutinefunction(attr):
+            return attr
+        recorder = self._recorder
+
+        async def recorded(*args, **kwargs):
+            return await recorder.call('exchange', name, attr, args, kwargs)
+
+        return recorded
+
+
+class RecordingDeepSeekAgent:
+    """
+    DeepSeekAgent 代理: 录制 analyze() 的决策结果与耗时，其余属性透传
+    (类名保留 DeepSeekAgent，多策略融合引擎按类名识别 AI 信号)
+    """
+
+    def __init__(self, agent, recorder):
+        self._agent = agent
+        self._recorder = recorder
+
+    async def analyze(self, symbol, timeframe, *args, **kwargs):
+        # 输入 (K 线 / 指标) 已由交易所录制覆盖，这里只记录决策结果，避免日志膨胀
+        return await self._recorder.call('agent', 'analyze', self._agent.analyze,
+                                         (symbol, timeframe) + args, kwargs, record_args=False)
+
+    def __getattr__(self, name):
+        return getattr(self._agent, name)
@@ -0,0 +1,213 @@
+"""
+[Optimization] 热路径记录类型 (Slotted Records)
+
+持仓 (PositionManager.get_current_position)、策略信号 (DeepSeekAgent.analyze / 多策略融合)、模拟成交
+(OrderExecutor._record_sim_trade) 与每轮结果 (DeepSeekTrader.run) 原先都是 15~20 个键的字典，
+每条返回路径各自重建一遍。这里改为带 __slots__ 的记录类:
+- 构造只是给固定的槽位赋值 (无每实例 __dict__，也不必为每个键分配哈希表项)
+- 写入不存在的字段直接抛出 KeyError，键名拼写错误不再静默生成新键
+- 保留只读的映射接口 (rec['side'] / rec.get('mode') / 'uplRatio' in rec)，现有按字典访问的调用点无需改写；
+  值为 None 的字段按 "键不存在" 处理，与原字典中缺省键的行为一致
+- to_dict() 只在 I/O 边界调用 (状态存储、录制日志、插件、数据库)
+- from_dict() 遇到未声明的键 (第三方策略的自定义字段、新版本写入的状态) 时原样保留在 extra 中，
+  映射接口可读取，to_dict() 时写回；直接构造的记录没有 extra，不增加热路径开销
+"""
+
+from datetime import datetime
+
+
+class Record:
+    __slots__ = ('_extra',)
+    _fields = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = frozenset(cls.__slots__) | frozenset(getattr(cls, '_derived', ()))
+
+    # ---------------- 映射接口 (兼容原字典调用点) ----------------
+
+    @property
+    def extra(self):
+        """from_dict 时保留的未声明键 (没有时为空字典)"""
+        return getattr(self, '_extra', None) or {}
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            return self.extra[key]
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} 没有字段 {key!r}")
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        if key not in self._fields:
+            return key in self.extra
+        return getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        if key not in self._fields:
+            return self.extra.get(key, default)
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def keys(self):
+        return [key for key in self.__slots__ if getattr(self, key) is not None] + list(self.extra)
+
+    def to_dict(self):
+        """转换为字典 (省略值为 None 的字段，与原字典结构一致；extra 中的键一并写回)"""
+        data = {key: value for key in self.__slots__ if (value := getattr(self, key)) is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def _keep_extra(self, data, known):
+        """[Fix] 保留 from_dict 输入中未声明的键，不再静默丢弃"""
+        extra = {key: value for key, value in data.items() if key not in known}
+        if extra:
+            self._extra = extra
+        return self
+
+    @classmethod
+    def from_dict(cls, data):
+        """由字典构造 (用于读取状态文件、录制日志与第三方策略返回的字典；未声明的键保留在 extra 中)"""
+        if data is None or isinstance(data, cls):
+            return data
+        record = cls(**{key: data[key] for key in cls.__slots__ if key in data})
+        return record._keep_extra(data, cls._fields)
+
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in self.to_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+
+class PositionRecord(Record):
+    """当前持仓 (coin_size 为实际币数；size 为合约张数，现货与模拟盘中两者相同)"""
+    __slots__ = ('side', 'size', 'coin_size', 'entry_price', 'unrealized_pnl', 'leverage', 'symbol', 'mode')
+
+    def __init__(self, side, size, coin_size=None, entry_price=0.0, unrealized_pnl=0.0, leverage=1.0,
+                 symbol=None, mode=None):
+        self.side = side
+        self.size = size
+        self.coin_size = size if coin_size is None else coin_size
+        self.entry_price = entry_price
+        self.unrealized_pnl = unrealized_pnl
+        self.leverage = leverage
+        self.symbol = symbol
+        self.mode = mode
+
+
+class SignalRecord(Record):
+    """
+    策略信号 (AI / Pinbar / 回测替身)
+    volatility_status 与 pattern 由 DeepSeekTrader 在执行前注入
+    """
+    __slots__ = ('signal', 'confidence', 'reason', 'summary', 'amount', 'entry_price', 'stop_loss', 'take_profit',
+                 'position_ratio', 'sentiment_score', 'direction_prediction', 'volatility_status', 'pattern')
+
+    def __init__(self, signal=None, confidence=None, reason=None, summary=None, amount=None, entry_price=None,
+                 stop_loss=None, take_profit=None, position_ratio=None, sentiment_score=None,
+                 direction_prediction=None, volatility_status=None, pattern=None):
+        self.signal = signal
+        self.confidence = confidence
+        self.reason = reason
+        self.summary = summary
+        self.amount = amount
+        self.entry_price = entry_price
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.position_ratio = position_ratio
+        self.sentiment_score = sentiment_score
+        self.direction_prediction = direction_prediction
+        self.volatility_status = volatility_status
+        self.pattern = pattern
+
+
+class SimTradeRecord(Record):
+    """
+    模拟成交 (测试模式)
+    对外保持 ccxt 成交结构: fee / info / cost / datetime 由字段派生，RiskManager 的成交统计无需区分实盘与模拟
+    """
+    __slots__ = ('symbol', 'side', 'price', 'amount', 'fee_cost', 'pnl', 'timestamp')
+    _derived = ('cost', 'fee', 'info', 'datetime')
+
+    def __init__(self, symbol, side, price, amount, fee_cost=0.0, pnl=0.0, timestamp=0):
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.amount = amount
+        self.fee_cost = fee_cost
+        self.pnl = pnl
+        self.timestamp = timestamp
+
+    @property
+    def cost(self):
+        return self.price * self.amount
+
+    @property
+    def fee(self):
+        return {'cost': self.fee_cost, 'currency': 'USDT'}
+
+    @property
+    def info(self):
+        return {'pnl': self.pnl}
+
+    @property
+    def datetime(self):
+        return datetime.fromtimestamp(self.timestamp / 1000).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+    def to_dict(self):
+        return {
+            'symbol': self.symbol,
+            'side': self.side,
+            'price': self.price,
+            'amount': self.amount,
+            'cost': self.cost,
+            'fee': self.fee,
+            'timestamp': self.timestamp,
+            'datetime': self.datetime,
+            'info': self.info,
+            **self.extra,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data is None or isinstance(data, cls):
+            return data
+        record = cls(data['symbol'], data['side'], data['price'], data['amount'],
+                     fee_cost=(data.get('fee') or {}).get('cost', 0.0),
+                     pnl=(data.get('info') or {}).get('pnl', 0.0),
+                     timestamp=data.get('timestamp', 0))
+        return record._keep_extra(data, cls._fields)
+
+
+class TickResult(Record):
+    """DeepSeekTrader.run() 每轮结果 (主循环据此输出市场扫描表格)"""
+    __slots__ = ('symbol', 'price', 'change', 'signal', 'confidence', 'reason', 'summary', 'status', 'status_msg',
+                 'volatility', 'persona', 'adx', 'rsi', 'atr_ratio', 'vol_ratio', 'pattern', 'has_position',
+                 'recommended_sleep', 'error')
+
+    def __init__(self, symbol, price=0.0, change=0.0, signal='HOLD', confidence='LOW', reason='', summary='',
+                 status='WAIT', status_msg='', volatility=None, persona='Normal', adx=None, rsi=None,
+                 atr_ratio=None, vol_ratio=None, pattern='-', has_position=False, recommended_sleep=5.0,
+                 error=None):
+        self.symbol = symbol
+        self.price = price
+        self.change = change
+        self.signal = signal
+        self.confidence = confidence
+        self.reason = reason
+        self.summary = summary
+        self.status = status
+        self.status_msg = status_msg
+        self.volatility = volatility
+        self.persona = persona
+        self.adx = adx
+        self.rsi = rsi
+        self.atr_ratio = atr_ratio
+        self.vol_ratio = vol_ratio
+        self.pattern = pattern
+        self.has_position = has_position
+        self.recommended_sleep = recommended_sleep
+        self.error = error
@@ -0,0 +1,157 @@
+"""
+[New] 启动剖析 (Startup Profile)
+
+`python OKXBot_Plus.py --profile-startup` (或环境变量 CRYPTO_ORACLE_PROFILE_STARTUP=1) 开启:
+- 导入计时: 在 sys.meta_path 最前面挂一个 finder，给每个模块的 loader.exec_module 计时，
+  得到每个模块的累计耗时 (含其导入的子模块) 与自身耗时，并按顶层包汇总
+- 初始化阶段计时: main() 在每个初始化阶段结束时调用 startup_profile.mark(name)
+  (阶段耗时 = 距上一个 mark 的时间)，也可用 startup_profile.phase(name) 包住代码块
+- 首个 tick 完成时输出报告 (time-to-first-tick) 并写入 log/startup_profile.json
+未开启时 mark() / phase() / first_tick() 均为空操作。本模块只依赖标准库，须在其它重型模块之前导入。
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from contextlib import contextmanager
+
+_PROCESS_START = time.perf_counter()
+
+
+class _ImportTimer:
+    """meta path finder: 不负责查找，只给其它 finder 找到的 loader 包一层计时"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self._finding = set()
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+        loader = spec.loader
+        # 内置/冻结模块的 loader 是类本身 (所有模块共用)，不做包装
+        if loader is None or isinstance(loader, type) or not hasattr(loader, 'exec_module'):
+            return spec
+        loader.exec_module = self._timed(fullname, loader.exec_module)
+        return spec
+
+    def _timed(self, fullname, exec_module):
+        profile = self.profile
+
+        def exec_module_timed(module):
+            profile._stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - t0
+                children = profile._stack.pop()
+                if profile._stack:
+                    profile._stack[-1] += total
+                profile.imports[fullname] = (total, total - children)
+        return exec_module_timed
+
+
+class StartupProfile:
+    def __init__(self):
+        self.enabled = False
+        self.imports = {}   # 模块 -> (累计耗时, 自身耗时) 秒
+        self.phases = []    # [(阶段, 开始偏移, 耗时)]
+        self._stack = []
+        self._timer = None
+        self._last_mark = None
+        self.first_tick_at = None
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._timer = _ImportTimer(self)
+        sys.meta_path.insert(0, self._timer)
+
+    def disable_import_timer(self):
+        if self._timer is not None and self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+    def mark(self, name):
+        """记录从上一个 mark (首次调用时为进程启动) 到现在的阶段耗时"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        start = self._last_mark if self._last_mark is not None else _PROCESS_START
+        self.phases.append((name, start - _PROCESS_START, now - start))
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last_mark = time.perf_counter()
+            self.phases.append((name, t0 - _PROCESS_START, self._last_mark - t0))
+
+    # ---------------- 报告 ----------------
+
+    def report(self, top=15):
+        packages = {}
+        for name, (_, self_time) in self.imports.items():
+            root = name.split('.', 1)[0]
+            packages[root] = packages.get(root, 0.0) + self_time
+        ms = lambda seconds: round(seconds * 1000, 1)
+        return {
+            'time_to_first_tick_ms': ms(self.first_tick_at) if self.first_tick_at is not None else None,
+            'import_total_ms': ms(sum(self_time for _, self_time in self.imports.values())),
+            'modules_imported': len(self.imports),
+            'packages_ms': {k: ms(v) for k, v in sorted(packages.items(), key=lambda kv: -kv[1])[:top]},
+            'modules_cumulative_ms': {
+                k: ms(v[0]) for k, v in sorted(self.imports.items(), key=lambda kv: -kv[1][0])[:top]
+            },
+            'phases': [{'phase': name, 'start_ms': ms(start), 'duration_ms': ms(duration)}
+                       for name, start, duration in self.phases],
+        }
+
+    def first_tick(self, logger=None, path='log/startup_profile.json'):
+        """首个 tick 完成: 输出报告并停止导入计时 (只执行一次)"""
+        if not self.enabled or self.first_tick_at is not None:
+            return None
+        self.first_tick_at = time.perf_counter() - _PROCESS_START
+        self.disable_import_timer()
+        report = self.report()
+        logger = logger or logging.getLogger("crypto_oracle")
+        logger.info(f"⏱️ [PROFILE] 首个 tick 完成: {report['time_to_first_tick_ms']:.0f}ms "
+                    f"(导入 {report['modules_imported']} 个模块共 {report['import_total_ms']:.0f}ms)")
+        logger.info("⏱️ [PROFILE] 导入耗时 (按顶层包): " +
+                    " | ".join(f"{k} {v:.0f}ms" for k, v in report['packages_ms'].items()))
+        logger.info("⏱️ [PROFILE] 初始化阶段: " +
+                    " | ".join(f"{p['phase']} {p['duration_ms']:.0f}ms" for p in report['phases']))
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.warning(f"⚠️ 写入启动剖析报告失败: {e}")
+        return report
+
+
+# 全局单例
+startup_profile = StartupProfile()
@@ -0,0 +1,260 @@
+"""
+[New] 统一状态存储 (State Store)
+
+替代每个交易对各自整文件重写的 data/state_<SYM>.json / data/sim_state_<SYM>.json 与 RiskManager 的 bot_state.json:
+- 所有状态以 key -> JSON 值 的形式保存在内存中，put() 只更新内存并登记为待写 (同一 key 只保留最新值)
+- 后台线程按 flush_interval_ms 合并写盘: 每个 key 在每个窗口内最多写一次，
+  记录以追加方式写入 data/state.journal (每行 = crc32 + JSON，一次 write + fsync，先写日志再确认)
+- 启动时顺序重放日志 (后写覆盖先写)，校验失败的尾部记录 (写到一半时崩溃) 被截断丢弃
+- 日志记录数超过 compact_records 时写出全量快照 (临时文件 + fsync + os.replace 原子替换)
+首次读取某个 key 且日志中没有时，可从旧版 JSON 文件迁移。
+
+用法:
+    from core.state_store import state_store
+    state_store.put('trader/BTC/USDT:USDT', {...})
+    state = state_store.get('trader/BTC/USDT:USDT', legacy_path='data/state_BTC_USDT:USDT.json')
+"""
+
+import os
+import json
+import zlib
+import atexit
+import logging
+import threading
+from collections import deque
+
+
+def default_state_path():
+    """项目根目录下的 data/state.journal (CRYPTO_ORACLE_HOME 可重定向，与 RiskManager / 日志一致)"""
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    project_root = os.getenv('CRYPTO_ORACLE_HOME', project_root)
+    return os.path.join(project_root, 'data', 'state.journal')
+
+
+def _json_default(obj):
+    # deque (模拟成交记录) / NumPy 标量
+    if isinstance(obj, (deque, set, tuple)):
+        return list(obj)
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+def _encode(record):
+    payload = json.dumps(record, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b'%08x ' % zlib.crc32(payload) + payload + b'\n'
+
+
+def _decode(line):
+    """校验并解析一行日志，损坏时返回 None"""
+    if len(line) < 10 or line[8:9] != b' ' or not line.endswith(b'\n'):
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class StateStore:
+    """追加式日志 + 合并写盘的键值状态存储"""
+
+    def __init__(self, path=None, flush_interval_ms=500, fsync=True, compact_records=2000, in_memory=False):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.path = path
+        self.in_memory = in_memory
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.fsync = fsync
+        self.compact_records = compact_records
+
+        self._state = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._fh = None
+        self._loaded = False
+        self._journal_records = 0
+
+        self.puts = 0
+        self.writes = 0
+
+    def configure(self, path=None, flush_interval_ms=500, fsync=True, compact_records=2000):
+        """调整参数 (已加载时先落盘并关闭，下次访问按新路径重放)"""
+        if self._loaded:
+            self.close()
+        self.path = path
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.fsync = fsync
+        self.compact_records = compact_records
+
+    # ---------------- 读写 ----------------
+
+    def get(self, key, default=None, legacy_path=None):
+        self._ensure_loaded()
+        with self._lock:
+            if key in self._state:
+                return self._state[key]
+        if legacy_path and os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"⚠️ 迁移旧状态文件失败 {legacy_path}: {e}")
+                return default
+            self.put(key, value)
+            self.logger.info(f"📦 已迁移旧状态文件: {legacy_path} -> {key}")
+            return value
+        return default
+
+    def put(self, key, value):
+        """更新内存状态并登记待写 (同一 key 在写盘窗口内多次 put 只写最后一次)"""
+        self._ensure_loaded()
+        line = None if self.in_memory else _encode({'k': key, 'v': value})
+        with self._lock:
+            self._state[key] = value
+            self.puts += 1
+            if line is not None:
+                self._pending[key] = line
+        if line is not None:
+            self._start_writer()
+            self._wake.set()
+
+    def delete(self, key):
+        self._ensure_loaded()
+        with self._lock:
+            self._state.pop(key, None)
+            if not self.in_memory:
+                self._pending[key] = _encode({'k': key, 'd': 1})
+        if not self.in_memory:
+            self._start_writer()
+            self._wake.set()
+
+    def keys(self, prefix=''):
+        self._ensure_loaded()
+        with self._lock:
+            return [k for k in self._state if k.startswith(prefix)]
+
+    # ---------------- 加载与重放 ----------------
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._io_lock:
+            if self._loaded:
+                return
+            if not self.in_memory:
+                self.path = self.path or default_state_path()
+                self._replay()
+            self._loaded = True
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        state = {}
+        records = 0
+        good_offset = 0
+        with open(self.path, 'rb') as fh:
+            for line in fh:
+                record = _decode(line)
+                if record is None:
+                    break
+                if record.get('d'):
+                    state.pop(record['k'], None)
+                else:
+                    state[record['k']] = record.get('v')
+                records += 1
+                good_offset += len(line)
+        if good_offset < os.path.getsize(self.path):
+            # 崩溃时写到一半的尾部记录: 截断，保证后续追加从完整记录之后开始
+            self.logger.warning(f"⚠️ 状态日志尾部损坏，已截断 {os.path.getsize(self.path) - good_offset} 字节: {self.path}")
+            with open(self.path, 'r+b') as fh:
+                fh.truncate(good_offset)
+        self._state = state
+        self._journal_records = records
+        self.logger.info(f"♻️ 状态日志重放完成: {records} 条记录 -> {len(state)} 个键")
+
+    # ---------------- 写盘 ----------------
+
+    def _start_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._worker, name="state-store-writer", daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # 合并窗口: 窗口内对同一 key 的多次 put 只保留最新值
+            self._stop.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """立即写出所有待写记录"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with self._io_lock:
+            try:
+                if self._fh is None:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._fh = open(self.path, 'ab')
+                self._fh.write(b''.join(pending.values()))
+                self._fh.flush()
+                if self.fsync:
+                    os.fsync(self._fh.fileno())
+                self.writes += len(pending)
+                self._journal_records += len(pending)
+                if self.compact_records and self._journal_records > self.compact_records:
+                    self._compact()
+            except Exception as e:
+                # 写盘失败时放回待写队列 (不覆盖期间产生的更新)，下个窗口重试
+                with self._lock:
+                    for key, line in pending.items():
+                        self._pending.setdefault(key, line)
+                self.logger.warning(f"⚠️ 状态日志写入失败: {e}")
+
+    def _compact(self):
+        """写出全量快照并原子替换日志 (调用方持有 _io_lock)"""
+        with self._lock:
+            snapshot = [_encode({'k': k, 'v': v}) for k, v in self._state.items()]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as fh:
+            fh.write(b''.join(snapshot))
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._fh.close()
+        os.replace(tmp_path, self.path)
+        self._fh = open(self.path, 'ab')
+        self._journal_records = len(snapshot)
+
+    def close(self):
+        """落盘并停止后台线程；之后再次访问会重新重放日志"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        if not self.in_memory and self._loaded:
+            self.flush()
+        if self.in_memory:
+            return
+        with self._io_lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self._loaded = False
+            self._state = {}
+
+
+# 全局单例 (交易对状态 / 模拟账户 / 风控基准共用一个日志)
+state_store = StateStore()
+atexit.register(state_store.close)
@@ -0,0 +1,166 @@
+"""
+[New] 主循环剖析器 (Tick Profiler)
+
+main() 原先只计算整轮 elapsed 并以 debug 级别输出，无法判断时间花在 risk_manager.check / plugin_manager.on_tick /
+get_ohlcv / 指标计算 / 持仓查询 / AI 调用 / 表格输出中的哪一步。这里提供:
+- span(name, symbol=None): 计时上下文管理器，包住 main() 与 DeepSeekTrader.run() 的各个阶段
+  (跨 await 计时，得到的是该阶段的墙钟延迟)
+- LatencyHistogram: HDR 风格的对数-线性分桶直方图 (微秒精度，相对误差 < 2%)，记录 O(1)、内存与样本数无关，
+  按阶段、按 (阶段, 交易对) 分别统计 p50 / p95 / p99 / max
+- summary(): 汇总当前统计窗口，由 HealthMonitor.log_health_report 定期输出后重置窗口
+
+每个 span 只有两次 perf_counter 与一次字典累加 (约 1-2µs)，相对一轮数百毫秒的 tick 可忽略。
+关闭时 (trading.performance.profiler.enabled=false) span() 返回共享的空上下文。
+"""
+
+import time
+import logging
+from contextlib import nullcontext
+
+_SUB_BUCKET_BITS = 6
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_HALF_SUB_BUCKETS = _SUB_BUCKETS >> 1
+_NULL_SPAN = nullcontext()
+
+
+def _bucket_index(value_us):
+    """
+    对数-线性分桶: < 64µs 的值每微秒一个桶；更大的值按 2 的幂分段，每段再均分为 32 个子桶
+    """
+    if value_us < _SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - _SUB_BUCKET_BITS
+    return shift * _HALF_SUB_BUCKETS + (value_us >> shift)
+
+
+def _bucket_value(index):
+    """桶的代表值 (区间中点，微秒)"""
+    if index < _SUB_BUCKETS:
+        return float(index)
+    shift = index // _HALF_SUB_BUCKETS - 1
+    mantissa = index - shift * _HALF_SUB_BUCKETS
+    return ((mantissa << shift) + ((mantissa + 1) << shift) - 1) / 2.0
+
+
+class LatencyHistogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        idx = _bucket_index(int(seconds * 1_000_000))
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99)):
+        """返回各分位数 (秒)"""
+        if not self.count:
+            return [0.0 for _ in quantiles]
+        items = sorted(self.counts.items())
+        results = []
+        for q in quantiles:
+            target = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for idx, n in items:
+                seen += n
+                if seen >= target:
+                    results.append(min(_bucket_value(idx) / 1_000_000, self.max))
+                    break
+        return results
+
+    def stats(self):
+        """毫秒统计"""
+        p50, p95, p99 = self.percentiles()
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            'p50_ms': round(p50 * 1000, 2),
+            'p95_ms': round(p95 * 1000, 2),
+            'p99_ms': round(p99 * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'symbol', 't0')
+
+    def __init__(self, profiler, name, symbol):
+        self.profiler = profiler
+        self.name = name
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, time.perf_counter() - self.t0, self.symbol)
+        return False
+
+
+class TickProfiler:
+    def __init__(self, enabled=True, top_symbols=5):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.enabled = enabled
+        self.top_symbols = top_symbols
+        self.reset()
+
+    def configure(self, enabled=True, top_symbols=5):
+        self.enabled = enabled
+        self.top_symbols = top_symbols
+
+    def reset(self):
+        self.phases = {}       # 阶段 -> LatencyHistogram
+        self.by_symbol = {}    # (阶段, 交易对) -> LatencyHistogram
+        self.window_start = time.time()
+
+    def span(self, name, symbol=None):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, symbol)
+
+    def record(self, name, seconds, symbol=None):
+        if not self.enabled:
+            return
+        hist = self.phases.get(name)
+        if hist is None:
+            hist = self.phases[name] = LatencyHistogram()
+        hist.record(seconds)
+        if symbol is not None:
+            key = (name, symbol)
+            hist = self.by_symbol.get(key)
+            if hist is None:
+                hist = self.by_symbol[key] = LatencyHistogram()
+            hist.record(seconds)
+
+    def summary(self, reset=False):
+        """
+        当前统计窗口的汇总: 各阶段分位数 + 每个阶段 p95 最慢的 top_symbols 个交易对
+        reset=True 时汇总后开启新窗口
+        """
+        slowest = {}
+        for (name, symbol), hist in self.by_symbol.items():
+            slowest.setdefault(name, []).append((hist.percentiles((0.95,))[0], symbol, hist))
+        report = {
+            'window_seconds': round(time.time() - self.window_start, 1),
+            'phases': {name: hist.stats() for name, hist in sorted(self.phases.items())},
+            'slowest_symbols': {
+                name: [dict(symbol=symbol, **hist.stats())
+                       for _, symbol, hist in sorted(entries, key=lambda e: -e[0])[:self.top_symbols]]
+                for name, entries in sorted(slowest.items())
+            },
+        }
+        if reset:
+            self.reset()
+        return report
+
+
+# 全局单例 (由 OKXBot_Plus.main 按 trading.performance.profiler 调用 configure)
+tick_profiler = TickProfiler()
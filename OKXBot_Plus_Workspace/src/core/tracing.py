@@ -0,0 +1,255 @@
+"""
+[New] 信号到成交链路追踪 (Signal-to-Fill Tracing)
+
+每个交易对每轮 run() 开启一条 trace (correlation ID 由 contextvars 在协程间传递，无需层层传参)，
+各阶段记录为带时间戳的 span，嵌套关系自动形成父子链:
+
+    run ─┬─ ohlcv
+         ├─ gate            (门禁判定；异动唤醒时附带 surge 事件)
+         ├─ ai.analyze ─── ai.request (每次 DeepSeek 请求，含 token 用量)
+         └─ execute_trade ─ order.create ─ order.ack (交易所回执)
+                                          └ order.fill (回执已成交时直接记录；否则可选后台 fetch_order 确认)
+
+trace 存放在固定容量的环形缓冲区中，可通过 /traces (指标端点) 或 dump() 导出为 JSON span 列表。
+下过单的 trace 结束时输出一行耗时拆解 (信号 -> 下单)，成交确认后再补一行成交延迟。
+未开启 trace 的代码路径 (回测引擎直接调用 execute_trade 等) 中 span() 为空操作。
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import contextvars
+from collections import deque
+
+from .utils import rate_limiter
+
+_current = contextvars.ContextVar('crypto_oracle_trace', default=None)  # (Trace, 父 span id)
+_FINAL_STATUSES = ('closed', 'canceled', 'rejected', 'expired')
+
+
+class Trace:
+    __slots__ = ('trace_id', 'symbol', 'start', 'spans', 'has_order', '_next_id')
+
+    def __init__(self, symbol):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.symbol = symbol
+        self.start = time.time()
+        self.spans = []
+        self.has_order = False
+        self._next_id = 0
+
+    def new_span_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def add(self, name, start, duration, parent_id, span_id=None, attrs=None):
+        span = {
+            'trace_id': self.trace_id,
+            'span_id': span_id or self.new_span_id(),
+            'parent_id': parent_id,
+            'name': name,
+            'symbol': self.symbol,
+            'start': round(start, 6),
+            'duration_ms': round(duration * 1000, 3),
+            'attrs': attrs or {},
+        }
+        self.spans.append(span)
+        return span
+
+    def to_list(self):
+        return list(self.spans)
+
+
+class _SpanContext:
+    __slots__ = ('trace', 'name', 'attrs', 'span_id', 'parent_id', 'start', 't0', 'token')
+
+    def __init__(self, trace, parent_id, name, attrs):
+        self.trace = trace
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.span_id = self.trace.new_span_id()
+        self.start = time.time()
+        self.t0 = time.perf_counter()
+        self.token = _current.set((self.trace, self.span_id))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self.token)
+        if exc_type is not None and exc_type is not asyncio.CancelledError:
+            self.attrs['error'] = str(exc)[:200]
+        self.trace.add(self.name, self.start, time.perf_counter() - self.t0, self.parent_id, self.span_id, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, enabled=True, capacity=500, confirm_fills=False, fill_poll_interval=1.0,
+                 fill_poll_max_interval=8.0, fill_poll_timeout=30.0):
+        self.logger = logging.getLogger("crypto_oracle")
+        self._fill_tasks = set()  # 持有后台轮询任务的强引用，防止执行中被垃圾回收
+        self.configure(enabled, capacity, confirm_fills, fill_poll_interval, fill_poll_max_interval, fill_poll_timeout)
+
+    def configure(self, enabled=True, capacity=500, confirm_fills=False, fill_poll_interval=1.0,
+                  fill_poll_max_interval=8.0, fill_poll_timeout=30.0):
+        """
+        confirm_fills: 回执未成交时后台轮询 fetch_order 记录成交延迟 (默认关闭: 每次轮询占用一个全局限频令牌，
+        只为计时而与交易请求争抢额度)。轮询间隔从 fill_poll_interval 起每次翻倍，上限 fill_poll_max_interval，
+        最长 fill_poll_timeout 秒 (默认 1/2/4/8/8/8s，每笔订单最多约 6 次请求)
+        """
+        self.enabled = enabled
+        self.confirm_fills = confirm_fills
+        self.fill_poll_interval = fill_poll_interval
+        self.fill_poll_max_interval = max(fill_poll_interval, fill_poll_max_interval)
+        self.fill_poll_timeout = fill_poll_timeout
+        self.traces = deque(getattr(self, 'traces', ()), maxlen=max(1, capacity))
+
+    # ---------------- 记录 ----------------
+
+    def start_trace(self, symbol):
+        """开启一条 trace 并设为当前上下文，返回 (trace, token)；未开启时返回 (None, None)"""
+        if not self.enabled:
+            return None, None
+        trace = Trace(symbol)
+        self.traces.append(trace)
+        return trace, _current.set((trace, None))
+
+    def end_trace(self, trace, token):
+        if trace is None:
+            return
+        _current.reset(token)
+        if trace.has_order:
+            self._log_breakdown(trace)
+
+    def current_trace_id(self):
+        ctx = _current.get()
+        return ctx[0].trace_id if ctx else None
+
+    def span(self, name, **attrs):
+        ctx = _current.get()
+        if ctx is None:
+            return _NULL_SPAN
+        return _SpanContext(ctx[0], ctx[1], name, attrs)
+
+    def record(self, name, start, duration, **attrs):
+        """记录一个已结束的 span (start 为 unix 时间戳，duration 为秒)"""
+        ctx = _current.get()
+        if ctx is not None:
+            ctx[0].add(name, start, duration, ctx[1], attrs=attrs)
+
+    def event(self, name, **attrs):
+        """记录一个零时长事件 (如异动唤醒、交易所回执)"""
+        self.record(name, time.time(), 0.0, **attrs)
+
+    def mark_order(self):
+        ctx = _current.get()
+        if ctx is not None:
+            ctx[0].has_order = True
+
+    # ---------------- 成交确认 ----------------
+
+    def confirm_fill(self, exchange, symbol, order):
+        """
+        回执已是终态 (如市价单 closed) 时直接记录 order.fill，不再请求交易所；
+        否则在 confirm_fills 开启时后台轮询 fetch_order 直到成交/撤单/超时
+        (create_task 会复制当前上下文，span 自动挂在 order.create 下)
+        """
+        if _current.get() is None or not order or not order.get('id'):
+            return None
+        if order.get('status') in _FINAL_STATUSES:
+            self.record('order.fill', time.time(), 0.0, order_id=order['id'], status=order['status'],
+                        filled=order.get('filled'), average=order.get('average'))
+            return None
+        if not self.confirm_fills:
+            return None
+        task = asyncio.create_task(self._poll_fill(exchange, symbol, order))
+        self._fill_tasks.add(task)
+        task.add_done_callback(self._fill_tasks.discard)
+        return task
+
+    async def _poll_fill(self, exchange, symbol, order):
+        ack_wall, t0 = time.time(), time.perf_counter()
+        status = order.get('status')
+        interval = self.fill_poll_interval
+        while status not in _FINAL_STATUSES:
+            remaining = self.fill_poll_timeout - (time.perf_counter() - t0)
+            if remaining <= 0:
+                status = 'timeout'
+                break
+            # [Fix] 指数退避: 挂单长时间不成交时请求次数按 log2 增长，而不是每 0.5s 一次
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.fill_poll_max_interval)
+            try:
+                # [Fix] 轮询与下单 / 行情请求共用全局限频
+                await rate_limiter.acquire()
+                order = await exchange.fetch_order(order['id'], symbol) or order
+                status = order.get('status')
+            except Exception as e:
+                status = f'error: {str(e)[:80]}'
+                break
+        duration = time.perf_counter() - t0
+        self.record('order.fill', ack_wall, duration, order_id=order.get('id'), status=status,
+                    filled=order.get('filled'), average=order.get('average'))
+        ctx = _current.get()
+        if ctx is not None:
+            trace = ctx[0]
+            total = time.time() - trace.start
+            self.logger.info(f"⏱️ [TRACE {trace.trace_id}] {symbol} 成交确认 ({status}): 回执后 {duration * 1000:.0f}ms，"
+                             f"距本轮开始 {total:.2f}s")
+
+    # ---------------- 导出 ----------------
+
+    def export(self, symbol=None, orders_only=False, limit=None):
+        """导出 span 列表 (按 trace 开始时间排列)"""
+        traces = [t for t in self.traces
+                  if (symbol is None or t.symbol == symbol) and (not orders_only or t.has_order)]
+        if limit:
+            traces = traces[-limit:]
+        spans = []
+        for trace in traces:
+            spans.extend(sorted(trace.to_list(), key=lambda s: s['start']))
+        return spans
+
+    def dump(self, path='log/traces.json', **filters):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.export(**filters), f, ensure_ascii=False)
+        return path
+
+    def _log_breakdown(self, trace):
+        """下过单的 trace: 输出从本轮开始到下单回执的各阶段耗时"""
+        stages = trace.spans
+        ack = next((s for s in stages if s['name'] == 'order.ack'), None)
+        elapsed = (ack['start'] if ack else time.time()) - trace.start
+        parts = " | ".join(f"{s['name']} {s['duration_ms']:.0f}ms" for s in stages
+                           if s['name'] in ('ohlcv', 'gate', 'ai.analyze', 'order.create'))
+        surge = next((s for s in stages if s['name'] == 'surge'), None)
+        prefix = f"异动({surge['attrs'].get('reason', '')}) -> " if surge else ""
+        self.logger.info(f"⏱️ [TRACE {trace.trace_id}] {trace.symbol} {prefix}信号 -> 下单回执 {elapsed:.2f}s: {parts}")
+
+
+# 全局单例 (由 OKXBot_Plus.main 按 trading.performance.tracing 调用 configure)
+tracer = Tracer()
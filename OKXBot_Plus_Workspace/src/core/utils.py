@@ -12,6 +12,7 @@ from .exceptions import (
     ConfigError, TradingError, RiskManagementError,
     DataProcessingError, AIError
 )
+from .metrics import RATE_LIMIT_WAIT
 
 # [New] Notification Cooldown Cache
 _notification_cooldowns = {}
@@ -30,6 +31,7 @@ class GlobalRateLimiter:
 
     async def acquire(self):
         """获取令牌，若无则等待"""
+        wait_start = time.perf_counter()
         async with self.lock:
             while self.tokens < 1:
                 now = time.time()
@@ -42,6 +44,7 @@ class GlobalRateLimiter:
                     await asyncio.sleep(0.1)
             
             self.tokens -= 1
+        RATE_LIMIT_WAIT.observe(time.perf_counter() - wait_start)
 
 # 全局单例
 rate_limiter = GlobalRateLimiter(requests_per_second=10)
@@ -169,6 +172,7 @@ def setup_logger(name="crypto_oracle"):
     else:
         # 回退逻辑
         project_root = os.path.dirname(src_dir) # .../OKXBot_Plus_Workspace (项目根目录)
+    project_root = os.getenv('CRYPTO_ORACLE_HOME', project_root)
     
     log_dir = os.path.join(project_root, "log")
 
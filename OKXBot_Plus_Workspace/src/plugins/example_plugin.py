@@ -6,6 +6,7 @@ class ExamplePlugin(Plugin):
     description = "示例插件，展示插件系统的使用方法"
     version = "1.0.0"
     enabled = True
+    replayable = True  # 没有外部 I/O
     
     async def initialize(self):
         """初始化插件"""
@@ -7,6 +7,7 @@ class SentimentPlugin(Plugin):
     description = "实时市场情绪分析 (Fear & Greed Index)"
     version = "1.0.0"
     enabled = True
+    replayable = True  # HTTP 请求经 call_external，可录制 / 回放
 
     def __init__(self, config, exchange=None, agent=None):
         super().__init__(config, exchange, agent)
@@ -59,17 +60,22 @@ class SentimentPlugin(Plugin):
             except ValueError:
                 pass
 
+    async def _fetch_fear_greed(self):
+        """Alternative.me Fear & Greed Index API，返回最新一条数据 (无数据时为 None)"""
+        async with httpx.AsyncClient() as client:
+            response = await client.get("https://api.alternative.me/fng/?limit=1")
+            if response.status_code != 200:
+                return None
+            result = response.json()
+            return result['data'][0] if result.get('data') else None
+
     async def _update_sentiment(self):
         try:
-            async with httpx.AsyncClient() as client:
-                # Alternative.me Fear & Greed Index API
-                response = await client.get("https://api.alternative.me/fng/?limit=1")
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get('data'):
-                        self.sentiment_cache = result['data'][0]
-                        self.last_update = time.time()
-                        self.logger.debug(f"🧠 更新市场情绪: {self.sentiment_cache['value']} ({self.sentiment_cache['value_classification']})")
+            sentiment = await self.call_external('fear_greed_index', self._fetch_fear_greed)
+            if sentiment:
+                self.sentiment_cache = sentiment
+                self.last_update = time.time()
+                self.logger.debug(f"🧠 更新市场情绪: {self.sentiment_cache['value']} ({self.sentiment_cache['value_classification']})")
         except Exception as e:
             self.logger.error(f"情绪数据获取失败: {e}")
 
@@ -0,0 +1,277 @@
+"""
+[New] 跨币种批量指标内核 (Cross-Symbol Batch Indicator Kernel)
+
+将所有币种对齐后的 open/high/low/close/volume 堆叠为 (symbols × bars) 二维数组，
+一次向量化遍历计算全市场的 EMA / RSI / MACD / BB / ATR / ADX / 量比 / OBV / 买盘占比。
+MarketDataService 从结果中按币种切片，取代逐币种串行的 pandas 指标流水线。
+
+对齐规则: 各币种按最新一根 K 线右对齐，历史较短的币种在左侧补 NaN；
+所有窗口/EWM 运算对左侧 NaN 的处理与单币种独立计算完全一致，切片时再去掉补位。
+"""
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# 与 MarketDataService 原有列名保持一致 (get_ohlcv 的指标映射依赖这些名称)
+INDICATOR_COLUMNS = [
+    'ema20', 'ema50', 'ema200',
+    'rsi',
+    'macd', 'signal', 'hist',
+    'ma20', 'std', 'upper_bb', 'lower_bb',
+    'tr', 'atr', 'atr_ma50', 'atr_ratio',
+    'plus_di', 'minus_di', 'adx',
+    'vol_ma20', 'vol_ratio',
+    'obv', 'buy_vol_prop_5',
+]
+
+
+class IndicatorBatch:
+    """
+    批量指标结果容器
+    - symbols: 行顺序对应的币种列表
+    - timestamps: (symbols × bars) 的 datetime64 数组 (补位为 NaT)
+    - lengths: 每个币种的有效 K 线数量
+    - arrays: 列名 -> (symbols × bars) float64 数组 (含 OHLCV 与全部指标)
+    """
+
+    def __init__(self, symbols, timestamps, lengths, arrays):
+        self.symbols = list(symbols)
+        self.timestamps = timestamps
+        self.lengths = lengths
+        self.arrays = arrays
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def row(self, symbol, column):
+        """返回单币种某列的有效部分 (一维视图，不复制)"""
+        i = self._index[symbol]
+        n = int(self.lengths[i])
+        return self.arrays[column][i, -n:] if n > 0 else self.arrays[column][i, :0]
+
+    def frame(self, symbol):
+        """
+        按币种切片，重建与 MarketDataService._calculate_indicators 相同结构的 DataFrame
+        """
+        i = self._index[symbol]
+        n = int(self.lengths[i])
+        data = {'timestamp': self.timestamps[i, -n:] if n > 0 else self.timestamps[i, :0]}
+        for col in OHLCV_COLUMNS + INDICATOR_COLUMNS:
+            data[col] = self.row(symbol, col)
+        return pd.DataFrame(data)
+
+    def latest(self, column):
+        """全市场最新一根的某列值 (symbol -> float)，便于横向扫描"""
+        values = self.arrays[column][:, -1]
+        return {s: float(values[i]) for i, s in enumerate(self.symbols)}
+
+
+def stack_ohlcv(frames, bars=None):
+    """
+    将 {symbol: DataFrame} 堆叠为 (symbols × bars) 二维数组
+    DataFrame 需包含 timestamp/open/high/low/close/volume 列 (timestamp 可为索引)
+    bars 为 None 时取最长序列长度
+    返回 (symbols, timestamps, lengths, arrays)
+    """
+    symbols = [s for s, df in frames.items() if df is not None and len(df) > 0]
+    if bars is None:
+        bars = max((len(frames[s]) for s in symbols), default=0)
+
+    n_sym = len(symbols)
+    arrays = {col: np.full((n_sym, bars), np.nan, dtype=np.float64) for col in OHLCV_COLUMNS}
+    timestamps = np.full((n_sym, bars), np.datetime64('NaT'), dtype='datetime64[ns]')
+    lengths = np.zeros(n_sym, dtype=np.int64)
+
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol]
+        if 'timestamp' not in df.columns:
+            df = df.reset_index()
+        df = df.tail(bars)
+        n = len(df)
+        lengths[i] = n
+        if n == 0:
+            continue
+        ts = df['timestamp']
+        if not pd.api.types.is_datetime64_any_dtype(ts):
+            ts = pd.to_datetime(ts)
+        timestamps[i, -n:] = ts.to_numpy(dtype='datetime64[ns]')
+        for col in OHLCV_COLUMNS:
+            if col in df.columns:
+                values = df[col]
+                if not pd.api.types.is_numeric_dtype(values):
+                    values = pd.to_numeric(values, errors='coerce')
+                arrays[col][i, -n:] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            elif col == 'volume':
+                arrays[col][i, -n:] = 0.0
+
+    return symbols, timestamps, lengths, arrays
+
+
+def _ewm(mat, **kwargs):
+    """沿 bars 轴 (axis=1) 做 EWM，pandas 在列方向上的 C 实现一次处理所有币种"""
+    return pd.DataFrame(mat.T).ewm(adjust=False, **kwargs).mean().to_numpy().T
+
+
+def _rolling_sum(mat, window):
+    """
+    沿 bars 轴的滚动求和 (前缀和实现，全部币种一次完成)
+    与 pandas rolling(window).sum() 语义一致: 窗口内任一值为 NaN 或不足 window 根时输出 NaN
+    """
+    n_sym, n_bars = mat.shape
+    out = np.full(mat.shape, np.nan, dtype=np.float64)
+    if n_bars < window:
+        return out
+    nan_mask = np.isnan(mat)
+    filled = np.where(nan_mask, 0.0, mat)
+    csum = np.zeros((n_sym, n_bars + 1), dtype=np.float64)
+    np.cumsum(filled, axis=1, out=csum[:, 1:])
+    ncnt = np.zeros((n_sym, n_bars + 1), dtype=np.int64)
+    np.cumsum(nan_mask, axis=1, out=ncnt[:, 1:])
+    sums = csum[:, window:] - csum[:, :-window]
+    has_nan = (ncnt[:, window:] - ncnt[:, :-window]) > 0
+    out[:, window - 1:] = np.where(has_nan, np.nan, sums)
+    return out
+
+
+def _rolling_mean(mat, window):
+    return _rolling_sum(mat, window) / window
+
+
+def _rolling_std(mat, window):
+    """滚动样本标准差 (ddof=1)，滑动窗口视图避免大数相减的精度损失"""
+    out = np.full(mat.shape, np.nan, dtype=np.float64)
+    if mat.shape[1] < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(mat, window, axis=1)
+    out[:, window - 1:] = windows.std(axis=2, ddof=1)
+    return out
+
+
+def _shift1(mat):
+    out = np.full(mat.shape, np.nan, dtype=np.float64)
+    out[:, 1:] = mat[:, :-1]
+    return out
+
+
+def _safe_div(a, b):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(b == 0, np.nan, a / b)
+
+
+def compute_batch(arrays, adx_window=14):
+    """
+    对 (symbols × bars) 的 OHLCV 数组一次性计算全部指标
+    语义与 MarketDataService._calculate_indicators 一致，并补充 Wilder ADX (+DI/-DI)
+    返回包含 OHLCV 与指标的新字典 (不修改输入)
+    """
+    o = arrays['open']
+    h = arrays['high']
+    l = arrays['low']
+    c = arrays['close']
+    v = arrays['volume']
+
+    out = {col: arrays[col] for col in OHLCV_COLUMNS}
+
+    # EMA 20/50/200
+    out['ema20'] = _ewm(c, span=20)
+    out['ema50'] = _ewm(c, span=50)
+    out['ema200'] = _ewm(c, span=200)
+
+    # RSI (14, 简单均值)
+    # 与 pandas where 语义一致: 首根 delta 为 NaN 时记 0，仅左侧补位保持 NaN
+    pad = np.isnan(c)
+    prev_c = _shift1(c)
+    delta = c - prev_c
+    with np.errstate(invalid='ignore'):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+    gain[pad] = np.nan
+    loss[pad] = np.nan
+    # loss 为 0 时 rs = inf -> RSI = 100，与单币种 pandas 版本一致
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = _rolling_mean(gain, 14) / _rolling_mean(loss, 14)
+        out['rsi'] = 100 - (100 / (1 + rs))
+
+    # MACD
+    exp1 = _ewm(c, span=12)
+    exp2 = _ewm(c, span=26)
+    macd = exp1 - exp2
+    out['macd'] = macd
+    out['signal'] = _ewm(macd, span=9)
+    out['hist'] = macd - out['signal']
+
+    # Bollinger Bands
+    ma20 = _rolling_mean(c, 20)
+    std20 = _rolling_std(c, 20)
+    out['ma20'] = ma20
+    out['std'] = std20
+    out['upper_bb'] = ma20 + std20 * 2
+    out['lower_bb'] = ma20 - std20 * 2
+
+    # True Range / ATR (14, 简单均值)
+    tr = np.fmax(np.fmax(h - l, np.abs(h - prev_c)), np.abs(l - prev_c))
+    out['tr'] = tr
+    atr = _rolling_mean(tr, 14)
+    out['atr'] = atr
+    atr_ma50 = _rolling_mean(atr, 50)
+    out['atr_ma50'] = atr_ma50
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['atr_ratio'] = atr / atr_ma50
+
+    # ADX (Wilder's Smoothing, alpha = 1/n)
+    up_move = h - _shift1(h)
+    down_move = _shift1(l) - l
+    with np.errstate(invalid='ignore'):
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    # 保留左侧补位的 NaN，保证 EWM 起点与单币种一致
+    plus_dm[pad] = np.nan
+    minus_dm[pad] = np.nan
+    alpha = 1 / adx_window
+    tr_smooth = _ewm(tr, alpha=alpha)
+    plus_di = 100 * _safe_div(_ewm(plus_dm, alpha=alpha), tr_smooth)
+    minus_di = 100 * _safe_div(_ewm(minus_dm, alpha=alpha), tr_smooth)
+    dx = 100 * _safe_div(np.abs(plus_di - minus_di), plus_di + minus_di)
+    out['plus_di'] = plus_di
+    out['minus_di'] = minus_di
+    out['adx'] = _ewm(dx, alpha=alpha)
+
+    # Volume Ratio
+    vol_ma20 = _rolling_mean(v, 20)
+    out['vol_ma20'] = vol_ma20
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['vol_ratio'] = v / vol_ma20
+
+    # OBV (Close > PrevClose => +Vol, Close < PrevClose => -Vol)
+    with np.errstate(invalid='ignore'):
+        obv_change = np.where(c > prev_c, v, np.where(c < prev_c, -v, 0.0))
+    out['obv'] = np.cumsum(np.nan_to_num(obv_change), axis=1)
+
+    # 5 周期买盘占比 (阳线成交量 / 总成交量)
+    with np.errstate(invalid='ignore'):
+        up_vol = np.where(c >= o, v, 0.0)
+    vol_sum_5 = _rolling_sum(v, 5)
+    vol_sum_5[vol_sum_5 == 0] = np.nan
+    buy_prop = _rolling_sum(up_vol, 5) / vol_sum_5
+    out['buy_vol_prop_5'] = np.where(np.isnan(buy_prop), 0.5, buy_prop)
+
+    return out
+
+
+def calculate_batch(frames, bars=None):
+    """
+    便捷入口: {symbol: DataFrame} -> IndicatorBatch
+    """
+    symbols, timestamps, lengths, arrays = stack_ohlcv(frames, bars=bars)
+    return IndicatorBatch(symbols, timestamps, lengths, compute_batch(arrays))
+
+
+def calculate_single(df):
+    """单币种入口 (1 × bars)，模块级函数便于分析执行器在进程池中调度"""
+    return calculate_batch({'_': df}).frame('_')
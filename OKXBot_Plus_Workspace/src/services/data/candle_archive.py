@@ -0,0 +1,213 @@
+"""
+[New] 内存映射 K 线归档 (Memory-mapped Candle Archive)
+
+每个 (symbol, timeframe) 一个定长记录的二进制文件:
+    <root>/<BASE_QUOTE[_SETTLE]>/<timeframe>.candles
+    头部 128 字节: struct('<4sHH', b'CNDL', 版本, 记录长度) + symbol (64 字节) + timeframe (16 字节)
+    之后每根 K 线 48 字节: ts(int64 开盘时间 ms) / open / high / low / close / volume (float64)，按 ts 升序
+读取通过 np.memmap 映射，按开盘时间二分定位区间，返回的是映射内存上的视图 (零拷贝)；
+写入只追加更新的 K 线，已存在的开盘时间原地覆盖 (未收盘 K 线的更新)，
+更早的缺口回补 (少见) 才整体重写文件。进程崩溃留下的半条尾记录在下次追加前截断。
+热启动 (DataManager.get_recent_candles) 与回测 (CandleStore.load_candles) 都直接读取这里，不经过 SQLite。
+"""
+
+import os
+import glob
+import struct
+
+import numpy as np
+import pandas as pd
+
+from services.data.candle_series import CandleSeries
+from services.data.kline_archive import symbol_tag
+
+CANDLE_DTYPE = np.dtype([
+    ('ts', '<i8'), ('open', '<f8'), ('high', '<f8'),
+    ('low', '<f8'), ('close', '<f8'), ('volume', '<f8'),
+])
+MAGIC = b'CNDL'
+VERSION = 1
+HEADER_SIZE = 128
+_HEADER = struct.Struct('<4sHH64s16s')
+
+
+def to_records(df):
+    """DataFrame (timestamp + OHLCV) -> 按 ts 升序、去重 (保留最后一条) 的结构化数组"""
+    series = CandleSeries.from_frame(df)
+    records = np.empty(len(series), dtype=CANDLE_DTYPE)
+    records['ts'] = series.ts
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        records[name] = getattr(series, name)
+    return records
+
+
+class CandleFile:
+    """单个 (symbol, timeframe) 的归档文件"""
+
+    def __init__(self, path, symbol=None, timeframe=None):
+        self.path = path
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self._map = None
+        self._map_count = -1
+        if os.path.exists(path):
+            self._read_header()
+
+    def _read_header(self):
+        with open(self.path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+        magic, version, record_size, symbol, timeframe = _HEADER.unpack(raw[:_HEADER.size])
+        if magic != MAGIC or record_size != CANDLE_DTYPE.itemsize:
+            raise ValueError(f"不是有效的 K 线归档: {self.path}")
+        self.symbol = symbol.rstrip(b'\0').decode('utf-8')
+        self.timeframe = timeframe.rstrip(b'\0').decode('utf-8')
+
+    def _header_bytes(self):
+        head = _HEADER.pack(MAGIC, VERSION, CANDLE_DTYPE.itemsize,
+                            self.symbol.encode('utf-8'), self.timeframe.encode('utf-8'))
+        return head.ljust(HEADER_SIZE, b'\0')
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return max(0, (os.path.getsize(self.path) - HEADER_SIZE) // CANDLE_DTYPE.itemsize)
+
+    # ---------------- 读取 (零拷贝) ----------------
+
+    def view(self):
+        """整个归档的只读映射 (结构化数组)；记录数变化后重新映射"""
+        count = len(self)
+        if count != self._map_count:
+            self._map = (np.memmap(self.path, dtype=CANDLE_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+                         if count else np.empty(0, dtype=CANDLE_DTYPE))
+            self._map_count = count
+        return self._map
+
+    def range(self, start_ms=None, end_ms=None):
+        """开盘时间在 [start_ms, end_ms) 内的 K 线 (二分定位，返回映射视图)"""
+        data = self.view()
+        ts = data['ts']
+        lo = int(np.searchsorted(ts, start_ms, side='left')) if start_ms is not None else 0
+        hi = int(np.searchsorted(ts, end_ms, side='left')) if end_ms is not None else len(data)
+        return data[lo:hi]
+
+    def tail(self, n):
+        data = self.view()
+        return data[max(0, len(data) - n):]
+
+    @property
+    def last_ts(self):
+        data = self.view()
+        return int(data['ts'][-1]) if len(data) else None
+
+    def series(self, start_ms=None, end_ms=None):
+        """CandleSeries (各列为映射内存上的跨步视图，不复制数据)"""
+        data = self.range(start_ms, end_ms)
+        return CandleSeries(data['ts'], data['open'], data['high'], data['low'], data['close'], data['volume'])
+
+    @staticmethod
+    def frame(records):
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(records['ts'], unit='ms'),
+            'open': records['open'], 'high': records['high'], 'low': records['low'],
+            'close': records['close'], 'volume': records['volume'],
+        })
+
+    # ---------------- 写入 ----------------
+
+    def append(self, records):
+        """
+        写入 K 线 (结构化数组，需按 ts 升序去重)
+        - ts 大于归档末尾: 追加
+        - ts 已存在: 原地覆盖 (未收盘 K 线更新)
+        - 更早且不存在 (缺口回补): 合并后原子重写
+        返回追加/覆盖的记录数
+        """
+        if len(records) == 0:
+            return 0
+        if not os.path.exists(self.path):
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'wb') as f:
+                f.write(self._header_bytes())
+                f.write(records.tobytes())
+            return len(records)
+
+        count = len(self)
+        expected = HEADER_SIZE + count * CANDLE_DTYPE.itemsize
+        if os.path.getsize(self.path) != expected:
+            # 崩溃时写了一半的尾记录
+            with open(self.path, 'r+b') as f:
+                f.truncate(expected)
+
+        existing = self.view()
+        ts = existing['ts']
+        last = int(ts[-1]) if count else None
+        newer = records[records['ts'] > last] if last is not None else records
+        older = records[records['ts'] <= last] if last is not None else records[:0]
+
+        if len(older):
+            idx = np.searchsorted(ts, older['ts'])
+            found = ts[np.minimum(idx, count - 1)] == older['ts']
+            if not found.all():
+                return self._rewrite(np.concatenate([existing, records]))
+            with open(self.path, 'r+b') as f:
+                for i, record in zip(idx, older):
+                    f.seek(HEADER_SIZE + int(i) * CANDLE_DTYPE.itemsize)
+                    f.write(record.tobytes())
+        if len(newer):
+            with open(self.path, 'ab') as f:
+                f.write(newer.tobytes())
+        return len(records)
+
+    def _rewrite(self, records):
+        """合并去重后整体重写 (临时文件 + 原子替换)"""
+        order = np.argsort(records['ts'], kind='stable')
+        records = records[order]
+        keep = np.ones(len(records), dtype=bool)
+        keep[:-1] = records['ts'][1:] != records['ts'][:-1]
+        records = records[keep]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self._header_bytes())
+            f.write(records.tobytes())
+        self._map = None
+        self._map_count = -1
+        os.replace(tmp_path, self.path)
+        return len(records)
+
+
+class CandleArchive:
+    """按 (symbol, timeframe) 管理归档文件 (文件句柄/映射缓存在实例中)"""
+
+    def __init__(self, root):
+        self.root = root
+        self._files = {}
+
+    def _path(self, symbol, timeframe):
+        return os.path.join(self.root, symbol_tag(symbol), f"{timeframe}.candles")
+
+    def get(self, symbol, timeframe):
+        key = (symbol, timeframe)
+        if key not in self._files:
+            self._files[key] = CandleFile(self._path(symbol, timeframe), symbol, timeframe)
+        return self._files[key]
+
+    def append_frame(self, symbol, timeframe, df):
+        if df is None or df.empty:
+            return 0
+        return self.get(symbol, timeframe).append(to_records(df))
+
+    def recent_frame(self, symbol, timeframe, limit=200):
+        """最近 limit 根 K 线的 DataFrame；归档为空时返回 None"""
+        records = self.get(symbol, timeframe).tail(limit)
+        return CandleFile.frame(records) if len(records) else None
+
+    @staticmethod
+    def scan(pattern):
+        """按通配符查找归档文件 (目录时递归查找其下所有 *.candles)"""
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '**', '*.candles')
+        paths = sorted(glob.glob(pattern, recursive=True)) if any(ch in pattern for ch in '*?[') else [pattern]
+        return [CandleFile(path) for path in paths if path.endswith('.candles')]
@@ -0,0 +1,87 @@
+"""
+[Refactor] 列式 K 线 (Candle Series)
+
+单个 (symbol, timeframe) 的 K 线以 NumPy 列存储，按开盘时间二分定位窗口。
+供回测数据源 (backtest.data_feed) 与模拟撮合交易所 (services.execution.sim_exchange) 共用。
+"""
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class CandleSeries:
+    """单个 (symbol, timeframe) 的列式 K 线 (开盘时间 ms + OHLCV float64)"""
+
+    def __init__(self, ts_ms, open_, high, low, close, volume):
+        self.ts = np.asarray(ts_ms, dtype=np.int64)
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.ts)
+
+    @classmethod
+    def from_frame(cls, df):
+        df = df.reset_index() if 'timestamp' not in df.columns else df
+        ts = df['timestamp']
+        if pd.api.types.is_datetime64_any_dtype(ts):
+            ts_ms = ts.to_numpy(dtype='datetime64[ns]').astype('datetime64[ms]').astype(np.int64)
+        elif pd.api.types.is_numeric_dtype(ts):
+            ts_ms = ts.to_numpy(dtype=np.int64)
+        else:
+            ts_ms = pd.to_datetime(ts).to_numpy(dtype='datetime64[ns]').astype('datetime64[ms]').astype(np.int64)
+        cols = [pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64) for c in OHLCV_COLUMNS]
+        if len(ts_ms) > 1 and not (ts_ms[1:] > ts_ms[:-1]).all():
+            order = np.argsort(ts_ms, kind='stable')
+            ts_ms = ts_ms[order]
+            # 去重 (保留最后一条)
+            keep = np.ones(len(ts_ms), dtype=bool)
+            keep[:-1] = ts_ms[1:] != ts_ms[:-1]
+            ts_ms = ts_ms[keep]
+            cols = [col[order][keep] for col in cols]
+        # [Optimization] 已按时间严格递增时直接引用原列 (共享内存上的帧不再复制)
+        return cls(ts_ms, *cols)
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(self.ts, unit='ms'),
+            'open': self.open, 'high': self.high, 'low': self.low,
+            'close': self.close, 'volume': self.volume,
+        })
+
+    def closed_count(self, now_ms, step_ms):
+        """截至 now_ms 已收盘的 K 线数量 (开盘时间 + 周期 <= now)"""
+        return int(np.searchsorted(self.ts, now_ms - step_ms, side='right'))
+
+    def rows(self, end, limit, start=0):
+        """返回 [start, end) 中最后 limit 根，ccxt 格式 [[ts, o, h, l, c, v], ...]"""
+        lo = max(start, end - limit)
+        if end <= lo:
+            return []
+        block = np.column_stack((
+            self.ts[lo:end].astype(np.float64),
+            self.open[lo:end], self.high[lo:end], self.low[lo:end],
+            self.close[lo:end], self.volume[lo:end],
+        ))
+        rows = block.tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
+
+    def aggregate(self, step_ms):
+        """聚合为更大周期 (按开盘时间对齐到 step_ms 整数倍；最后一根可能未收满)"""
+        if len(self.ts) == 0:
+            return CandleSeries(self.ts, self.open, self.high, self.low, self.close, self.volume)
+        buckets = self.ts - self.ts % step_ms
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        return CandleSeries(
+            buckets[starts], self.open[starts],
+            np.maximum.reduceat(self.high, starts), np.minimum.reduceat(self.low, starts),
+            self.close[ends], np.add.reduceat(self.volume, starts),
+        )
@@ -2,17 +2,34 @@ import sqlite3
 import pandas as pd
 import logging
 import os
+import time
 from datetime import datetime
 import asyncio
 import aiosqlite
+from services.data.kline_archive import KlineArchive
+from services.data.candle_archive import CandleArchive
+from services.data.ohlcv_pipeline import timeframe_to_ms
+
+# 多个 DataManager (全局 + 每个交易对) 的分层任务串行执行，避免同时 VACUUM 争抢磁盘
+_tiering_lock = asyncio.Lock()
+
 
 class DataManager:
-    def __init__(self, db_path="data/trade_data.db"):
+    def __init__(self, db_path="data/trade_data.db", archive_dir=None):
         self.db_path = db_path
         self.logger = logging.getLogger("data_manager")
         self._ensure_data_dir()
         self._buffer = []
         self._last_flush_time = 0
+        # [New] K 线冷数据归档: 默认 data/archive/<数据库名>/<交易对>/<周期>/<YYYY-MM>.parquet
+        if archive_dir is None:
+            stem = os.path.splitext(os.path.basename(db_path))[0]
+            archive_dir = os.path.join(os.path.dirname(db_path), 'archive', stem)
+        self.archive = KlineArchive(archive_dir)
+        # [New] 内存映射 K 线归档 (OHLCV 定长记录): 热启动/回测直接读取，不经过 SQLite
+        stem = os.path.splitext(os.path.basename(db_path))[0]
+        self.candles = CandleArchive(os.path.join(os.path.dirname(db_path), 'candles', stem))
+        self._tiering_task = None
         
     def _ensure_data_dir(self):
         directory = os.path.dirname(self.db_path)
@@ -22,6 +39,8 @@ class DataManager:
     async def initialize(self):
         """初始化数据库表结构"""
         async with aiosqlite.connect(self.db_path) as db:
+            # [New] 新建数据库使用增量 auto_vacuum，分层删除冷数据后可逐步回收空间 (已有数据库在首次分层后转换)
+            await self._ensure_incremental_vacuum(db)
             # 1. K线表 (存储最近的K线和指标)
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS klines (
@@ -80,12 +99,47 @@ class DataManager:
             await db.commit()
             self.logger.info(f"💾 数据库已初始化: {self.db_path}")
 
+    async def _ensure_incremental_vacuum(self, db):
+        """新建数据库在建表前设置增量 auto_vacuum (立即生效)；已有数据库的转换见 _convert_incremental"""
+        async with db.execute("PRAGMA page_count") as cursor:
+            pages = (await cursor.fetchone())[0]
+        if not pages:
+            await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    async def _convert_incremental(self, db, timeout):
+        """
+        [Fix] 已有数据库切换为增量 auto_vacuum 需要一次完整 VACUUM (独占写锁，耗时随库大小增长)。
+        放在分层把冷数据迁出之后执行 (此时库只剩热窗口)，并用 progress handler 限制在 timeout 秒内:
+        超时则中止 (事务回滚，不影响数据)，保证其它连接不会超过 busy timeout (5s)，下次分层时重试
+        """
+        async with db.execute("PRAGMA page_count") as cursor:
+            pages = (await cursor.fetchone())[0]
+        deadline = time.monotonic() + timeout
+        t0 = time.perf_counter()
+        await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        await db.set_progress_handler(lambda: int(time.monotonic() > deadline), 10000)
+        try:
+            await db.execute("VACUUM")
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"⚠️ 数据库切换为增量 VACUUM 未完成 (下次分层时重试): {self.db_path} ({pages} 页): {e}")
+            return False
+        finally:
+            await db.set_progress_handler(None, 0)
+        self.logger.info(f"🧹 数据库已切换为增量 VACUUM: {self.db_path} ({pages} 页，耗时 {time.perf_counter() - t0:.1f}s)")
+        return True
+
     async def save_klines(self, symbol, timeframe, df):
         """
         保存 K 线数据 (批量缓冲写入)
         df: 包含 kline 数据和计算好的指标
         """
         if df.empty: return
+
+        # [New] 同步追加到内存映射归档 (定长记录追加/覆盖，开销与 df 行数成正比)
+        try:
+            self.candles.append_frame(symbol, timeframe, df)
+        except Exception as e:
+            self.logger.warning(f"写入 K 线归档失败: {e}")
         
         # 转换数据为 tuple 列表
         for _, row in df.iterrows():
@@ -148,10 +202,34 @@ class DataManager:
             ))
             await db.commit()
 
+    def get_recent_candles(self, symbol, timeframe, limit=200):
+        """
+        [New] 从内存映射归档读取最近 limit 根 K 线 (timestamp + OHLCV DataFrame)
+        二分定位 + 映射视图，不查询 SQLite；归档为空时返回 None
+        """
+        try:
+            return self.candles.recent_frame(symbol, timeframe, limit)
+        except Exception as e:
+            self.logger.warning(f"读取 K 线归档失败: {e}")
+            return None
+
+    def warm_fetch_limit(self, frame, timeframe, limit=200, min_bars=10):
+        """
+        [New] 热启动时 REST 只需补齐本地归档末尾之后的 K 线
+        本地已有 >= limit 根时返回 缺失根数 + 2 (覆盖未收盘 K 线)，限制在 [min_bars, limit]；否则返回 limit
+        """
+        step = timeframe_to_ms(timeframe)
+        if frame is None or step is None or len(frame) < limit:
+            return limit
+        last_ms = int(frame['timestamp'].iloc[-1].value // 1_000_000)
+        missing = max(0, (int(time.time() * 1000) - last_ms) // step) + 2
+        return int(min(limit, max(min_bars, missing)))
+
     async def get_recent_klines(self, symbol, timeframe, limit=200):
         """
         [Data Resume] 断点续传：获取最近的 K 线数据
         用于机器人重启后快速恢复状态，减少对交易所 API 的依赖
+        [New] SQLite 热窗口不足 limit 条时，透明地从 Parquet 归档补齐更早的记录
         """
         try:
             async with aiosqlite.connect(self.db_path) as db:
@@ -163,7 +241,6 @@ class DataManager:
                     LIMIT ?
                 """, (symbol, timeframe, limit)) as cursor:
                     rows = await cursor.fetchall()
-                    if not rows: return []
                     
                     # 转换回字典列表，注意时间序 (DESC -> ASC)
                     data = []
@@ -172,7 +249,14 @@ class DataManager:
                         # 确保 timestamp 是 datetime 对象或字符串，视后续处理而定
                         # SQLite 存的是字符串，这里保持字符串或转为 pd.Timestamp
                         data.append(item)
-                    return data
+
+            if len(data) < limit and self.archive.available:
+                before = data[0]['timestamp'] if data else None
+                cold = await asyncio.to_thread(self.archive.read, symbol, timeframe, limit - len(data), before)
+                if not cold.empty:
+                    cold = cold.astype(object).where(pd.notna(cold), None)
+                    data = cold.to_dict('records') + data
+            return data
         except Exception as e:
             self.logger.error(f"读取历史数据失败: {e}")
             return []
@@ -204,3 +288,98 @@ class DataManager:
                     
                     # 可选：归档后清理数据库中的旧数据 (保留最近 1000 条)
                     # await db.execute(...) 
+
+    async def tier_klines(self, hot_bars=2000, vacuum=True, convert_timeout=3.0):
+        """
+        [New] K 线冷热分层
+        每个 (symbol, timeframe) 在 SQLite 中只保留最新 hot_bars 根，更早的按月写入 Parquet 归档后再删除
+        (先写后删: 中途崩溃最多重复归档，分区写入时按 timestamp 去重)；
+        有数据迁出时执行增量 VACUUM 回收空闲页，并 ANALYZE 刷新查询计划统计；
+        尚未启用增量 auto_vacuum 的旧数据库在迁出后转换 (最长 convert_timeout 秒)
+        """
+        stats = {'moved': 0, 'partitions': 0, 'freed_pages': 0}
+        if not self.archive.available:
+            self.logger.warning("⚠️ 未安装 pyarrow，跳过 K 线冷数据归档")
+            return stats
+        await self._flush_buffer()
+
+        async with _tiering_lock:
+            async with aiosqlite.connect(self.db_path) as db:
+                async with db.execute("SELECT DISTINCT symbol, timeframe FROM klines") as cursor:
+                    pairs = await cursor.fetchall()
+
+                for symbol, timeframe in pairs:
+                    async with db.execute("""
+                        SELECT timestamp FROM klines
+                        WHERE symbol = ? AND timeframe = ?
+                        ORDER BY timestamp DESC
+                        LIMIT 1 OFFSET ?
+                    """, (symbol, timeframe, hot_bars - 1)) as cursor:
+                        row = await cursor.fetchone()
+                    if not row:
+                        continue
+                    cutoff = row[0]
+
+                    async with db.execute("""
+                        SELECT * FROM klines
+                        WHERE symbol = ? AND timeframe = ? AND timestamp < ?
+                        ORDER BY timestamp ASC
+                    """, (symbol, timeframe, cutoff)) as cursor:
+                        cols = [description[0] for description in cursor.description]
+                        rows = await cursor.fetchall()
+                    if not rows:
+                        continue
+
+                    cold = pd.DataFrame(rows, columns=cols)
+                    cold['timestamp'] = cold['timestamp'].astype(str)
+                    stats['partitions'] += await asyncio.to_thread(self.archive.write, cold)
+                    await db.execute(
+                        "DELETE FROM klines WHERE symbol = ? AND timeframe = ? AND timestamp < ?",
+                        (symbol, timeframe, cutoff)
+                    )
+                    await db.commit()
+                    stats['moved'] += len(rows)
+
+                if vacuum:
+                    async with db.execute("PRAGMA auto_vacuum") as cursor:
+                        mode = (await cursor.fetchone())[0]
+                    if stats['moved']:
+                        async with db.execute("PRAGMA freelist_count") as cursor:
+                            stats['freed_pages'] = (await cursor.fetchone())[0]
+                    if mode != 2:
+                        await self._convert_incremental(db, convert_timeout)
+                    elif stats['moved']:
+                        # executescript 会把 PRAGMA 执行到底 (execute 只单步执行，每次只回收一页)
+                        await db.executescript("PRAGMA incremental_vacuum;")
+                    if stats['moved']:
+                        await db.execute("ANALYZE")
+                        await db.commit()
+
+        if stats['moved']:
+            self.logger.info(
+                f"🧊 K 线分层: {os.path.basename(self.db_path)} 迁出 {stats['moved']} 条 -> "
+                f"{stats['partitions']} 个 Parquet 分区，回收 {stats['freed_pages']} 页"
+            )
+        return stats
+
+    def start_tiering(self, hot_bars=2000, interval=6 * 3600, initial_delay=300, convert_timeout=3.0):
+        """启动后台分层任务 (首次在 initial_delay 秒后执行，之后每 interval 秒一次)"""
+        if self._tiering_task is None or self._tiering_task.done():
+            self._tiering_task = asyncio.create_task(
+                self._tiering_loop(hot_bars, interval, initial_delay, convert_timeout))
+
+    def stop_tiering(self):
+        if self._tiering_task is not None:
+            self._tiering_task.cancel()
+            self._tiering_task = None
+
+    async def _tiering_loop(self, hot_bars, interval, initial_delay, convert_timeout=3.0):
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await self.tier_klines(hot_bars, convert_timeout=convert_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"K 线分层任务失败: {e}")
+            await asyncio.sleep(interval)
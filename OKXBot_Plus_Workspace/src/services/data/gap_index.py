@@ -0,0 +1,236 @@
+"""
+[New] K 线连续性检查与缺口索引 (Gap Index)
+
+取代每次 tick 对整段历史做 resample().asfreq() 的做法:
+1. 每个 (symbol, timeframe) 记录已检查到的最新时间戳，之后只扫描新追加的 K 线
+2. 发现缺口后优先用交易所 fetch_ohlcv(since=...) 回补真实 K 线
+3. 交易所也拿不到的部分 (例如维护停机) 才合成十字星 (沿用前收盘价，成交量 0)
+4. 每个缺口记入索引 (起止时间 / 根数 / 修补方式)，修补好的 K 线作为补丁保留，
+   之后每次从数据库 + API 重新合并时直接贴回，无需再次检测
+"""
+
+import asyncio
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.utils import rate_limiter
+from services.data.ohlcv_pipeline import timeframe_to_ms, timestamps_to_ms, find_gaps
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class GapIndex:
+    """
+    缺口索引
+    - gaps: (symbol, timeframe) -> [{'start', 'end', 'bars', 'status', 'detected_at'}]
+      status: backfilled (交易所回补) / partial (部分回补，其余合成) / synthetic (全部合成)
+    - patches: (symbol, timeframe) -> 已修补的 K 线 (DataFrame)
+    - checked_until: (symbol, timeframe) -> 已完成连续性检查的最新 K 线时间 (毫秒)
+    """
+
+    def __init__(self, max_backfill_bars=300, page_limit=100, max_gaps_per_key=100):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.max_backfill_bars = max_backfill_bars
+        self.page_limit = page_limit
+        self.max_gaps_per_key = max_gaps_per_key
+        self.gaps = {}
+        self.patches = {}
+        self.checked_until = {}
+
+    @staticmethod
+    def prepare(df):
+        """时间戳取整到秒、去重、排序 (已有序时跳过排序)，返回带 timestamp 列的 DataFrame"""
+        if 'timestamp' not in df.columns:
+            df = df.reset_index()
+        if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df['timestamp'] = df['timestamp'].dt.floor('1s')
+        df = df[df['timestamp'].notna()]
+        if not df['timestamp'].is_monotonic_increasing:
+            df = df.sort_values('timestamp', kind='stable')
+        if df['timestamp'].duplicated().any():
+            df = df.drop_duplicates(subset=['timestamp'], keep='last')
+        return df.reset_index(drop=True)
+
+    def _apply_patches(self, key, df):
+        """将此前修补过的 K 线贴回 (仅补入 df 中缺失的时间点)"""
+        patch = self.patches.get(key)
+        if patch is None or patch.empty or df.empty:
+            return df
+        lo, hi = df['timestamp'].iloc[0], df['timestamp'].iloc[-1]
+        # 丢弃已滑出窗口的旧补丁，控制内存
+        patch = patch[patch['timestamp'] >= lo]
+        self.patches[key] = patch
+        patch = patch[patch['timestamp'] <= hi]
+        if patch.empty:
+            return df
+        missing = ~patch['timestamp'].isin(df['timestamp'])
+        if not missing.any():
+            return df
+        merged = pd.concat([df, patch[missing]], ignore_index=True)
+        return merged.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+    def scan(self, symbol, timeframe, df):
+        """
+        只扫描上次检查点之后新追加的 K 线，返回新发现的缺口列表 [(start_ms, end_ms, bars)]
+        df 需已经过 prepare
+        """
+        step_ms = timeframe_to_ms(timeframe)
+        if step_ms is None or len(df) < 2:
+            return []
+        key = (symbol, timeframe)
+        ts_ms = timestamps_to_ms(df['timestamp'])
+        checked = self.checked_until.get(key)
+        start = 0
+        if checked is not None:
+            # 从检查点前一根开始，保证检查点与第一根新 K 线之间的缺口也能被发现
+            start = max(int(np.searchsorted(ts_ms, checked, side='right')) - 1, 0)
+        gaps = find_gaps(ts_ms[start:], step_ms)
+        self.checked_until[key] = int(ts_ms[-1])
+        return gaps
+
+    async def _fetch_range(self, exchange, symbol, api_timeframe, start_ms, end_ms, step_ms):
+        """用 since= 分页拉取 [start_ms, end_ms] 区间的真实 K 线"""
+        rows = []
+        since = start_ms
+        max_pages = self.max_backfill_bars // self.page_limit + 1
+        for _ in range(max_pages):
+            if since > end_ms:
+                break
+            await rate_limiter.acquire()
+            ohlcv = await asyncio.wait_for(
+                exchange.fetch_ohlcv(symbol, api_timeframe, since=since, limit=self.page_limit),
+                timeout=10
+            )
+            if not ohlcv:
+                break
+            rows.extend(r for r in ohlcv if start_ms <= r[0] <= end_ms)
+            last_ts = ohlcv[-1][0]
+            if last_ts < since:
+                break
+            since = last_ts + step_ms
+        if not rows:
+            return None
+        df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        return df.drop_duplicates(subset=['timestamp'], keep='last')
+
+    @staticmethod
+    def _synthesize(df, timestamps):
+        """为交易所也无法提供的时间点合成十字星: O/H/L/C = 前收盘价, Volume = 0"""
+        if len(timestamps) == 0:
+            return None
+        idx = np.searchsorted(df['timestamp'].to_numpy(), timestamps, side='right') - 1
+        prev_close = df['close'].to_numpy(dtype=np.float64)[np.clip(idx, 0, None)]
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'open': prev_close,
+            'high': prev_close,
+            'low': prev_close,
+            'close': prev_close,
+            'volume': 0.0,
+        })
+
+    async def repair(self, exchange, symbol, timeframe, df, api_timeframe=None):
+        """
+        增量连续性修补入口
+        返回 (df, backfilled): backfilled 为本次从交易所回补的真实 K 线 (可落库)，没有则为 None
+        """
+        if df is None or df.empty:
+            return df, None
+        step_ms = timeframe_to_ms(timeframe)
+        if step_ms is None:
+            return df, None
+
+        key = (symbol, timeframe)
+        df = self.prepare(df)
+        df = self._apply_patches(key, df)
+        new_gaps = self.scan(symbol, timeframe, df)
+        if not new_gaps:
+            return df, None
+
+        fills = []
+        backfilled_parts = []
+        now = time.time()
+        for start_ms, end_ms, bars in new_gaps:
+            expected = pd.to_datetime(np.arange(start_ms, end_ms + 1, step_ms), unit='ms')
+            fetched = None
+            if exchange is not None and bars <= self.max_backfill_bars:
+                try:
+                    fetched = await self._fetch_range(
+                        exchange, symbol, api_timeframe or timeframe, start_ms, end_ms, step_ms
+                    )
+                except Exception as e:
+                    self.logger.warning(f"[{symbol}] {timeframe} 缺口回补失败: {e}")
+
+            got = 0
+            if fetched is not None and not fetched.empty:
+                fills.append(fetched)
+                backfilled_parts.append(fetched)
+                got = len(fetched)
+                remaining = expected[~expected.isin(fetched['timestamp'])]
+            else:
+                remaining = expected
+
+            if len(remaining) > 0:
+                base = df if fetched is None else pd.concat([df, fetched]).sort_values('timestamp', kind='stable')
+                synthetic = self._synthesize(base, remaining.to_numpy())
+                if synthetic is not None:
+                    fills.append(synthetic)
+
+            status = 'backfilled' if len(remaining) == 0 else ('partial' if got else 'synthetic')
+            self._record(key, start_ms, end_ms, bars, status, now)
+            self.logger.info(
+                f"🩹 [{symbol}] {timeframe} K 线缺口 {pd.to_datetime(start_ms, unit='ms')} 起 {bars} 根 -> {status}"
+            )
+
+        patch = pd.concat(fills, ignore_index=True)
+        old_patch = self.patches.get(key)
+        self.patches[key] = patch if old_patch is None else pd.concat([old_patch, patch], ignore_index=True)
+
+        df = pd.concat([df, patch], ignore_index=True)
+        df = df.sort_values('timestamp', kind='stable').drop_duplicates(subset=['timestamp'], keep='first')
+        df = df.reset_index(drop=True)
+
+        backfilled = pd.concat(backfilled_parts, ignore_index=True) if backfilled_parts else None
+        return df, backfilled
+
+    def _record(self, key, start_ms, end_ms, bars, status, detected_at):
+        entries = self.gaps.setdefault(key, [])
+        entries.append({
+            'start': start_ms,
+            'end': end_ms,
+            'bars': bars,
+            'status': status,
+            'detected_at': detected_at,
+        })
+        if len(entries) > self.max_gaps_per_key:
+            del entries[:-self.max_gaps_per_key]
+
+    def get(self, symbol, timeframe):
+        """查询某币种/周期的缺口记录"""
+        return list(self.gaps.get((symbol, timeframe), []))
+
+    def summary(self):
+        """汇总各币种缺口数量与修补方式，便于健康报告/日志展示"""
+        result = {}
+        for (symbol, timeframe), entries in self.gaps.items():
+            stats = result.setdefault(f"{symbol}@{timeframe}", {'gaps': 0, 'bars': 0})
+            for entry in entries:
+                stats['gaps'] += 1
+                stats['bars'] += entry['bars']
+                stats[entry['status']] = stats.get(entry['status'], 0) + 1
+        return result
+
+    def reset(self, symbol=None, timeframe=None):
+        """清空检查点 (例如长时间停机后希望全量复检)"""
+        keys = [k for k in self.checked_until if (symbol is None or k[0] == symbol) and (timeframe is None or k[1] == timeframe)]
+        for key in keys:
+            self.checked_until.pop(key, None)
+
+
+# 全局单例
+gap_index = GapIndex()
@@ -0,0 +1,91 @@
+"""
+[New] K 线冷数据归档 (Parquet 分区)
+
+DataManager 的分层任务把 SQLite 中热窗口之外的 K 线按 交易对 / 周期 / 月份 写入:
+    <root>/<BASE_QUOTE[_SETTLE]>/<timeframe>/<YYYY-MM>.parquet
+列与 klines 表一致 (含 symbol / timeframe 列，backtest 的 --parquet 可直接加载)，
+同一分区重复写入时按 timestamp 合并去重。读取按月份从新到旧逐个分区加载，满足条数即停止。
+需要 pyarrow；未安装时 available 为 False，分层任务不会删除 SQLite 中的数据。
+"""
+
+import os
+import importlib.util
+import glob
+
+import pandas as pd
+
+# [Optimization] 只检测 pyarrow 是否已安装 (DataFrame.to_parquet 引擎)，不在导入时加载它；
+# pandas 在首次读写 Parquet 时才真正导入
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+def symbol_tag(symbol):
+    return symbol.replace('/', '_').replace(':', '_')
+
+
+class KlineArchive:
+    def __init__(self, root):
+        self.root = root
+
+    @property
+    def available(self):
+        return PARQUET_AVAILABLE
+
+    def _dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol_tag(symbol), timeframe)
+
+    def months(self, symbol, timeframe):
+        """已有分区的月份 (升序)"""
+        directory = self._dir(symbol, timeframe)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-8] for name in os.listdir(directory) if name.endswith('.parquet'))
+
+    def write(self, df):
+        """
+        写入冷数据 (df 为 klines 表的行，timestamp 为 'YYYY-MM-DD HH:MM:SS' 字符串)
+        返回写入的分区数
+        """
+        if df.empty:
+            return 0
+        written = 0
+        for (symbol, timeframe), group in df.groupby(['symbol', 'timeframe']):
+            directory = self._dir(symbol, timeframe)
+            os.makedirs(directory, exist_ok=True)
+            for month, part in group.groupby(group['timestamp'].str[:7]):
+                path = os.path.join(directory, f"{month}.parquet")
+                if os.path.exists(path):
+                    part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+                part = part.drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp')
+                tmp_path = path + '.tmp'
+                part.to_parquet(tmp_path, index=False, compression='snappy')
+                os.replace(tmp_path, path)
+                written += 1
+        return written
+
+    def read(self, symbol, timeframe, limit=None, before=None):
+        """
+        读取归档 K 线 (按时间升序)
+        before: 只返回 timestamp < before 的记录；limit: 只返回最新的 limit 条
+        """
+        frames = []
+        count = 0
+        for month in reversed(self.months(symbol, timeframe)):
+            if before and month > before[:7]:
+                continue
+            df = pd.read_parquet(os.path.join(self._dir(symbol, timeframe), f"{month}.parquet"))
+            if before:
+                df = df[df['timestamp'] < before]
+            if df.empty:
+                continue
+            frames.append(df)
+            count += len(df)
+            if limit and count >= limit:
+                break
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(reversed(frames), ignore_index=True)
+        return df.tail(limit).reset_index(drop=True) if limit else df
+
+    def size_bytes(self):
+        return sum(os.path.getsize(p) for p in glob.glob(os.path.join(self.root, '*', '*', '*.parquet')))
@@ -0,0 +1,152 @@
+"""
+[New] 市场元数据缓存 (Market Metadata Cache)
+
+OKX 的 load_markets() 每次启动都会拉取全部产品 (数千个现货/永续/交割/期权合约) 并逐个解析，
+而机器人只用到配置中的几十个交易对。这里把用到的交易对的 market 结构 (limits / contractSize / precision 等)
+保存为磁盘快照 data/markets.json:
+- 启动时快照未过期且覆盖所有交易对 -> 直接 exchange.set_markets() 注入 ccxt，不请求交易所；
+  之后 ccxt 内部的 load_markets() 发现 markets 已存在会立即返回
+- 快照缺失/过期/缺少交易对 -> 完整 load_markets() 一次，裁剪出用到的交易对写回快照
+- 后台任务每 refresh_hours 小时重新拉取一次产品列表并更新快照 (不阻塞主循环)
+注入后 exchange.markets 只包含用到的交易对，exchange.market(symbol) 仍是内存字典查询。
+
+用法:
+    await market_cache.load(exchange, symbols)       # 启动
+    await market_cache.ensure(exchange, [new_symbol])  # 热添加交易对
+    market_cache.start_refresh(exchange)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+
+
+def patch_okx_parse_market(okx_class):
+    """
+    [v3.9.6 Fix] OKX 返回不完整的产品数据时 parse_market 会抛出 NoneType 错误并导致 load_markets 崩溃:
+    单个产品解析失败时返回 None 并在 parse_markets 中过滤掉 (只打一次补丁)
+    """
+    if getattr(okx_class, '_crypto_oracle_patched', False):
+        return
+    original_parse_market = okx_class.parse_market
+    original_parse_markets = okx_class.parse_markets
+
+    def parse_market(self, market):
+        try:
+            return original_parse_market(self, market)
+        except Exception:
+            return None
+
+    def parse_markets(self, markets):
+        return [m for m in original_parse_markets(self, markets) if m is not None]
+
+    okx_class.parse_market = parse_market
+    okx_class.parse_markets = parse_markets
+    okx_class._crypto_oracle_patched = True
+
+
+class MarketCache:
+    def __init__(self, path='data/markets.json', ttl_hours=24, refresh_hours=6):
+        self.logger = logging.getLogger("crypto_oracle")
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.refresh_interval = refresh_hours * 3600
+        self.symbols = set()
+        self._refresh_task = None
+
+    def configure(self, path=None, ttl_hours=24, refresh_hours=6):
+        self.path = path or self.path
+        self.ttl = ttl_hours * 3600
+        self.refresh_interval = refresh_hours * 3600
+
+    # ---------------- 快照读写 ----------------
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 市场信息快照损坏，忽略: {e}")
+            return None
+
+    def _write_snapshot(self, markets):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'saved_at': time.time(), 'markets': markets}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    # ---------------- 注入与加载 ----------------
+
+    async def load(self, exchange, symbols):
+        """
+        启动时加载市场信息: 优先使用未过期的快照，否则完整 load_markets 并写回快照
+        返回 'snapshot' 或 'exchange' (数据来源)
+        """
+        self.symbols.update(symbols)
+        snapshot = self._read_snapshot()
+        if snapshot and time.time() - snapshot.get('saved_at', 0) < self.ttl:
+            markets = snapshot.get('markets', {})
+            if all(s in markets for s in self.symbols):
+                exchange.set_markets([markets[s] for s in sorted(self.symbols)])
+                self.logger.info(f"📦 市场信息: 使用本地快照 ({len(self.symbols)} 个交易对)")
+                return 'snapshot'
+        await self._load_full(exchange)
+        return 'exchange'
+
+    async def ensure(self, exchange, symbols):
+        """确保交易对的市场信息已注入 (热添加交易对时调用)，缺失时完整加载一次"""
+        self.symbols.update(symbols)
+        markets = exchange.markets or {}
+        if all(s in markets for s in symbols):
+            return
+        await self._load_full(exchange)
+
+    async def _load_full(self, exchange):
+        t0 = time.perf_counter()
+        markets = await exchange.load_markets(True)
+        trimmed = {s: markets[s] for s in sorted(self.symbols) if s in markets}
+        missing = self.symbols - set(trimmed)
+        if missing:
+            self.logger.warning(f"⚠️ 交易所不存在以下交易对: {', '.join(sorted(missing))}")
+        # 只保留用到的交易对，后续 market() 查询与快照都不再携带全部产品
+        exchange.set_markets(list(trimmed.values()))
+        try:
+            self._write_snapshot(trimmed)
+        except Exception as e:
+            self.logger.warning(f"⚠️ 写入市场信息快照失败: {e}")
+        self.logger.info(f"🌐 市场信息: 完整加载 {len(markets)} 个产品，保留 {len(trimmed)} 个 "
+                         f"({(time.perf_counter() - t0) * 1000:.0f}ms)")
+
+    # ---------------- 后台刷新 ----------------
+
+    def start_refresh(self, exchange):
+        if self.refresh_interval <= 0:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop(exchange))
+
+    def stop_refresh(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def _refresh_loop(self, exchange):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self._load_full(exchange)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"⚠️ 刷新市场信息失败 (继续使用缓存): {e}")
+
+
+# 全局单例
+market_cache = MarketCache()
@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 import asyncio
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
+from core.utils import rate_limiter
+from core.executor import analytics_executor
+from core.metrics import CACHE_REQUESTS
+from services.data.batch_indicators import calculate_batch, calculate_single
+from services.data.gap_index import gap_index
 
 class MarketDataService:
     def __init__(self, exchange, data_manager, logger=None):
@@ -10,6 +16,10 @@ class MarketDataService:
         self.data_manager = data_manager
         self.logger = logger
         self.cache = {} # Simple memory cache
+        # [New] 批量指标切片缓存: (symbol, timeframe) -> (DataFrame, 计算时间)
+        # 由 prefetch_universe 一次性填充，fetch_and_process_ohlcv 取用后即移除 (每轮只服务一次)
+        self.batch_frames = {}
+        self.batch_ttl = 30
 
     def _log(self, message: str, level: str = 'info'):
         if self.logger:
@@ -55,44 +65,31 @@ class MarketDataService:
     async def fetch_and_process_ohlcv(self, symbol: str, timeframe: str, limit: int = 200) -> Optional[pd.DataFrame]:
         """
         通用的 K 线获取、合并、清洗、指标计算流程
+        [Optimization] 若本轮已由 prefetch_universe 批量计算，直接返回该币种的切片
         """
-        try:
-            # 1. 尝试从数据库加载近期数据 (断点续传)
-            local_klines = []
-            try:
-                # 假设 data_manager 已经支持 timeframe 参数
-                local_klines = await self.data_manager.get_recent_klines(symbol, timeframe, limit=limit)
-            except Exception as e:
-                self._log(f"[{timeframe}] 加载本地数据失败: {e}", 'debug')
+        batched = bool(self.batch_frames)
+        cached = self.batch_frames.pop((symbol, timeframe), None)
+        if cached is not None:
+            df_cached, computed_at = cached
+            if time.time() - computed_at <= self.batch_ttl:
+                CACHE_REQUESTS.labels('batch_indicators', 'hit').inc()
+                return df_cached
+        if batched:
+            CACHE_REQUESTS.labels('batch_indicators', 'miss').inc()
 
-            # 2. 从 API 拉取最新数据
-            # 兼容性处理
-            api_tf = '1m' if 'ms' in timeframe or timeframe.endswith('s') else timeframe
-            
-            ohlcv = await self.exchange.fetch_ohlcv(symbol, api_tf, limit=limit)
-            if not ohlcv:
+        try:
+            df = await self._load_merged_ohlcv(symbol, timeframe, limit)
+            if df is None:
                 return None
-                
-            df_new = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df_new['timestamp'] = pd.to_datetime(df_new['timestamp'], unit='ms')
-
-            # 3. 合并数据
-            df = df_new
-            if local_klines:
-                df_local = pd.DataFrame(local_klines)
-                df_local['timestamp'] = pd.to_datetime(df_local['timestamp'])
-                # 合并并去重，保留最新的 API 数据
-                df = pd.concat([df_local, df_new]).drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp')
             
-            # 4. 计算技术指标
-            df = self._calculate_indicators(df)
+            # 4. 计算技术指标 (CPU 密集，交由分析执行器，避免阻塞事件循环)
+            try:
+                df = await analytics_executor.run_frame(calculate_single, df)
+            except Exception as e:
+                self._log(f"指标计算错误: {e}", 'error')
             
             # 5. 异步保存回数据库 (只保存最新的部分，避免全量写入)
-            # 保存最近 5 根，确保覆盖可能更新的未收盘 K 线
-            if self.data_manager:
-                to_save = df.tail(5).reset_index(drop=True)
-                # 注意：这里不 await，放后台跑
-                asyncio.create_task(self.data_manager.save_klines(symbol, timeframe, to_save))
+            self._schedule_save(symbol, timeframe, df)
                 
             return df
             
@@ -100,75 +97,101 @@ class MarketDataService:
             self._log(f"[{timeframe}] 获取/处理数据失败: {e}", 'error')
             return None
 
-    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    async def _load_merged_ohlcv(self, symbol: str, timeframe: str, limit: int = 200) -> Optional[pd.DataFrame]:
         """
-        计算全套技术指标 (RSI, MACD, BB, ADX, ATR)
-        复用 TradeExecutor 中的逻辑
+        [Refactor] 加载本地 K 线并与 API 最新数据合并 (不含指标计算)
         """
-        try:
-            # Ensure numeric
-            cols = ['open', 'high', 'low', 'close', 'volume']
-            for col in cols:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        # 1. 加载近期数据 (断点续传): 优先内存映射归档 (零拷贝)，不足 limit 根时回退数据库
+        local_klines = self.data_manager.get_recent_candles(symbol, timeframe, limit=limit) if self.data_manager else None
+        if local_klines is None or len(local_klines) < limit:
+            try:
+                local_klines = await self.data_manager.get_recent_klines(symbol, timeframe, limit=limit)
+            except Exception as e:
+                self._log(f"[{timeframe}] 加载本地数据失败: {e}", 'debug')
+                local_klines = []
+
+        # 2. 从 API 拉取最新数据 (归档已覆盖 limit 根时只补齐末尾之后的 K 线)
+        # 兼容性处理
+        api_tf = '1m' if 'ms' in timeframe or timeframe.endswith('s') else timeframe
+        fetch_limit = self.data_manager.warm_fetch_limit(local_klines, timeframe, limit=limit) \
+            if isinstance(local_klines, pd.DataFrame) else limit
+        
+        ohlcv = await self.exchange.fetch_ohlcv(symbol, api_tf, limit=fetch_limit)
+        if not ohlcv:
+            return None
             
-            # EMA 20/50/200
-            df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
-            df['ema50'] = df['close'].ewm(span=50, adjust=False).mean()
-            df['ema200'] = df['close'].ewm(span=200, adjust=False).mean()
+        df_new = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        df_new['timestamp'] = pd.to_datetime(df_new['timestamp'], unit='ms')
 
-            # RSI
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            df['rsi'] = 100 - (100 / (1 + rs))
+        # 3. 合并数据
+        df = df_new
+        if len(local_klines):
+            df_local = pd.DataFrame(local_klines)
+            df_local['timestamp'] = pd.to_datetime(df_local['timestamp'])
+            # 合并并去重，保留最新的 API 数据
+            df = pd.concat([df_local, df_new]).drop_duplicates(subset=['timestamp'], keep='last').sort_values('timestamp')
 
-            # MACD
-            exp1 = df['close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['close'].ewm(span=26, adjust=False).mean()
-            df['macd'] = exp1 - exp2
-            df['signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-            df['hist'] = df['macd'] - df['signal']
+        # 4. [New] 增量连续性检查: 只扫描新追加的 K 线，缺口优先用 since= 从交易所回补
+        df, backfilled = await gap_index.repair(self.exchange, symbol, timeframe, df, api_timeframe=api_tf)
+        if backfilled is not None and self.data_manager:
+            asyncio.create_task(self.data_manager.save_klines(symbol, timeframe, backfilled))
+        return df
 
-            # Bollinger Bands
-            df['ma20'] = df['close'].rolling(window=20).mean()
-            df['std'] = df['close'].rolling(window=20).std()
-            df['upper_bb'] = df['ma20'] + (df['std'] * 2)
-            df['lower_bb'] = df['ma20'] - (df['std'] * 2)
+    def _schedule_save(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        # 保存最近 5 根，确保覆盖可能更新的未收盘 K 线
+        if self.data_manager:
+            to_save = df.tail(5).reset_index(drop=True)
+            # 注意：这里不 await，放后台跑
+            asyncio.create_task(self.data_manager.save_klines(symbol, timeframe, to_save))
 
-            # ADX
-            df['tr1'] = df['high'] - df['low']
-            df['tr2'] = abs(df['high'] - df['close'].shift())
-            df['tr3'] = abs(df['low'] - df['close'].shift())
-            df['tr'] = df[['tr1', 'tr2', 'tr3']].max(axis=1)
-            df['atr'] = df['tr'].rolling(window=14).mean() # ATR 14
-            
-            # ATR Ratio (Volatility Factor)
-            df['atr_ma50'] = df['atr'].rolling(window=50).mean()
-            df['atr_ratio'] = df['atr'] / df['atr_ma50']
+    async def prefetch_universe(self, symbols: List[str], timeframes: List[str], limit: int = 200) -> Dict[str, Any]:
+        """
+        [New] 全市场批量预取 + 批量指标计算
+        1. 并发拉取所有币种/周期的 K 线 (受全局限频器约束)
+        2. 每个周期堆叠为 (symbols × bars) 数组，一次向量化计算全部指标
+        3. 按币种切片放入 batch_frames，供本轮 get_market_context 直接取用
+        返回 {timeframe: IndicatorBatch}
+        """
+        async def load(symbol, timeframe):
+            try:
+                await rate_limiter.acquire()
+                return symbol, timeframe, await self._load_merged_ohlcv(symbol, timeframe, limit)
+            except Exception as e:
+                self._log(f"[{timeframe}] 批量预取 {symbol} 失败: {e}", 'warning')
+                return symbol, timeframe, None
 
-            # Volume Ratio
-            df['vol_ma20'] = df['volume'].rolling(window=20).mean()
-            df['vol_ratio'] = df['volume'] / df['vol_ma20']
-            
-            # [New] OBV (On-Balance Volume)
-            # Close > PrevClose => +Vol, else -Vol
-            df['obv_change'] = 0.0
-            df.loc[df['close'] > df['close'].shift(), 'obv_change'] = df['volume']
-            df.loc[df['close'] < df['close'].shift(), 'obv_change'] = -df['volume']
-            df['obv'] = df['obv_change'].cumsum()
-            
-            # [New] Buy Volume Proportion (Capital Flow)
-            # 简单估算：阳线视为买入主导，阴线视为卖出主导
-            df['is_up_candle'] = df['close'] >= df['open']
-            df['up_vol'] = df['volume'].where(df['is_up_candle'], 0)
-            
-            # 5周期买盘占比 (0~1)
-            vol_sum_5 = df['volume'].rolling(window=5).sum().replace(0, np.nan)
-            df['buy_vol_prop_5'] = df['up_vol'].rolling(window=5).sum() / vol_sum_5
-            df['buy_vol_prop_5'] = df['buy_vol_prop_5'].fillna(0.5)
+        tasks = [load(sym, tf) for tf in timeframes for sym in symbols]
+        results = await asyncio.gather(*tasks)
 
-            return df
+        frames_by_tf = {tf: {} for tf in timeframes}
+        for symbol, timeframe, df in results:
+            if df is not None and not df.empty:
+                frames_by_tf[timeframe][symbol] = df
+
+        batches = {}
+        computed_at = time.time()
+        for timeframe, frames in frames_by_tf.items():
+            if not frames:
+                continue
+            try:
+                batch = await analytics_executor.run(calculate_batch, frames)
+            except Exception as e:
+                self._log(f"[{timeframe}] 批量指标计算失败: {e}", 'error')
+                continue
+            batches[timeframe] = batch
+            for symbol in batch.symbols:
+                df = batch.frame(symbol)
+                self.batch_frames[(symbol, timeframe)] = (df, computed_at)
+                self._schedule_save(symbol, timeframe, df)
+        return batches
+
+    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        计算全套技术指标 (RSI, MACD, BB, ADX, ATR)
+        [Optimization] 与批量预取共用同一向量化内核 (单币种即 1 × bars)
+        """
+        try:
+            return calculate_single(df)
         except Exception as e:
             self._log(f"指标计算错误: {e}", 'error')
             return df
@@ -0,0 +1,266 @@
+"""
+[New] OHLCV 数据处理流水线 (纯函数版)
+
+从 DeepSeekTrader 中抽离的 normalize_data / clean_data / calculate_indicators，
+不依赖 Trader 实例状态，可由 core.executor.analytics_executor 调度到线程池或进程池执行
+(进程池模式下 DataFrame 经共享内存传输)。DeepSeekTrader 的同名方法保留为薄封装。
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("crypto_oracle")
+
+# CCXT 周期单位 -> 毫秒
+_TIMEFRAME_UNIT_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+
+def timeframe_to_ms(timeframe):
+    """CCXT 周期 (1m/15m/4h/1d/1w) 转换为毫秒步长，毫秒级/秒级等非标准周期返回 None"""
+    if not timeframe or 'ms' in timeframe or timeframe[-1] not in _TIMEFRAME_UNIT_MS:
+        return None
+    try:
+        return int(timeframe[:-1]) * _TIMEFRAME_UNIT_MS[timeframe[-1]]
+    except ValueError:
+        return None
+
+
+def timestamps_to_ms(series):
+    """datetime 列 -> int64 毫秒数组 (向量化，无逐行转换)"""
+    return series.to_numpy(dtype='datetime64[ns]').astype('datetime64[ms]').astype(np.int64)
+
+
+def find_gaps(ts_ms, step_ms):
+    """
+    [New] 在已排序的毫秒时间戳数组中查找缺口
+    返回 [(首根缺失时间, 末根缺失时间, 缺失根数)]，时间均为毫秒
+    """
+    if step_ms is None or len(ts_ms) < 2:
+        return []
+    diffs = np.diff(ts_ms)
+    gaps = []
+    for i in np.nonzero(diffs > step_ms)[0]:
+        missing = int(diffs[i] // step_ms) - (1 if diffs[i] % step_ms == 0 else 0)
+        if missing <= 0:
+            continue
+        start = int(ts_ms[i]) + step_ms
+        gaps.append((start, start + (missing - 1) * step_ms, missing))
+    return gaps
+
+
+def normalize_ohlcv(df, timeframe):
+    """
+    [Data Wrangling] 数据整理 - 时间对齐与缺省填充
+    确保 K 线时间轴连续，填补因维护或停机导致的空洞
+    """
+    try:
+        if df.empty: return df
+
+        # [Fix] 去重：确保时间戳唯一 (Duplicate Labels Check)
+        # [Hardcore Fix] 强制时间戳取整对齐，彻底消除毫秒级微小差异导致的 Duplicate Label
+        # 例如: 10:00:00.001 和 10:00:00.002 会被统一为 10:00:00
+
+        # 1. 确保是 datetime 类型
+        if 'timestamp' in df.columns:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        else:
+            df = df.reset_index()
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+
+        # 2. 强制 Rounding (根据 timeframe 动态调整)
+        # 这里统一 Round 到 '1s' 精度，足以应付所有 K 线 (最小 1m)
+        # 如果是毫秒级高频 K 线，可能需要调整，但 CCXT 最小也是 1m
+        df['timestamp'] = df['timestamp'].dt.floor('1s')
+
+        # 3. 再次去重 (这次是基于 Round 后的时间戳)
+        df = df.drop_duplicates(subset=['timestamp'], keep='last')
+
+        # [Optimization] 快速路径: 时间轴已连续 (通常已由 GapIndex 在拉取阶段增量修补)
+        # 直接返回，跳过整表 set_index + resample + reset_index
+        step_ms = timeframe_to_ms(timeframe)
+        if step_ms and df['timestamp'].is_monotonic_increasing:
+            ts_ms = timestamps_to_ms(df['timestamp'])
+            if len(ts_ms) < 2 or (np.diff(ts_ms) == step_ms).all():
+                return df.reset_index(drop=True)
+
+        # 4. 设置索引
+        df = df.set_index('timestamp').sort_index()
+
+        # 1. 转换 Timeframe 为 Pandas Offset
+        # CCXT: 1m, 5m, 1h, 1d, 1w
+        # Pandas: 1min, 5min, 1h, 1D, 1W
+        tf = timeframe
+        freq = None
+        if tf.endswith('m'): freq = tf.replace('m', 'min')
+        elif tf.endswith('h'): freq = tf.replace('h', 'H')
+        elif tf.endswith('d'): freq = tf.replace('d', 'D')
+        elif tf.endswith('w'): freq = tf.replace('w', 'W')
+
+        if not freq: return df # 不支持的周期，跳过
+
+        # [Fix] 再次去重 (Just in case index still has duplicates)
+        df = df[~df.index.duplicated(keep='last')]
+
+        # 3. 重采样 (Resample) - 强制对齐时间网格
+        # 使用 asfreq() 插入缺失行 (值为 NaN)
+        df_resampled = df.resample(freq).asfreq()
+        # 规则: 
+        # - Close: 沿用上一个 Close (Forward Fill)
+        # - Open/High/Low: 既然无成交，价格应等于 Close (画十字星)
+        # - Volume: 0
+
+        if df_resampled.isnull().any().any():
+            # self._log(f"🔧 检测到 K 线缺失，正在修补...", 'debug')
+
+            df_resampled['close'] = df_resampled['close'].ffill()
+            df_resampled['volume'] = df_resampled['volume'].fillna(0)
+
+            # Open/High/Low 填充为 Close (此时 Close 已经是填充过的了)
+            df_resampled['open'] = df_resampled['open'].fillna(df_resampled['close'])
+            df_resampled['high'] = df_resampled['high'].fillna(df_resampled['close'])
+            df_resampled['low'] = df_resampled['low'].fillna(df_resampled['close'])
+
+        # 5. 还原索引
+        df_final = df_resampled.reset_index()
+
+        return df_final
+
+    except Exception as e:
+        logger.error(f"数据整理失败: {e}")
+        return df
+
+
+def clean_ohlcv(df):
+    """
+    [Data Cleaning] 数据清洗 - 剔除价格异常值 (Z-Score)
+    防止插针导致指标计算错误
+    """
+    try:
+        if len(df) < 20: return df
+
+        # 计算 Close 价格的 Z-Score
+        # 这里的窗口可以稍微大一点，比如 20
+        rolling_mean = df['close'].rolling(window=20).mean()
+        rolling_std = df['close'].rolling(window=20).std().replace(0, np.nan) # [Fix] Avoid div by zero
+
+        # 异常阈值: 3倍标准差
+        threshold = 3.0
+
+        # 标记异常值 (Z-Score > 3)
+        # 我们只清洗 "收盘价"，因为指标计算主要依赖 Close
+        # 如果某根 K 线的 Close 极其离谱，我们用 rolling_mean 替换它
+        z_score = abs(df['close'] - rolling_mean) / rolling_std
+
+        outliers = z_score > threshold
+        if outliers.any():
+            outlier_count = outliers.sum()
+            # self._log(f"🧹 检测到 {outlier_count} 个价格异常点，正在清洗...", 'warning')
+
+            # 用均值填充异常值
+            df.loc[outliers, 'close'] = rolling_mean[outliers]
+
+            # 同时也修正 High/Low，防止 High < Close 或 Low > Close
+            df.loc[outliers, 'high'] = df.loc[outliers, ['high', 'close']].max(axis=1)
+            df.loc[outliers, 'low'] = df.loc[outliers, ['low', 'close']].min(axis=1)
+
+        return df
+    except Exception as e:
+        # self._log(f"数据清洗失败: {e}", 'error')
+        return df
+
+
+def compute_indicators(df, timeframe):
+    try:
+        if len(df) < 30: return df
+
+        # [Step 0] Data Wrangling (Time Alignment)
+        df = normalize_ohlcv(df, timeframe)
+
+        # [Step 1] Data Cleaning
+        df = clean_ohlcv(df)
+
+        # [Step 2] RSI (Wilder's Smoothing)
+        delta = df['close'].diff()
+        gain = (delta.where(delta > 0, 0)).ewm(alpha=1/14, adjust=False).mean()
+        loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, adjust=False).mean()
+        rs = gain / loss.replace(0, np.nan)
+        df['rsi'] = 100 - (100 / (1 + rs))
+        df['rsi'] = df['rsi'].fillna(50) # Fill initial NaNs with neutral 50
+
+        # [Step 3] MACD
+        exp1 = df['close'].ewm(span=12, adjust=False).mean()
+        exp2 = df['close'].ewm(span=26, adjust=False).mean()
+        df['macd'] = exp1 - exp2
+        df['signal_line'] = df['macd'].ewm(span=9, adjust=False).mean()
+        df['macd_hist'] = df['macd'] - df['signal_line']
+
+        # [Step 4] Bollinger Bands
+        df['sma_20'] = df['close'].rolling(window=20).mean()
+        df['std_20'] = df['close'].rolling(window=20).std()
+        df['upper_band'] = df['sma_20'] + (df['std_20'] * 2)
+        df['lower_band'] = df['sma_20'] - (df['std_20'] * 2)
+
+        # [Step 5] Volume Ratio
+        df['vol_sma_20'] = df['volume'].rolling(window=20).mean().replace(0, np.nan)
+        df['vol_ratio'] = df['volume'] / df['vol_sma_20'] # 量比
+        df['vol_ratio'] = df['vol_ratio'].fillna(0)
+
+        # [New] 计算买卖压力指标 (OBV & Delta Volume)
+        # 1. OBV: Close > PrevClose => +Vol, else -Vol
+        df['obv_change'] = 0.0
+        df.loc[df['close'] > df['close'].shift(), 'obv_change'] = df['volume']
+        df.loc[df['close'] < df['close'].shift(), 'obv_change'] = -df['volume']
+        df['obv'] = df['obv_change'].cumsum()
+
+        # 2. 估算买入量占比 (Buying Pressure)
+        # 使用简单的 Close-Open 逻辑: 阳线视为买入主导，阴线视为卖出主导
+        # 也可以用更细的 (Close-Low)/(High-Low)
+        # 这里用最近 5 根 K 线的阳线成交量占比
+        df['is_up_candle'] = df['close'] >= df['open']
+        df['up_vol'] = df['volume'].where(df['is_up_candle'], 0)
+        df['down_vol'] = df['volume'].where(~df['is_up_candle'], 0)
+
+        # 5周期买盘占比 (0~1)
+        vol_sum_5 = df['volume'].rolling(window=5).sum().replace(0, np.nan)
+        df['buy_vol_prop_5'] = df['up_vol'].rolling(window=5).sum() / vol_sum_5
+        df['buy_vol_prop_5'] = df['buy_vol_prop_5'].fillna(0.5) # Default to 0.5 if no volume
+
+        # [Step 6] ADX & ATR (Wilder's Smoothing)
+        df['tr0'] = abs(df['high'] - df['low'])
+        df['tr1'] = abs(df['high'] - df['close'].shift())
+        df['tr2'] = abs(df['low'] - df['close'].shift())
+        df['tr'] = df[['tr0', 'tr1', 'tr2']].max(axis=1)
+
+        df['up_move'] = df['high'] - df['high'].shift()
+        df['down_move'] = df['low'].shift() - df['low']
+        df['plus_dm'] = 0.0
+        df['minus_dm'] = 0.0
+        df.loc[(df['up_move'] > df['down_move']) & (df['up_move'] > 0), 'plus_dm'] = df['up_move']
+        df.loc[(df['down_move'] > df['up_move']) & (df['down_move'] > 0), 'minus_dm'] = df['down_move']
+
+        window = 14
+        # Use EWM for Wilder's Smoothing (alpha=1/n)
+        df['tr_smooth'] = df['tr'].ewm(alpha=1/window, adjust=False).mean()
+        df['plus_di'] = 100 * (df['plus_dm'].ewm(alpha=1/window, adjust=False).mean() / df['tr_smooth'].replace(0, np.nan))
+        df['minus_di'] = 100 * (df['minus_dm'].ewm(alpha=1/window, adjust=False).mean() / df['tr_smooth'].replace(0, np.nan))
+
+        sum_di = df['plus_di'] + df['minus_di']
+        df['dx'] = 100 * abs(df['plus_di'] - df['minus_di']) / sum_di.replace(0, np.nan)
+        df['adx'] = df['dx'].ewm(alpha=1/window, adjust=False).mean()
+
+        # [New] ATR (Average True Range) Calculation
+        # tr_smooth is basically ATR (Wilder's Smoothing)
+        df['atr'] = df['tr_smooth']
+
+        # [New] ATR Ratio (波动率因子)
+        # 当前 ATR / 过去 50根 K线的平均 ATR
+        # 如果 < 0.5，说明波动率极度萎缩 (死鱼盘)
+        df['atr_ma50'] = df['atr'].rolling(window=50).mean().replace(0, np.nan)
+        df['atr_ratio'] = df['atr'] / df['atr_ma50']
+
+        return df
+    except Exception as e:
+        logger.error(f"计算技术指标失败: {e}")
+        return df
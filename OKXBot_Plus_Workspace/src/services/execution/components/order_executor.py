@@ -1,7 +1,9 @@
 import time
 import asyncio
-from datetime import datetime
 from core.utils import retry_async, rate_limiter
+from core.records import PositionRecord, SimTradeRecord
+from core.metrics import ORDER_RTT
+from core.tracing import tracer
 
 class OrderExecutor:
     def __init__(self, exchange, symbol, trade_mode, test_mode, position_manager, logger):
@@ -31,6 +33,23 @@ class OrderExecutor:
     def set_fee_rate(self, rate):
         self.taker_fee_rate = rate
 
+    async def _timed_create_order(self, order_type, side, amount, price, params):
+        """[New] 下单并记录往返时间 (按交易对 / 方向 / 结果)，链路追踪中记录回执并在后台确认成交"""
+        t0 = time.perf_counter()
+        status = 'ok'
+        try:
+            with tracer.span('order.create', side=side, type=order_type, amount=amount, price=price):
+                order = await self.exchange.create_order(self.symbol, order_type, side, amount, price, params=params)
+                tracer.mark_order()
+                tracer.event('order.ack', order_id=(order or {}).get('id'), status=(order or {}).get('status'))
+                tracer.confirm_fill(self.exchange, self.symbol, order)
+            return order
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            ORDER_RTT.labels(self.symbol, side, status).observe(time.perf_counter() - t0)
+
     @retry_async(retries=2, delay=0.5)
     async def create_order_with_retry(self, side, amount, order_type='market', price=None, params={}):
         # [P0-4.1] 检查熔断状态
@@ -41,14 +60,7 @@ class OrderExecutor:
         await rate_limiter.acquire()
 
         try:
-            res = await self.exchange.create_order(
-                self.symbol,
-                order_type,
-                side,
-                amount,
-                price,
-                params=params
-            )
+            res = await self._timed_create_order(order_type, side, amount, price, params)
             # 成功则重置失败计数
             self.consecutive_failures = 0
             return res
@@ -60,14 +72,7 @@ class OrderExecutor:
                 self.logger.warning(f"⚠️ 余额不足 (51008)，尝试减少数量重试: {amount} -> {amount * 0.95:.4f}")
                 
                 try:
-                    res2 = await self.exchange.create_order(
-                        self.symbol,
-                        order_type,
-                        side,
-                        amount * 0.95, # 降级 5%
-                        price,
-                        params=params
-                    )
+                    res2 = await self._timed_create_order(order_type, side, amount * 0.95, price, params) # 降级 5%
                     # 成功则重置失败计数
                     self.consecutive_failures = 0
                     return res2
@@ -111,10 +116,10 @@ class OrderExecutor:
 
         if signal == 'BUY':
             # Opening Long or Closing Short
-            if sim_position and sim_position['side'] == 'short':
+            if sim_position and sim_position.side == 'short':
                 # Closing Short (Buy to Cover)
                 close_amount = amount
-                current_size = sim_position['size']
+                current_size = sim_position.size
                 
                 if close_amount >= current_size * 0.99: # Full close
                     close_amount = current_size
@@ -122,7 +127,7 @@ class OrderExecutor:
                 else:
                     is_full_close = False
                     
-                entry_price = sim_position['entry_price']
+                entry_price = sim_position.entry_price
                 
                 pnl = (entry_price - current_price) * close_amount
                 pnl -= fee 
@@ -136,21 +141,21 @@ class OrderExecutor:
                     sim_position = None 
                     self.logger.info(f"🧪 模拟平空(全): {close_amount} @ {current_price} | PnL: {pnl:.2f} U")
                 else:
-                    sim_position['size'] -= close_amount
-                    sim_position['coin_size'] -= close_amount 
+                    sim_position.size -= close_amount
+                    sim_position.coin_size -= close_amount 
                     self.logger.info(f"🧪 模拟平空(分): {close_amount} @ {current_price} | PnL: {pnl:.2f} U")
                 
-            elif sim_position and sim_position['side'] == 'long':
+            elif sim_position and sim_position.side == 'long':
                 # Adding to Long (Pyramiding)
-                old_size = sim_position['size']
-                old_entry = sim_position['entry_price']
+                old_size = sim_position.size
+                old_entry = sim_position.entry_price
                 
                 new_size = old_size + amount
                 avg_entry = ((old_size * old_entry) + (amount * current_price)) / new_size
                 
-                sim_position['size'] = new_size
-                sim_position['coin_size'] = new_size
-                sim_position['entry_price'] = avg_entry
+                sim_position.size = new_size
+                sim_position.coin_size = new_size
+                sim_position.entry_price = avg_entry
                 
                 sim_realized_pnl -= fee
                 sim_balance -= fee
@@ -160,16 +165,16 @@ class OrderExecutor:
                 
             else:
                 # Opening Long
-                sim_position = {
-                    'side': 'long',
-                    'size': amount,
-                    'coin_size': amount,
-                    'entry_price': current_price,
-                    'unrealized_pnl': 0.0,
-                    'leverage': 1.0, # Default logic, maybe pass from config
-                    'symbol': self.symbol,
-                    'mode': 'cash' if self.trade_mode == 'cash' else 'margin'
-                }
+                sim_position = PositionRecord(
+                    side='long',
+                    size=amount,
+                    coin_size=amount,
+                    entry_price=current_price,
+                    unrealized_pnl=0.0,
+                    leverage=1.0, # Default logic, maybe pass from config
+                    symbol=self.symbol,
+                    mode='cash' if self.trade_mode == 'cash' else 'margin'
+                )
                 sim_realized_pnl -= fee
                 sim_balance -= fee
                 
@@ -181,10 +186,10 @@ class OrderExecutor:
 
         elif signal == 'SELL':
             # Opening Short or Closing Long
-            if sim_position and sim_position['side'] == 'long':
+            if sim_position and sim_position.side == 'long':
                 # Closing Long (Sell to Close)
                 close_amount = amount
-                current_size = sim_position['size']
+                current_size = sim_position.size
                 
                 if close_amount >= current_size * 0.99: 
                     close_amount = current_size
@@ -192,7 +197,7 @@ class OrderExecutor:
                 else:
                     is_full_close = False
                     
-                entry_price = sim_position['entry_price']
+                entry_price = sim_position.entry_price
                 
                 pnl = (current_price - entry_price) * close_amount
                 pnl -= fee
@@ -210,21 +215,21 @@ class OrderExecutor:
                     sim_position = None
                     self.logger.info(f"🧪 模拟平多(全): {close_amount} @ {current_price} | PnL: {pnl:.2f} U")
                 else:
-                    sim_position['size'] -= close_amount
-                    sim_position['coin_size'] -= close_amount
+                    sim_position.size -= close_amount
+                    sim_position.coin_size -= close_amount
                     self.logger.info(f"🧪 模拟平多(分): {close_amount} @ {current_price} | PnL: {pnl:.2f} U")
                 
-            elif sim_position and sim_position['side'] == 'short':
+            elif sim_position and sim_position.side == 'short':
                 # Adding to Short
-                old_size = sim_position['size']
-                old_entry = sim_position['entry_price']
+                old_size = sim_position.size
+                old_entry = sim_position.entry_price
                 
                 new_size = old_size + amount
                 avg_entry = ((old_size * old_entry) + (amount * current_price)) / new_size
                 
-                sim_position['size'] = new_size
-                sim_position['coin_size'] = new_size
-                sim_position['entry_price'] = avg_entry
+                sim_position.size = new_size
+                sim_position.coin_size = new_size
+                sim_position.entry_price = avg_entry
                 
                 sim_realized_pnl -= fee
                 sim_balance -= fee
@@ -238,16 +243,16 @@ class OrderExecutor:
                     self.logger.info(f"🧪 现货模式无法开空")
                     return "FAILED", "现货无法开空"
                     
-                sim_position = {
-                    'side': 'short',
-                    'size': amount,
-                    'coin_size': amount,
-                    'entry_price': current_price,
-                    'unrealized_pnl': 0.0,
-                    'leverage': 1.0,
-                    'symbol': self.symbol,
-                    'mode': 'margin'
-                }
+                sim_position = PositionRecord(
+                    side='short',
+                    size=amount,
+                    coin_size=amount,
+                    entry_price=current_price,
+                    unrealized_pnl=0.0,
+                    leverage=1.0,
+                    symbol=self.symbol,
+                    mode='margin'
+                )
                 sim_realized_pnl -= fee
                 sim_balance -= fee
                 
@@ -260,15 +265,7 @@ class OrderExecutor:
         return "EXECUTED_SIM", "模拟交易成功"
 
     def _record_sim_trade(self, side, price, amount, fee=0.0, pnl=0.0):
-        trade = {
-            'symbol': self.symbol,
-            'side': side.lower(),
-            'price': price,
-            'amount': amount,
-            'cost': price * amount,
-            'fee': {'cost': fee, 'currency': 'USDT'},
-            'timestamp': int(time.time() * 1000),
-            'datetime': datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z',
-            'info': {'pnl': pnl}
-        }
+        # [Optimization] 成交记录为 SimTradeRecord (cost / fee / info / datetime 按需派生，保存状态时再转为 ccxt 结构)
+        trade = SimTradeRecord(self.symbol, side.lower(), price, amount, fee_cost=fee, pnl=pnl,
+                               timestamp=int(time.time() * 1000))
         self.position_manager.sim_trades.append(trade)
@@ -1,7 +1,37 @@
 import asyncio
 from collections import deque
 from core.utils import to_float
+from core.records import PositionRecord
 from .rl_position_sizer import SmartPositionSizer
+from .sim_position_book import sim_position_book
+
+# 分段止盈默认阶梯 (与 v3.9.6 硬编码行为一致): 5% / 10% 利润各减仓 30%
+DEFAULT_PARTIAL_TP_STAGES = [
+    {'threshold': 0.05, 'ratio': 0.3},
+    {'threshold': 0.10, 'ratio': 0.3},
+]
+
+
+def normalize_partial_tp_stages(stages):
+    """
+    [New] 解析 strategy.partial_tp_stages 配置
+    返回按利润阈值降序排列的 [(tag, threshold, ratio)]，tag 形如 'stage_5' (已执行标记)
+    """
+    if stages is None:
+        stages = DEFAULT_PARTIAL_TP_STAGES
+    parsed = []
+    for stage in stages or []:
+        try:
+            threshold = float(stage.get('threshold'))
+            ratio = float(stage.get('ratio'))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if threshold <= 0 or not (0 < ratio < 1):
+            continue
+        parsed.append((f"stage_{round(threshold * 100, 2):g}", threshold, ratio))
+    parsed.sort(key=lambda x: x[1], reverse=True)
+    return parsed
+
 
 class PositionManager:
     def __init__(self, exchange, symbol, trade_mode, test_mode, logger):
@@ -13,6 +43,7 @@ class PositionManager:
         
         self.trailing_max_pnl = 0.0
         self.trailing_config = {}
+        self.partial_tp_stages_config = normalize_partial_tp_stages(None)
         
         # [v3.9.6] Smart Sizing Module (AI + Heuristic)
         self.rl_sizer = SmartPositionSizer(logger=self.logger)
@@ -27,12 +58,37 @@ class PositionManager:
         # [v3.9.6 New] Risk Control Factor (0.0 - 1.0)
         self.global_risk_factor = 1.0
 
+    # [Optimization] 测试模式下模拟余额/持仓的每次写入同步到列式持仓簿，供风控向量化盯市
+    @property
+    def sim_balance(self):
+        return self._sim_balance
+
+    @sim_balance.setter
+    def sim_balance(self, value):
+        self._sim_balance = value
+        if self.test_mode:
+            sim_position_book.set_balance(self.symbol, value)
+
+    @property
+    def sim_position(self):
+        return self._sim_position
+
+    @sim_position.setter
+    def sim_position(self, value):
+        self._sim_position = value
+        if self.test_mode:
+            sim_position_book.set_position(self.symbol, value)
+
     def set_trailing_config(self, config):
         self.trailing_config = config
 
+    def set_partial_tp_stages(self, stages):
+        """设置分段止盈阶梯 (None 使用默认 5%/10% 各 30%，空列表关闭分段止盈)"""
+        self.partial_tp_stages_config = normalize_partial_tp_stages(stages)
+
     def set_sim_state(self, balance, position, trades, realized_pnl):
         self.sim_balance = balance
-        self.sim_position = position
+        self.sim_position = PositionRecord.from_dict(position)
         self.sim_trades = trades
         self.sim_realized_pnl = realized_pnl
         
@@ -94,13 +150,13 @@ class PositionManager:
                     ticker = await self.exchange.fetch_ticker(self.symbol)
                     current_price = ticker['last']
                     
-                    entry = float(self.sim_position['entry_price'])
-                    size = float(self.sim_position['coin_size']) # Use coin_size for calculation
+                    entry = float(self.sim_position.entry_price)
+                    size = float(self.sim_position.coin_size) # Use coin_size for calculation
                     
-                    if self.sim_position['side'] == 'long':
-                        self.sim_position['unrealized_pnl'] = (current_price - entry) * size
+                    if self.sim_position.side == 'long':
+                        self.sim_position.unrealized_pnl = (current_price - entry) * size
                     else:
-                        self.sim_position['unrealized_pnl'] = (entry - current_price) * size
+                        self.sim_position.unrealized_pnl = (entry - current_price) * size
                 except:
                     pass
             return self.sim_position
@@ -126,15 +182,15 @@ class PositionManager:
                         except:
                             pass
 
-                        return {
-                            'side': pos['side'],
-                            'size': contracts,
-                            'coin_size': contracts * contract_size, # 实际币数
-                            'entry_price': float(pos['entryPrice']) if pos['entryPrice'] else 0,
-                            'unrealized_pnl': float(pos['unrealizedPnl']) if pos['unrealizedPnl'] else 0,
-                            'leverage': float(pos['leverage']) if pos['leverage'] else 1.0,
-                            'symbol': pos['symbol']
-                        }
+                        return PositionRecord(
+                            side=pos['side'],
+                            size=contracts,
+                            coin_size=contracts * contract_size, # 实际币数
+                            entry_price=float(pos['entryPrice']) if pos['entryPrice'] else 0,
+                            unrealized_pnl=float(pos['unrealizedPnl']) if pos['unrealizedPnl'] else 0,
+                            leverage=float(pos['leverage']) if pos['leverage'] else 1.0,
+                            symbol=pos['symbol']
+                        )
 
             # [Fix] 增加对现货模式 (Cash) 和 现货杠杆 (Spot Margin) 的持仓支持
             if not is_contract:
@@ -162,16 +218,16 @@ class PositionManager:
                      
                      pnl = (current_price - avg_price) * spot_bal
                      
-                     return {
-                         'side': 'long', 
-                         'size': spot_bal,
-                         'coin_size': spot_bal,
-                         'entry_price': avg_price,
-                         'unrealized_pnl': pnl,
-                         'leverage': 1.0,
-                         'symbol': self.symbol,
-                         'mode': 'cash' if self.trade_mode == 'cash' else 'margin'
-                     }
+                     return PositionRecord(
+                         side='long',
+                         size=spot_bal,
+                         coin_size=spot_bal,
+                         entry_price=avg_price,
+                         unrealized_pnl=pnl,
+                         leverage=1.0,
+                         symbol=self.symbol,
+                         mode='cash' if self.trade_mode == 'cash' else 'margin'
+                     )
             
             return None
         except Exception as e:
@@ -195,8 +251,8 @@ class PositionManager:
 
     async def get_spot_balance(self, total=False):
         if self.test_mode:
-            if self.sim_position and self.sim_position.get('mode') == 'cash':
-                 return float(self.sim_position['size'])
+            if self.sim_position and self.sim_position.mode == 'cash':
+                 return float(self.sim_position.size)
             return 0.0
 
         try:
@@ -305,7 +361,8 @@ class PositionManager:
                     asyncio.create_task(save_callback())
 
             # 3. [New] 分段止盈机制 (Partial Profit Taking)
-            # 达到 5% 利润平 30%，10% 利润平 30%
+            # 阶梯来自 strategy.partial_tp_stages (默认 5% / 10% 利润各平 30%)
+            # 每轮最多执行一级: 从最高阈值开始找第一个已达到且未执行的阶梯
             if not hasattr(self, 'partial_tp_stages'):
                 self.partial_tp_stages = []
             
@@ -313,23 +370,17 @@ class PositionManager:
             side = 'buy' if current_position['side'] == 'short' else 'sell'
             close_params = {'reduceOnly': True, 'tdMode': self.trade_mode}
 
-            if pnl_ratio >= 0.10 and 'stage_10' not in self.partial_tp_stages:
-                self.logger.info(f"💰 [Partial TP] 触及 10% 利润节点，执行 30% 分批减仓")
-                await self.exchange.create_market_order(self.symbol, side, current_size * 0.3, params=close_params)
-                self.partial_tp_stages.append('stage_10')
+            for tag, threshold, ratio in self.partial_tp_stages_config:
+                if pnl_ratio < threshold or tag in self.partial_tp_stages:
+                    continue
+                self.logger.info(f"💰 [Partial TP] 触及 {threshold*100:g}% 利润节点，执行 {ratio*100:g}% 分批减仓")
+                await self.exchange.create_market_order(self.symbol, side, current_size * ratio, params=close_params)
+                self.partial_tp_stages.append(tag)
                 # [Refined] 减仓后重置追踪点，让剩余仓位从当前盈亏水平重新追踪
-                self.trailing_max_pnl = pnl_ratio * 0.7 
-                if notification_callback:
-                    await notification_callback(f"💰 [Partial TP] {self.symbol} 触及 10% 节点，已减仓 30%")
-
-            elif pnl_ratio >= 0.05 and 'stage_5' not in self.partial_tp_stages:
-                self.logger.info(f"💰 [Partial TP] 触及 5% 利润节点，执行 30% 分批减仓")
-                await self.exchange.create_market_order(self.symbol, side, current_size * 0.3, params=close_params)
-                self.partial_tp_stages.append('stage_5')
-                # [Refined] 减仓后重置追踪点
-                self.trailing_max_pnl = pnl_ratio * 0.7
+                self.trailing_max_pnl = pnl_ratio * (1 - ratio)
                 if notification_callback:
-                    await notification_callback(f"💰 [Partial TP] {self.symbol} 触及 5% 节点，已减仓 30%")
+                    await notification_callback(f"💰 [Partial TP] {self.symbol} 触及 {threshold*100:g}% 节点，已减仓 {ratio*100:g}%")
+                break
 
             # 4. 检查是否激活移动止盈
             if self.trailing_max_pnl >= activation_pnl:
@@ -1,4 +1,4 @@
-import pandas as pd
+from services.strategy.patterns import to_ohlcv_arrays, three_line_strike
 
 class SignalProcessor:
     def __init__(self, logger):
@@ -54,6 +54,8 @@ class SignalProcessor:
         [Hardcore] Python 硬核识别 "三线战法" (Three-Line Strike)
         支持输入: DataFrame 或 包含 'kline_data' 的字典
         [Update] 增加 indicators 参数，用于环境过滤 (Market Regime Filter)
+        [Optimization] 基于向量化形态库 (services.strategy.patterns)，不再逐行 float 转换
+        返回: (pattern, {'sl', 'tp'}) 或 (None, {})
         """
         # [Market Regime Filter] 仅在趋势行情中启用三线战法
         if indicators:
@@ -63,85 +65,37 @@ class SignalProcessor:
                     self.logger.info(f"三线过滤: ADX {adx} < 20")
                 except Exception:
                     pass
-                return None
+                return None, {}
 
-        df = None
         try:
+            # [Optimization] 统一转换为 NumPy 数组，由向量化形态库一次性扫描整个窗口
+            arrays = to_ohlcv_arrays(data_input)
 
-            # 1. 如果输入是 DataFrame，直接使用
-            if isinstance(data_input, pd.DataFrame):
-                df = data_input
-            # 2. 如果输入是字典 (price_data)，尝试提取 df 或 kline_data
-            elif isinstance(data_input, dict):
-                if 'df' in data_input and isinstance(data_input['df'], pd.DataFrame):
-                    df = data_input['df']
-                elif 'kline_data' in data_input:
-                    # Fallback: 从 kline_data (list of dicts) 重构 DataFrame
-                    df = pd.DataFrame(data_input['kline_data'])
-            
-            if df is None or len(df) < 4:
+            if arrays is None or len(arrays['close']) < 4:
                 try:
                     self.logger.info("三线过滤: K线不足4根")
                 except Exception:
                     pass
-                return None
-            
-            # 获取最近 4 根 K 线
-            last_4 = df.iloc[-4:].copy()
-            k1, k2, k3, k4 = last_4.iloc[0], last_4.iloc[1], last_4.iloc[2], last_4.iloc[3]
-            
-            def is_bull(k): return float(k['close']) > float(k['open'])
-            def is_bear(k): return float(k['close']) < float(k['open'])
-            
-            # --- 识别看涨三线 (Bullish Strike) ---
-            # 条件: 三连阴 (下台阶) + 一阳吞三阴
-            if (is_bear(k1) and is_bear(k2) and is_bear(k3) and is_bull(k4)):
-                if (float(k2['low']) < float(k1['low']) and float(k3['low']) < float(k2['low'])):
-                    if float(k4['close']) > float(k1['open']):
-                        # [Strict Standard] 成交量严格确认: 第4根K线的成交量必须大于前三根中的最大值
-                        # 这代表了真正的“爆量吞没”，有效防止假突破
-                        vol4 = float(k4.get('volume', 0))
-                        max_vol3 = max(float(k1.get('volume', 0)), float(k2.get('volume', 0)), float(k3.get('volume', 0)))
-                        
-                        if vol4 > max_vol3:
-                            # [Optimization] 返回具体的 SL/TP 价格点位
-                            # 止损 (看涨): 取四根K线的【最低价】作为硬止损
-                            sl = min(float(k1['low']), float(k2['low']), float(k3['low']), float(k4['low']))
-                            # [Optimization] 放大硬性止盈目标至 5 倍 (R:R = 1:5)
-                            # 原理: 硬性 TP 仅作为"梦想目标"，实际离场交由 Level 3 移动止损 (Dynamic Trailing) 接管
-                            # 这样可以防止在趋势行情中过早止盈 (卖飞)
-                            entry = float(k4['close'])
-                            tp = entry + (entry - sl) * 5
-                            return 'BULLISH_STRIKE', {'sl': sl, 'tp': tp}
-                        else:
-                            try:
-                                self.logger.info(f"三线弱信号(量能不足): vol4 {vol4:.2f} <= max_prev {max_vol3:.2f}")
-                            except Exception:
-                                pass
-            
-            # --- 识别看跌三线 (Bearish Strike) ---
-            # 条件: 三连阳 (上台阶) + 一阴吞三阳
-            if (is_bull(k1) and is_bull(k2) and is_bull(k3) and is_bear(k4)):
-                if (float(k2['high']) > float(k1['high']) and float(k3['high']) > float(k2['high'])):
-                    if float(k4['close']) < float(k1['open']):
-                        # [Strict Standard] 成交量严格确认
-                        vol4 = float(k4.get('volume', 0))
-                        max_vol3 = max(float(k1.get('volume', 0)), float(k2.get('volume', 0)), float(k3.get('volume', 0)))
-                        
-                        if vol4 > max_vol3:
-                            # [Optimization] 返回具体的 SL/TP 价格点位
-                            # 止损 (看跌): 取四根K线的【最高价】作为硬止损
-                            sl = max(float(k1['high']), float(k2['high']), float(k3['high']), float(k4['high']))
-                            # [Optimization] 放大硬性止盈目标至 5 倍 (R:R = 1:5)
-                            entry = float(k4['close'])
-                            tp = entry - (sl - entry) * 5
-                            return 'BEARISH_STRIKE', {'sl': sl, 'tp': tp}
-                        else:
-                            try:
-                                self.logger.info(f"三线弱信号(量能不足): vol4 {vol4:.2f} <= max_prev {max_vol3:.2f}")
-                            except Exception:
-                                pass
-                        
+                return None, {}
+
+            strike = three_line_strike(
+                arrays['open'], arrays['high'], arrays['low'], arrays['close'], arrays['volume']
+            )
+
+            # 仅取最新一根 K 线的判定结果 (历史位可用于形态回测/统计)
+            # 止损: 看涨取四根最低价，看跌取四根最高价；止盈按 R:R = 1:5 放大，实际离场交由移动止损接管
+            if strike['bullish'][-1]:
+                return 'BULLISH_STRIKE', {'sl': float(strike['sl'][-1]), 'tp': float(strike['tp'][-1])}
+            if strike['bearish'][-1]:
+                return 'BEARISH_STRIKE', {'sl': float(strike['sl'][-1]), 'tp': float(strike['tp'][-1])}
+
+            # [Strict Standard] 形态成立但量能不足 (第4根成交量未超过前三根最大值)
+            if strike['bullish_weak'][-1] or strike['bearish_weak'][-1]:
+                try:
+                    self.logger.info(f"三线弱信号(量能不足): vol4 {strike['vol4'][-1]:.2f} <= max_prev {strike['max_vol3'][-1]:.2f}")
+                except Exception:
+                    pass
+
         except Exception as e:
             pass
             
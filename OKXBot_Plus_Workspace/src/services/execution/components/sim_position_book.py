@@ -0,0 +1,131 @@
+"""
+[Optimization] 模拟持仓簿 (列式存储)
+
+测试模式下所有交易对的模拟持仓集中存放在同一组 NumPy 列中 (每个交易对一行):
+    side(+1 多 / -1 空 / 0 空仓) / size(币数量) / entry(开仓均价) / leverage / balance(模拟余额) / cash(现货模式) / mark(最近标记价)
+PositionManager 在模拟状态变更时写入本表；RiskManager 每轮只需拉取一次批量行情快照 (fetch_tickers)，
+盯市与总权益在一次数组运算中完成，替代逐个交易对 await get_account_info() (每次都会单独请求 Ticker)。
+"""
+
+import numpy as np
+
+
+class SimPositionBook:
+    """列式模拟持仓簿 (按交易对分配行号，容量不足时倍增)"""
+
+    def __init__(self, capacity=32):
+        self.index = {}
+        self.symbols = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = getattr(self, 'side', None)
+        n = len(self.symbols)
+        columns = {
+            'side': np.zeros(capacity, dtype=np.int8),
+            'size': np.zeros(capacity, dtype=np.float64),
+            'entry': np.zeros(capacity, dtype=np.float64),
+            'leverage': np.ones(capacity, dtype=np.float64),
+            'balance': np.zeros(capacity, dtype=np.float64),
+            'cash': np.zeros(capacity, dtype=bool),
+            'mark': np.full(capacity, np.nan, dtype=np.float64),
+        }
+        for name, column in columns.items():
+            if old is not None:
+                column[:n] = getattr(self, name)[:n]
+            setattr(self, name, column)
+
+    def _row(self, symbol):
+        row = self.index.get(symbol)
+        if row is None:
+            row = len(self.symbols)
+            if row >= len(self.side):
+                self._allocate(len(self.side) * 2)
+            self.index[symbol] = row
+            self.symbols.append(symbol)
+        return row
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def set_balance(self, symbol, balance):
+        self.balance[self._row(symbol)] = float(balance or 0.0)
+
+    def set_position(self, symbol, position):
+        """写入模拟持仓 (position 为 PositionManager.sim_position 记录，None 表示空仓)"""
+        row = self._row(symbol)
+        if not position or not float(position.get('coin_size', position.get('size', 0)) or 0):
+            self.side[row] = 0
+            self.size[row] = 0.0
+            self.entry[row] = 0.0
+            return
+        self.side[row] = 1 if position.get('side') == 'long' else -1
+        self.size[row] = float(position.get('coin_size', position.get('size', 0)))
+        self.entry[row] = float(position.get('entry_price', 0) or 0)
+        self.leverage[row] = float(position.get('leverage', 1) or 1)
+        self.cash[row] = position.get('mode') == 'cash'
+
+    def open_symbols(self, symbols=None):
+        """有持仓的交易对 (symbols 不为空时只在其中查找)"""
+        n = len(self.symbols)
+        held = [self.symbols[i] for i in np.flatnonzero(self.side[:n])]
+        if symbols is None:
+            return held
+        wanted = set(symbols)
+        return [s for s in held if s in wanted]
+
+    def update_marks(self, prices):
+        """写入行情快照 {symbol: price}，未出现在快照中的交易对沿用上一次标记价"""
+        rows, values = [], []
+        for symbol, price in prices.items():
+            row = self.index.get(symbol)
+            if row is not None and price:
+                rows.append(row)
+                values.append(price)
+        if rows:
+            self.mark[rows] = values
+
+    def mark_to_market(self, prices=None, symbols=None):
+        """
+        向量化盯市
+        返回 (symbols, unrealized_pnl, equity) 三列 (按 symbols 顺序；None 表示全部交易对)
+        - 合约/杠杆: 权益 = 余额 + 方向 × (标记价 - 开仓价) × 数量
+        - 现货: 权益 = 现金余额 + 数量 × 标记价 (开仓成本已从余额中扣除)
+        从未取得行情的持仓按开仓价估值
+        """
+        if prices:
+            self.update_marks(prices)
+        if symbols is None:
+            symbols = list(self.symbols)
+            rows = np.arange(len(symbols))
+        else:
+            symbols = [s for s in symbols if s in self.index]
+            rows = np.fromiter((self.index[s] for s in symbols), dtype=np.intp, count=len(symbols))
+
+        side = self.side[rows]
+        size = self.size[rows]
+        entry = self.entry[rows]
+        mark = self.mark[rows]
+        mark = np.where(np.isnan(mark), entry, mark)
+        cash = self.cash[rows]
+        held = side != 0
+
+        unrealized = np.where(held, side * (mark - entry) * size, 0.0)
+        holdings = np.where(cash, size * mark, unrealized)
+        equity = self.balance[rows] + np.where(held, holdings, 0.0)
+        return symbols, unrealized, equity
+
+    def total_equity(self, prices=None, symbols=None):
+        return float(self.mark_to_market(prices, symbols)[2].sum())
+
+    def clear(self):
+        self.index.clear()
+        self.symbols.clear()
+        self._allocate(len(self.side))
+
+
+# 全局单例 (所有 PositionManager 共享)
+sim_position_book = SimPositionBook()
@@ -0,0 +1,816 @@
+"""
+[New] 模拟撮合交易所 (Simulated Exchange)
+
+test_mode 下替代 ccxt.okx 的独立撮合引擎，实现机器人实际调用到的 ccxt 方法子集:
+- 行情: fetch_ohlcv (只返回已收盘 K 线) / fetch_ticker / fetch_tickers / fetch_order_book / fetch_funding_rate
+- 市场: load_markets / market / amount_to_precision / fetch_trading_fee / set_leverage
+- 账户: fetch_balance / fetch_positions / fetch_my_trades / fetch_ledger
+- 订单: create_order / create_market_order / fetch_order / fetch_open_orders / cancel_order
+
+成交模型:
+- 盘口深度 (DepthModel): 以最新价为中心合成双边 N 档挂单，市价单逐档吃单按成交量加权均价成交，
+  超出全部深度的部分撤销 (部分成交)；未配置每档挂单量时退化为 "最新价 ± 半个价差" 的固定滑点
+- 网络延迟: 下单/撤单前等待 latency_ms + U(0, latency_jitter_ms)
+- 挂单/触发单: sync_orders() 用下单之后收盘的 K 线高低点撮合；participation 限制每根 K 线
+  最多成交该 K 线成交量的一定比例，大额限价单会分多根 K 线部分成交
+- USDT 本位线性合约采用单向净持仓，现货按币种余额记账，收取 Maker/Taker 手续费
+
+行情源可以是历史 K 线回放 (CandleFeed) 或实时生成的随机游走 (SyntheticFeed)，纸面交易与压测均无需联网。
+回测引擎的 BacktestExchange 即本类在虚拟时钟 + 无延迟 + 无限深度下的特例。
+"""
+
+import math
+import time
+import asyncio
+import random
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    from ccxt.base.errors import InsufficientFunds, OrderNotFound, BadSymbol
+except ImportError:
+    InsufficientFunds = OrderNotFound = BadSymbol = Exception
+
+from services.data.ohlcv_pipeline import timeframe_to_ms
+from services.data.candle_series import CandleSeries
+
+
+class WallClock:
+    """真实墙钟 (与回测 VirtualClock 接口一致)"""
+
+    def time(self):
+        return time.time()
+
+
+# ---------------- 行情源 ----------------
+
+class CandleFeed:
+    """
+    历史 K 线行情源
+    store: 提供 get(symbol, tf) / symbols / timeframes(symbol) 的 K 线仓库 (例如 backtest.data_feed.CandleStore)
+    replay_start: 设置后按 "replay_start + (墙钟 - 启动时刻) * speed" 实时回放历史；不设置时直接使用 clock 时间
+    store 中不存在的周期由最小周期按需聚合
+    """
+
+    def __init__(self, store, clock=None, replay_start=None, speed=1.0):
+        self.store = store
+        self.clock = clock or WallClock()
+        self.speed = float(speed)
+        self._anchor = None
+        if replay_start is not None:
+            self._anchor = (self.clock.time(), pd.Timestamp(replay_start).value / 1e9)
+        self._base = {}
+        self._derived = {}
+
+    def now_ms(self):
+        now = self.clock.time()
+        if self._anchor is not None:
+            wall_start, replay_start = self._anchor
+            now = replay_start + (now - wall_start) * self.speed
+        return int(now * 1000)
+
+    @property
+    def symbols(self):
+        return self.store.symbols
+
+    def add_symbol(self, symbol):
+        """运行中新增交易对: 历史回放只能使用已加载的 K 线，仓库中没有该交易对时返回 False"""
+        return symbol in self.store.symbols
+
+    def base(self, symbol):
+        """最小周期 K 线 (用于最新价与挂单撮合)，返回 (CandleSeries, step_ms) 或 None"""
+        entry = self._base.get(symbol)
+        if entry is None:
+            tfs = self.store.timeframes(symbol)
+            if not tfs:
+                return None
+            entry = (self.store.get(symbol, tfs[0]), timeframe_to_ms(tfs[0]))
+            self._base[symbol] = entry
+        return entry
+
+    def get(self, symbol, timeframe):
+        series = self.store.get(symbol, timeframe)
+        if series is not None:
+            return series
+        return self._derive(symbol, timeframe)
+
+    def _derive(self, symbol, timeframe):
+        entry = self.base(symbol)
+        step_ms = timeframe_to_ms(timeframe)
+        if entry is None or not step_ms or step_ms % entry[1]:
+            return None
+        base, _ = entry
+        version = (len(base), int(base.ts[-1]) if len(base) else 0)
+        cached = self._derived.get((symbol, timeframe))
+        if cached is None or cached[0] != version:
+            cached = (version, base.aggregate(step_ms))
+            self._derived[(symbol, timeframe)] = cached
+        return cached[1]
+
+
+class SyntheticFeed(CandleFeed):
+    """
+    实时随机游走行情源 (无需任何历史数据)
+    启动时为每个币种生成 history_bars 根 1m 历史，之后随墙钟推进按需补齐新 K 线；
+    15m / 4h 等周期由 1m 聚合得到
+    """
+
+    def __init__(self, symbols, clock=None, seed=None, volatility=0.001, start_prices=None,
+                 history_bars=30000, max_bars=50000, base_timeframe='1m'):
+        self._series = {}
+        super().__init__(self, clock=clock)
+        self.rng = np.random.default_rng(seed)
+        self.volatility = float(volatility)
+        self.start_prices = start_prices or {}
+        self.history_bars = int(history_bars)
+        self.max_bars = int(max(max_bars, history_bars))
+        self.base_timeframe = base_timeframe
+        self.step_ms = timeframe_to_ms(base_timeframe)
+        for i, symbol in enumerate(symbols):
+            self._series[symbol] = self._generate(
+                float(self.start_prices.get(symbol, 100.0 * (1 + i % 7))),
+                self._last_closed_open() - (self.history_bars - 1) * self.step_ms,
+                self.history_bars,
+            )
+
+    # CandleFeed 以自身作为 store
+    @property
+    def symbols(self):
+        return sorted(self._series)
+
+    def timeframes(self, symbol):
+        return [self.base_timeframe] if symbol in self._series else []
+
+    def add_symbol(self, symbol):
+        """运行中新增交易对 (配置热重载): 与启动时相同，生成 history_bars 根历史"""
+        if symbol not in self._series:
+            self._series[symbol] = self._generate(
+                float(self.start_prices.get(symbol, 100.0 * (1 + len(self._series) % 7))),
+                self._last_closed_open() - (self.history_bars - 1) * self.step_ms,
+                self.history_bars,
+            )
+        return True
+
+    def _last_closed_open(self):
+        now = self.now_ms()
+        return now - now % self.step_ms - self.step_ms
+
+    def _generate(self, start_price, first_ts, bars):
+        rets = self.rng.normal(0, self.volatility, bars)
+        close = start_price * np.exp(np.cumsum(rets))
+        open_ = np.concatenate(([start_price], close[:-1]))
+        wick = np.abs(self.rng.normal(0, self.volatility * 0.75, bars)) * close
+        high = np.maximum(open_, close) + wick
+        low = np.minimum(open_, close) - wick
+        volume = self.rng.lognormal(3, 0.6, bars)
+        ts = first_ts + np.arange(bars, dtype=np.int64) * self.step_ms
+        return CandleSeries(ts, open_, high, low, close, volume)
+
+    def get(self, symbol, timeframe):
+        series = self._series.get(symbol)
+        if series is None:
+            return None
+        last_open = self._last_closed_open()
+        if series.ts[-1] < last_open:
+            missing = int((last_open - series.ts[-1]) // self.step_ms)
+            tail = self._generate(float(series.close[-1]), int(series.ts[-1]) + self.step_ms, missing)
+            keep = max(0, len(series) + missing - self.max_bars)
+            series = CandleSeries(*(np.concatenate((getattr(series, c)[keep:], getattr(tail, c)))
+                                    for c in ('ts', 'open', 'high', 'low', 'close', 'volume')))
+            self._series[symbol] = series
+            self._base.pop(symbol, None)
+        if timeframe == self.base_timeframe:
+            return series
+        return self._derive(symbol, timeframe)
+
+    def base(self, symbol):
+        series = self.get(symbol, self.base_timeframe)
+        return (series, self.step_ms) if series is not None else None
+
+
+# ---------------- 盘口深度 ----------------
+
+class DepthModel:
+    """
+    合成订单簿: 以最新价为中心，买卖双边各 levels 档，
+    第 i 档 (从 0 开始) 偏离中间价 spread_bps / 2 + i * level_step_bps，每档挂单名义价值 level_notional USDT
+    level_notional 为 None 时深度无限，所有成交都在最优档完成 (即固定半价差滑点)
+    """
+
+    def __init__(self, spread_bps=2.0, levels=20, level_step_bps=1.0, level_notional=None):
+        self.half_spread = spread_bps / 20000.0
+        self.levels = max(int(levels), 1)
+        self.level_step = level_step_bps / 10000.0
+        self.level_notional = float(level_notional) if level_notional else None
+
+    def level_price(self, mid, side, i):
+        offset = self.half_spread + i * self.level_step
+        return mid * (1 + offset) if side == 'buy' else mid * (1 - offset)
+
+    def book(self, mid, limit=None):
+        n = min(limit or self.levels, self.levels)
+        size = self.level_notional / mid if self.level_notional else float('inf')
+        return {
+            'bids': [[self.level_price(mid, 'sell', i), size] for i in range(n)],
+            'asks': [[self.level_price(mid, 'buy', i), size] for i in range(n)],
+        }
+
+    def sweep(self, mid, side, qty, limit_price=None):
+        """
+        逐档吃单 (qty 为基础币数量)，limit_price 限制最差成交价
+        返回 (成交数量, 成交均价)；没有可成交档位时返回 (0.0, None)
+        """
+        if self.level_notional is None:
+            price = self.level_price(mid, side, 0)
+            if limit_price is not None and ((side == 'buy' and price > limit_price) or
+                                            (side == 'sell' and price < limit_price)):
+                return 0.0, None
+            return qty, price
+        filled = 0.0
+        cost = 0.0
+        for i in range(self.levels):
+            price = self.level_price(mid, side, i)
+            if limit_price is not None and ((side == 'buy' and price > limit_price) or
+                                            (side == 'sell' and price < limit_price)):
+                break
+            take = min(qty - filled, self.level_notional / price)
+            filled += take
+            cost += take * price
+            if filled >= qty - 1e-12:
+                break
+        return (filled, cost / filled) if filled > 0 else (0.0, None)
+
+
+# ---------------- 撮合引擎 ----------------
+
+class SimExchange:
+    id = 'okx'
+
+    def __init__(self, feed, initial_balance=10000.0, taker_fee=0.0005, maker_fee=0.0002,
+                 funding_rate=0.0001, contract_sizes=None, leverage=1, depth=None,
+                 latency_ms=0.0, latency_jitter_ms=0.0, participation=None, seed=None):
+        self.feed = feed
+        self.clock = feed.clock
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+        self.funding_rate = funding_rate
+        self.contract_sizes = contract_sizes or {}
+        self.default_leverage = leverage
+        self.depth = depth or DepthModel()
+        self.latency = max(float(latency_ms), 0.0) / 1000.0
+        self.latency_jitter = max(float(latency_jitter_ms), 0.0) / 1000.0
+        self.participation = participation
+        self.rng = random.Random(seed)
+
+        self.cash = float(initial_balance)
+        self.initial_balance = float(initial_balance)
+        self.spot = {}          # 现货币种余额: base -> amount
+        self.positions = {}     # 合约净持仓: symbol -> {'side', 'contracts', 'entry_price', 'leverage'}
+        self.leverages = {}
+        self.open_orders = {}   # order_id -> order dict
+        self.orders = {}        # 全部订单 (fetch_order 查询)
+        self.trades = []
+        self.realized_pnl = 0.0
+        self.fees_paid = 0.0
+        self.calls = Counter()
+        self._order_seq = 0
+        self._synced_ms = {}    # symbol -> 挂单已撮合到的时间
+
+        self.markets = {symbol: self._build_market(symbol) for symbol in feed.symbols}
+
+    # ---------------- 市场信息 ----------------
+
+    def _build_market(self, symbol):
+        is_swap = ':' in symbol
+        base, rest = symbol.split('/', 1)
+        quote = rest.split(':')[0]
+        contract_size = float(self.contract_sizes.get(symbol, 1.0)) if is_swap else 1.0
+        return {
+            'id': symbol.replace('/', '-').replace(':USDT', '-SWAP'),
+            'symbol': symbol,
+            'base': base,
+            'quote': quote,
+            'type': 'swap' if is_swap else 'spot',
+            'spot': not is_swap,
+            'swap': is_swap,
+            'future': False,
+            'option': False,
+            'contract': is_swap,
+            'linear': is_swap,
+            'contractSize': contract_size,
+            'precision': {'amount': 0.01 if is_swap else 1e-6, 'price': 1e-8},
+            'limits': {
+                'amount': {'min': 0.01 if is_swap else 1e-6, 'max': None},
+                'cost': {'min': 1.0, 'max': None},
+                'market': {'max': None},
+            },
+        }
+
+    def add_symbol(self, symbol):
+        """配置热重载新增交易对时注册市场信息；行情源无法提供该交易对时返回 False"""
+        if symbol in self.markets:
+            return True
+        if not self.feed.add_symbol(symbol):
+            return False
+        self.markets[symbol] = self._build_market(symbol)
+        return True
+
+    async def load_markets(self, reload=False):
+        self.calls['load_markets'] += 1
+        return self.markets
+
+    def market(self, symbol):
+        if symbol not in self.markets:
+            raise BadSymbol(f"okx does not have market symbol {symbol}")
+        return self.markets[symbol]
+
+    def _floor_amount(self, symbol, amount):
+        step = self.market(symbol)['precision']['amount']
+        return math.floor(float(amount) / step + 1e-9) * step
+
+    def amount_to_precision(self, symbol, amount):
+        step = self.market(symbol)['precision']['amount']
+        digits = max(0, -int(math.floor(math.log10(step))))
+        return f"{self._floor_amount(symbol, amount):.{digits}f}"
+
+    async def fetch_trading_fee(self, symbol, params={}):
+        self.calls['fetch_trading_fee'] += 1
+        return {'symbol': symbol, 'taker': self.taker_fee, 'maker': self.maker_fee}
+
+    async def set_leverage(self, leverage, symbol=None, params={}):
+        self.calls['set_leverage'] += 1
+        if symbol:
+            self.leverages[symbol] = float(leverage)
+        return {'leverage': leverage}
+
+    async def close(self):
+        return None
+
+    async def _network_delay(self):
+        """模拟下单/撤单的网络往返延迟"""
+        delay = self.latency + (self.rng.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    # ---------------- 行情 ----------------
+
+    def _now_ms(self):
+        return self.feed.now_ms()
+
+    def last_price(self, symbol):
+        entry = self.feed.base(symbol)
+        if entry is None:
+            return None
+        series, step_ms = entry
+        n = series.closed_count(self._now_ms(), step_ms)
+        if n <= 0:
+            return None
+        return float(series.close[n - 1])
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=100, params={}):
+        self.calls['fetch_ohlcv'] += 1
+        series = self.feed.get(symbol, timeframe)
+        step_ms = timeframe_to_ms(timeframe)
+        if series is None or not step_ms:
+            return []
+        end = series.closed_count(self._now_ms(), step_ms)
+        limit = limit or 100
+        if since is not None:
+            start = int(np.searchsorted(series.ts, since, side='left'))
+            return series.rows(min(end, start + limit), limit, start=start)
+        return series.rows(end, limit)
+
+    async def fetch_ticker(self, symbol, params={}):
+        self.calls['fetch_ticker'] += 1
+        return self._ticker(symbol)
+
+    async def fetch_tickers(self, symbols=None, params={}):
+        self.calls['fetch_tickers'] += 1
+        symbols = symbols or list(self.markets)
+        return {s: self._ticker(s) for s in symbols if s in self.markets}
+
+    def _ticker(self, symbol):
+        price = self.last_price(symbol)
+        if price is None:
+            raise BadSymbol(f"okx no market data for {symbol} at {self._now_ms()}")
+        series, step_ms = self.feed.base(symbol)
+        n = series.closed_count(self._now_ms(), step_ms)
+        day_ago = int(np.searchsorted(series.ts, series.ts[n - 1] - 86_400_000, side='left'))
+        open_24h = float(series.close[day_ago]) if day_ago < n else price
+        return {
+            'symbol': symbol,
+            'timestamp': self._now_ms(),
+            'last': price,
+            'close': price,
+            'bid': self.depth.level_price(price, 'sell', 0),
+            'ask': self.depth.level_price(price, 'buy', 0),
+            'open': open_24h,
+            'percentage': (price - open_24h) / open_24h * 100 if open_24h else 0.0,
+        }
+
+    async def fetch_order_book(self, symbol, limit=None, params={}):
+        self.calls['fetch_order_book'] += 1
+        price = self.last_price(symbol)
+        if price is None:
+            raise BadSymbol(f"okx no market data for {symbol}")
+        book = self.depth.book(price, limit)
+        book.update({'symbol': symbol, 'timestamp': self._now_ms(), 'nonce': None})
+        return book
+
+    async def fetch_funding_rate(self, symbol, params={}):
+        self.calls['fetch_funding_rate'] += 1
+        return {'symbol': symbol, 'fundingRate': self.funding_rate}
+
+    # ---------------- 账户 ----------------
+
+    def _unrealized(self, symbol, pos, price=None):
+        price = price if price is not None else self.last_price(symbol)
+        if price is None:
+            return 0.0
+        cs = self.markets[symbol]['contractSize']
+        direction = 1.0 if pos['side'] == 'long' else -1.0
+        return (price - pos['entry_price']) * pos['contracts'] * cs * direction
+
+    def _used_margin(self):
+        used = 0.0
+        for symbol, pos in self.positions.items():
+            cs = self.markets[symbol]['contractSize']
+            used += pos['entry_price'] * pos['contracts'] * cs / max(pos['leverage'], 1.0)
+        return used
+
+    def equity(self):
+        """账户权益 = USDT 现金 + 合约浮盈 + 现货市值"""
+        eq = self.cash
+        for symbol, pos in self.positions.items():
+            eq += self._unrealized(symbol, pos)
+        for base, amount in self.spot.items():
+            if amount <= 0:
+                continue
+            symbol = self._spot_symbol(base)
+            price = self.last_price(symbol) if symbol else None
+            if price:
+                eq += amount * price
+        return eq
+
+    def _spot_symbol(self, base):
+        for symbol, market in self.markets.items():
+            if market['spot'] and market['base'] == base:
+                return symbol
+        return None
+
+    async def fetch_balance(self, params={}):
+        self.calls['fetch_balance'] += 1
+        self.sync_orders()
+        equity = self.equity()
+        free = max(self.cash - self._used_margin(), 0.0)
+        balance = {
+            'USDT': {'free': free, 'used': self.cash - free, 'total': self.cash, 'equity': equity},
+            'free': {'USDT': free},
+            'total': {'USDT': self.cash},
+        }
+        details = [{'ccy': 'USDT', 'eq': str(equity), 'availBal': str(free), 'cashBal': str(self.cash)}]
+        for base, amount in self.spot.items():
+            balance[base] = {'free': amount, 'used': 0.0, 'total': amount}
+            balance['free'][base] = amount
+            balance['total'][base] = amount
+            details.append({'ccy': base, 'eq': str(amount), 'availBal': str(amount), 'cashBal': str(amount)})
+        balance['info'] = {'data': [{'totalEq': str(equity), 'details': details}]}
+        return balance
+
+    async def fetch_positions(self, symbols=None, params={}):
+        self.calls['fetch_positions'] += 1
+        self.sync_orders()
+        result = []
+        for symbol, pos in self.positions.items():
+            if symbols and symbol not in symbols:
+                continue
+            price = self.last_price(symbol)
+            cs = self.markets[symbol]['contractSize']
+            result.append({
+                'symbol': symbol,
+                'side': pos['side'],
+                'contracts': pos['contracts'],
+                'contractSize': cs,
+                'entryPrice': pos['entry_price'],
+                'markPrice': price,
+                'notional': (price or 0.0) * pos['contracts'] * cs,
+                'unrealizedPnl': self._unrealized(symbol, pos, price),
+                'leverage': pos['leverage'],
+                'marginMode': 'cross',
+                'info': {},
+            })
+        return result
+
+    async def fetch_my_trades(self, symbol=None, since=None, limit=100, params={}):
+        self.calls['fetch_my_trades'] += 1
+        trades = [t for t in self.trades if symbol is None or t['symbol'] == symbol]
+        if since is not None:
+            trades = [t for t in trades if t['timestamp'] >= since]
+        return trades[-limit:] if limit else trades
+
+    async def fetch_ledger(self, code=None, since=None, limit=None, params={}):
+        self.calls['fetch_ledger'] += 1
+        return []
+
+    # ---------------- 订单 ----------------
+
+    def _next_id(self):
+        self._order_seq += 1
+        return str(self._order_seq)
+
+    async def create_market_order(self, symbol, side, amount, price=None, params={}):
+        return await self.create_order(symbol, 'market', side, amount, price, params)
+
+    async def create_order(self, symbol, type, side, amount, price=None, params={}):
+        self.calls['create_order'] += 1
+        market = self.market(symbol)
+        amount = float(amount)
+        if amount <= 0:
+            raise InsufficientFunds("okx 51008 Insufficient balance: amount must be positive")
+        await self._network_delay()
+        self.sync_orders()
+        params = params or {}
+        order = {
+            'id': self._next_id(),
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'amount': amount,
+            'price': price,
+            'status': 'open',
+            'filled': 0.0,
+            'remaining': amount,
+            'average': None,
+            'cost': 0.0,
+            'fee': {'cost': 0.0, 'currency': 'USDT'},
+            'timestamp': self._now_ms(),
+            'reduceOnly': bool(params.get('reduceOnly')),
+            'info': {},
+        }
+
+        trigger = params.get('stopLossPrice') or params.get('triggerPrice') or params.get('takeProfitPrice')
+        if trigger:
+            order['type'] = 'stop'
+            order['triggerPrice'] = float(trigger)
+            order['trigger_side'] = 'below' if side == 'sell' else 'above'
+            if params.get('takeProfitPrice'):
+                order['trigger_side'] = 'above' if side == 'sell' else 'below'
+            self._rest(order)
+            return order
+
+        last = self.last_price(symbol)
+        if last is None:
+            raise BadSymbol(f"okx no market data for {symbol}")
+
+        limit_price = float(price) if type == 'limit' and price is not None else None
+        self._take(order, last, limit_price)
+        if order['remaining'] > 1e-12:
+            if limit_price is not None:
+                # 限价单未成交部分挂单
+                self._rest(order)
+            else:
+                # 市价单超出盘口深度的部分撤销
+                order['status'] = 'canceled'
+        self.orders[order['id']] = order
+        return order
+
+    def _take(self, order, mid, limit_price=None):
+        """按盘口深度吃单 (Taker)，成交数量按合约精度向下取整"""
+        symbol = order['symbol']
+        cs = self.markets[symbol]['contractSize']
+        wanted = order['remaining'] * cs
+        qty_base, avg = self.depth.sweep(mid, order['side'], wanted, limit_price)
+        if not avg:
+            return
+        qty = order['remaining'] if qty_base >= wanted - 1e-12 else self._floor_amount(symbol, qty_base / cs)
+        if qty > 0:
+            self._fill(order, qty, avg, self.taker_fee)
+
+    def _rest(self, order):
+        symbol = order['symbol']
+        if not any(o['symbol'] == symbol for o in self.open_orders.values()):
+            self._synced_ms[symbol] = self._now_ms()
+        self.open_orders[order['id']] = order
+        self.orders[order['id']] = order
+
+    def _fill(self, order, qty, fill_price, fee_rate):
+        symbol = order['symbol']
+        side = order['side']
+        market = self.markets[symbol]
+        cs = market['contractSize']
+        notional = fill_price * qty * cs
+        fee = notional * fee_rate
+        realized = 0.0
+
+        if market['swap']:
+            realized = self._apply_swap_fill(symbol, side, qty, fill_price, fee, order['reduceOnly'])
+        else:
+            base = market['base']
+            if side == 'buy':
+                if notional + fee > self.cash + 1e-9:
+                    raise InsufficientFunds(f"okx 51008 Insufficient USDT balance for {symbol}")
+                self.cash -= notional + fee
+                self.spot[base] = self.spot.get(base, 0.0) + qty
+            else:
+                held = self.spot.get(base, 0.0)
+                if qty > held + 1e-12:
+                    raise InsufficientFunds(f"okx 51008 Insufficient {base} balance")
+                self.spot[base] = held - qty
+                self.cash += notional - fee
+
+        self.fees_paid += fee
+        filled = order['filled'] + qty
+        remaining = max(order['amount'] - filled, 0.0)
+        order.update({
+            'status': 'closed' if remaining <= 1e-12 else 'open',
+            'filled': filled,
+            'remaining': remaining if remaining > 1e-12 else 0.0,
+            'average': ((order['average'] or 0.0) * order['filled'] + fill_price * qty) / filled,
+            'cost': order['cost'] + notional,
+            'fee': {'cost': order['fee']['cost'] + fee, 'currency': 'USDT'},
+        })
+        self.trades.append({
+            'id': f"{order['id']}-{len(self.trades)}",
+            'order': order['id'],
+            'symbol': symbol,
+            'side': side,
+            'price': fill_price,
+            'amount': qty,
+            'cost': notional,
+            'fee': {'cost': fee, 'currency': 'USDT'},
+            'timestamp': self._now_ms(),
+            'datetime': None,
+            'info': {'fillPnl': str(realized)},
+        })
+
+    def _apply_swap_fill(self, symbol, side, amount, price, fee, reduce_only):
+        cs = self.markets[symbol]['contractSize']
+        leverage = self.leverages.get(symbol, self.default_leverage)
+        pos = self.positions.get(symbol)
+        order_side = 'long' if side == 'buy' else 'short'
+        realized = 0.0
+
+        if pos is None or pos['side'] == order_side:
+            if reduce_only:
+                raise InsufficientFunds(f"okx 51169 reduceOnly order has no position to reduce: {symbol}")
+            # 开仓/加仓: 保证金校验
+            margin_needed = price * amount * cs / max(leverage, 1.0)
+            free = self.cash - self._used_margin()
+            if margin_needed + fee > free + 1e-9:
+                raise InsufficientFunds(f"okx 51008 Insufficient margin for {symbol}")
+            if pos is None:
+                self.positions[symbol] = {'side': order_side, 'contracts': amount,
+                                          'entry_price': price, 'leverage': leverage}
+            else:
+                total = pos['contracts'] + amount
+                pos['entry_price'] = (pos['entry_price'] * pos['contracts'] + price * amount) / total
+                pos['contracts'] = total
+        else:
+            # 反向: 先平仓，剩余部分 (非 reduceOnly) 反手开仓
+            close_qty = min(amount, pos['contracts'])
+            direction = 1.0 if pos['side'] == 'long' else -1.0
+            realized = (price - pos['entry_price']) * close_qty * cs * direction
+            self.cash += realized
+            self.realized_pnl += realized
+            pos['contracts'] -= close_qty
+            if pos['contracts'] <= 1e-12:
+                del self.positions[symbol]
+            remainder = amount - close_qty
+            if remainder > 1e-12 and not reduce_only:
+                self.positions[symbol] = {'side': order_side, 'contracts': remainder,
+                                          'entry_price': price, 'leverage': leverage}
+        self.cash -= fee
+        return realized
+
+    async def fetch_order(self, id, symbol=None, params={}):
+        self.calls['fetch_order'] += 1
+        self.sync_orders()
+        order = self.orders.get(id)
+        if order is None:
+            raise OrderNotFound(f"okx order {id} not found")
+        return order
+
+    async def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        self.calls['fetch_open_orders'] += 1
+        self.sync_orders()
+        want = (params or {}).get('type')
+        orders = [o for o in self.open_orders.values() if symbol is None or o['symbol'] == symbol]
+        if want == 'stop':
+            orders = [o for o in orders if o['type'] == 'stop']
+        return orders
+
+    async def cancel_order(self, id, symbol=None, params={}):
+        self.calls['cancel_order'] += 1
+        await self._network_delay()
+        self.sync_orders()
+        order = self.open_orders.pop(id, None)
+        if order is None:
+            raise OrderNotFound(f"okx order {id} not found")
+        order['status'] = 'canceled'
+        return order
+
+    # ---------------- 挂单撮合 ----------------
+
+    def sync_orders(self):
+        """用上次撮合之后收盘的 K 线撮合挂单与触发单 (无挂单时直接返回)"""
+        if not self.open_orders:
+            return
+        now_ms = self._now_ms()
+        for symbol in {o['symbol'] for o in self.open_orders.values()}:
+            entry = self.feed.base(symbol)
+            if entry is None:
+                continue
+            series, step_ms = entry
+            since = self._synced_ms.get(symbol, now_ms)
+            for i in range(series.closed_count(since, step_ms), series.closed_count(now_ms, step_ms)):
+                self.on_bar(symbol, series.high[i], series.low[i], series.volume[i])
+            self._synced_ms[symbol] = now_ms
+
+    def on_bar(self, symbol, high, low, volume=None):
+        """用一根 K 线的高低点撮合该币种的挂单与触发单"""
+        for order_id, order in list(self.open_orders.items()):
+            if order['symbol'] != symbol:
+                continue
+            try:
+                if order['type'] == 'stop':
+                    trig = order['triggerPrice']
+                    hit = (low <= trig) if order['trigger_side'] == 'below' else (high >= trig)
+                    if not hit:
+                        continue
+                    # 触发后按市价吃单，深度不足的部分撤销
+                    del self.open_orders[order_id]
+                    self._take(order, trig)
+                    if order['remaining'] > 1e-12:
+                        order['status'] = 'canceled'
+                    continue
+
+                price = order['price']
+                if (order['side'] == 'buy' and low > price) or (order['side'] == 'sell' and high < price):
+                    continue
+                qty = order['remaining']
+                if self.participation and volume is not None:
+                    cs = self.markets[symbol]['contractSize']
+                    qty = min(qty, self._floor_amount(symbol, float(volume) * self.participation / cs))
+                if qty <= 0:
+                    continue
+                self._fill(order, qty, price, self.maker_fee)
+                if order['remaining'] <= 1e-12:
+                    del self.open_orders[order_id]
+            except InsufficientFunds:
+                self.open_orders.pop(order_id, None)
+                order['status'] = 'rejected'
+
+
+def build_sim_exchange(sim_config, trading_config, symbols, initial_balance=10000.0):
+    """
+    按 trading.simulation 配置构造模拟交易所
+    feed: synthetic (默认，实时随机游走) / sqlite / parquet (按 replay_start + replay_speed 实时回放历史 K 线)
+    """
+    feed_type = sim_config.get('feed', 'synthetic')
+    if feed_type == 'synthetic':
+        feed = SyntheticFeed(
+            symbols,
+            seed=sim_config.get('seed'),
+            volatility=sim_config.get('volatility', 0.001),
+            start_prices=sim_config.get('start_prices', {}),
+        )
+    elif feed_type in ('sqlite', 'parquet'):
+        # 历史数据加载器与回测共用
+        from backtest.data_feed import CandleStore
+        base_tf = sim_config.get('base_timeframe', '1m')
+        store = CandleStore()
+        if feed_type == 'sqlite':
+            store.load_sqlite(sim_config.get('source', 'data/trade_data_*.db'), base_tf, symbols)
+        else:
+            store.load_parquet(sim_config.get('source', 'data/archive/*.parquet'), base_tf, symbols)
+        if not store.series:
+            raise ValueError(f"模拟行情源没有可用的 K 线: {sim_config.get('source')}")
+        replay_start = sim_config.get('replay_start')
+        if replay_start is None:
+            first_ts = min(int(s.ts[0]) for s in store.series.values())
+            replay_start = pd.to_datetime(first_ts + int(sim_config.get('warmup_hours', 72)) * 3_600_000, unit='ms')
+        feed = CandleFeed(store, replay_start=replay_start, speed=sim_config.get('replay_speed', 1.0))
+    else:
+        raise ValueError(f"未知的模拟行情源: {feed_type} (可选: synthetic / sqlite / parquet)")
+
+    return SimExchange(
+        feed,
+        initial_balance=sim_config.get('initial_balance', initial_balance),
+        taker_fee=sim_config.get('taker_fee', 0.0005),
+        maker_fee=sim_config.get('maker_fee', 0.0002),
+        funding_rate=sim_config.get('funding_rate', 0.0001),
+        contract_sizes=sim_config.get('contract_sizes', {}),
+        leverage=trading_config.get('leverage', 1),
+        depth=DepthModel(
+            spread_bps=sim_config.get('spread_bps', 2.0),
+            levels=sim_config.get('depth_levels', 20),
+            level_step_bps=sim_config.get('level_step_bps', 1.0),
+            level_notional=sim_config.get('level_notional'),
+        ),
+        latency_ms=sim_config.get('latency_ms', 50),
+        latency_jitter_ms=sim_config.get('latency_jitter_ms', 30),
+        participation=sim_config.get('participation'),
+        seed=sim_config.get('seed'),
+    )
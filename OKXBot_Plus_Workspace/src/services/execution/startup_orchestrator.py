@@ -0,0 +1,161 @@
+"""
+[New] 启动编排器 (Startup Orchestrator)
+
+替代 main() 中 "每批 max_concurrent_traders 个顺序 initialize + 批间 sleep(2)" 的启动方式:
+1. markets: 一次 load_markets (已缓存时直接返回)，之后各交易对的 market() 查询均为内存命中
+2. fees:    交易所支持 fetchTradingFees 时一次取全部费率；否则 (OKX) 按品种类型 (spot/swap/...) 各请求一次，
+            同类型交易对共用结果 (OKX 费率按产品类型与账户等级计，不随交易对变化)
+3. equity:  实盘共用一个账户，只请求一次 fetch_balance；测试模式下各交易对的模拟权益仍由 Trader 自行计算
+4. traders: 全部 Trader 并发 initialize (信号量限制并发数)，交易所请求由全局限频器排队，不再固定 sleep
+每个阶段 (phases) 与每个 Trader 的各步骤 (trader_timings) 耗时，并在启动完成后输出汇总。
+
+用法:
+    orchestrator = StartupOrchestrator(exchange, config['trading'], logger)
+    await orchestrator.prefetch(traders)
+    await orchestrator.initialize_traders(traders, concurrency=10)
+    orchestrator.log_report()
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+
+from core.utils import rate_limiter
+
+
+class StartupOrchestrator:
+    def __init__(self, exchange, trading_config=None, logger=None):
+        self.exchange = exchange
+        self.trading_config = trading_config or {}
+        self.logger = logger or logging.getLogger("crypto_oracle")
+        self.fees = {}
+        self.equity = None
+        self.phases = {}          # 阶段名 -> 耗时 (秒)
+        self.trader_timings = {}  # symbol -> {'db', 'leverage', 'fee', 'equity', 'total'}
+        self.requests = 0         # 预取阶段的交易所请求数
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t0
+
+    # ---------------- 批量预取 ----------------
+
+    async def prefetch(self, traders):
+        """批量预取全部 Trader 共用的市场信息 / 费率 / 账户权益"""
+        symbols = [t.symbol for t in traders]
+        with self.phase('markets'):
+            try:
+                await self.exchange.load_markets()
+                self.requests += 1
+            except Exception as e:
+                self.logger.warning(f"⚠️ [STARTUP] 加载市场信息失败: {e}")
+        with self.phase('fees'):
+            await self.prefetch_fees(symbols)
+        if not self.trading_config.get('test_mode', False) and traders:
+            with self.phase('equity'):
+                try:
+                    await rate_limiter.acquire()
+                    self.equity = await traders[0].get_account_equity()
+                    self.requests += 1
+                except Exception as e:
+                    self.logger.warning(f"⚠️ [STARTUP] 预取账户权益失败: {e}")
+        return self.prefetched
+
+    async def prefetch_fees(self, symbols):
+        """批量获取费率 (热添加交易对时也可单独调用)"""
+        has = getattr(self.exchange, 'has', None) or {}
+        if has.get('fetchTradingFees'):
+            try:
+                await rate_limiter.acquire()
+                fees = await self.exchange.fetch_trading_fees()
+                self.requests += 1
+                self.fees.update({s: fees[s] for s in symbols if fees.get(s)})
+                return
+            except Exception as e:
+                self.logger.warning(f"⚠️ [STARTUP] 批量获取费率失败，改为按品种类型获取: {e}")
+
+        groups = {}
+        for symbol in symbols:
+            try:
+                market_type = self.exchange.market(symbol).get('type') or 'swap'
+            except Exception:
+                market_type = 'swap'
+            groups.setdefault(market_type, []).append(symbol)
+
+        async def fetch_group(group):
+            await rate_limiter.acquire()
+            try:
+                fee = await self.exchange.fetch_trading_fee(group[0])
+            except Exception as e:
+                self.logger.warning(f"⚠️ [STARTUP] 获取费率失败 ({group[0]}): {e}")
+                return
+            self.requests += 1
+            if fee:
+                for symbol in group:
+                    self.fees[symbol] = fee
+
+        await asyncio.gather(*(fetch_group(group) for group in groups.values()))
+
+    @property
+    def prefetched(self):
+        return {'fees': self.fees, 'equity': self.equity}
+
+    # ---------------- 并发初始化 ----------------
+
+    async def initialize_traders(self, traders, concurrency=10):
+        """
+        并发初始化 Trader (失败的 Trader 记录日志后跳过)
+        返回初始化成功的 Trader 列表 (保持原顺序)
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        prefetched = self.prefetched
+
+        async def init_one(trader):
+            async with semaphore:
+                t0 = time.perf_counter()
+                try:
+                    steps = await trader.initialize(prefetched=prefetched) or {}
+                except Exception as e:
+                    self.logger.error(f"❌ [STARTUP] 初始化 {trader.symbol} 失败: {e}")
+                    return None
+                steps['total'] = time.perf_counter() - t0
+                self.trader_timings[trader.symbol] = steps
+                return trader
+
+        with self.phase('traders'):
+            results = await asyncio.gather(*(init_one(t) for t in traders))
+        return [t for t in results if t is not None]
+
+    # ---------------- 报告 ----------------
+
+    def report(self):
+        """各阶段耗时与 Trader 初始化步骤的平均/最大耗时 (毫秒)"""
+        steps = {}
+        for timing in self.trader_timings.values():
+            for name, value in timing.items():
+                steps.setdefault(name, []).append(value)
+        return {
+            'phases_ms': {name: round(value * 1000, 1) for name, value in self.phases.items()},
+            'trader_steps_ms': {
+                name: {'avg': round(sum(values) / len(values) * 1000, 1), 'max': round(max(values) * 1000, 1)}
+                for name, values in steps.items()
+            },
+            'traders': len(self.trader_timings),
+            'prefetch_requests': self.requests,
+        }
+
+    def log_report(self):
+        report = self.report()
+        phases = " | ".join(f"{name} {ms:.0f}ms" for name, ms in report['phases_ms'].items())
+        self.logger.info(f"🚀 [STARTUP] {report['traders']} 个交易对初始化完成: {phases} "
+                         f"(预取请求 {report['prefetch_requests']} 次)")
+        steps = " | ".join(f"{name} avg {v['avg']:.0f}ms / max {v['max']:.0f}ms"
+                           for name, v in report['trader_steps_ms'].items())
+        if steps:
+            self.logger.info(f"⏱️ [STARTUP] Trader 初始化步骤: {steps}")
+        return report
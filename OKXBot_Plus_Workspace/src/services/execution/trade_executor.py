@@ -11,14 +11,30 @@ from core.exceptions import (
 )
 from core.cache import cache_manager
 from services.data.data_manager import DataManager
+from services.data.ohlcv_pipeline import normalize_ohlcv, clean_ohlcv, compute_indicators
+from services.data.gap_index import gap_index
+from core.executor import analytics_executor
+from core.state_store import state_store as global_state_store
+from core.tick_profiler import tick_profiler
+from core.metrics import TICK_DURATION
+from core.tracing import tracer
+from core.records import PositionRecord, SimTradeRecord, SignalRecord, TickResult
 from services.strategy.registry import StrategyFactory
 from .components import PositionManager, OrderExecutor, SignalProcessor
 import json
 import os
 from collections import deque
 
+# 波动率状态 -> 交易人格 (市场扫描表格的 PERSONA 列)
+PERSONAS = {
+    'HIGH_TREND': 'Trend Hunter (趋势猎人)',
+    'LOW': 'Grid Trader (网格交易)',
+    'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
+    'NORMAL': 'Day Trader (波段交易)'
+}
+
 class DeepSeekTrader:
-    def __init__(self, symbol_config, common_config, exchange, agent, market_data_service=None):
+    def __init__(self, symbol_config, common_config, exchange, agent, market_data_service=None, state_store=None):
         self.symbol_config = symbol_config # Store for hot reload
         self.common_config = common_config # Store for hot reload
         self.market_data_service = market_data_service # [New] Service Injection
@@ -92,6 +108,7 @@ class DeepSeekTrader:
             logging.getLogger("crypto_oracle")
         )
         self.position_manager.set_trailing_config(self.trailing_config)
+        self.position_manager.set_partial_tp_stages(strategy_config.get('partial_tp_stages'))
         
         self.order_executor = OrderExecutor(
             self.exchange,
@@ -141,9 +158,14 @@ class DeepSeekTrader:
         self._last_analyzed_bar_ts = None
 
         # [New] State Persistence
+        # [Optimization] 状态统一写入 core.state_store (追加日志 + 合并写盘)，旧版 JSON 文件仅用于首次迁移
+        # [Fix] 可注入独立的 StateStore (回测)，构造期间的 load_state / 旧文件迁移不会触及实盘的 state.journal
+        self.state_store = state_store or global_state_store
+        self.state_key = f"trader/{self.symbol}"
         self.state_file = f"data/state_{self.symbol.replace('/', '_')}.json"
         
         # [New] Simulation State (Test Mode Only)
+        self.sim_state_key = f"sim/{self.symbol}"
         self.sim_state_file = f"data/sim_state_{self.symbol.replace('/', '_')}.json"
         
         if self.test_mode:
@@ -170,7 +192,7 @@ class DeepSeekTrader:
         self.load_state()
 
     async def save_state(self):
-        """Async save state to disk"""
+        """Save state (内存更新 + 后台合并写盘，不阻塞事件循环)"""
         try:
             state = {
                 'daily_high_equity': self.daily_high_equity,
@@ -181,53 +203,45 @@ class DeepSeekTrader:
                 'trailing_max_pnl': self.trailing_max_pnl, # [New] Persist trailing stop
                 'updated_at': time.time()
             }
-            
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._save_state_sync, state)
+            self.state_store.put(self.state_key, state)
         except Exception as e:
             self.logger.warning(f"[{self.symbol}] ⚠️ 保存状态失败: {e}")
 
     def load_state(self):
         """Load persistent state (Circuit Breaker & Dynamic Risk)"""
-        if os.path.exists(self.state_file):
+        state = self.state_store.get(self.state_key, legacy_path=self.state_file)
+        if state:
             try:
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    state = json.load(f)
+                # [Fix] Stale State Check (过期状态检查)
+                # 只要有持仓，止损位(Price Level)就是永久有效的，不应随时间过期。
+                # 如果停机期间价格跌破止损，启动后理应立即执行止损，而不是丢弃风控。
+                updated_at = state.get('updated_at', 0)
+                is_stale = (time.time() - updated_at) > 3600 # 1 hour
                     
-                    # [Fix] Stale State Check (过期状态检查)
-                    # 只要有持仓，止损位(Price Level)就是永久有效的，不应随时间过期。
-                    # 如果停机期间价格跌破止损，启动后理应立即执行止损，而不是丢弃风控。
-                    updated_at = state.get('updated_at', 0)
-                    is_stale = (time.time() - updated_at) > 3600 # 1 hour
-                    
-                    if is_stale:
-                        self.logger.warning(f"[{self.symbol}] ⚠️ 加载了旧的状态文件 (Last Update: {datetime.fromtimestamp(updated_at).strftime('%H:%M:%S')})，请注意动态止损可能立即触发")
+                if is_stale:
+                    self.logger.warning(f"[{self.symbol}] ⚠️ 加载了旧的状态文件 (Last Update: {datetime.fromtimestamp(updated_at).strftime('%H:%M:%S')})，请注意动态止损可能立即触发")
 
-                    self.daily_high_equity = state.get('daily_high_equity', 0.0)
-                    saved_day = state.get('high_water_day')
-                    today = datetime.now().strftime('%Y%m%d')
+                self.daily_high_equity = state.get('daily_high_equity', 0.0)
+                saved_day = state.get('high_water_day')
+                today = datetime.now().strftime('%Y%m%d')
                     
-                    # [Fix] Reset high water mark on new day to prevent stale drawdown
-                    if saved_day != today:
-                        self.daily_high_equity = 0.0
-                        self.high_water_day = today
-                    else:
-                        self.high_water_day = saved_day or today
+                # [Fix] Reset high water mark on new day to prevent stale drawdown
+                if saved_day != today:
+                    self.daily_high_equity = 0.0
+                    self.high_water_day = today
+                else:
+                    self.high_water_day = saved_day or today
                     
-                    # Always restore risk params if they exist
-                    self.dynamic_stop_loss = state.get('dynamic_stop_loss', 0.0)
-                    self.dynamic_take_profit = state.get('dynamic_take_profit', 0.0)
-                    self.dynamic_sl_side = state.get('dynamic_sl_side')
-                    self.trailing_max_pnl = state.get('trailing_max_pnl', 0.0)
+                # Always restore risk params if they exist
+                self.dynamic_stop_loss = state.get('dynamic_stop_loss', 0.0)
+                self.dynamic_take_profit = state.get('dynamic_take_profit', 0.0)
+                self.dynamic_sl_side = state.get('dynamic_sl_side')
+                self.trailing_max_pnl = state.get('trailing_max_pnl', 0.0)
                     
-                    self.logger.info(f"[{self.symbol}] 🔄 恢复状态: DailyHigh={self.daily_high_equity:.2f}, DynSL={self.dynamic_stop_loss}, TrailMax={self.trailing_max_pnl:.2%}")
+                self.logger.info(f"[{self.symbol}] 🔄 恢复状态: DailyHigh={self.daily_high_equity:.2f}, DynSL={self.dynamic_stop_loss}, TrailMax={self.trailing_max_pnl:.2%}")
             except Exception as e:
                 self.logger.warning(f"[{self.symbol}] ⚠️ 加载状态失败: {e}")
 
-    def _save_state_sync(self, state):
-        with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(state, f)
-
     async def check_trailing_stop(self, current_position=None):
         """检查并执行移动止盈 (Trailing Stop)"""
         # [Fix] Sync state to PositionManager before check
@@ -265,60 +279,77 @@ class DeepSeekTrader:
     def _check_candlestick_pattern(self, data_input):
         return self.signal_processor.check_candlestick_pattern(data_input)
 
-    def _execute_sim_trade(self, signal_data, current_price):
-        return asyncio.run(self.order_executor.execute_sim_trade(signal_data, current_price))
+    async def _execute_sim_trade(self, signal_data, current_price):
+        # [Fix] 已在事件循环中运行，不能再 asyncio.run (会抛 RuntimeError)
+        result = await self.order_executor.execute_sim_trade(signal_data, current_price)
+        self._save_sim_state()
+        return result
 
     # _record_sim_trade removed as it is handled by OrderExecutor
 
     def _load_sim_state(self):
-        """Load simulation state from JSON"""
-        if os.path.exists(self.sim_state_file):
+        """Load simulation state (state_store，首次运行时迁移旧版 sim_state JSON)"""
+        state = self.state_store.get(self.sim_state_key, legacy_path=self.sim_state_file)
+        if state:
             try:
-                with open(self.sim_state_file, 'r', encoding='utf-8') as f:
-                    state = json.load(f)
-                    self.position_manager.set_sim_state(
-                        state.get('balance', 0.0),
-                        state.get('position'),
-                        state.get('trades', []),
-                        state.get('realized_pnl', 0.0)
-                    )
+                self.position_manager.set_sim_state(
+                    state.get('balance', 0.0),
+                    PositionRecord.from_dict(state.get('position')),
+                    [SimTradeRecord.from_dict(t) for t in state.get('trades', [])],
+                    state.get('realized_pnl', 0.0)
+                )
             except Exception as e:
                 self._log(f"读取模拟状态失败: {e}", 'warning')
         else:
             self.position_manager.sim_trades = []
 
     def _save_sim_state(self):
-        """Save simulation state to JSON"""
+        """Save simulation state (state_store 合并写盘)"""
         try:
             state = self.position_manager.get_sim_state()
             # Map back to storage format
+            position = state['sim_position']
             storage_state = {
-                'position': state['sim_position'],
+                'position': position.to_dict() if position else None,
                 'realized_pnl': state['sim_realized_pnl'],
                 'balance': state['sim_balance'],
-                'trades': state['sim_trades']
+                'trades': [t.to_dict() for t in state['sim_trades']]
             }
-            with open(self.sim_state_file, 'w', encoding='utf-8') as f:
-                json.dump(storage_state, f, indent=4)
+            self.state_store.put(self.sim_state_key, storage_state)
         except Exception as e:
             self._log(f"保存模拟状态失败: {e}", 'warning')
 
 
 
-    async def initialize(self):
-        """Async Initialization"""
+    async def initialize(self, prefetched=None):
+        """
+        Async Initialization
+        [Optimization] prefetched: StartupOrchestrator 批量预取的共享数据
+            {'fees': {symbol: {'taker', 'maker'}}, 'equity': float|None}
+        提供时跳过逐交易对的费率/权益请求；返回各阶段耗时 (秒)
+        """
+        prefetched = prefetched or {}
+        timings = {}
+        t0 = time.perf_counter()
         # [New] Init Data Manager
         await self.data_manager.initialize()
-        
+        timings['db'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
         await self.setup_leverage()
-        # [Fix] 使用内部已有的 _update_fee_rate 方法，避免重复定义
-        if hasattr(self, '_update_fee_rate'):
-            await self._update_fee_rate()
+        timings['leverage'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        await self._update_fee_rate(prefetched.get('fees', {}).get(self.symbol))
+        timings['fee'] = time.perf_counter() - t0
 
         # [New] Smart Balance Calibration (智能资金校准)
         # 解决配置资金与实际资金偏差导致的错误盈亏计算问题
+        t0 = time.perf_counter()
         try:
-            current_equity = await self.get_account_equity()
+            current_equity = prefetched.get('equity')
+            if current_equity is None:
+                current_equity = await self.get_account_equity()
             if current_equity > 0:
                 # [Modified] 放宽资金校准阈值 (10% -> 50%)
                 # 用户反馈: 希望看到历史累计亏损，而不是每次重启都重置
@@ -337,6 +368,37 @@ class DeepSeekTrader:
         except Exception as e:
             # 只有在失败时才打印警告，成功时静默
             self._log(f"⚠️ 资金校准失败: {e}", 'warning')
+        timings['equity'] = time.perf_counter() - t0
+        return timings
+
+    def _tick_result(self, price_data, current_pos, reason, status, summary='', status_msg='', signal='HOLD',
+                     confidence='LOW', pattern=None, persona=None, recommended_sleep=5.0, has_position=None):
+        """
+        [Optimization] 构造本轮结果 (TickResult)
+        行情 / 指标 / 波动率 / 交易人格统一从 price_data 填充，各返回路径只传差异字段
+        """
+        ind = price_data.get('indicators') or {}
+        volatility = price_data.get('volatility_status', 'NORMAL')
+        return TickResult(
+            self.symbol,
+            price=price_data['price'],
+            change=price_data.get('price_change', 0.0),
+            signal=signal,
+            confidence=confidence,
+            reason=reason,
+            summary=summary,
+            status=status,
+            status_msg=status_msg,
+            volatility=volatility,
+            persona=persona or PERSONAS.get(volatility, volatility),
+            adx=ind.get('adx'),
+            rsi=ind.get('rsi'),
+            atr_ratio=ind.get('atr_ratio'),
+            vol_ratio=ind.get('vol_ratio'),
+            pattern=pattern or '-',
+            has_position=current_pos is not None if has_position is None else has_position,
+            recommended_sleep=recommended_sleep
+        )
 
     def _log(self, msg, level='info'):
         if level == 'info':
@@ -430,9 +492,11 @@ class DeepSeekTrader:
             self._log(f"自动计算 amount 失败: {e}", 'error')
             self.amount = 0
 
-    async def _update_fee_rate(self):
+    async def _update_fee_rate(self, fees=None):
+        """fees: 批量预取的费率 (StartupOrchestrator)，为空时单独请求"""
         try:
-            fees = await self.exchange.fetch_trading_fee(self.symbol)
+            if fees is None:
+                fees = await self.exchange.fetch_trading_fee(self.symbol)
             if fees:
                 new_taker = to_float(fees.get('taker', self.taker_fee_rate))
                 new_maker = to_float(fees.get('maker', self.maker_fee_rate))
@@ -447,6 +511,8 @@ class DeepSeekTrader:
     async def setup_leverage(self):
         try:
             if self.trade_mode == 'cash': return
+            # [Optimization] 并发初始化时经全局限频器排队，替代固定的批间 sleep
+            await rate_limiter.acquire()
             await self.exchange.set_leverage(self.leverage, self.symbol, {'mgnMode': self.margin_mode})
             # [Fix] Remove emoji dependency to prevent runtime errors if package missing
             # self._log(emoji.emojize(f":gear: 设置杠杆: {self.leverage}x ({self.margin_mode})"))
@@ -460,210 +526,31 @@ class DeepSeekTrader:
     def normalize_data(self, df):
         """
         [Data Wrangling] 数据整理 - 时间对齐与缺省填充
-        确保 K 线时间轴连续，填补因维护或停机导致的空洞
+        [Refactor] 实现迁移至 services.data.ohlcv_pipeline.normalize_ohlcv
         """
-        try:
-            if df.empty: return df
-            
-            # [Fix] 去重：确保时间戳唯一 (Duplicate Labels Check)
-            # [Hardcore Fix] 强制时间戳取整对齐，彻底消除毫秒级微小差异导致的 Duplicate Label
-            # 例如: 10:00:00.001 和 10:00:00.002 会被统一为 10:00:00
-            
-            # 1. 确保是 datetime 类型
-            if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            else:
-                df = df.reset_index()
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # 2. 强制 Rounding (根据 timeframe 动态调整)
-            # 这里统一 Round 到 '1s' 精度，足以应付所有 K 线 (最小 1m)
-            # 如果是毫秒级高频 K 线，可能需要调整，但 CCXT 最小也是 1m
-            df['timestamp'] = df['timestamp'].dt.floor('1s')
-            
-            # 3. 再次去重 (这次是基于 Round 后的时间戳)
-            df = df.drop_duplicates(subset=['timestamp'], keep='last')
-            
-            # 4. 设置索引
-            df = df.set_index('timestamp').sort_index()
-            
-            # 1. 转换 Timeframe 为 Pandas Offset
-            # CCXT: 1m, 5m, 1h, 1d, 1w
-            # Pandas: 1min, 5min, 1h, 1D, 1W
-            tf = self.timeframe
-            freq = None
-            if tf.endswith('m'): freq = tf.replace('m', 'min')
-            elif tf.endswith('h'): freq = tf.replace('h', 'H')
-            elif tf.endswith('d'): freq = tf.replace('d', 'D')
-            elif tf.endswith('w'): freq = tf.replace('w', 'W')
-            
-            if not freq: return df # 不支持的周期，跳过
-            
-            # [Fix] 再次去重 (Just in case index still has duplicates)
-            df = df[~df.index.duplicated(keep='last')]
-            
-            # 3. 重采样 (Resample) - 强制对齐时间网格
-            # 使用 asfreq() 插入缺失行 (值为 NaN)
-            df_resampled = df.resample(freq).asfreq()
-            # 规则: 
-            # - Close: 沿用上一个 Close (Forward Fill)
-            # - Open/High/Low: 既然无成交，价格应等于 Close (画十字星)
-            # - Volume: 0
-            
-            if df_resampled.isnull().any().any():
-                # self._log(f"🔧 检测到 K 线缺失，正在修补...", 'debug')
-                
-                df_resampled['close'] = df_resampled['close'].ffill()
-                df_resampled['volume'] = df_resampled['volume'].fillna(0)
-                
-                # Open/High/Low 填充为 Close (此时 Close 已经是填充过的了)
-                df_resampled['open'] = df_resampled['open'].fillna(df_resampled['close'])
-                df_resampled['high'] = df_resampled['high'].fillna(df_resampled['close'])
-                df_resampled['low'] = df_resampled['low'].fillna(df_resampled['close'])
-            
-            # 5. 还原索引
-            df_final = df_resampled.reset_index()
-            
-            return df_final
-            
-        except Exception as e:
-            self._log(f"数据整理失败: {e}", 'error')
-            return df
+        return normalize_ohlcv(df, self.timeframe)
 
     def clean_data(self, df):
         """
         [Data Cleaning] 数据清洗 - 剔除价格异常值 (Z-Score)
-        防止插针导致指标计算错误
+        [Refactor] 实现迁移至 services.data.ohlcv_pipeline.clean_ohlcv
         """
-        try:
-            if len(df) < 20: return df
-            
-            # 计算 Close 价格的 Z-Score
-            # 这里的窗口可以稍微大一点，比如 20
-            rolling_mean = df['close'].rolling(window=20).mean()
-            rolling_std = df['close'].rolling(window=20).std().replace(0, np.nan) # [Fix] Avoid div by zero
-            
-            # 异常阈值: 3倍标准差
-            threshold = 3.0
-            
-            # 标记异常值 (Z-Score > 3)
-            # 我们只清洗 "收盘价"，因为指标计算主要依赖 Close
-            # 如果某根 K 线的 Close 极其离谱，我们用 rolling_mean 替换它
-            z_score = abs(df['close'] - rolling_mean) / rolling_std
-            
-            outliers = z_score > threshold
-            if outliers.any():
-                outlier_count = outliers.sum()
-                # self._log(f"🧹 检测到 {outlier_count} 个价格异常点，正在清洗...", 'warning')
-                
-                # 用均值填充异常值
-                df.loc[outliers, 'close'] = rolling_mean[outliers]
-                
-                # 同时也修正 High/Low，防止 High < Close 或 Low > Close
-                df.loc[outliers, 'high'] = df.loc[outliers, ['high', 'close']].max(axis=1)
-                df.loc[outliers, 'low'] = df.loc[outliers, ['low', 'close']].min(axis=1)
-                
-            return df
-        except Exception as e:
-            # self._log(f"数据清洗失败: {e}", 'error')
-            return df
+        return clean_ohlcv(df)
 
     def calculate_indicators(self, df):
+        """同步版本 (保留兼容)，主循环请使用 calculate_indicators_async"""
+        return compute_indicators(df, self.timeframe)
+
+    async def calculate_indicators_async(self, df):
+        """
+        [New] 指标计算卸载到分析执行器 (线程池/进程池)，避免阻塞事件循环
+        """
         try:
-            if len(df) < 30: return df
-            
-            # [Step 0] Data Wrangling (Time Alignment)
-            df = self.normalize_data(df)
-            
-            # [Step 1] Data Cleaning
-            df = self.clean_data(df)
-            
-            # [Step 2] RSI (Wilder's Smoothing)
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).ewm(alpha=1/14, adjust=False).mean()
-            loss = (-delta.where(delta < 0, 0)).ewm(alpha=1/14, adjust=False).mean()
-            rs = gain / loss.replace(0, np.nan)
-            df['rsi'] = 100 - (100 / (1 + rs))
-            df['rsi'] = df['rsi'].fillna(50) # Fill initial NaNs with neutral 50
-
-            # [Step 3] MACD
-            exp1 = df['close'].ewm(span=12, adjust=False).mean()
-            exp2 = df['close'].ewm(span=26, adjust=False).mean()
-            df['macd'] = exp1 - exp2
-            df['signal_line'] = df['macd'].ewm(span=9, adjust=False).mean()
-            df['macd_hist'] = df['macd'] - df['signal_line']
-
-            # [Step 4] Bollinger Bands
-            df['sma_20'] = df['close'].rolling(window=20).mean()
-            df['std_20'] = df['close'].rolling(window=20).std()
-            df['upper_band'] = df['sma_20'] + (df['std_20'] * 2)
-            df['lower_band'] = df['sma_20'] - (df['std_20'] * 2)
-            
-            # [Step 5] Volume Ratio
-            df['vol_sma_20'] = df['volume'].rolling(window=20).mean().replace(0, np.nan)
-            df['vol_ratio'] = df['volume'] / df['vol_sma_20'] # 量比
-            df['vol_ratio'] = df['vol_ratio'].fillna(0)
-            
-            # [New] 计算买卖压力指标 (OBV & Delta Volume)
-            # 1. OBV: Close > PrevClose => +Vol, else -Vol
-            df['obv_change'] = 0.0
-            df.loc[df['close'] > df['close'].shift(), 'obv_change'] = df['volume']
-            df.loc[df['close'] < df['close'].shift(), 'obv_change'] = -df['volume']
-            df['obv'] = df['obv_change'].cumsum()
-            
-            # 2. 估算买入量占比 (Buying Pressure)
-            # 使用简单的 Close-Open 逻辑: 阳线视为买入主导，阴线视为卖出主导
-            # 也可以用更细的 (Close-Low)/(High-Low)
-            # 这里用最近 5 根 K 线的阳线成交量占比
-            df['is_up_candle'] = df['close'] >= df['open']
-            df['up_vol'] = df['volume'].where(df['is_up_candle'], 0)
-            df['down_vol'] = df['volume'].where(~df['is_up_candle'], 0)
-            
-            # 5周期买盘占比 (0~1)
-            vol_sum_5 = df['volume'].rolling(window=5).sum().replace(0, np.nan)
-            df['buy_vol_prop_5'] = df['up_vol'].rolling(window=5).sum() / vol_sum_5
-            df['buy_vol_prop_5'] = df['buy_vol_prop_5'].fillna(0.5) # Default to 0.5 if no volume
-            
-            # [Step 6] ADX & ATR (Wilder's Smoothing)
-            df['tr0'] = abs(df['high'] - df['low'])
-            df['tr1'] = abs(df['high'] - df['close'].shift())
-            df['tr2'] = abs(df['low'] - df['close'].shift())
-            df['tr'] = df[['tr0', 'tr1', 'tr2']].max(axis=1)
-            
-            df['up_move'] = df['high'] - df['high'].shift()
-            df['down_move'] = df['low'].shift() - df['low']
-            df['plus_dm'] = 0.0
-            df['minus_dm'] = 0.0
-            df.loc[(df['up_move'] > df['down_move']) & (df['up_move'] > 0), 'plus_dm'] = df['up_move']
-            df.loc[(df['down_move'] > df['up_move']) & (df['down_move'] > 0), 'minus_dm'] = df['down_move']
-            
-            window = 14
-            # Use EWM for Wilder's Smoothing (alpha=1/n)
-            df['tr_smooth'] = df['tr'].ewm(alpha=1/window, adjust=False).mean()
-            df['plus_di'] = 100 * (df['plus_dm'].ewm(alpha=1/window, adjust=False).mean() / df['tr_smooth'].replace(0, np.nan))
-            df['minus_di'] = 100 * (df['minus_dm'].ewm(alpha=1/window, adjust=False).mean() / df['tr_smooth'].replace(0, np.nan))
-            
-            sum_di = df['plus_di'] + df['minus_di']
-            df['dx'] = 100 * abs(df['plus_di'] - df['minus_di']) / sum_di.replace(0, np.nan)
-            df['adx'] = df['dx'].ewm(alpha=1/window, adjust=False).mean()
-            
-            # [New] ATR (Average True Range) Calculation
-            # tr_smooth is basically ATR (Wilder's Smoothing)
-            df['atr'] = df['tr_smooth']
-            
-            # [New] ATR Ratio (波动率因子)
-            # 当前 ATR / 过去 50根 K线的平均 ATR
-            # 如果 < 0.5，说明波动率极度萎缩 (死鱼盘)
-            df['atr_ma50'] = df['atr'].rolling(window=50).mean().replace(0, np.nan)
-            df['atr_ratio'] = df['atr'] / df['atr_ma50']
-            
-            return df
+            with tick_profiler.span('run.indicators', self.symbol):
+                return await analytics_executor.run_frame(compute_indicators, df, self.timeframe)
         except Exception as e:
             self._log(f"计算技术指标失败: {e}", 'error')
             return df
-            
-
-
 
     def _build_ohlcv_result(self, df, indicators, trend_4h, current_data, previous_data):
         """
@@ -832,17 +719,21 @@ class DeepSeekTrader:
         # [Resume] 尝试从数据库加载最近的 K 线 (断点续传)
         # 优先使用本地数据，以减少 API 调用并保持状态连续性
         # 但为了数据的实时性，我们仍需要拉取最新的数据进行合并
-        local_klines = []
-        try:
-            local_klines = await self.data_manager.get_recent_klines(self.symbol, self.timeframe, limit=200)
-        except Exception as e:
-            self._log(f"加载本地历史数据失败: {e}", 'warning')
+        # [Optimization] 优先读取内存映射归档 (零拷贝，不查 SQLite)，不足 200 根时再回退数据库
+        local_klines = self.data_manager.get_recent_candles(self.symbol, self.timeframe, limit=200)
+        if local_klines is None or len(local_klines) < 200:
+            try:
+                local_klines = await self.data_manager.get_recent_klines(self.symbol, self.timeframe, limit=200)
+            except Exception as e:
+                self._log(f"加载本地历史数据失败: {e}", 'warning')
+                local_klines = []
 
-        # [Optimization] 获取 200 根 K 线
-        # 如果本地有足够数据，理论上我们可以只拉取最近的几十根，但为了安全起见（防止长时间停机导致的巨大 Gap），
-        # 这里还是拉取 200 根，然后做 merge
+        # [Optimization] 本地归档已有 200 根时只拉取归档末尾之后缺失的 K 线 (停机过久时仍是 200 根)，
+        # 否则拉取 200 根，然后做 merge
+        fetch_limit = self.data_manager.warm_fetch_limit(local_klines, self.timeframe, limit=200) \
+            if isinstance(local_klines, pd.DataFrame) else 200
         ohlcv = await asyncio.wait_for(
-            self.exchange.fetch_ohlcv(self.symbol, api_timeframe, limit=200),
+            self.exchange.fetch_ohlcv(self.symbol, api_timeframe, limit=fetch_limit),
             timeout=10
         )
         df_new = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -850,7 +741,7 @@ class DeepSeekTrader:
         
         # [Merge] 合并本地数据与新数据
         df = df_new
-        if local_klines:
+        if len(local_klines):
             try:
                 df_local = pd.DataFrame(local_klines)
                 # 确保 timestamp 类型一致
@@ -875,6 +766,15 @@ class DeepSeekTrader:
             except Exception as e:
                 self._log(f"合并本地K线失败: {e}", 'warning')
                 df = df_new # Fallback to API data only
+
+        # [New] 增量连续性检查 (取代 normalize_data 中每次整表 resample)
+        # 仅扫描新追加的 K 线，缺口优先用 since= 从交易所回补，回补的真实 K 线同步落库
+        try:
+            df, backfilled = await gap_index.repair(self.exchange, self.symbol, self.timeframe, df, api_timeframe=api_timeframe)
+            if backfilled is not None:
+                asyncio.create_task(self.data_manager.save_klines(self.symbol, self.timeframe, backfilled))
+        except Exception as e:
+            self._log(f"K 线缺口检查失败: {e}", 'warning')
         
         # 维护历史 K 线记录
         self.price_history = df.tail(100).to_dict('records')
@@ -884,8 +784,8 @@ class DeepSeekTrader:
             self._log(f"🔥 正在预热历史数据...")
             pass
         
-        # 计算指标
-        df = self.calculate_indicators(df)
+        # 计算指标 (CPU 密集，交由分析执行器)
+        df = await self.calculate_indicators_async(df)
         
         # [Fix] 如果指标计算失败 (df 长度过短或异常)，直接返回 None
         # 否则后续访问 indicators['obv'] 会报错
@@ -1148,7 +1048,6 @@ class DeepSeekTrader:
         # 强制限制开仓间隔，防止高频刷单 (Churning)
         # 默认间隔 5分钟 (300s)，可通过 min_trade_interval 配置
         # 仅针对开新仓 (is_opening)，平仓 (Closing) 不受限制以确保风险控制
-        import time
         now = time.time()
         if is_opening:
              # Check Stop Loss Cool-down
@@ -1326,7 +1225,7 @@ class DeepSeekTrader:
                      exec_price = 0
             
             if exec_price > 0:
-                return self._execute_sim_trade(signal_data, exec_price)
+                return await self._execute_sim_trade(signal_data, exec_price)
             else:
                 self._log(f"🧪 测试模式: {signal_data['signal']} (无法获取价格，跳过)")
                 return "TEST_MODE", "无法获取价格"
@@ -2565,9 +2464,10 @@ class DeepSeekTrader:
                     **kwargs
                 )
                 if sig:
+                    # [Optimization] 第三方策略 / 回放的字典信号统一转为 SignalRecord
                     strategy_signals.append({
                         'name': strategy.__class__.__name__,
-                        'signal': sig
+                        'signal': SignalRecord.from_dict(sig)
                     })
             except Exception as e:
                 self._log(f"策略 {strategy.__class__.__name__} 执行失败: {e}", 'error')
@@ -3244,9 +3144,21 @@ class DeepSeekTrader:
             self.dynamic_take_profit = 0.0
             self.dynamic_sl_side = None
             await self.save_state()
+            return True
+        return False
 
     async def run(self):
         """Async 单次运行 - 返回结果给调用者进行统一打印"""
+        t0 = time.perf_counter()
+        trace, token = tracer.start_trace(self.symbol)
+        try:
+            with tick_profiler.span('run', self.symbol), tracer.span('run'):
+                return await self._run()
+        finally:
+            TICK_DURATION.labels(self.symbol).observe(time.perf_counter() - t0)
+            tracer.end_trace(trace, token)
+
+    async def _run(self):
         # [New] Hot Reload Check
         await self._check_config_update()
         
@@ -3265,7 +3177,8 @@ class DeepSeekTrader:
                 await self._update_fee_rate()
                 self.last_fee_update_time = time.time()
             
-            price_data = await self.get_ohlcv()
+            with tick_profiler.span('run.ohlcv', self.symbol), tracer.span('ohlcv'):
+                price_data = await self.get_ohlcv()
             if not price_data: return None
 
             # [New] Dynamic Risk Check (Orbit B)
@@ -3275,17 +3188,21 @@ class DeepSeekTrader:
             # [Fix] Move current_pos initialization to the TOP of the risk check logic
             current_pos = None
             try:
-                current_pos = await self.get_current_position()
+                with tick_profiler.span('run.position', self.symbol):
+                    current_pos = await self.get_current_position()
             except Exception as e:
                 self._log(f"获取持仓失败: {e}", 'warning')
 
-            if current_pos and (self.dynamic_stop_loss > 0 or self.dynamic_take_profit > 0):
-                await self._check_dynamic_risk_levels(price_data['price'], current_pos)
-            
-            # [v3.9.6 New] Orbit C: 实时检查移动止盈与分段止盈 (Trailing Stop & Partial TP)
-            # 无论 AI 是否分析，每轮循环都必须检查持仓风险
-            if current_pos:
-                await self.check_trailing_stop(current_pos)
+            with tick_profiler.span('run.risk_exits', self.symbol):
+                if current_pos and (self.dynamic_stop_loss > 0 or self.dynamic_take_profit > 0):
+                    # [Fix] 已平仓则丢弃旧持仓快照，避免下方移动止盈对空仓再次 reduceOnly (OKX 51169)
+                    if await self._check_dynamic_risk_levels(price_data['price'], current_pos):
+                        current_pos = None
+                
+                # [v3.9.6 New] Orbit C: 实时检查移动止盈与分段止盈 (Trailing Stop & Partial TP)
+                # 无论 AI 是否分析，每轮循环都必须检查持仓风险
+                if current_pos and await self.check_trailing_stop(current_pos):
+                    current_pos = None
             
             # [New] Fast Pattern Exit (Monitor by Minute) - User Request: "monitor by minute... fetch volume/price... three-line strategy"
             # 移至 analyze_on_bar_close 之前，确保即使在 K 线未收盘时也能触发分钟级止盈
@@ -3302,7 +3219,8 @@ class DeepSeekTrader:
                     # self._log(f"🔍 [1m监控] 正在扫描 {self.symbol} 持仓的三线形态...", 'debug')
                     
                     # 1. Fetch 1m data for fast exit monitoring
-                    ohlcv_1m = await self.exchange.fetch_ohlcv(self.symbol, '1m', limit=10)
+                    with tick_profiler.span('run.fast_exit_1m', self.symbol):
+                        ohlcv_1m = await self.exchange.fetch_ohlcv(self.symbol, '1m', limit=10)
                     if ohlcv_1m:
                          df_1m = pd.DataFrame(ohlcv_1m, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
                          # Convert numeric
@@ -3310,7 +3228,8 @@ class DeepSeekTrader:
                              df_1m[col] = df_1m[col].astype(float)
                          
                          # 2. Check Pattern on 1m
-                         pat_1m = self.signal_processor.check_candlestick_pattern(df_1m)
+                         # [Fix] 返回值为 (pattern, levels) 元组，需解包后再与形态名比较
+                         pat_1m, _ = self.signal_processor.check_candlestick_pattern(df_1m)
                          
                          # [Update] 仅打印关键触发理由，避免刷屏
                          # 信息已整合至下方 Monitoring Mode 的 summary 中显示在表格里
@@ -3347,19 +3266,14 @@ class DeepSeekTrader:
                              
                              await self.send_notification(f"⚡ **极速止盈触发**\n原因: {exit_reason}\n周期: 1m监控", title=f"🚀 止盈离场 | {self.symbol}")
                              # [Fix] 极速止盈后直接返回，不继续等待 K 线收盘
-                             return {
-                                 'symbol': self.symbol,
-                                 'price': price_data['price'],
-                                 'change': price_data['price_change'],
-                                 'signal': 'CLOSE',
-                                 'confidence': 'HIGH',
-                                 'reason': exit_reason,
-                                 'status': 'EXECUTED',
-                                 'summary': 'Fast Exit Triggered',
-                                 'volatility': price_data.get('volatility_status', 'NORMAL'),
-                                 'persona': 'Fast Guard',
-                                 'recommended_sleep': 60.0
-                             }
+                             return self._tick_result(
+                                 price_data, None, exit_reason, 'EXECUTED',
+                                 summary='Fast Exit Triggered',
+                                 signal='CLOSE',
+                                 confidence='HIGH',
+                                 persona='Fast Guard',
+                                 recommended_sleep=60.0
+                             )
                 except Exception as e:
                     self._log(f"Fast exit check failed: {e}", 'warning')
 
@@ -3405,25 +3319,15 @@ class DeepSeekTrader:
                     if 'pat_1m' in locals() and pat_1m:
                         monitor_summary = f"⚠️ 形态预警: {pat_1m} | {monitor_summary}"
 
-                    return {
-                        'symbol': self.symbol,
-                        'price': price_data['price'],
-                        'change': price_data.get('price_change', 0.0), # Use .get for safety
-                        'signal': 'HOLD',
-                        'confidence': 'LOW',
-                        'reason': 'AI冷却中',
-                        'summary': monitor_summary,
-                        'status': 'UNKNOWN', # [Critical] Return UNKNOWN so OKXBot_Plus handles it as WAIT/SCAN
-                        'status_msg': 'Monitoring',
-                        'volatility': price_data.get('volatility_status', 'NORMAL'),
-                        'persona': 'Monitor',
-                        'adx': price_data.get('indicators', {}).get('adx'),
-                        'rsi': price_data.get('indicators', {}).get('rsi'),
-                        'atr_ratio': price_data.get('indicators', {}).get('atr_ratio'),
-                        'vol_ratio': price_data.get('indicators', {}).get('vol_ratio'),
-                        'pattern': pat_1m if 'pat_1m' in locals() and pat_1m else '-', # Show 1m pattern if exists
-                        'recommended_sleep': 1.0 # 保持活跃
-                    }
+                    return self._tick_result(
+                        price_data, current_pos, 'AI冷却中',
+                        'UNKNOWN', # [Critical] Return UNKNOWN so OKXBot_Plus handles it as WAIT/SCAN
+                        summary=monitor_summary,
+                        status_msg='Monitoring',
+                        persona='Monitor',
+                        pattern=pat_1m if 'pat_1m' in locals() and pat_1m else None, # Show 1m pattern if exists
+                        recommended_sleep=1.0 # 保持活跃
+                    )
                 
                 # 更新检查时间
                 self.last_ai_check_time = time.time()
@@ -3441,66 +3345,27 @@ class DeepSeekTrader:
                     last_ts = pd.Timestamp(last_rec['timestamp']).timestamp() if last_rec else None
                     now_ts = time.time()
                     if last_ts and now_ts < last_ts + tf_sec:
-                        persona_map = {
-                            'HIGH_TREND': 'Trend Hunter (趋势猎人)',
-                            'LOW': 'Grid Trader (网格交易)',
-                            'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
-                            'NORMAL': 'Day Trader (波段交易)'
-                        }
-                        persona = persona_map.get(price_data.get('volatility_status', 'NORMAL'), 'NORMAL')
-                        return {
-                            'symbol': self.symbol,
-                            'has_position': current_pos is not None,
-                            'price': price_data['price'],
-                            'change': price_data.get('price_change', 0.0),
-                            'signal': 'HOLD',
-                            'confidence': 'LOW',
-                            'reason': '等待K线收盘',
-                            'summary': '等待K线收盘',
-                            'status': 'HOLD',
-                            'status_msg': '未收盘',
-                            'volatility': price_data.get('volatility_status', 'NORMAL'),
-                            'persona': persona,
-                            'adx': price_data.get('indicators', {}).get('adx'),
-                            'rsi': price_data.get('indicators', {}).get('rsi'),
-                            'atr_ratio': price_data.get('indicators', {}).get('atr_ratio'),
-                            'vol_ratio': price_data.get('indicators', {}).get('vol_ratio'),
-                            'recommended_sleep': max(1.0, min(tf_sec, 60))
-                        }
+                        return self._tick_result(
+                            price_data, current_pos, '等待K线收盘', 'HOLD',
+                            summary='等待K线收盘',
+                            status_msg='未收盘',
+                            recommended_sleep=max(1.0, min(tf_sec, 60))
+                        )
                     if last_ts and self._last_analyzed_bar_ts == last_ts:
-                        persona_map = {
-                            'HIGH_TREND': 'Trend Hunter (趋势猎人)',
-                            'LOW': 'Grid Trader (网格交易)',
-                            'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
-                            'NORMAL': 'Day Trader (波段交易)'
-                        }
-                        persona = persona_map.get(price_data.get('volatility_status', 'NORMAL'), 'NORMAL')
-                        return {
-                            'symbol': self.symbol,
-                            'has_position': current_pos is not None,
-                            'price': price_data['price'],
-                            'change': price_data.get('price_change', 0.0),
-                            'signal': 'HOLD',
-                            'confidence': 'LOW',
-                            'reason': '本周期已分析',
-                            'summary': '本周期已分析',
-                            'status': 'HOLD',
-                            'status_msg': '已分析',
-                            'volatility': price_data.get('volatility_status', 'NORMAL'),
-                            'persona': persona,
-                            'adx': price_data.get('indicators', {}).get('adx'),
-                            'rsi': price_data.get('indicators', {}).get('rsi'),
-                            'atr_ratio': price_data.get('indicators', {}).get('atr_ratio'),
-                            'vol_ratio': price_data.get('indicators', {}).get('vol_ratio'),
-                            'recommended_sleep': 5.0
-                        }
+                        return self._tick_result(
+                            price_data, current_pos, '本周期已分析', 'HOLD',
+                            summary='本周期已分析',
+                            status_msg='已分析',
+                            recommended_sleep=5.0
+                        )
                     if last_ts:
                         self._last_analyzed_bar_ts = last_ts
                 except Exception:
                     pass
 
             # [Optimized] 获取实时余额用于动态资金计算
-            balance, equity = await self.get_account_info()
+            with tick_profiler.span('run.account', self.symbol):
+                balance, equity = await self.get_account_info()
             
             # Call Agent
             # [Fix] 确保在调用 AI 之前获取最新的持仓信息
@@ -3508,7 +3373,8 @@ class DeepSeekTrader:
             # 但为了性能，如果刚才没触发止盈，复用 current_pos 也可以
             # 这里我们选择安全起见，复用之前获取的 current_pos，如果它为空，再尝试获取一次
             if not current_pos:
-                 current_pos = await self.get_current_position()
+                 with tick_profiler.span('run.position', self.symbol):
+                     current_pos = await self.get_current_position()
 
             # [Fix] Global Circuit Breaker (账户级熔断)
             # 记录当日最高权益 (High Water Mark)
@@ -3529,18 +3395,14 @@ class DeepSeekTrader:
                     await self.save_state()
                 else:
                     remaining = int((cooldown_hours * 3600) - (time.time() - cb_ts))
-                    return {
-                        'symbol': self.symbol,
-                        'has_position': current_pos is not None,
-                        'price': price_data['price'],
-                        'change': price_data.get('price_change', 0.0),
-                        'signal': 'STOPPED',
-                        'confidence': 'HIGH',
-                        'reason': f"熔断冷却中 (剩余 {remaining//60}m)",
-                        'status': 'STOPPED',
-                        'status_msg': f"熔断冷却中 (剩余 {remaining//60}m)",
-                        'recommended_sleep': 60.0
-                    }
+                    stop_msg = f"熔断冷却中 (剩余 {remaining//60}m)"
+                    return self._tick_result(
+                        price_data, current_pos, stop_msg, 'STOPPED',
+                        status_msg=stop_msg,
+                        signal='STOPPED',
+                        confidence='HIGH',
+                        recommended_sleep=60.0
+                    )
 
             # Initialize high water with current equity
             if self.daily_high_equity == 0.0:
@@ -3565,21 +3427,20 @@ class DeepSeekTrader:
                     self.circuit_breaker_timestamp = time.time()
                     await self.save_state() # 持久化，防止重启后立即复活
                     
-                    return {
-                        'symbol': self.symbol,
-                        'has_position': current_pos is not None,
-                        'price': price_data['price'],
-                        'change': price_data.get('price_change', 0.0), 
-                        'signal': 'STOPPED',
-                        'confidence': 'HIGH', 
-                        'reason': f"熔断触发: 回撤 {drawdown*100:.2f}%", 
-                        'status': 'STOPPED',
-                        'status_msg': f"熔断触发: 回撤 {drawdown*100:.2f}%",
-                        'recommended_sleep': 60.0 
-                    }
+                    stop_msg = f"熔断触发: 回撤 {drawdown*100:.2f}%"
+                    return self._tick_result(
+                        price_data, current_pos, stop_msg, 'STOPPED',
+                        status_msg=stop_msg,
+                        signal='STOPPED',
+                        confidence='HIGH',
+                        recommended_sleep=60.0
+                    )
 
             await self._update_amount_auto(price_data['price'], balance)
             
+            # [New] 链路追踪: 门禁判定阶段 (形态识别 / 异动唤醒 / ADX-RSI 门禁)
+            gate_wall, gate_start = time.time(), time.perf_counter()
+            
             # Calculate volatility status
             ind = price_data.get('indicators', {})
             # [Fix] Already calculated in get_ohlcv with better logic (ATR Ratio)
@@ -3653,36 +3514,19 @@ class DeepSeekTrader:
             else:
                 # 如果是异动，记录日志提醒
                 self._log(f"🚀 触发异动唤醒: {surge_reason} -> 绕过 ADX/RSI 门禁", 'info')
+                tracer.event('surge', reason=surge_reason)
+            tracer.record('gate', gate_wall, time.perf_counter() - gate_start,
+                          passed=gate_reason is None, reason=gate_reason or surge_reason, pattern=candlestick_pattern)
 
             if gate_reason:
-                persona_map = {
-                    'HIGH_TREND': 'Trend Hunter (趋势猎人)',
-                    'LOW': 'Grid Trader (网格交易)',
-                    'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
-                    'NORMAL': 'Day Trader (波段交易)'
-                }
-                persona = persona_map.get(volatility_status, volatility_status)
                 self.consecutive_errors = 0
-                return {
-                    'symbol': self.symbol,
-                    'has_position': current_pos is not None,
-                    'price': price_data['price'],
-                    'change': price_data['price_change'],
-                    'signal': 'HOLD',
-                    'confidence': 'LOW',
-                    'reason': gate_reason,
-                    'summary': gate_reason,
-                    'status': 'HOLD',
-                    'status_msg': gate_reason,
-                    'volatility': volatility_status,
-                    'persona': persona,
-                    'adx': adx_val,
-                    'rsi': rsi_val,
-                    'atr_ratio': ind.get('atr_ratio'),
-                    'vol_ratio': ind.get('vol_ratio'),
-                    'pattern': candlestick_pattern or '-',
-                    'recommended_sleep': 60.0
-                }
+                return self._tick_result(
+                    price_data, current_pos, gate_reason, 'HOLD',
+                    summary=gate_reason,
+                    status_msg=gate_reason,
+                    pattern=candlestick_pattern,
+                    recommended_sleep=60.0
+                )
 
             # Call Agent (Wait, we already have current_pos above)
             # current_pos = await self.get_current_position() # Removed duplicate call
@@ -3698,6 +3542,7 @@ class DeepSeekTrader:
                     current_pnl = equity - self.initial_balance
 
             # [New] 获取资金费率 (Funding Rate)
+            context_start = time.perf_counter()
             funding_rate = 0.0
             try:
                  # 仅合约模式需要获取资金费率
@@ -3724,6 +3569,7 @@ class DeepSeekTrader:
                     btc_change_24h = price_data['price_change']
             except:
                 pass
+            tick_profiler.record('run.market_context', time.perf_counter() - context_start, self.symbol)
 
             # [Fix] AI Throttling (AI 频率控制)
             # 即使通过了 Gate，也要检查是否到了 AI 分析间隔
@@ -3747,54 +3593,35 @@ class DeepSeekTrader:
                     skip_reason = f"AI冷却 ({int(ai_interval - time_since_last)}s)"
             
             if should_skip_ai:
-                persona_map = {
-                    'HIGH_TREND': 'Trend Hunter (趋势猎人)',
-                    'LOW': 'Grid Trader (网格交易)',
-                    'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
-                    'NORMAL': 'Day Trader (波段交易)'
-                }
-                persona = persona_map.get(volatility_status, volatility_status)
-                return {
-                    'symbol': self.symbol,
-                    'has_position': current_pos is not None,
-                    'price': price_data['price'],
-                    'change': price_data['price_change'],
-                    'signal': 'HOLD',
-                    'confidence': 'LOW',
-                    'reason': skip_reason,
-                    'summary': f"监控中 | {skip_reason}",
-                    'status': 'HOLD',
-                    'status_msg': skip_reason,
-                    'volatility': volatility_status,
-                    'persona': persona,
-                    'adx': adx_val,
-                    'rsi': rsi_val,
-                    'atr_ratio': ind.get('atr_ratio'),
-                    'vol_ratio': ind.get('vol_ratio'),
-                    'pattern': candlestick_pattern or '-',
-                    'recommended_sleep': 10.0
-                }
+                return self._tick_result(
+                    price_data, current_pos, skip_reason, 'HOLD',
+                    summary=f"监控中 | {skip_reason}",
+                    status_msg=skip_reason,
+                    pattern=candlestick_pattern,
+                    recommended_sleep=10.0
+                )
 
             # Update analysis time BEFORE calling AI
             self.last_ai_analysis_time = time.time()
 
-            signal_data = await self._analyze_market_with_strategies( 
-                self.symbol, 
-                self.timeframe, 
-                price_data, 
-                current_pos, 
-                balance, 
-                default_amount=self.amount,
-                taker_fee_rate=self.taker_fee_rate,
-                leverage=self.leverage, # 传入杠杆
-                risk_control=self.risk_control, # 传入风控配置
-                current_account_pnl=current_pnl, # [New] 传入当前账户总盈亏
-                funding_rate=funding_rate, # [New] 传入资金费率
-                dynamic_tp=self.common_config.get('strategy', {}).get('dynamic_tp', False), # [New] 传入动态止盈开关 (False)
-                btc_change_24h=btc_change_24h, # [New] 传入 BTC 涨跌幅
-                is_surge=is_surge, # [New] 传入异动唤醒标志
-                candlestick_pattern=candlestick_pattern # [New] 传入 K 线形态
-            )
+            with tick_profiler.span('run.ai', self.symbol), tracer.span('ai.analyze'):
+                signal_data = await self._analyze_market_with_strategies( 
+                    self.symbol, 
+                    self.timeframe, 
+                    price_data, 
+                    current_pos, 
+                    balance, 
+                    default_amount=self.amount,
+                    taker_fee_rate=self.taker_fee_rate,
+                    leverage=self.leverage, # 传入杠杆
+                    risk_control=self.risk_control, # 传入风控配置
+                    current_account_pnl=current_pnl, # [New] 传入当前账户总盈亏
+                    funding_rate=funding_rate, # [New] 传入资金费率
+                    dynamic_tp=self.common_config.get('strategy', {}).get('dynamic_tp', False), # [New] 传入动态止盈开关 (False)
+                    btc_change_24h=btc_change_24h, # [New] 传入 BTC 涨跌幅
+                    is_surge=is_surge, # [New] 传入异动唤醒标志
+                    candlestick_pattern=candlestick_pattern # [New] 传入 K 线形态
+                )
             
             if signal_data:
                 # [New] 异步保存信号记录
@@ -3813,12 +3640,13 @@ class DeepSeekTrader:
                 exec_status, exec_msg = "UNKNOWN", ""
                 try:
                     # [Optimization] Pass cached data to execute_trade
-                    result = await self.execute_trade(
-                        signal_data, 
-                        current_price=price_data['price'], 
-                        current_position=current_pos, 
-                        balance=balance
-                    )
+                    with tick_profiler.span('run.execute', self.symbol), tracer.span('execute_trade', signal=signal):
+                        result = await self.execute_trade(
+                            signal_data, 
+                            current_price=price_data['price'], 
+                            current_position=current_pos, 
+                            balance=balance
+                        )
                     
                     if isinstance(result, tuple) and len(result) == 2:
                         exec_status, exec_msg = result
@@ -3833,14 +3661,6 @@ class DeepSeekTrader:
                     exec_msg = str(e)
                     self._log(f"执行交易失败: {e}", 'error')
 
-                # 映射为用户友好的 "交易人格"
-                persona_map = {
-                    'HIGH_TREND': 'Trend Hunter (趋势猎人)',
-                    'LOW': 'Grid Trader (网格交易)',
-                    'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
-                    'NORMAL': 'Day Trader (波段交易)'
-                }
-                persona = persona_map.get(volatility_status, volatility_status)
 
                 # 返回结构化结果给上层打印表格
                 # [Optimization] Calculate recommended sleep time based on volatility
@@ -3852,36 +3672,18 @@ class DeepSeekTrader:
                 # [New] Reset consecutive errors on success
                 self.consecutive_errors = 0
                 
-                return {
-                    'symbol': self.symbol,
-                    'price': price_data['price'],
-                    'change': price_data['price_change'],
-                    'signal': signal,
-                    'confidence': confidence,
-                    'reason': reason,
-                    'summary': signal_data.get('summary', ''),
-                    'status': exec_status,
-                    'status_msg': exec_msg,
-                    'volatility': volatility_status, # [New]
-                    'persona': persona, # [New] Display Name
-                    'adx': adx_val, # [New]
-                    'rsi': ind.get('rsi'), # [New]
-                    'atr_ratio': ind.get('atr_ratio'), # [New]
-                    'vol_ratio': ind.get('vol_ratio'), # [New]
-                    'pattern': candlestick_pattern or '-',
-                    'recommended_sleep': recommended_sleep # [New]
-                }
+                return self._tick_result(
+                    price_data, current_pos, reason, exec_status,
+                    summary=signal_data.get('summary', ''),
+                    status_msg=exec_msg,
+                    signal=signal,
+                    confidence=confidence,
+                    pattern=candlestick_pattern,
+                    recommended_sleep=recommended_sleep # [New]
+                )
             
             # [Fix] 如果没有策略产生信号，也需要返回一个 WAIT 状态，否则表格会显示为空
             # 这种情况通常发生在所有策略都返回 None (HOLD且无理由) 时
-            persona_map = {
-                'HIGH_TREND': 'Trend Hunter (趋势猎人)',
-                'LOW': 'Grid Trader (网格交易)',
-                'HIGH_CHOPPY': 'Risk Guardian (风控卫士)',
-                'NORMAL': 'Day Trader (波段交易)'
-            }
-            persona = persona_map.get(volatility_status, volatility_status)
-            
             # [Optimization] 如果 AI 策略被调用了但没有信号，尝试提取 "为什么"
             # 实际上如果 AI 返回了 None，我们也拿不到理由。
             # 但如果 AI 返回了 HOLD 信号，应该会进入上面的 signal_data 逻辑。
@@ -3892,25 +3694,13 @@ class DeepSeekTrader:
             if not strategy_signals:
                  reason_msg = "AI 暂无明确方向 (HOLD)"
             
-            return {
-                'symbol': self.symbol,
-                'price': price_data['price'],
-                'change': price_data['price_change'],
-                'signal': 'HOLD',
-                'confidence': 'LOW',
-                'reason': reason_msg,
-                'summary': '等待更佳机会',
-                'status': 'WAIT',
-                'status_msg': '观察中',
-                'volatility': volatility_status,
-                'persona': persona,
-                'adx': adx_val,
-                'rsi': ind.get('rsi'),
-                'atr_ratio': ind.get('atr_ratio'),
-                'vol_ratio': ind.get('vol_ratio'),
-                'pattern': candlestick_pattern or '-',
-                'recommended_sleep': 5.0
-            }
+            return self._tick_result(
+                price_data, current_pos, reason_msg, 'WAIT',
+                summary='等待更佳机会',
+                status_msg='观察中',
+                pattern=candlestick_pattern,
+                recommended_sleep=5.0
+            )
             
         except Exception as e:
             self.consecutive_errors += 1
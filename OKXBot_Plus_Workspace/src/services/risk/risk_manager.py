@@ -11,10 +11,14 @@ from datetime import datetime
 # But inside package, better use relative or absolute
 # Assuming running from src root context
 from core.utils import to_float, send_notification_async
+from core.state_store import state_store as global_state_store
+from core.pnl_store import PnLStore
+from core.chart_renderer import chart_renderer
+from services.execution.components.sim_position_book import sim_position_book
 
 class RiskManager:
     """全局风控管理器 (Async)"""
-    def __init__(self, exchange, risk_config, traders):
+    def __init__(self, exchange, risk_config, traders, state_store=None):
         self.logger = logging.getLogger("crypto_oracle")
         self.exchange = exchange
         self.config = risk_config
@@ -37,14 +41,21 @@ class RiskManager:
         
         # 获取项目根目录 (src/services/risk -> src/services -> src -> root)
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        # [New] CRYPTO_ORACLE_HOME 可将状态/PnL/图表重定向到其它目录 (回放录制日志时隔离线上数据)
+        project_root = os.getenv('CRYPTO_ORACLE_HOME', project_root)
         self.data_dir = os.path.join(project_root, "data")
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
             
+        # [Optimization] 风控基准快照写入 core.state_store；bot_state.json 仅用于首次迁移
+        self.state_store = state_store or global_state_store
+        self.state_key = "risk_manager"
         self.state_file = os.path.join(self.data_dir, "bot_state.json")
         self.csv_file = os.path.join(self.data_dir, "pnl_history.csv")
         if self.is_test_mode:
             self.csv_file = os.path.join(self.data_dir, "pnl_history_sim.csv")
+        # [Optimization] 权益序列按日分段 + 预聚合 (core.pnl_store)，旧版 CSV 仅用于首次导入
+        self.pnl_store = PnLStore(os.path.splitext(self.csv_file)[0], legacy_csv=self.csv_file)
         
         self.load_state()
         
@@ -67,10 +78,8 @@ class RiskManager:
     def load_state(self):
         """[P0-4.2] 加载历史状态，如果快照在 24 小时内则恢复"""
         try:
-            if os.path.exists(self.state_file):
-                with open(self.state_file, 'r', encoding='utf-8') as f:
-                    state = json.load(f)
-                
+            state = self.state_store.get(self.state_key, legacy_path=self.state_file)
+            if state:
                 last_ts = state.get('timestamp', 0)
                 # 检查快照是否在 24 小时内 (86400秒)
                 if time.time() - last_ts < 86400:
@@ -100,8 +109,7 @@ class RiskManager:
                 'daily_date': self.daily_date,
                 'timestamp': time.time()
             }
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(state, f)
+            self.state_store.put(self.state_key, state)
         except Exception as e:
             self.logger.warning(f"⚠️ 保存状态失败: {e}")
 
@@ -125,39 +133,19 @@ class RiskManager:
 
     async def record_pnl_to_csv(self, total_equity, current_pnl, pnl_percent):
         """Async 记录 PnL 并生成图表 (非阻塞)"""
-        file_exists = os.path.isfile(self.csv_file)
         try:
-            # 1. 写入 CSV (使用 asyncio.to_thread 避免文件IO阻塞)
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            line = f"{timestamp},{total_equity:.2f},{current_pnl:.2f},{pnl_percent:.2f}\n"
-            
-            def write_csv_sync():
-                with open(self.csv_file, 'a', encoding='utf-8') as f:
-                    if not file_exists:
-                        f.write("timestamp,total_equity,pnl_usdt,pnl_percent\n")
-                    f.write(line)
-            
-            await asyncio.to_thread(write_csv_sync)
+            # 1. 追加到权益序列存储 (使用 asyncio.to_thread 避免文件IO阻塞)
+            await asyncio.to_thread(self.pnl_store.append, total_equity, current_pnl, pnl_percent)
             
-            # 2. 生成图表 (Matplotlib 很慢，必须放到后台线程/进程)
+            # 2. 生成图表: 读取预聚合序列 (线程) 后交给独立的渲染进程，不等待渲染完成
             try:
-                # 使用 asyncio.to_thread 将绘图任务扔到后台线程执行
-                # 这样就不会阻塞主循环的 await check()
-                await asyncio.to_thread(self._generate_chart_in_background)
+                df = await asyncio.to_thread(self.pnl_store.frame, 'auto')
+                chart_renderer.submit(df, self.chart_path)
             except Exception as e:
                 self._log(f"调度图表生成任务失败: {e}", 'warning')
 
         except Exception as e:
-            self._log(f"写入CSV失败: {e}", 'error')
-
-    def _generate_chart_in_background(self):
-        """后台线程执行绘图"""
-        try:
-            from core import plotter
-            plotter.generate_pnl_chart(csv_path=self.csv_file, output_path=self.chart_path, verbose=False)
-            self.logger.debug(f"盈亏折线图已更新: {self.chart_path}")
-        except Exception as e:
-            self._log(f"生成折线图失败: {e}", 'warning')
+            self._log(f"写入PnL记录失败: {e}", 'error')
 
     async def close_all_traders(self):
         self._log("🛑 正在执行全局清仓...")
@@ -335,20 +323,27 @@ class RiskManager:
         except Exception as e:
             self._log(f"显示成交记录失败: {e}", 'error')
 
-    def display_pnl_history(self):
-        # 保持同步方法
-        if not os.path.isfile(self.csv_file):
+    async def display_pnl_history_async(self):
+        """[New] 异步版本: 首次访问 (打开/导入旧 CSV) 放到线程中执行，之后只读内存缓存"""
+        try:
+            history = await asyncio.to_thread(self.pnl_store.history, 10)
+        except Exception as e:
+            self._log(f"显示历史战绩失败: {e}", 'warning')
             return
+        self.display_pnl_history(history)
+
+    def display_pnl_history(self, history=None):
+        # 保持同步方法
+        # history: (总记录数, 最近记录 DataFrame)，为空时从 pnl_store 读取 (最近记录在内存中)
         try:
-            df = pd.read_csv(self.csv_file)
-            if df.empty: return
+            total_count, recent = history if history is not None else self.pnl_store.history(10)
+            if recent is None or recent.empty: return
             
             # [Reverted] 恢复为经典的 "历史盈亏回顾" 标题，这才是用户记忆中的设计
-            header = "\n" + "="*40 + f"\n 历史盈亏回顾 (共 {len(df)} 条记录)\n" + "="*40
+            header = "\n" + "="*40 + f"\n 历史盈亏回顾 (共 {total_count} 条记录)\n" + "="*40
             self.logger.info(header)
             # print(header) # Duplicate print removed
               
-            recent = df.tail(10)
             max_pnl = recent['pnl_usdt'].abs().max()
             scale_factor = 1.0
             if max_pnl > 0:
@@ -479,6 +474,24 @@ class RiskManager:
         )
         return summary
 
+    async def _sim_total_equity(self):
+        """
+        [Optimization] 测试模式总权益
+        所有交易对的模拟持仓在列式持仓簿中，只为有持仓的交易对拉取一次批量行情快照，盯市与求和一次向量化完成
+        (原实现逐个 await get_account_info()，每个交易对各请求一次 Ticker)
+        批量行情失败时沿用上一次标记价
+        """
+        symbols = [t.symbol for t in self.traders]
+        held = sim_position_book.open_symbols(symbols)
+        prices = {}
+        if held:
+            try:
+                tickers = await self.exchange.fetch_tickers(held)
+                prices = {s: t.get('last') for s, t in tickers.items() if t}
+            except Exception as e:
+                self._log(f"模拟盯市获取批量行情失败，沿用上次标记价: {e}", 'warning')
+        return sim_position_book.total_equity(prices, symbols)
+
     async def check(self, force_log=False):
         """执行风控检查 (Async)"""
         try:
@@ -488,11 +501,7 @@ class RiskManager:
             if self.is_test_mode:
                 # [Fix] 测试模式下，使用所有交易对的sim_balance总和作为total_equity
                 # 必须包含未实现盈亏，否则无法正确反映浮亏
-                eq_sum = 0.0
-                for t in self.traders:
-                    _, sim_equity = await t.get_account_info()
-                    eq_sum += sim_equity
-                total_equity = eq_sum
+                total_equity = await self._sim_total_equity()
                 found_usdt = True
                 used_total_eq = True
             else:
@@ -827,7 +836,7 @@ class RiskManager:
                 self.last_csv_record_time = current_ts
             
             if time.time() - self.last_chart_display_time > 3600:
-                self.display_pnl_history()
+                await self.display_pnl_history_async()
                 self.last_chart_display_time = time.time()
             
             should_take_profit = False
@@ -876,11 +885,7 @@ class RiskManager:
     async def initialize_baseline(self, current_usdt_equity):
         """初始化基准资金 (Async)"""
         if self.is_test_mode:
-            sim_eq = 0.0
-            for t in self.traders:
-                _, e = await t.get_account_info()
-                sim_eq += e
-            current_usdt_equity = sim_eq
+            current_usdt_equity = await self._sim_total_equity()
 
         # 1. 先获取所有交易对的价格，用于后续估值
         symbols = [t.symbol for t in self.traders]
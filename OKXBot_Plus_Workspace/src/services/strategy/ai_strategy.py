@@ -1,9 +1,11 @@
 import json
 import logging
 import time
-from openai import AsyncOpenAI
-import httpx
 from core.utils import to_float, retry_async
+from core.metrics import AI_LATENCY, AI_TOKENS
+from core.monitor import health_monitor
+from core.tracing import tracer
+from core.records import SignalRecord
 from .base import BaseStrategy
 
 class DeepSeekAgent(BaseStrategy):
@@ -20,7 +22,11 @@ class DeepSeekAgent(BaseStrategy):
             'base_url': base_url,
             'max_retries': 2  # [Fix] 增加重试次数，防止网络微抖动导致分析失败
         }
+        # [Optimization] openai / httpx 较重 (~0.5s)，在创建客户端时才导入，
+        # 回测/回放等注入其它 Agent 的场景不再付出这部分启动时间
+        from openai import AsyncOpenAI
         if proxy:
+            import httpx
             client_params['http_client'] = httpx.AsyncClient(proxies=proxy)
             
         self.client = AsyncOpenAI(**client_params)
@@ -466,9 +472,11 @@ class DeepSeekAgent(BaseStrategy):
                 # Reset after cooldown
                 self.failure_count = 0
         
+        model = "deepseek-chat"
+        req_wall, req_start = time.time(), time.perf_counter()
         try:
             response = await self.client.chat.completions.create(
-                model="deepseek-chat",
+                model=model,
                 messages=[
                     {"role": "system", "content": role_prompt},
                     {"role": "user", "content": prompt}
@@ -479,9 +487,21 @@ class DeepSeekAgent(BaseStrategy):
             )
             # Success - Reset breaker
             self.failure_count = 0
+            AI_LATENCY.labels(model, 'ok').observe(time.perf_counter() - req_start)
+            health_monitor.record_api_call('deepseek', success=True)
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                AI_TOKENS.labels(model, 'prompt').inc(getattr(usage, 'prompt_tokens', 0) or 0)
+                AI_TOKENS.labels(model, 'completion').inc(getattr(usage, 'completion_tokens', 0) or 0)
+            tracer.record('ai.request', req_wall, time.perf_counter() - req_start, model=model,
+                          prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                          completion_tokens=getattr(usage, 'completion_tokens', None))
             return response
             
         except Exception as e:
+            AI_LATENCY.labels(model, 'error').observe(time.perf_counter() - req_start)
+            tracer.record('ai.request', req_wall, time.perf_counter() - req_start, model=model, error=str(e)[:200])
+            health_monitor.record_api_call('deepseek', success=False)
             self.failure_count += 1
             self.last_failure_time = time.time()
             self.logger.error(f"DeepSeek API 调用失败 ({self.failure_count}/3): {e}")
@@ -533,20 +553,22 @@ class DeepSeekAgent(BaseStrategy):
                 json_str = json_match.group(0)
                 signal_data = json.loads(json_str)
                 
-                signal_data['signal'] = str(signal_data.get('signal', '')).upper()
-                signal_data['entry_price'] = to_float(signal_data.get('entry_price'))
-                signal_data['stop_loss'] = to_float(signal_data.get('stop_loss'))
-                signal_data['take_profit'] = to_float(signal_data.get('take_profit'))
-                signal_data['position_ratio'] = to_float(signal_data.get('position_ratio', 1.0))
-                
                 ai_amount = to_float(signal_data.get('amount'))
-                # [Fix] 允许 AI 建议 0 数量 (即仅平仓不反手)，不强制覆盖为 default_amount
-                if ai_amount is not None:
-                    signal_data['amount'] = ai_amount
-                else:
-                    signal_data['amount'] = default_amount
-                
-                return signal_data
+                # [Optimization] 解析结果直接构造 SignalRecord (未声明的键被丢弃，拼写错误的字段读取时即为缺省)
+                return SignalRecord(
+                    signal=str(signal_data.get('signal', '')).upper(),
+                    confidence=signal_data.get('confidence'),
+                    reason=signal_data.get('reason'),
+                    summary=signal_data.get('summary'),
+                    # [Fix] 允许 AI 建议 0 数量 (即仅平仓不反手)，不强制覆盖为 default_amount
+                    amount=ai_amount if ai_amount is not None else default_amount,
+                    entry_price=to_float(signal_data.get('entry_price')),
+                    stop_loss=to_float(signal_data.get('stop_loss')),
+                    take_profit=to_float(signal_data.get('take_profit')),
+                    position_ratio=to_float(signal_data.get('position_ratio', 1.0)),
+                    sentiment_score=signal_data.get('sentiment_score'),
+                    direction_prediction=signal_data.get('direction_prediction')
+                )
             else:
                 self.logger.error(f"[{symbol}] 无法解析JSON: {result}")
                 return None
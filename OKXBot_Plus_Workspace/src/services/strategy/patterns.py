@@ -0,0 +1,251 @@
+"""
+[New] 向量化 K 线形态库 (Vectorized Candlestick Patterns)
+
+一次 NumPy 遍历即可在整个窗口上识别:
+- 三线战法 (Three-Line Strike, 含量能确认与 SL/TP 点位)
+- Pinbar: 锤子线 (Hammer) / 射击之星 (Shooting Star)
+- 吞没形态 (Engulfing)
+
+所有函数均返回与输入等长的布尔/价格数组 (第 i 位代表以第 i 根 K 线收尾的形态)，
+因此形态历史、形态回测、多币种扫描只需再取切片，几乎零边际成本。
+"""
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def to_ohlcv_arrays(data_input):
+    """
+    将 DataFrame / price_data 字典 / kline_data 列表统一转换为 float64 数组字典
+    返回 None 表示无法解析
+    """
+    df = None
+    if isinstance(data_input, pd.DataFrame):
+        df = data_input
+    elif isinstance(data_input, dict):
+        if 'df' in data_input and isinstance(data_input['df'], pd.DataFrame):
+            df = data_input['df']
+        elif 'kline_data' in data_input:
+            return to_ohlcv_arrays(data_input['kline_data'])
+        elif all(k in data_input for k in ('open', 'high', 'low', 'close')):
+            # 已经是数组字典 (例如来自批量指标内核)
+            n = len(data_input['close'])
+            arrays = {}
+            for col in OHLCV_COLUMNS:
+                if col in data_input:
+                    arrays[col] = np.asarray(data_input[col], dtype=np.float64)
+                else:
+                    arrays[col] = np.zeros(n, dtype=np.float64)
+            return arrays
+    elif isinstance(data_input, (list, tuple)):
+        if not data_input:
+            return None
+        first = data_input[0]
+        if isinstance(first, dict) and all(k in first for k in ('open', 'high', 'low', 'close')):
+            # kline_data (records) 直接逐列取值，避免为 5 列构造整张 DataFrame
+            arrays = {}
+            for col in OHLCV_COLUMNS:
+                if col in first:
+                    arrays[col] = np.array([row.get(col) for row in data_input], dtype=np.float64)
+                else:
+                    arrays[col] = np.zeros(len(data_input), dtype=np.float64)
+            return arrays
+        df = pd.DataFrame(list(data_input))
+
+    if df is None or df.empty:
+        return None
+
+    arrays = {}
+    for col in OHLCV_COLUMNS:
+        if col in df.columns:
+            arrays[col] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        elif col == 'volume':
+            arrays[col] = np.zeros(len(df), dtype=np.float64)
+        else:
+            return None
+    return arrays
+
+
+def _shift(arr, n):
+    """向后平移 n 位 (前 n 位填 NaN)，用于对齐 k1/k2/k3 与 k4"""
+    out = np.full(arr.shape, np.nan, dtype=np.float64)
+    if n < arr.shape[0]:
+        out[n:] = arr[:-n]
+    return out
+
+
+def three_line_strike(open_, high, low, close, volume=None, rr_ratio=5.0):
+    """
+    三线战法 (Three-Line Strike)
+    - 看涨: 三连阴且低点逐级下移 + 第4根阳线收盘高于第1根开盘
+    - 看跌: 三连阳且高点逐级上移 + 第4根阴线收盘低于第1根开盘
+    - 量能确认: 第4根成交量 > 前三根最大值 (否则记为弱信号)
+
+    返回字典:
+        bullish / bearish: 量能确认后的信号
+        bullish_weak / bearish_weak: 形态成立但量能不足
+        sl / tp: 信号位上的止损/止盈价 (其余为 NaN)，TP 按 R:R = 1:rr_ratio
+        vol4 / max_vol3: 量能对比值，便于日志输出
+    """
+    o = np.asarray(open_, dtype=np.float64)
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+    v = np.zeros_like(c) if volume is None else np.asarray(volume, dtype=np.float64)
+
+    bull = c > o
+    bear = c < o
+
+    # k1/k2/k3 分别相对 k4 (当前位) 向前 3/2/1 根
+    o1 = _shift(o, 3)
+    h1, h2, h3 = _shift(h, 3), _shift(h, 2), _shift(h, 1)
+    l1, l2, l3 = _shift(l, 3), _shift(l, 2), _shift(l, 1)
+    v1, v2, v3 = _shift(v, 3), _shift(v, 2), _shift(v, 1)
+
+    def lag_mask(mask, n):
+        out = np.zeros(mask.shape, dtype=bool)
+        if n < mask.shape[0]:
+            out[n:] = mask[:-n]
+        return out
+
+    bear3 = lag_mask(bear, 3) & lag_mask(bear, 2) & lag_mask(bear, 1)
+    bull3 = lag_mask(bull, 3) & lag_mask(bull, 2) & lag_mask(bull, 1)
+
+    with np.errstate(invalid='ignore'):
+        bull_shape = bear3 & bull & (l2 < l1) & (l3 < l2) & (c > o1)
+        bear_shape = bull3 & bear & (h2 > h1) & (h3 > h2) & (c < o1)
+        max_vol3 = np.fmax(np.fmax(v1, v2), v3)
+        vol_ok = v > max_vol3
+
+    bullish = bull_shape & vol_ok
+    bearish = bear_shape & vol_ok
+
+    sl = np.full(c.shape, np.nan, dtype=np.float64)
+    tp = np.full(c.shape, np.nan, dtype=np.float64)
+
+    if bullish.any():
+        # 止损 (看涨): 四根K线的最低价
+        low4 = np.fmin(np.fmin(l1, l2), np.fmin(l3, l))
+        sl[bullish] = low4[bullish]
+        tp[bullish] = c[bullish] + (c[bullish] - low4[bullish]) * rr_ratio
+    if bearish.any():
+        # 止损 (看跌): 四根K线的最高价
+        high4 = np.fmax(np.fmax(h1, h2), np.fmax(h3, h))
+        sl[bearish] = high4[bearish]
+        tp[bearish] = c[bearish] - (high4[bearish] - c[bearish]) * rr_ratio
+
+    return {
+        'bullish': bullish,
+        'bearish': bearish,
+        'bullish_weak': bull_shape & ~vol_ok,
+        'bearish_weak': bear_shape & ~vol_ok,
+        'sl': sl,
+        'tp': tp,
+        'vol4': v,
+        'max_vol3': max_vol3,
+    }
+
+
+def pinbar(open_, high, low, close, shadow_ratio=0.6, body_ratio=0.3):
+    """
+    Pinbar 识别 (锤子线 / 射击之星)
+    - hammer: 下影线占比 > shadow_ratio 且实体占比 < body_ratio
+    - shooting_star: 上影线占比 > shadow_ratio 且实体占比 < body_ratio (与 hammer 互斥，hammer 优先)
+
+    返回字典: hammer / shooting_star 布尔数组，以及 range / body / upper_shadow / lower_shadow 价格数组
+    """
+    o = np.asarray(open_, dtype=np.float64)
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+
+    total_len = h - l
+    body_len = np.abs(c - o)
+    upper_shadow = h - np.maximum(o, c)
+    lower_shadow = np.minimum(o, c) - l
+
+    valid = total_len > 0
+    safe_len = np.where(valid, total_len, 1.0)
+    small_body = valid & (body_len / safe_len < body_ratio)
+
+    hammer = small_body & (lower_shadow / safe_len > shadow_ratio)
+    shooting_star = small_body & ~hammer & (upper_shadow / safe_len > shadow_ratio)
+
+    return {
+        'hammer': hammer,
+        'shooting_star': shooting_star,
+        'range': total_len,
+        'body': body_len,
+        'upper_shadow': upper_shadow,
+        'lower_shadow': lower_shadow,
+    }
+
+
+def engulfing(open_, high, low, close):
+    """
+    吞没形态 (Engulfing)
+    - 看涨吞没: 前阴后阳，且当前实体完全覆盖前一根实体
+    - 看跌吞没: 前阳后阴，且当前实体完全覆盖前一根实体
+    """
+    o = np.asarray(open_, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+
+    prev_o = _shift(o, 1)
+    prev_c = _shift(c, 1)
+
+    with np.errstate(invalid='ignore'):
+        prev_bear = prev_c < prev_o
+        prev_bull = prev_c > prev_o
+        bullish = prev_bear & (c > o) & (o <= prev_c) & (c >= prev_o) & ((c - o) > (prev_o - prev_c))
+        bearish = prev_bull & (c < o) & (o >= prev_c) & (c <= prev_o) & ((o - c) > (prev_c - prev_o))
+
+    return {'bullish': bullish, 'bearish': bearish}
+
+
+def scan_patterns(data_input, shadow_ratio=0.6, body_ratio=0.3, rr_ratio=5.0):
+    """
+    一次性扫描全部形态
+    返回 {'strike': {...}, 'pinbar': {...}, 'engulfing': {...}, 'length': n}，无法解析时返回 None
+    """
+    arrays = to_ohlcv_arrays(data_input)
+    if arrays is None:
+        return None
+
+    o, h, l, c, v = (arrays[col] for col in OHLCV_COLUMNS)
+    return {
+        'strike': three_line_strike(o, h, l, c, v, rr_ratio=rr_ratio),
+        'pinbar': pinbar(o, h, l, c, shadow_ratio=shadow_ratio, body_ratio=body_ratio),
+        'engulfing': engulfing(o, h, l, c),
+        'length': len(c),
+    }
+
+
+def latest_pattern_labels(scan_result, index=-1):
+    """
+    读取指定位置 (默认最新一根) 的形态标签列表，便于日志/表格展示
+    """
+    if not scan_result or scan_result.get('length', 0) == 0:
+        return []
+
+    labels = []
+    strike = scan_result['strike']
+    if strike['bullish'][index]:
+        labels.append('BULLISH_STRIKE')
+    elif strike['bearish'][index]:
+        labels.append('BEARISH_STRIKE')
+
+    pin = scan_result['pinbar']
+    if pin['hammer'][index]:
+        labels.append('HAMMER')
+    elif pin['shooting_star'][index]:
+        labels.append('SHOOTING_STAR')
+
+    eng = scan_result['engulfing']
+    if eng['bullish'][index]:
+        labels.append('BULLISH_ENGULFING')
+    elif eng['bearish'][index]:
+        labels.append('BEARISH_ENGULFING')
+
+    return labels
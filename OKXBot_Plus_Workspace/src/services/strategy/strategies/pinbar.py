@@ -1,6 +1,25 @@
+from core.records import SignalRecord
 from ..base import BaseStrategy
+from ..patterns import to_ohlcv_arrays, pinbar
 
 class PinbarStrategy(BaseStrategy):
+    # Thresholds
+    shadow_ratio = 0.6
+    body_ratio = 0.3
+
+    def scan(self, kline_data):
+        """
+        [New] 全窗口 Pinbar 扫描 (形态历史/回测用)
+        返回 hammer / shooting_star 布尔数组，无法解析时返回 None
+        """
+        arrays = to_ohlcv_arrays(kline_data)
+        if arrays is None:
+            return None
+        return pinbar(
+            arrays['open'], arrays['high'], arrays['low'], arrays['close'],
+            shadow_ratio=self.shadow_ratio, body_ratio=self.body_ratio
+        )
+
     async def analyze(self, symbol, timeframe, price_data, current_pos, balance, **kwargs):
         kline_data = price_data.get('kline_data', [])
         if not kline_data or len(kline_data) < 1:
@@ -12,21 +31,21 @@ class PinbarStrategy(BaseStrategy):
         # Let's check the last completed candle (index -2 if real-time, or -1 if closed)
         # Assuming kline_data[-1] is the latest available data.
         
-        last_kline = kline_data[-1]
-        
-        open_p = float(last_kline['open'])
-        close_p = float(last_kline['close'])
-        high_p = float(last_kline['high'])
-        low_p = float(last_kline['low'])
+        # [Optimization] 使用向量化形态库一次扫描整个窗口，最新一根取 [-1]
+        arrays = to_ohlcv_arrays(kline_data)
+        if arrays is None:
+            return None
+        pins = self.scan(arrays)
         
-        total_len = high_p - low_p
-        body_len = abs(close_p - open_p)
+        high_p = float(arrays['high'][-1])
+        low_p = float(arrays['low'][-1])
+        total_len = float(pins['range'][-1])
         
-        if total_len == 0:
+        if not total_len > 0:
             return None
             
-        upper_shadow = high_p - max(open_p, close_p)
-        lower_shadow = min(open_p, close_p) - low_p
+        upper_shadow = float(pins['upper_shadow'][-1])
+        lower_shadow = float(pins['lower_shadow'][-1])
         
         signal = "HOLD"
         reason = ""
@@ -35,10 +54,6 @@ class PinbarStrategy(BaseStrategy):
         take_profit = None
         confidence = "LOW"
         
-        # Thresholds
-        shadow_ratio = 0.6
-        body_ratio = 0.3
-        
         # [Rule 2] 位置要对，震荡行情无效 (Market Regime Filter)
         # 引入 ADX 指标过滤震荡
         # 引入 RSI 指标辅助判断超买超卖 (Location)
@@ -62,7 +77,7 @@ class PinbarStrategy(BaseStrategy):
         confluence_reasons = []
 
         # Bullish Pinbar (Hammer)
-        if lower_shadow / total_len > shadow_ratio and body_len / total_len < body_ratio:
+        if pins['hammer'][-1]:
             # 基础形态成立
             confluence_score += 1
             confluence_reasons.append("Hammer Pattern")
@@ -101,7 +116,7 @@ class PinbarStrategy(BaseStrategy):
             take_profit = entry_price + reward_target
 
         # Bearish Pinbar (Shooting Star)
-        elif upper_shadow / total_len > shadow_ratio and body_len / total_len < body_ratio:
+        elif pins['shooting_star'][-1]:
             # 基础形态成立
             confluence_score += 1
             confluence_reasons.append("Shooting Star Pattern")
@@ -139,12 +154,12 @@ class PinbarStrategy(BaseStrategy):
         if signal == "HOLD":
             return None
             
-        return {
-            "signal": signal,
-            "entry_price": entry_price,
-            "stop_loss": stop_loss,
-            "take_profit": take_profit,
-            "amount": 0, # Let executor decide or AI decide
-            "reason": reason,
-            "confidence": confidence
-        }
+        return SignalRecord(
+            signal=signal,
+            entry_price=entry_price,
+            stop_loss=stop_loss,
+            take_profit=take_profit,
+            amount=0, # Let executor decide or AI decide
+            reason=reason,
+            confidence=confidence
+        )